@@ -64,7 +64,10 @@ def check_valid_dicom(f_dcm):
     """
     status = False
     try:
-        dcm_info = pydicom.dcmread(f_dcm)
+        # only read the tag needed (and no pixel data)
+        dcm_info = pydicom.dcmread(
+            f_dcm, stop_before_pixels=True, specific_tags=[("0008", "0008")]
+        )
         img_type = dcm_info[("0008", "0008")].value[0]
         if img_type == "DERIVED":
             status = False #Heudiconv cannot convert derived images
@@ -0,0 +1,67 @@
+"""Benchmark DICOM derived-image checks: full reads against header-only probes.
+
+Also compares reading headers against looking them up in the DICOM header index.
+
+Usage: python benchmarks/bench_dicom_check.py [--n-files N] [--n-jobs N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pydicom
+
+from nipoppy.dicom_index import DicomHeaderIndex
+from nipoppy.workflows.dicom_reorg import check_dicom_headers, is_derived_dicom
+
+FPATH_DICOM = Path(__file__).parents[1] / "tests" / "data" / "dicom-not_derived.dcm"
+
+
+def is_derived_dicom_full_read(fpath: Path) -> bool:
+    """Previous implementation: the whole file (including pixel data) is read."""
+    return "DERIVED" in pydicom.dcmread(fpath).ImageType
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-files", type=int, default=500)
+    parser.add_argument("--n-jobs", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        fpaths = []
+        # old enough to be indexed
+        mtime = time.time() - 3600
+        for i_file in range(args.n_files):
+            fpath = Path(dpath_tmp, f"{i_file}.dcm")
+            shutil.copyfile(FPATH_DICOM, fpath)
+            os.utime(fpath, (mtime, mtime))
+            fpaths.append(fpath)
+        size_mb = FPATH_DICOM.stat().st_size / 1e6
+        print(f"{args.n_files} DICOM files of {size_mb:.1f} MB")
+
+        for label, func in (
+            ("full read", lambda: [is_derived_dicom_full_read(f) for f in fpaths]),
+            ("header probe", lambda: [is_derived_dicom(f) for f in fpaths]),
+            (
+                f"header probe, n_jobs={args.n_jobs}",
+                lambda: check_dicom_headers(fpaths, n_jobs=args.n_jobs),
+            ),
+        ):
+            start = time.perf_counter()
+            func()
+            print(f"\t{label}: {time.perf_counter() - start:.2f} s")
+
+        with DicomHeaderIndex(Path(dpath_tmp, "index.sqlite")) as index:
+            for label in ("indexed, first run", "indexed, rerun"):
+                start = time.perf_counter()
+                check_dicom_headers(fpaths, n_jobs=args.n_jobs, index=index)
+                print(f"\t{label}: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
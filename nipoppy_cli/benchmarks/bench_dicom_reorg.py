@@ -0,0 +1,104 @@
+"""Benchmark sequential and concurrent DICOM reorganization.
+
+File operations are slowed down to simulate a filesystem with high latency.
+
+Usage: python benchmarks/bench_dicom_reorg.py [--n-participants N]
+    [--n-files N] [--n-jobs N] [--latency-ms MS]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from nipoppy.logger import get_logger
+from nipoppy.tabular.dicom_dir_map import DicomDirMap
+from nipoppy.tabular.doughnut import generate_doughnut
+from nipoppy.tabular.manifest import Manifest
+from nipoppy.workflows.dicom_reorg import DicomReorgWorkflow
+
+SESSION_ID = "BL"
+
+
+def make_workflow(
+    dpath_root: Path, n_participants: int, n_files: int, n_jobs: int
+) -> DicomReorgWorkflow:
+    """Create fake raw DICOM files and a workflow ready to reorganize them."""
+    workflow = DicomReorgWorkflow(
+        dpath_root=dpath_root,
+        n_jobs=n_jobs,
+        logger=get_logger("bench_dicom_reorg", level=logging.WARNING),
+    )
+    records = []
+    for i_participant in range(n_participants):
+        participant_id = str(i_participant).zfill(5)
+        records.append(
+            {
+                Manifest.col_participant_id: participant_id,
+                Manifest.col_visit_id: SESSION_ID,
+                Manifest.col_session_id: SESSION_ID,
+                Manifest.col_datatype: ["anat"],
+            }
+        )
+        dpath = workflow.layout.dpath_raw_imaging / participant_id / SESSION_ID
+        dpath.mkdir(parents=True)
+        for i_file in range(n_files):
+            (dpath / f"{i_file}.dcm").touch()
+    manifest = Manifest(records)
+
+    workflow.dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    workflow.doughnut = generate_doughnut(
+        manifest=manifest,
+        dicom_dir_map=workflow.dicom_dir_map,
+        dpath_downloaded=workflow.layout.dpath_raw_imaging,
+        dpath_organized=workflow.layout.dpath_sourcedata,
+        dpath_bidsified=workflow.layout.dpath_bids,
+        logger=workflow.logger,
+    )
+    return workflow
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-participants", type=int, default=200)
+    parser.add_argument("--n-files", type=int, default=20)
+    parser.add_argument("--n-jobs", type=int, default=16)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=1.0,
+        help="Simulated latency of each symlink creation",
+    )
+    args = parser.parse_args()
+
+    symlink = os.symlink
+
+    def slow_symlink(*symlink_args, **symlink_kwargs):
+        time.sleep(args.latency_ms / 1000)
+        return symlink(*symlink_args, **symlink_kwargs)
+
+    print(
+        f"{args.n_participants} participant-sessions with {args.n_files} files each,"
+        f" simulated latency of {args.latency_ms} ms per symlink"
+    )
+    for n_jobs in sorted({1, args.n_jobs}):
+        with tempfile.TemporaryDirectory() as dpath_tmp:
+            workflow = make_workflow(
+                Path(dpath_tmp), args.n_participants, args.n_files, n_jobs
+            )
+            start = time.perf_counter()
+            with mock.patch("os.symlink", side_effect=slow_symlink):
+                workflow.run_main()
+            runtime = time.perf_counter() - start
+            assert workflow.n_success == args.n_participants
+            print(f"\tn_jobs={n_jobs}: {runtime:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
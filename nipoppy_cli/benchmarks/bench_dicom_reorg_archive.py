@@ -0,0 +1,164 @@
+"""Benchmark DICOM reorganization from archives.
+
+Compares extracting archives into the raw imaging directory and then copying the
+files to the organized directory (previous approach) with extracting the archive
+members directly into the organized directory. Also times the doughnut status
+checks for archives, with and without the directory index.
+
+Usage: python benchmarks/bench_dicom_reorg_archive.py [--n-participants N]
+    [--n-files N] [--size-kb N] [--format {zip,tar.gz}]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from nipoppy.logger import get_logger
+from nipoppy.tabular.dicom_dir_map import DicomDirMap
+from nipoppy.tabular.doughnut import DirectoryIndex, generate_doughnut
+from nipoppy.tabular.manifest import Manifest
+from nipoppy.workflows.dicom_reorg import DicomReorgWorkflow
+
+SESSION_ID = "BL"
+
+
+def _get_disk_usage(dpath: Path) -> int:
+    return sum(
+        os.stat(os.path.join(dpath_current, fname)).st_blocks * 512
+        for dpath_current, _, fnames in os.walk(dpath)
+        for fname in fnames
+    )
+
+
+def _make_archive(fpath_archive: Path, n_files: int, content: bytes):
+    if fpath_archive.name.endswith(".zip"):
+        with zipfile.ZipFile(fpath_archive, "w", zipfile.ZIP_DEFLATED) as file_zip:
+            for i_file in range(n_files):
+                file_zip.writestr(f"series/{i_file}.dcm", content)
+        return
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        dpath_series = Path(dpath_tmp, "series")
+        dpath_series.mkdir()
+        for i_file in range(n_files):
+            (dpath_series / f"{i_file}.dcm").write_bytes(content)
+        shutil.make_archive(
+            str(fpath_archive).removesuffix(".tar.gz"), "gztar", dpath_tmp
+        )
+
+
+def make_workflow(
+    dpath_root: Path, n_participants: int, n_files: int, size_kb: int, fmt: str
+) -> tuple[DicomReorgWorkflow, Manifest]:
+    """Create archives of fake DICOM files and a workflow to reorganize them."""
+    workflow = DicomReorgWorkflow(
+        dpath_root=dpath_root,
+        copy_files=True,
+        logger=get_logger("bench_dicom_reorg_archive", level=logging.WARNING),
+    )
+    # partly compressible content, like DICOM files
+    content = os.urandom(size_kb * 512) + bytes(size_kb * 512)
+    records = []
+    dicom_dirs = []
+    for i_participant in range(n_participants):
+        participant_id = str(i_participant).zfill(5)
+        records.append(
+            {
+                Manifest.col_participant_id: participant_id,
+                Manifest.col_visit_id: SESSION_ID,
+                Manifest.col_session_id: SESSION_ID,
+                Manifest.col_datatype: ["anat"],
+            }
+        )
+        dicom_dirs.append(f"{participant_id}.{fmt}")
+        workflow.layout.dpath_raw_imaging.mkdir(parents=True, exist_ok=True)
+        _make_archive(
+            workflow.layout.dpath_raw_imaging / dicom_dirs[-1], n_files, content
+        )
+    manifest = Manifest(records)
+    workflow.dicom_dir_map = DicomDirMap(
+        data={
+            DicomDirMap.col_participant_id: manifest[Manifest.col_participant_id],
+            DicomDirMap.col_session_id: manifest[Manifest.col_session_id],
+            DicomDirMap.col_participant_dicom_dir: dicom_dirs,
+        }
+    )
+    return workflow, manifest
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-participants", type=int, default=50)
+    parser.add_argument("--n-files", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=64)
+    parser.add_argument("--format", choices=["zip", "tar.gz"], default="zip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        workflow, manifest = make_workflow(
+            Path(dpath_tmp),
+            args.n_participants,
+            args.n_files,
+            args.size_kb,
+            args.format,
+        )
+        dpath_raw_imaging = workflow.layout.dpath_raw_imaging
+        participant_ids = manifest[Manifest.col_participant_id].tolist()
+        print(
+            f"{args.n_participants} {args.format} archives of {args.n_files} files"
+            f" ({args.size_kb} kB each)"
+        )
+
+        # previous approach: extract, then reorganize the extracted files
+        dpath_extracted = Path(dpath_tmp, "extracted")
+        start = time.perf_counter()
+        for participant_id in participant_ids:
+            shutil.unpack_archive(
+                dpath_raw_imaging / f"{participant_id}.{args.format}",
+                dpath_extracted / participant_id / SESSION_ID,
+            )
+            dpath_dest = Path(dpath_tmp, "previous", participant_id)
+            dpath_dest.mkdir(parents=True)
+            for dpath_current, _, fnames in os.walk(dpath_extracted / participant_id):
+                for fname in fnames:
+                    shutil.copy2(Path(dpath_current, fname), dpath_dest / fname)
+        runtime = time.perf_counter() - start
+        usage_mb = _get_disk_usage(dpath_extracted) / 1e6
+        print(f"\textract + reorg: {runtime:.2f} s ({usage_mb:.0f} MB extracted)")
+
+        start = time.perf_counter()
+        for participant_id in participant_ids:
+            workflow.run_single(participant_id, SESSION_ID)
+        print(f"\tfrom archives: {time.perf_counter() - start:.2f} s (0 MB extracted)")
+
+        # doughnut statuses
+        dir_index = DirectoryIndex()
+        mtime = time.time() - 3600
+        for fpath in dpath_raw_imaging.iterdir():
+            os.utime(fpath, (mtime, mtime))
+        os.utime(dpath_raw_imaging, (mtime, mtime))
+        for label, index in (
+            ("no index", None),
+            ("index, first run", dir_index),
+            ("index, rerun", dir_index),
+        ):
+            start = time.perf_counter()
+            doughnut = generate_doughnut(
+                manifest=manifest,
+                dicom_dir_map=workflow.dicom_dir_map,
+                dpath_downloaded=dpath_raw_imaging,
+                logger=workflow.logger,
+                dir_index=index,
+            )
+            runtime = time.perf_counter() - start
+            assert doughnut[doughnut.col_in_raw_imaging].all()
+            print(f"\tdoughnut statuses ({label}): {runtime * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark the reorganization of a single participant-session with many files.
+
+Compares the runtime and peak memory usage of the streaming implementation with
+the previous one (full file list, one existence check per file).
+
+Usage: python benchmarks/bench_dicom_reorg_stream.py [--n-files N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench_dicom_reorg import SESSION_ID, make_workflow
+
+from nipoppy.utils import participant_id_to_bids_participant, session_id_to_bids_session
+from nipoppy.workflows.dicom_reorg import DicomReorgWorkflow
+
+
+def run_single_previous(
+    workflow: DicomReorgWorkflow, participant_id: str, session_id: str
+):
+    """Previous implementation: file list and one existence check per file."""
+    dpath_downloaded = workflow.layout.dpath_raw_imaging / participant_id / session_id
+    fpaths_to_reorg = []
+    for dpath, _, fnames in os.walk(dpath_downloaded):
+        fpaths_to_reorg.extend(Path(dpath, fname) for fname in fnames)
+
+    dpath_reorganized = (
+        workflow.layout.dpath_sourcedata
+        / participant_id_to_bids_participant(participant_id)
+        / session_id_to_bids_session(session_id)
+    )
+    workflow.mkdir(dpath_reorganized)
+    for fpath_source in fpaths_to_reorg:
+        fpath_dest = dpath_reorganized / fpath_source.name
+        if fpath_dest.exists():
+            raise FileExistsError(fpath_dest)
+        fpath_source = os.path.relpath(fpath_source, fpath_dest.parent)
+        workflow.create_symlink(path_source=fpath_source, path_dest=fpath_dest)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-files", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        workflow = make_workflow(Path(dpath_tmp), 1, args.n_files, n_jobs=1)
+        participant_id = workflow.doughnut[workflow.doughnut.col_participant_id][0]
+        print(f"1 participant-session with {args.n_files} files")
+
+        for label, func in (
+            ("previous", run_single_previous),
+            ("streaming", DicomReorgWorkflow.run_single),
+        ):
+            shutil.rmtree(workflow.layout.dpath_sourcedata, ignore_errors=True)
+            tracemalloc.start()
+            start = time.perf_counter()
+            func(workflow, participant_id, SESSION_ID)
+            runtime = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\t{label}: {runtime:.2f} s, peak memory {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
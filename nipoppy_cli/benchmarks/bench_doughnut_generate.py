@@ -0,0 +1,165 @@
+"""Benchmark doughnut status detection against per-record directory checks.
+
+Also compares sequential and concurrent status detection on a filesystem with
+(simulated) high latency.
+
+Usage: python benchmarks/bench_doughnut_generate.py [--n-participants N]
+    [--n-jobs N] [--latency-ms MS]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from nipoppy.logger import get_logger
+from nipoppy.tabular.dicom_dir_map import DicomDirMap
+from nipoppy.tabular.doughnut import _get_statuses, generate_doughnut
+from nipoppy.tabular.manifest import Manifest
+
+SESSION_IDS = ["BL", "M12"]
+
+
+def check_status_per_record(dpath: Path, dname_subdirectory: Path) -> bool:
+    """Previous implementation: two metadata operations per record."""
+    dpath_participant = dpath / dname_subdirectory
+    if dpath_participant.exists():
+        return next(dpath_participant.iterdir(), None) is not None
+    return False
+
+
+def make_dataset(dpath_root: Path, n_participants: int) -> Manifest:
+    """Create a manifest and fake raw/sourcedata/BIDS directories."""
+    records = []
+    for i_participant in range(n_participants):
+        participant_id = str(i_participant).zfill(5)
+        for session_id in SESSION_IDS:
+            records.append(
+                {
+                    Manifest.col_participant_id: participant_id,
+                    Manifest.col_visit_id: session_id,
+                    Manifest.col_session_id: session_id,
+                    Manifest.col_datatype: ["anat"],
+                }
+            )
+            # 3/4 downloaded, 1/2 organized, 1/4 converted
+            bids_subdir = Path(f"sub-{participant_id}", f"ses-{session_id}")
+            for dpath, is_present in (
+                (
+                    dpath_root / "raw" / participant_id / session_id,
+                    i_participant % 4 < 3,
+                ),
+                (dpath_root / "sourcedata" / bids_subdir, i_participant % 4 < 2),
+                (dpath_root / "bids" / bids_subdir, i_participant % 4 < 1),
+            ):
+                if is_present:
+                    dpath.mkdir(parents=True)
+                    (dpath / "file").touch()
+    return Manifest(records)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-participants", type=int, default=5_000)
+    parser.add_argument("--n-jobs", type=int, default=16)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=1.0,
+        help="Simulated latency of each directory listing",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        dpath_root = Path(dpath_tmp)
+        manifest = make_dataset(dpath_root, args.n_participants)
+        dicom_dir_map = DicomDirMap.load_or_generate(
+            manifest, fpath_dicom_dir_map=None, participant_first=True
+        )
+        kwargs = dict(
+            manifest=manifest,
+            dicom_dir_map=dicom_dir_map,
+            dpath_downloaded=dpath_root / "raw",
+            dpath_organized=dpath_root / "sourcedata",
+            dpath_bidsified=dpath_root / "bids",
+            logger=get_logger("bench_doughnut_generate", level=logging.WARNING),
+        )
+        print(f"Manifest with {len(manifest)} records")
+
+        runtime_statuses = 0
+
+        def timed_get_statuses(*args, **kwargs):
+            nonlocal runtime_statuses
+            start = time.perf_counter()
+            statuses = _get_statuses(*args, **kwargs)
+            runtime_statuses += time.perf_counter() - start
+            return statuses
+
+        start = time.perf_counter()
+        with mock.patch(
+            "nipoppy.tabular.doughnut._get_statuses", new=timed_get_statuses
+        ):
+            doughnut = generate_doughnut(**kwargs)
+        runtime = time.perf_counter() - start
+        print(
+            f"\tgenerate_doughnut: {runtime:.2f} s total,"
+            f" {runtime_statuses:.2f} s for status detection"
+        )
+        # separate run since mocking os.scandir adds overhead
+        with mock.patch("os.scandir", wraps=os.scandir) as mocked_scandir:
+            generate_doughnut(**kwargs)
+        print(f"\t\t{mocked_scandir.call_count} directories listed")
+
+        bids_subdirs = [
+            Path(f"sub-{participant_id}", f"ses-{session_id}")
+            for participant_id, session_id in zip(
+                doughnut[doughnut.col_participant_id],
+                doughnut[doughnut.col_session_id],
+            )
+        ]
+        start = time.perf_counter()
+        statuses = {
+            col: [
+                check_status_per_record(Path(kwargs[dpath_key]), dname)
+                for dname in dnames
+            ]
+            for col, dpath_key, dnames in (
+                (
+                    doughnut.col_in_raw_imaging,
+                    "dpath_downloaded",
+                    doughnut[doughnut.col_participant_dicom_dir],
+                ),
+                (doughnut.col_in_sourcedata, "dpath_organized", bids_subdirs),
+                (doughnut.col_in_bids, "dpath_bidsified", bids_subdirs),
+            )
+        }
+        runtime = time.perf_counter() - start
+        n_checks = sum(len(values) for values in statuses.values())
+        print(
+            f"\tper-record checks: {runtime:.2f} s,"
+            f" {2 * n_checks} metadata operations"
+        )
+        for col, values in statuses.items():
+            assert doughnut[col].tolist() == values
+
+        def slow_scandir(path):
+            time.sleep(args.latency_ms / 1000)
+            return scandir(path)
+
+        scandir = os.scandir
+        print(f"Simulated latency of {args.latency_ms} ms per directory listing")
+        with mock.patch("os.scandir", new=slow_scandir):
+            for n_jobs in (1, args.n_jobs):
+                start = time.perf_counter()
+                doughnut_n_jobs = generate_doughnut(**kwargs, n_jobs=n_jobs)
+                runtime = time.perf_counter() - start
+                print(f"\tgenerate_doughnut (n_jobs={n_jobs}): {runtime:.2f} s")
+                assert doughnut_n_jobs.equals(doughnut)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark incremental doughnut refresh against full regeneration.
+
+Usage: python benchmarks/bench_doughnut_refresh.py [--n-participants N]
+    [--n-changed N]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+from unittest import mock
+
+from bench_doughnut_generate import make_dataset
+
+from nipoppy.logger import get_logger
+from nipoppy.tabular.dicom_dir_map import DicomDirMap
+from nipoppy.tabular.doughnut import DirectoryIndex, generate_doughnut, refresh_doughnut
+
+
+def set_old_mtimes(dpaths: Iterable[Path], seconds_ago: int = 3600):
+    """Set the mtime of directories to the past (so they can be indexed)."""
+    mtime = time.time() - seconds_ago
+    for dpath in dpaths:
+        os.utime(dpath, (mtime, mtime))
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-participants", type=int, default=5_000)
+    parser.add_argument(
+        "--n-changed",
+        type=int,
+        default=50,
+        help="Number of participants with new BIDS data between refreshes",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        dpath_root = Path(dpath_tmp)
+        manifest = make_dataset(dpath_root, args.n_participants)
+        set_old_mtimes(Path(dpath) for dpath, _, _ in os.walk(dpath_root))
+        logger = get_logger("bench_doughnut_refresh", level=logging.WARNING)
+        dpaths = dict(
+            dpath_downloaded=dpath_root / "raw",
+            dpath_organized=dpath_root / "sourcedata",
+            dpath_bidsified=dpath_root / "bids",
+        )
+        doughnut = generate_doughnut(
+            manifest=manifest,
+            dicom_dir_map=DicomDirMap.load_or_generate(
+                manifest, fpath_dicom_dir_map=None, participant_first=True
+            ),
+            logger=logger,
+            **dpaths,
+        )
+        print(f"Doughnut with {len(doughnut)} records")
+
+        dir_index = DirectoryIndex()
+        start = time.perf_counter()
+        refresh_doughnut(doughnut, logger=logger, dir_index=dir_index, **dpaths)
+        print(f"\tFirst refresh (empty index): {time.perf_counter() - start:.2f} s")
+
+        # new BIDS data for some participants that were not converted yet
+        dpaths_changed = [dpath_root / "bids"]
+        for participant_id in doughnut.loc[
+            ~doughnut[doughnut.col_in_bids], doughnut.col_participant_id
+        ].unique()[: args.n_changed]:
+            dpath = dpath_root / "bids" / f"sub-{participant_id}" / "ses-BL"
+            dpath.mkdir(parents=True)
+            (dpath / "file").touch()
+            dpaths_changed.extend([dpath.parent, dpath])
+        set_old_mtimes(dpaths_changed, seconds_ago=60)
+
+        for label, dir_index_refresh in (
+            ("full re-check", None),
+            ("incremental refresh", dir_index),
+        ):
+            doughnut_refreshed = doughnut.copy()
+            start = time.perf_counter()
+            with mock.patch("os.scandir", wraps=os.scandir) as mocked_scandir:
+                refresh_doughnut(
+                    doughnut_refreshed,
+                    logger=logger,
+                    dir_index=dir_index_refresh,
+                    **dpaths,
+                )
+            runtime = time.perf_counter() - start
+            print(
+                f"\t{label}: {runtime:.2f} s,"
+                f" {mocked_scandir.call_count} directories listed"
+            )
+        n_changed = (doughnut_refreshed != doughnut).any(axis="columns").sum()
+        print(f"\t{n_changed} records changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark memory usage and filtering speed of compact vs object bagels.
+
+Usage: python benchmarks/bench_tabular_compact.py [--n-rows N] [--n-repeats N]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nipoppy.tabular.bagel import Bagel
+
+
+def make_bagel(n_rows: int, seed: int = 0) -> Bagel:
+    """Generate a validated bagel with several pipelines and sessions."""
+    rng = np.random.default_rng(seed)
+    pipelines = [("fmriprep", "23.1.3"), ("freesurfer", "7.3.2"), ("mriqc", "23.1.0")]
+    session_ids = ["BL", "M12", "M24", "M36"]
+    statuses = [Bagel.status_success, Bagel.status_fail, Bagel.status_incomplete]
+    n_participants = n_rows // (len(pipelines) * len(session_ids)) + 1
+
+    records = {
+        col: []
+        for col in (
+            Bagel.col_participant_id,
+            Bagel.col_session_id,
+            Bagel.col_pipeline_name,
+            Bagel.col_pipeline_version,
+        )
+    }
+    for i_participant in range(n_participants):
+        for session_id in session_ids:
+            for pipeline_name, pipeline_version in pipelines:
+                records[Bagel.col_participant_id].append(str(i_participant).zfill(6))
+                records[Bagel.col_session_id].append(session_id)
+                records[Bagel.col_pipeline_name].append(pipeline_name)
+                records[Bagel.col_pipeline_version].append(pipeline_version)
+    df = pd.DataFrame(records).iloc[:n_rows]
+    df[Bagel.col_pipeline_complete] = rng.choice(statuses, size=len(df))
+    return Bagel(df).validate()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-rows", type=int, default=500_000)
+    parser.add_argument("--n-repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    bagels = {"object": make_bagel(args.n_rows)}
+    bagels["compact"] = bagels["object"].compact()
+    print(f"Bagel with {len(bagels['object'])} rows")
+
+    memory = {}
+    for label, bagel in bagels.items():
+        memory[label] = bagel.memory_usage(deep=True).sum() / 1e6
+        print(f"\t{label}: {memory[label]:.1f} MB")
+    print(f"Memory reduction: {memory['object'] / memory['compact']:.1f}x")
+
+    for filter_kwargs in ({}, {"session_id": "M12"}, {"participant_id": "000042"}):
+        print(f"get_completed_participants_sessions(**{filter_kwargs})")
+        timings = {}
+        results = {}
+        for label, bagel in bagels.items():
+
+            def run(bagel=bagel):
+                return list(
+                    bagel.get_completed_participants_sessions(
+                        pipeline_name="fmriprep",
+                        pipeline_version="23.1.3",
+                        **filter_kwargs,
+                    )
+                )
+
+            timings[label] = min(timeit.repeat(run, number=1, repeat=args.n_repeats))
+            results[label] = run()
+            print(f"\t{label}: {timings[label] * 1000:.1f} ms")
+        assert results["object"] == results["compact"]
+        print(f"\tSpeedup: {timings['object'] / timings['compact']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark get_diff against the previous tuple-index implementation.
+
+Usage: python benchmarks/bench_tabular_diff.py [--n-rows N] [--n-repeats N]
+"""
+
+import argparse
+import timeit
+
+import pandas as pd
+
+from nipoppy.tabular.manifest import Manifest
+
+
+def make_manifest(n_rows: int, offset: int = 0) -> Manifest:
+    """Generate a manifest with two sessions per participant."""
+    n_participants = n_rows // 2
+    participant_ids = [
+        str(i_participant + offset).zfill(6) for i_participant in range(n_participants)
+    ]
+    return Manifest(
+        {
+            Manifest.col_participant_id: participant_ids * 2,
+            Manifest.col_visit_id: ["BL"] * n_participants + ["M12"] * n_participants,
+            Manifest.col_session_id: ["BL"] * n_participants + ["M12"] * n_participants,
+            Manifest.col_datatype: [["anat"]] * (2 * n_participants),
+        }
+    )
+
+
+def get_diff_tuples(df1: Manifest, df2: Manifest, cols: list[str]) -> Manifest:
+    """Previous implementation of get_diff."""
+    index_self = pd.Index(zip(*[df1.loc[:, col] for col in cols]))
+    index_other = pd.Index(zip(*[df2.loc[:, col] for col in cols]))
+    return df1.loc[~index_self.isin(index_other)]
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-rows", type=int, default=200_000)
+    parser.add_argument("--n-repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    manifest = make_manifest(args.n_rows)
+    # 10% of the participants are new
+    other = make_manifest(args.n_rows, offset=args.n_rows // 20)
+    cols = Manifest.index_cols
+    print(f"Manifests with {len(manifest)} rows")
+
+    for label, other_manifest in (("object", other), ("compact", other.compact())):
+        timings = {}
+        results = {}
+        for name, func in (
+            ("tuples", lambda: get_diff_tuples(manifest, other_manifest, cols)),
+            ("hashed", lambda: manifest.get_diff(other_manifest, cols=cols)),
+        ):
+            timings[name] = min(timeit.repeat(func, number=1, repeat=args.n_repeats))
+            results[name] = func()
+            print(f"\t{label}/{name}: {timings[name] * 1000:.1f} ms")
+        assert results["tuples"].index.equals(results["hashed"].index)
+        print(f"\tSpeedup: {timings['tuples'] / timings['hashed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark loading a slice of a large bagel with and without read-time filters.
+
+Usage: python benchmarks/bench_tabular_filtered_load.py [--n-rows N]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench_tabular_compact import make_bagel
+
+from nipoppy.tabular.bagel import Bagel
+
+
+def measure(func):
+    """Return the output, runtime and peak traced memory (in MB) of a function."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = func()
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, runtime, peak / 1e6
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    filters = {
+        Bagel.col_pipeline_name: "fmriprep",
+        Bagel.col_pipeline_version: "23.1.3",
+        Bagel.col_session_id: "M12",
+    }
+
+    with tempfile.TemporaryDirectory() as dpath_tmp:
+        fpath_bagel = Path(dpath_tmp, "bagel.csv")
+        make_bagel(args.n_rows).to_csv(fpath_bagel, index=False)
+        print(f"Bagel with {args.n_rows} rows")
+
+        def load_then_filter():
+            bagel = Bagel.load(fpath_bagel)
+            mask = bagel[list(filters)].eq(list(filters.values())).all(axis=1)
+            return bagel.loc[mask]
+
+        results = {}
+        for label, func in (
+            ("load then filter", load_then_filter),
+            ("load with filters", lambda: Bagel.load(fpath_bagel, filters=filters)),
+        ):
+            results[label], runtime, peak = measure(func)
+            print(f"\t{label}: {runtime:.2f} s, peak memory {peak:.0f} MB")
+
+    assert len(results["load then filter"]) == len(results["load with filters"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark row-wise vs column-wise validation of a large manifest.
+
+Usage: python benchmarks/bench_tabular_validate.py [--n-rows N] [--n-repeats N]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nipoppy.tabular.manifest import Manifest
+
+
+def make_manifest(n_rows: int, seed: int = 0) -> Manifest:
+    """Generate an unvalidated manifest similar to one loaded from a CSV file."""
+    rng = np.random.default_rng(seed)
+    session_ids = np.array(["BL", "M12", "M24", "M36"])
+    datatypes = np.array(["['anat']", "['anat','dwi']", "['anat','func']", None])
+    n_participants = n_rows // len(session_ids) + 1
+    participant_ids = [str(i).zfill(6) for i in range(n_participants)]
+
+    df = pd.DataFrame(
+        {
+            Manifest.col_participant_id: np.repeat(participant_ids, len(session_ids))[
+                :n_rows
+            ],
+            Manifest.col_visit_id: np.tile(session_ids, n_participants)[:n_rows],
+            Manifest.col_session_id: np.tile(session_ids, n_participants)[:n_rows],
+            Manifest.col_datatype: rng.choice(datatypes, size=n_rows),
+        }
+    )
+    return Manifest(df.astype(object))
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-rows", type=int, default=100_000)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    manifest = make_manifest(args.n_rows)
+    print(f"Validating a manifest with {len(manifest)} rows")
+
+    timings = {}
+    for columnar in (False, True):
+        timings[columnar] = min(
+            timeit.repeat(
+                lambda: manifest.validate(columnar=columnar),
+                number=1,
+                repeat=args.n_repeats,
+            )
+        )
+        print(f"\tcolumnar={columnar}: {timings[columnar]:.3f} s")
+
+    assert manifest.validate(columnar=True).equals(manifest.validate(columnar=False))
+    print(f"Speedup: {timings[False] / timings[True]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Benchmark per-participant template string replacement in a large descriptor.
+
+Compares replacing all template strings in the serialized descriptor for each
+participant (previous implementation, and current one without reusing the
+compiled template) with compiling the descriptor once and only filling in the
+participant/session IDs for each participant.
+
+Usage: python benchmarks/bench_template_render.py [--n-participants N]
+    [--n-extra-inputs N]
+"""
+
+import argparse
+import json
+import time
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+
+from nipoppy.utils import (
+    DPATH_DESCRIPTORS,
+    TEMPLATE_REPLACE_PATTERN,
+    CompiledTemplate,
+    participant_id_to_bids_participant,
+    process_template_str,
+    session_id_to_bids_session,
+)
+from nipoppy.workflows.pipeline import TEMPLATE_PARTICIPANT_KEYS
+
+
+def process_template_str_previous(template_str: str, objs=None, **kwargs) -> str:
+    """Previous implementation: one full str.replace per template string."""
+
+    def replace(json_str: str, to_replace: str, replacement):
+        if isinstance(replacement, Path):
+            replacement = replacement.resolve()
+        return json_str.replace(to_replace, str(replacement))
+
+    def replace_from_objs(json_str: str, to_replace: str, objs):
+        for obj in objs:
+            if hasattr(obj, replacement_key):
+                return replace(json_str, to_replace, getattr(obj, replacement_key))
+        warnings.warn(f"Unable to replace {to_replace} in {template_str_original}")
+        return json_str
+
+    if objs is None:
+        objs = []
+
+    template_str_original = template_str
+
+    matches = TEMPLATE_REPLACE_PATTERN.finditer(template_str)
+    for match in matches:
+        to_replace = match.group()
+        replacement_key = match.groups()[0].lower()
+        if not str.isidentifier(replacement_key):
+            raise ValueError(
+                f"Invalid identifier name {replacement_key} in {template_str}"
+            )
+        if replacement_key in kwargs:
+            template_str = replace(template_str, to_replace, kwargs[replacement_key])
+        else:
+            template_str = replace_from_objs(template_str, to_replace, objs)
+
+    return template_str
+
+
+def make_descriptor(n_extra_inputs: int) -> dict:
+    """Load the fMRIPrep descriptor and add inputs with template strings."""
+    descriptor = json.loads((DPATH_DESCRIPTORS / "fmriprep-23.1.3.json").read_text())
+    for i_input in range(n_extra_inputs):
+        descriptor["inputs"].append(
+            {
+                "id": f"extra_{i_input}",
+                "name": f"extra_{i_input}",
+                "type": "String",
+                "optional": True,
+                "description": (
+                    "[[NIPOPPY_DPATH_PIPELINE_OUTPUT]]/[[NIPOPPY_BIDS_PARTICIPANT]]"
+                    "/[[NIPOPPY_BIDS_SESSION]]"
+                ),
+                "default-value": (
+                    "[[NIPOPPY_DPATH_BIDS]]/[[NIPOPPY_PIPELINE_NAME]]"
+                    "-[[NIPOPPY_PIPELINE_VERSION]]-[[NIPOPPY_PARTICIPANT_ID]]"
+                ),
+                "command-line-flag": f"--extra-{i_input}",
+                "value-key": f"[EXTRA_{i_input}]",
+            }
+        )
+    return descriptor
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-participants", type=int, default=10_000)
+    parser.add_argument("--n-extra-inputs", type=int, default=100)
+    args = parser.parse_args()
+
+    descriptor = make_descriptor(args.n_extra_inputs)
+    # stand-in for the workflow and layout attributes
+    objs = [
+        SimpleNamespace(
+            pipeline_name="fmriprep",
+            pipeline_version="23.1.3",
+            dpath_pipeline_output=Path("derivatives/fmriprep/23.1.3/output"),
+            dpath_pipeline_work=Path("scratch/work/fmriprep-23.1.3"),
+            dpath_pipeline_bids_db=Path("proc/pybids/bids_db/fmriprep-23.1.3"),
+            fpath_container=Path("containers/fmriprep_23.1.3.sif"),
+            dpath_bids=Path("bids"),
+            dpath_derivatives=Path("derivatives"),
+            dpath_tracker_configs=Path("proc/pipelines/tracker_configs"),
+        )
+    ]
+    participants_sessions = [
+        (str(i_participant).zfill(5), "BL")
+        for i_participant in range(args.n_participants)
+    ]
+    kwargs_list = [
+        {
+            "participant_id": participant_id,
+            "session_id": session_id,
+            "bids_participant": participant_id_to_bids_participant(participant_id),
+            "bids_session": session_id_to_bids_session(session_id),
+            # also passed for each participant by the runner
+            "container_command": "apptainer run --bind bids",
+        }
+        for participant_id, session_id in participants_sessions
+    ]
+    n_chars = len(json.dumps(descriptor))
+    n_template_strings = json.dumps(descriptor).count("[[NIPOPPY_")
+    print(
+        f"Descriptor with {n_chars} characters and {n_template_strings} template"
+        f" strings, rendered for {args.n_participants} participants"
+    )
+
+    start = time.perf_counter()
+    expected = [
+        process_template_str_previous(json.dumps(descriptor), objs=objs, **kwargs)
+        for kwargs in kwargs_list
+    ]
+    runtime = time.perf_counter() - start
+    print(f"\tprevious process_template_str (per participant): {runtime:.2f} s")
+
+    start = time.perf_counter()
+    processed = [
+        process_template_str(json.dumps(descriptor), objs=objs, **kwargs)
+        for kwargs in kwargs_list
+    ]
+    runtime = time.perf_counter() - start
+    print(f"\tprocess_template_str (per participant): {runtime:.2f} s")
+    assert processed == expected
+
+    start = time.perf_counter()
+    template = CompiledTemplate(
+        json.dumps(descriptor),
+        objs=objs,
+        dynamic_keys=[*TEMPLATE_PARTICIPANT_KEYS, "container_command"],
+    )
+    runtime_compile = time.perf_counter() - start
+    rendered = [template.render(**kwargs) for kwargs in kwargs_list]
+    runtime = time.perf_counter() - start
+    print(
+        f"\tCompiledTemplate: {runtime:.2f} s"
+        f" ({runtime_compile * 1000:.1f} ms to compile,"
+        f" {len(template.keys)} template strings left to render)"
+    )
+    assert rendered == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the transfer modes used to reorganize DICOM files.
+
+Compares the previous copy implementation (shutil.copy2, one file at a time) with
+each transfer mode. Modes that are not supported by the filesystem of the
+temporary directory fall back to the next one, as reported in the output.
+
+Usage: python benchmarks/bench_transfer.py [--n-files N] [--size-kb N]
+    [--dpath-tmp DPATH]
+"""
+
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from nipoppy.env import TRANSFER_MODES
+from nipoppy.logger import get_logger
+from nipoppy.transfer import FileTransferer
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-files", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument(
+        "--dpath-tmp", help="Directory in which to create files (default: system)"
+    )
+    args = parser.parse_args()
+
+    logger = get_logger("bench_transfer", level=logging.ERROR)
+    with tempfile.TemporaryDirectory(dir=args.dpath_tmp) as dpath_tmp:
+        dpath_source = Path(dpath_tmp, "source")
+        dpath_source.mkdir()
+        fpaths_source = []
+        for i_file in range(args.n_files):
+            fpath = dpath_source / f"{i_file}.dcm"
+            fpath.write_bytes(bytes(args.size_kb * 1024))
+            fpaths_source.append(fpath)
+        size_mb = args.n_files * args.size_kb / 1024
+        print(f"{args.n_files} files ({size_mb:.0f} MB) in {dpath_tmp}")
+
+        dpath_dest = Path(dpath_tmp, "dest")
+        dpath_dest.mkdir()
+        start = time.perf_counter()
+        for fpath_source in fpaths_source:
+            shutil.copy2(fpath_source, dpath_dest / fpath_source.name)
+        print(f"\tshutil.copy2 (previous): {time.perf_counter() - start:.2f} s")
+
+        for mode in TRANSFER_MODES:
+            shutil.rmtree(dpath_dest)
+            dpath_dest.mkdir()
+            transferer = FileTransferer(mode=mode, logger=logger)
+            fpaths_dest = [dpath_dest / fpath.name for fpath in fpaths_source]
+            start = time.perf_counter()
+            transferer.transfer(fpaths_source, fpaths_dest)
+            runtime = time.perf_counter() - start
+            print(f"\t{mode} (used: {transferer.mode}): {runtime:.2f} s")
+            if mode == "move":
+                # move the files back for the next runs
+                FileTransferer(mode="move").transfer(fpaths_dest, fpaths_source)
+
+
+if __name__ == "__main__":
+    main()
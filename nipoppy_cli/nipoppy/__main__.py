@@ -0,0 +1,6 @@
+"""Entrypoint for ``python -m nipoppy``."""
+
+from nipoppy.cli.run import cli
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,167 @@
+"""Reading of DICOM files directly from zip/tar archives."""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import shutil
+import tarfile
+import time
+import zipfile
+from functools import lru_cache
+from typing import IO, Iterator, NamedTuple
+
+from nipoppy.env import StrOrPathLike
+
+# file name suffixes of supported archives (compression is detected from content)
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# errors raised when reading invalid/corrupted archives
+ARCHIVE_ERRORS = (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile)
+
+# size of the chunks in which members are copied
+CHUNK_SIZE = 1 << 20
+# number of archive listings kept in memory
+N_LISTINGS_CACHED = 256
+
+
+class ArchiveMember(NamedTuple):
+    """Regular file in an archive."""
+
+    name: str
+    size: int
+    mtime: float
+
+    @property
+    def fname(self) -> str:
+        """File name (without the directories within the archive)."""
+        return posixpath.basename(self.name)
+
+
+def is_archive(path: StrOrPathLike) -> bool:
+    """Check whether a path has the name of a supported archive."""
+    return os.fspath(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _is_zip(path: StrOrPathLike) -> bool:
+    return os.fspath(path).lower().endswith(".zip")
+
+
+def _is_valid_member_name(name: str) -> bool:
+    return posixpath.basename(name) not in ("", ".", "..")
+
+
+def _get_zip_member(info: zipfile.ZipInfo) -> ArchiveMember:
+    return ArchiveMember(
+        name=info.filename,
+        size=info.file_size,
+        mtime=time.mktime(info.date_time + (0, 0, -1)),
+    )
+
+
+def _get_tar_member(info: tarfile.TarInfo) -> ArchiveMember:
+    return ArchiveMember(name=info.name, size=info.size, mtime=info.mtime)
+
+
+def iter_archive_members(fpath: StrOrPathLike) -> Iterator[ArchiveMember]:
+    """Iterate over the regular files in an archive, without extracting them.
+
+    Zip archives are listed from their central directory, without decompressing
+    anything. Tar archives are read sequentially, so stopping the iteration early
+    avoids reading (and decompressing) the rest of the archive.
+    """
+    if _is_zip(fpath):
+        with zipfile.ZipFile(fpath) as file_zip:
+            for info in file_zip.infolist():
+                if not info.is_dir() and _is_valid_member_name(info.filename):
+                    yield _get_zip_member(info)
+        return
+
+    with tarfile.open(fpath, mode="r|*") as file_tar:
+        for info in file_tar:
+            if info.isfile() and _is_valid_member_name(info.name):
+                yield _get_tar_member(info)
+
+
+def iter_archive_files(
+    fpath: StrOrPathLike,
+) -> Iterator[tuple[ArchiveMember, IO[bytes]]]:
+    """Iterate over the regular files in an archive and their (streamed) contents.
+
+    The file object of a member is only valid until the next member is requested.
+    Members are decompressed as they are read, so no temporary files are created.
+    """
+    if _is_zip(fpath):
+        with zipfile.ZipFile(fpath) as file_zip:
+            for info in file_zip.infolist():
+                if info.is_dir() or not _is_valid_member_name(info.filename):
+                    continue
+                with file_zip.open(info) as file_member:
+                    yield _get_zip_member(info), file_member
+        return
+
+    with tarfile.open(fpath, mode="r|*") as file_tar:
+        for info in file_tar:
+            if info.isfile() and _is_valid_member_name(info.name):
+                yield _get_tar_member(info), file_tar.extractfile(info)
+
+
+@lru_cache(maxsize=N_LISTINGS_CACHED)
+def _list_archive_members(
+    fpath: str, mtime_ns: int, size: int
+) -> tuple[ArchiveMember, ...]:
+    return tuple(iter_archive_members(fpath))
+
+
+def list_archive_members(fpath: StrOrPathLike) -> tuple[ArchiveMember, ...]:
+    """Get the regular files in an archive.
+
+    Listings are cached in memory until the archive's mtime or size changes.
+    """
+    fpath = os.path.abspath(fpath)
+    stat = os.stat(fpath)
+    return _list_archive_members(fpath, stat.st_mtime_ns, stat.st_size)
+
+
+def archive_has_members(fpath: StrOrPathLike) -> bool:
+    """Check whether an archive contains at least one regular file.
+
+    Only the first member of tar archives is read. Invalid archives are considered
+    empty.
+    """
+    members = iter_archive_members(fpath)
+    try:
+        return next(members, None) is not None
+    except ARCHIVE_ERRORS:
+        return False
+    finally:
+        members.close()
+
+
+def write_archive_file(
+    file_member: IO[bytes], member: ArchiveMember, fpath_dest: StrOrPathLike
+) -> int:
+    """Write the contents of an archive member to a new file.
+
+    The modification time of the member is kept. Returns the number of bytes
+    written.
+
+    Raises
+    ------
+    FileExistsError
+        If the destination file already exists
+    """
+    with open(fpath_dest, "xb") as file_dest:
+        shutil.copyfileobj(file_member, file_dest, CHUNK_SIZE)
+        n_bytes = file_dest.tell()
+    os.utime(fpath_dest, (member.mtime, member.mtime))
+    return n_bytes
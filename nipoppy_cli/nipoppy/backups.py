@@ -0,0 +1,352 @@
+"""Storage of historical versions (backups) of tabular files."""
+
+from __future__ import annotations
+
+import datetime
+import json
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from nipoppy.base import Base
+from nipoppy.env import StrOrPathLike
+
+# same as the default timestamp format in nipoppy.utils.add_path_timestamp
+BACKUP_TIMESTAMP_FORMAT = "%Y%m%d_%H%M"
+
+
+class BackupPolicy(BaseModel):
+    """Schema for the storage and retention options of a tabular file's backups."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    snapshot_interval: int = Field(
+        default=10,
+        ge=1,
+        description=(
+            "Store one in every N versions as a full snapshot. The other versions"
+            " are stored as row-level differences (deltas) with the next version"
+            " (CSV files only). The latest version is always a full snapshot."
+            " Setting this to 1 disables delta storage"
+        ),
+    )
+    max_versions: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Maximum number of versions to keep (including the latest version)"
+            ", by default no limit"
+        ),
+    )
+    max_age_days: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "Delete versions older than this number of days (the latest version is"
+            " never deleted), by default no limit"
+        ),
+    )
+
+
+def get_dpath_backups(
+    fpath_symlink: StrOrPathLike, dname_backups: Optional[str] = None
+) -> Path:
+    """Get the backup directory for a tabular file (symlink).
+
+    If ``dname_backups`` is None, the directory is ``.<stem>s`` (e.g.
+    ``.doughnuts`` for ``doughnut.csv``), next to the symlink.
+    """
+    fpath_symlink = Path(fpath_symlink)
+    if dname_backups is None:
+        dname_backups = f".{fpath_symlink.stem}s"
+    return fpath_symlink.parent / dname_backups
+
+
+def _split_lines(content: bytes) -> list[str]:
+    """Split file content into lines (keeping line endings)."""
+    return content.decode("utf-8", errors="surrogateescape").splitlines(keepends=True)
+
+
+def _join_lines(lines: list[str]) -> bytes:
+    """Inverse of _split_lines."""
+    return "".join(lines).encode("utf-8", errors="surrogateescape")
+
+
+def compute_delta(content_old: bytes, content_new: bytes) -> Optional[dict]:
+    """Compute the line-level difference needed to get an old version from a new one.
+
+    Lines (i.e. rows for CSV files) are matched by value. The delta lists the lines
+    of the new version that are not in the old version, and the lines of the old
+    version that are not in the new version (with their position). Returns None if
+    the lines common to both versions are not in the same relative order, in which
+    case the old version cannot be rebuilt from a delta.
+    """
+    lines_old = _split_lines(content_old)
+    lines_new = _split_lines(content_new)
+
+    positions_new = defaultdict(deque)
+    for i_line, line in enumerate(lines_new):
+        positions_new[line].append(i_line)
+
+    inserted = []
+    matched_new = []
+    for i_line, line in enumerate(lines_old):
+        if positions_new[line]:
+            matched_new.append(positions_new[line].popleft())
+        else:
+            inserted.append([i_line, line])
+
+    if any(i2 <= i1 for i1, i2 in zip(matched_new, matched_new[1:])):
+        return None
+
+    removed = sorted(
+        i_line for positions in positions_new.values() for i_line in positions
+    )
+    return {"n_lines": len(lines_old), "removed": removed, "inserted": inserted}
+
+
+def apply_delta(content_new: bytes, delta: dict) -> bytes:
+    """Rebuild an old version from a new version and a delta (see compute_delta)."""
+    lines_new = _split_lines(content_new)
+    removed = set(delta["removed"])
+    common = iter(
+        line for i_line, line in enumerate(lines_new) if i_line not in removed
+    )
+    inserted = {i_line: line for i_line, line in delta["inserted"]}
+    lines_old = [
+        inserted[i_line] if i_line in inserted else next(common)
+        for i_line in range(delta["n_lines"])
+    ]
+    return _join_lines(lines_old)
+
+
+class BackupStore(Base):
+    """Backup directory for a tabular file.
+
+    Each version of the file is identified by the name of its (timestamped) backup
+    file. Versions are stored either as full snapshots or as deltas (``.delta``
+    files) that rebuild the version from the next (newer) one. Since deltas only
+    depend on newer versions, the oldest versions can always be deleted.
+    """
+
+    delta_suffix = ".delta"
+
+    def __init__(self, dpath_backups: StrOrPathLike, fname: str):
+        """Initialize the store.
+
+        Parameters
+        ----------
+        dpath_backups : nipoppy.env.StrOrPathLike
+            Path to the backup directory
+        fname : str
+            Name of the tabular file (symlink) whose versions are in the directory
+        """
+        self.dpath_backups = Path(dpath_backups)
+        self.fname = fname
+
+    @classmethod
+    def from_symlink(
+        cls, fpath_symlink: StrOrPathLike, dname_backups: Optional[str] = None
+    ) -> BackupStore:
+        """Get the store for a tabular file (symlink) saved with backups."""
+        fpath_symlink = Path(fpath_symlink)
+        return cls(get_dpath_backups(fpath_symlink, dname_backups), fpath_symlink.name)
+
+    @property
+    def _prefix(self) -> str:
+        return f"{Path(self.fname).stem}-"
+
+    @property
+    def _suffix(self) -> str:
+        return Path(self.fname).suffix
+
+    def get_fpath(self, version: str) -> Path:
+        """Get the path to the full snapshot of a version (may not exist)."""
+        return self.dpath_backups / version
+
+    def get_fpath_delta(self, version: str) -> Path:
+        """Get the path to the delta file of a version (may not exist)."""
+        return self.dpath_backups / f"{version}{self.delta_suffix}"
+
+    def get_versions(self) -> list[str]:
+        """Get all available versions, from oldest to newest."""
+        pattern = f"{self._prefix}*{self._suffix}"
+        versions = {fpath.name for fpath in self.dpath_backups.glob(pattern)}
+        versions.update(
+            fpath.name.removesuffix(self.delta_suffix)
+            for fpath in self.dpath_backups.glob(f"{pattern}{self.delta_suffix}")
+        )
+        return sorted(versions)
+
+    def get_timestamp(self, version: str) -> Optional[datetime.datetime]:
+        """Get the timestamp of a version from its name (None if not parsable)."""
+        timestamp = version.removeprefix(self._prefix).removesuffix(self._suffix)
+        try:
+            return datetime.datetime.strptime(timestamp, BACKUP_TIMESTAMP_FORMAT)
+        except ValueError:
+            return None
+
+    def is_snapshot(self, version: str) -> bool:
+        """Check whether a version is stored as a full snapshot."""
+        return self.get_fpath(version).exists()
+
+    def read(self, version: str) -> bytes:
+        """Rebuild the content of any version.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the version does not exist in the store
+        """
+        deltas = []
+        while not self.is_snapshot(version):
+            fpath_delta = self.get_fpath_delta(version)
+            if not fpath_delta.exists():
+                raise FileNotFoundError(
+                    f"Version {version} not found in backup directory"
+                    f" {self.dpath_backups}"
+                )
+            delta = json.loads(fpath_delta.read_text())
+            deltas.append(delta)
+            version = delta["base"]
+
+        content = self.get_fpath(version).read_bytes()
+        for delta in reversed(deltas):
+            content = apply_delta(content, delta)
+        return content
+
+    def restore(self, version: str, fpath: StrOrPathLike) -> Path:
+        """Write the content of a version to a file."""
+        fpath = Path(fpath)
+        fpath.write_bytes(self.read(version))
+        return fpath
+
+    def _store(
+        self,
+        version: str,
+        content: bytes,
+        version_next: Optional[str] = None,
+        content_next: Optional[bytes] = None,
+    ) -> bool:
+        """Store a version as a delta with the next version, if possible/smaller.
+
+        Returns whether the version was stored as a delta. Otherwise (or if
+        ``version_next`` is None), it is stored as a full snapshot.
+        """
+        delta = None
+        if version_next is not None and self._suffix == ".csv":
+            delta = compute_delta(content, content_next)
+        if delta is not None:
+            delta_str = json.dumps({"base": version_next, **delta})
+            if len(delta_str) >= len(content):
+                delta = None
+
+        fpath = self.get_fpath(version)
+        fpath_delta = self.get_fpath_delta(version)
+        if delta is None:
+            if not fpath.exists():
+                fpath.write_bytes(content)
+            fpath_delta.unlink(missing_ok=True)
+        else:
+            fpath_delta.write_text(delta_str)
+            fpath.unlink(missing_ok=True)
+        return delta is not None
+
+    def detach(self, version: str) -> None:
+        """Store the version preceding ``version`` as a full snapshot if needed.
+
+        This should be called before overwriting the file of an existing version
+        (e.g. when saving twice within the same timestamp), so that no delta
+        depends on the old content.
+        """
+        versions = self.get_versions()
+        if version not in versions:
+            return
+        i_version = versions.index(version)
+        if i_version > 0 and not self.is_snapshot(versions[i_version - 1]):
+            self._store(versions[i_version - 1], self.read(versions[i_version - 1]))
+
+    def add_version(self, version: str, policy: BackupPolicy) -> None:
+        """Apply the backup policy after a new version has been saved.
+
+        The previous version is converted to a delta (unless it should be kept
+        as a full snapshot), then old versions are deleted according to the
+        retention options of the policy.
+        """
+        versions = self.get_versions()
+        i_version = versions.index(version)
+        if i_version > 0:
+            i_previous = i_version - 1
+            n_deltas = 0
+            while i_previous - n_deltas - 1 >= 0 and not self.is_snapshot(
+                versions[i_previous - n_deltas - 1]
+            ):
+                n_deltas += 1
+            if self.is_snapshot(versions[i_previous]) and (
+                n_deltas + 1 < policy.snapshot_interval
+            ):
+                self._store(
+                    versions[i_previous],
+                    self.read(versions[i_previous]),
+                    version,
+                    self.read(version),
+                )
+        self.prune(policy)
+
+    def prune(
+        self, policy: BackupPolicy, now: Optional[datetime.datetime] = None
+    ) -> list[str]:
+        """Delete the oldest versions according to the retention options.
+
+        Returns the deleted versions.
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        versions = self.get_versions()
+        # the latest version is always kept
+        candidates = versions[:-1]
+
+        to_delete = []
+        if policy.max_versions is not None:
+            to_delete = candidates[: max(len(versions) - policy.max_versions, 0)]
+        if policy.max_age_days is not None:
+            max_age = datetime.timedelta(days=policy.max_age_days)
+            for version in candidates[len(to_delete) :]:
+                timestamp = self.get_timestamp(version)
+                if timestamp is None or now - timestamp <= max_age:
+                    break
+                to_delete.append(version)
+
+        for version in to_delete:
+            self.get_fpath(version).unlink(missing_ok=True)
+            self.get_fpath_delta(version).unlink(missing_ok=True)
+        return to_delete
+
+    def compact(self, policy: BackupPolicy) -> int:
+        """Rewrite all versions according to the policy (e.g., after changing it).
+
+        One in every ``snapshot_interval`` versions (counting from the oldest) and
+        the latest version are stored as full snapshots, and the other versions
+        are stored as deltas where possible. Retention options are not applied
+        (see :meth:`prune`).
+
+        Returns the number of versions stored as deltas.
+        """
+        versions = self.get_versions()
+        if len(versions) == 0:
+            return 0
+
+        n_deltas = 0
+        version_next = versions[-1]
+        content_next = self.read(version_next)
+        for i_version in range(len(versions) - 2, -1, -1):
+            version = versions[i_version]
+            content = self.read(version)
+            if (i_version + 1) % policy.snapshot_interval == 0:
+                self._store(version, content)
+            elif self._store(version, content, version_next, content_next):
+                n_deltas += 1
+            version_next, content_next = version, content
+        return n_deltas
@@ -1,18 +1,34 @@
 """Parsers for the CLI."""
 
 import logging
-from argparse import ArgumentParser, HelpFormatter, _ActionsContainer, _SubParsersAction
+import re
+from argparse import (
+    ArgumentParser,
+    ArgumentTypeError,
+    HelpFormatter,
+    _ActionsContainer,
+    _SubParsersAction,
+)
 from pathlib import Path
 
-from nipoppy.env import BIDS_SESSION_PREFIX, BIDS_SUBJECT_PREFIX
+from nipoppy.env import (
+    BIDS_SESSION_PREFIX,
+    BIDS_SUBJECT_PREFIX,
+    HPC_SCHEDULERS,
+    TRANSFER_MODES,
+    WALLTIME_PATTERN,
+)
+from nipoppy.watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
 
 PROGRAM_NAME = "nipoppy"
 COMMAND_INIT = "init"
 COMMAND_DOUGHNUT = "doughnut"
 COMMAND_DICOM_REORG = "reorg"
+COMMAND_DICOM_INDEX = "dicom-index"
 COMMAND_BIDS_CONVERSION = "bidsify"
 COMMAND_PIPELINE_RUN = "run"
 COMMAND_PIPELINE_TRACK = "track"
+COMMAND_COMPACT = "compact"
 
 DEFAULT_VERBOSITY = "2"  # info
 VERBOSITY_TO_LOG_LEVEL_MAP = {
@@ -44,6 +60,111 @@ def add_arg_simulate(parser: _ActionsContainer) -> _ActionsContainer:
     return parser
 
 
+def _positive_int(value: str) -> int:
+    """Convert a command-line argument to a positive integer."""
+    try:
+        value_int = int(value)
+    except ValueError:
+        value_int = 0
+    if value_int < 1:
+        raise ArgumentTypeError(f"must be a positive integer, got {value}")
+    return value_int
+
+
+def _positive_float(value: str) -> float:
+    """Convert a command-line argument to a positive number."""
+    try:
+        value_float = float(value)
+    except ValueError:
+        value_float = 0
+    if not value_float > 0:
+        raise ArgumentTypeError(f"must be a positive number, got {value}")
+    return value_float
+
+
+def add_arg_n_jobs(
+    parser: _ActionsContainer, help: str = "Number of concurrent jobs."
+) -> _ActionsContainer:
+    """Add a --n-jobs argument to the parser."""
+    parser.add_argument(
+        "--n-jobs",
+        type=_positive_int,
+        default=1,
+        help=help,
+    )
+    return parser
+
+
+def add_arg_n_jobs_pipeline(parser: _ActionsContainer) -> _ActionsContainer:
+    """Add a --n-jobs argument for pipeline runs to the parser."""
+    return add_arg_n_jobs(
+        parser,
+        help=(
+            "Number of participant-session pairs to run concurrently, each in its"
+            " own subprocess and with its own log file. Also limited by the CPUs"
+            " and memory needed for each pair (RESOURCES field of the pipeline"
+            " step config) (default: %(default)s)."
+        ),
+    )
+
+
+def add_arg_hpc(parser: _ActionsContainer) -> _ActionsContainer:
+    """Add a --hpc argument to the parser."""
+    parser.add_argument(
+        "--hpc",
+        choices=HPC_SCHEDULERS,
+        help=(
+            "Submit the participant-session pairs to an HPC job scheduler as an"
+            " array job (one pair per task) instead of running them. Resources are"
+            " taken from the pipeline step config and other job options from the"
+            " HPC_CONFIG field of the dataset config."
+        ),
+    )
+    return parser
+
+
+def _walltime(value: str) -> str:
+    """Check that a command-line argument is a time limit in HH:MM:SS format."""
+    if re.match(WALLTIME_PATTERN, value) is None:
+        raise ArgumentTypeError(f"must be in HH:MM:SS format, got {value}")
+    return value
+
+
+def add_args_worker(parser: _ActionsContainer) -> _ActionsContainer:
+    """Add --worker, --walltime and --reset-work-list arguments to the parser."""
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help=(
+            "Run participant-session pairs from a work list shared with other"
+            " workers, using all the CPUs and memory available (e.g. in an HPC job)."
+            " As many pairs as fit in these resources (RESOURCES field of the"
+            " pipeline step config) run at the same time, until the list is drained"
+            " or the walltime is almost reached. Unfinished pairs are returned to"
+            " the list for the next worker."
+        ),
+    )
+    parser.add_argument(
+        "--walltime",
+        type=_walltime,
+        help=(
+            "Time limit of the worker (HH:MM:SS), usually the same as the HPC job's"
+            " (requires --worker)."
+        ),
+    )
+    parser.add_argument(
+        "--reset-work-list",
+        action="store_true",
+        help=(
+            "Create the work list again from the participant-session pairs to run"
+            " (by default, an existing list is reused, including the record of"
+            " pairs already run). Do not use while other workers are running"
+            " (requires --worker)."
+        ),
+    )
+    return parser
+
+
 def add_args_participant_and_session(parser: _ActionsContainer) -> _ActionsContainer:
     """Add --participant-id and --session-id arguments to the parser."""
     parser.add_argument(
@@ -193,6 +314,50 @@ def add_subparser_doughnut(
             " (default: only append rows for new records)"
         ),
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Also re-check the statuses of existing records. Only the directories"
+            " that changed since the last refresh are listed again"
+            " (based on their modification times)."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running and update the doughnut whenever files are added to/removed"
+            " from the raw imaging, sourcedata or BIDS directories (implies"
+            " --refresh). Uses inotify if available, otherwise polling."
+        ),
+    )
+    parser.add_argument(
+        "--debounce",
+        type=_positive_float,
+        default=DEFAULT_DEBOUNCE,
+        help=(
+            "With --watch, number of seconds during which changes are batched"
+            " together before updating the doughnut (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=_positive_float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=(
+            "With --watch, number of seconds between two checks when no change is"
+            " reported, e.g. on network filesystems (default: %(default)s)."
+        ),
+    )
+    parser = add_arg_n_jobs(
+        parser,
+        help=(
+            "Number of directories to check concurrently when determining statuses."
+            " Values larger than 1 can reduce runtime on network filesystems"
+            " (default: %(default)s)."
+        ),
+    )
     return parser
 
 
@@ -216,10 +381,23 @@ def add_subparser_dicom_reorg(
         add_help=False,
     )
     parser = add_arg_dataset_root(parser)
-    parser.add_argument(
+    transfer_group = parser.add_mutually_exclusive_group()
+    transfer_group.add_argument(
         "--copy-files",
         action="store_true",
-        help="Copy files when reorganizing (default: create symlinks).",
+        help="Copy files when reorganizing (same as --transfer-mode copy).",
+    )
+    transfer_group.add_argument(
+        "--transfer-mode",
+        choices=TRANSFER_MODES,
+        help=(
+            "How files are reorganized (default: symlink). symlink: relative"
+            " symbolic links; hardlink: hard links (same filesystem only); reflink:"
+            " copy-on-write clones (supported filesystems only); copy: full copies;"
+            " move: files are moved out of the raw imaging directory. If a mode is"
+            " not supported, the next one in symlink, hardlink, reflink, copy is"
+            " used instead."
+        ),
     )
     parser.add_argument(
         "--check-dicoms",
@@ -230,6 +408,46 @@ def add_subparser_dicom_reorg(
             "converters). The paths to the derived DICOMs will be written to the log."
         ),
     )
+    parser = add_arg_n_jobs(
+        parser,
+        help=(
+            "Number of participant-session pairs to reorganize concurrently"
+            " (default: %(default)s)."
+        ),
+    )
+    return parser
+
+
+def add_subparser_dicom_index(
+    subparsers: _SubParsersAction,
+    formatter_class: type[HelpFormatter] = HelpFormatter,
+) -> ArgumentParser:
+    """Add subparser for dicom-index command."""
+    description = (
+        "Report statistics on the index of DICOM file headers read by the reorg"
+        " command (with --check-dicoms), and optionally remove the entries of"
+        " files that were deleted or modified."
+    )
+    parser = subparsers.add_parser(
+        COMMAND_DICOM_INDEX,
+        description=description,
+        help=description,
+        formatter_class=formatter_class,
+        add_help=False,
+    )
+    parser = add_arg_dataset_root(parser)
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove the entries of files that were deleted or modified.",
+    )
+    parser = add_arg_n_jobs(
+        parser,
+        help=(
+            "Number of files to check concurrently when pruning"
+            " (default: %(default)s)."
+        ),
+    )
     return parser
 
 
@@ -250,6 +468,17 @@ def add_subparser_bids_conversion(
     parser = add_arg_pipeline_step(parser)
     parser = add_args_participant_and_session(parser)
     parser = add_arg_simulate(parser)
+    parser = add_arg_n_jobs_pipeline(parser)
+    parser = add_arg_hpc(parser)
+    parser.add_argument(
+        "--no-update-doughnut",
+        dest="update_doughnut",
+        action="store_false",
+        help=(
+            "Do not update the doughnut file, even if the pipeline config says to"
+            " (e.g. when another process updates it)."
+        ),
+    )
     return parser
 
 
@@ -270,6 +499,9 @@ def add_subparser_pipeline_run(
     parser = add_arg_pipeline_step(parser)
     parser = add_args_participant_and_session(parser)
     parser = add_arg_simulate(parser)
+    parser = add_arg_n_jobs_pipeline(parser)
+    parser = add_arg_hpc(parser)
+    parser = add_args_worker(parser)
     return parser
 
 
@@ -291,6 +523,27 @@ def add_subparser_pipeline_track(
     return parser
 
 
+def add_subparser_compact(
+    subparsers: _SubParsersAction, formatter_class: type[HelpFormatter] = HelpFormatter
+) -> ArgumentParser:
+    """Add subparser for compact command."""
+    description = (
+        "Delete old backups of the dataset's tabular files (doughnut, bagel) and"
+        " store the remaining ones as full snapshots or deltas, according to the"
+        " backup options in the layout (files without backup options are not"
+        " changed)."
+    )
+    parser = subparsers.add_parser(
+        COMMAND_COMPACT,
+        description=description,
+        help=description,
+        formatter_class=formatter_class,
+        add_help=False,
+    )
+    parser = add_arg_dataset_root(parser)
+    return parser
+
+
 def get_global_parser(
     formatter_class: type[HelpFormatter] = HelpFormatter,
 ) -> ArgumentParser:
@@ -316,9 +569,11 @@ def get_global_parser(
     add_subparser_init(subparsers, formatter_class=formatter_class)
     add_subparser_doughnut(subparsers, formatter_class=formatter_class)
     add_subparser_dicom_reorg(subparsers, formatter_class=formatter_class)
+    add_subparser_dicom_index(subparsers, formatter_class=formatter_class)
     add_subparser_bids_conversion(subparsers, formatter_class=formatter_class)
     add_subparser_pipeline_run(subparsers, formatter_class=formatter_class)
     add_subparser_pipeline_track(subparsers, formatter_class=formatter_class)
+    add_subparser_compact(subparsers, formatter_class=formatter_class)
 
     # add common/global options to subcommand parsers
     for parser in list(subparsers.choices.values()):
@@ -8,6 +8,8 @@ from rich_argparse import RichHelpFormatter
 
 from nipoppy.cli.parser import (
     COMMAND_BIDS_CONVERSION,
+    COMMAND_COMPACT,
+    COMMAND_DICOM_INDEX,
     COMMAND_DICOM_REORG,
     COMMAND_DOUGHNUT,
     COMMAND_INIT,
@@ -18,7 +20,7 @@ from nipoppy.cli.parser import (
 from nipoppy.logger import add_logfile, capture_warnings, get_logger
 
 
-def cli(argv: Sequence[str] = None) -> None:
+def cli(argv: Sequence[str] = None) -> None:  # noqa: C901
     """Entrypoint to the command-line interface."""
     if argv is None:
         argv = sys.argv
@@ -53,6 +55,11 @@ def cli(argv: Sequence[str] = None) -> None:
                 dpath_root=dpath_root,
                 empty=args.empty,
                 regenerate=args.regenerate,
+                refresh=args.refresh,
+                n_jobs=args.n_jobs,
+                watch=args.watch,
+                debounce=args.debounce,
+                poll_interval=args.poll_interval,
                 **workflow_kwargs,
             )
         elif command == COMMAND_DICOM_REORG:
@@ -63,6 +70,18 @@ def cli(argv: Sequence[str] = None) -> None:
                 dpath_root=dpath_root,
                 copy_files=args.copy_files,
                 check_dicoms=args.check_dicoms,
+                n_jobs=args.n_jobs,
+                transfer_mode=args.transfer_mode,
+                **workflow_kwargs,
+            )
+        elif command == COMMAND_DICOM_INDEX:
+            # Lazy import to improve performance of cli.
+            from nipoppy.workflows.dicom_index import DicomHeaderIndexWorkflow
+
+            workflow = DicomHeaderIndexWorkflow(
+                dpath_root=dpath_root,
+                prune=args.prune,
+                n_jobs=args.n_jobs,
                 **workflow_kwargs,
             )
         elif command == COMMAND_BIDS_CONVERSION:
@@ -77,6 +96,9 @@ def cli(argv: Sequence[str] = None) -> None:
                 participant_id=args.participant_id,
                 session_id=args.session_id,
                 simulate=args.simulate,
+                n_jobs=args.n_jobs,
+                hpc=args.hpc,
+                update_doughnut=args.update_doughnut,
                 **workflow_kwargs,
             )
         elif command == COMMAND_PIPELINE_RUN:
@@ -91,6 +113,11 @@ def cli(argv: Sequence[str] = None) -> None:
                 participant_id=args.participant_id,
                 session_id=args.session_id,
                 simulate=args.simulate,
+                n_jobs=args.n_jobs,
+                hpc=args.hpc,
+                worker=args.worker,
+                walltime=args.walltime,
+                reset_work_list=args.reset_work_list,
                 **workflow_kwargs,
             )
         elif command == COMMAND_PIPELINE_TRACK:
@@ -105,6 +132,14 @@ def cli(argv: Sequence[str] = None) -> None:
                 session_id=args.session_id,
                 **workflow_kwargs,
             )
+        elif command == COMMAND_COMPACT:
+            # Lazy import to improve performance of cli.
+            from nipoppy.workflows.backups import BackupCompactionWorkflow
+
+            workflow = BackupCompactionWorkflow(
+                dpath_root=dpath_root,
+                **workflow_kwargs,
+            )
         else:
             raise ValueError(f"Unsupported command: {command}")
 
@@ -255,6 +255,7 @@ def prepare_container(
     subcommand: str = "run",
     check=True,
     logger: Optional[logging.Logger] = None,
+    env: Optional[dict[str, str]] = None,
 ) -> str:
     """Build the command for container and set environment variables.
 
@@ -267,6 +268,9 @@ def prepare_container(
         if needed, by default True
     logger : Optional[logging.Logger], optional
         Logger, by default None
+    env : Optional[dict[str, str]], optional
+        Mapping in which to set the environment variables. If None (default),
+        they are set in ``os.environ``, which affects all subsequent subprocesses
 
     Returns
     -------
@@ -281,19 +285,26 @@ def prepare_container(
         command = check_container_command(command)
         args = check_container_args(args, logger=logger)
 
-    set_container_env_vars(env_vars, logger=logger)
+    set_container_env_vars(env_vars, logger=logger, env=env)
 
     return shlex.join([command, subcommand] + args)
 
 
 def set_container_env_vars(
-    env_vars: dict[str, str], logger: Optional[logging.Logger] = None
+    env_vars: dict[str, str],
+    logger: Optional[logging.Logger] = None,
+    env: Optional[dict[str, str]] = None,
 ) -> None:
-    """Set environment variables for the container."""
+    """Set environment variables for the container.
+
+    The variables are set in ``env`` if it is given, otherwise in ``os.environ``.
+    """
     if logger is None:
         logger = get_logger("set_container_env_vars")
+    if env is None:
+        env = os.environ
     for var, value in env_vars.items():
         for prefix in APPTAINER_ENVVAR_PREFIXES:
             var_with_prefix = f"{prefix}{var}"
             logger.info(f"Setting environment variable: {var_with_prefix}={value}")
-            os.environ[var_with_prefix] = value
+            env[var_with_prefix] = value
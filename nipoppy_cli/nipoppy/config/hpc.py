@@ -0,0 +1,60 @@
+"""HPC job scheduler (i.e., SLURM/SGE) configuration model."""
+
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class HpcConfig(BaseModel):
+    """
+    Schema for HPC job submission configuration.
+
+    Does not include the resources needed by each participant-session, which are
+    specified in the pipeline step configurations.
+    """
+
+    QUEUE: Optional[str] = Field(
+        default=None,
+        description="Partition (SLURM) or queue (SGE) to submit jobs to",
+    )
+    ACCOUNT: Optional[str] = Field(
+        default=None,
+        description="Account (SLURM) or project (SGE) to charge the jobs to",
+    )
+    MAX_CONCURRENT_TASKS: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Maximum number of participant-sessions (array tasks) running at the"
+            " same time. If not specified, the scheduler's default is used"
+        ),
+    )
+    DEPENDENCIES: list[str] = Field(
+        default=[],
+        description=(
+            "IDs of jobs that must have completed (successfully, for SLURM) before"
+            " the submitted jobs can start"
+        ),
+    )
+    PARALLEL_ENVIRONMENT: str = Field(
+        default="smp",
+        description=(
+            "Parallel environment used to request multiple CPUs per task (SGE only)"
+        ),
+    )
+    ARGS: list[str] = Field(
+        default=[],
+        description=(
+            "Additional options for the job scheduler, each written as a separate"
+            ' directive in the job script (e.g. "--qos=normal" for SLURM)'
+        ),
+    )
+    PREAMBLE: list[str] = Field(
+        default=[],
+        description=(
+            "Shell commands to run at the start of each job"
+            ' (e.g. "module load apptainer")'
+        ),
+    )
+
+    model_config = ConfigDict(extra="forbid")
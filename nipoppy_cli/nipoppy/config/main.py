@@ -9,6 +9,7 @@ from pydantic import ConfigDict, Field, model_validator
 from typing_extensions import Self
 
 from nipoppy.config.container import SchemaWithContainerConfig
+from nipoppy.config.hpc import HpcConfig
 from nipoppy.config.pipeline import (
     BasePipelineConfig,
     BidsPipelineConfig,
@@ -73,6 +74,13 @@ class Config(SchemaWithContainerConfig):
     PROC_PIPELINES: list[ProcPipelineConfig] = Field(
         description="Configurations for processing pipelines"
     )
+    HPC_CONFIG: HpcConfig = Field(
+        default=HpcConfig(),
+        description=(
+            "Configuration for submitting pipeline runs to an HPC job scheduler"
+            " (with the --hpc option)"
+        ),
+    )
     CUSTOM: dict = Field(
         default={},
         description="Free field that can be used for any purpose",
@@ -13,6 +13,7 @@ from nipoppy.config.pipeline_step import (
     BasePipelineStepConfig,
     BidsPipelineStepConfig,
     ProcPipelineStepConfig,
+    ResourcesConfig,
 )
 
 
@@ -102,6 +103,14 @@ class BasePipelineConfig(SchemaWithContainerConfig, ABC):
         """
         return self.get_step_config(step_name).DESCRIPTOR_FILE
 
+    def get_resources(self, step_name: Optional[str] = None) -> ResourcesConfig:
+        """
+        Return the resources needed by the given step.
+
+        If step is None, return the resources for the first step.
+        """
+        return self.get_step_config(step_name).RESOURCES
+
 
 class BidsPipelineConfig(BasePipelineConfig):
     """Schema for BIDS pipeline configuration."""
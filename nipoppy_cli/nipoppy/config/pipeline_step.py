@@ -6,12 +6,41 @@ from abc import ABC
 from pathlib import Path
 from typing import Optional
 
-from pydantic import ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from nipoppy.config.container import SchemaWithContainerConfig
+from nipoppy.env import WALLTIME_PATTERN
 from nipoppy.tabular.doughnut import Doughnut
 
 
+class ResourcesConfig(BaseModel):
+    """Schema for the resources needed to run a pipeline step."""
+
+    N_CPUS: int = Field(
+        default=1,
+        ge=1,
+        description="Number of CPUs needed to run on a single participant-session",
+    )
+    MEMORY_GB: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "Memory (in GB) needed to run on a single participant-session"
+            ". If not specified, memory is not taken into account when deciding"
+            " how many participant-sessions to run concurrently"
+        ),
+    )
+    WALLTIME: Optional[str] = Field(
+        default=None,
+        pattern=WALLTIME_PATTERN,
+        description=(
+            "Maximum run time for a single participant-session (HH:MM:SS)"
+            ", requested when submitting jobs to an HPC scheduler"
+        ),
+    )
+    model_config = ConfigDict(extra="forbid")
+
+
 class BasePipelineStepConfig(SchemaWithContainerConfig, ABC):
     """Schema for processing pipeline step configuration."""
 
@@ -29,6 +58,10 @@ class BasePipelineStepConfig(SchemaWithContainerConfig, ABC):
         default=None,
         description=("Path to the JSON invocation file"),
     )
+    RESOURCES: ResourcesConfig = Field(
+        default=ResourcesConfig(),
+        description="Resources needed to run the step on a single participant-session",
+    )
 
 
 class ProcPipelineStepConfig(BasePipelineStepConfig):
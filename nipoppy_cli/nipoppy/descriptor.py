@@ -0,0 +1,147 @@
+"""In-process handling of Boutiques descriptors and invocations."""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Optional
+
+import jsonschema
+from boutiques import bosh
+from boutiques.invocationSchemaHandler import generateInvocationSchema
+from boutiques.localExec import LocalExecutor, addDefaultValues
+
+# same options as `bosh exec simulate`
+EXECUTOR_OPTIONS = {
+    "forcePathType": True,
+    "destroyTempScripts": True,
+    "changeUser": True,
+    "skipDataCollect": True,
+    "requireComplete": False,
+    "sandbox": False,
+}
+
+# maximum number of descriptors kept in the cache (descriptors can differ between
+# participants if they contain participant-specific template strings)
+DESCRIPTOR_CACHE_SIZE = 16
+
+
+class CompiledDescriptor:
+    """A validated Boutiques descriptor, with its compiled invocation schema.
+
+    Replaces the ``bosh invocation`` and ``bosh exec`` commands, so that the
+    command line for an invocation can be obtained without validating the
+    descriptor again or starting a new Python process.
+    """
+
+    def __init__(self, descriptor_str: str):
+        """Validate the descriptor and compile its invocation schema.
+
+        Parameters
+        ----------
+        descriptor_str : str
+            JSON string of the descriptor
+        """
+        bosh(["validate", descriptor_str])
+        self.descriptor_str = descriptor_str
+        self.descriptor = json.loads(descriptor_str)
+        invocation_schema = self.descriptor.get("invocation-schema")
+        if invocation_schema is None:
+            # the schema generation can modify the descriptor
+            invocation_schema = generateInvocationSchema(copy.deepcopy(self.descriptor))
+        self.invocation_validator = jsonschema.Draft4Validator(invocation_schema)
+
+    @property
+    def has_container_image(self) -> bool:
+        """Whether Boutiques itself is expected to run the tool in a container."""
+        return self.descriptor.get("container-image") is not None
+
+    def validate_invocation(self, invocation: dict) -> dict:
+        """Validate an invocation (like ``bosh invocation``).
+
+        Returns
+        -------
+        dict
+            The invocation, with the default values of missing inputs
+
+        Raises
+        ------
+        ValueError
+            If the invocation is not valid for the descriptor
+        """
+        invocation = addDefaultValues(self.descriptor, dict(invocation))
+        error = jsonschema.exceptions.best_match(
+            self.invocation_validator.iter_errors(invocation)
+        )
+        if error is not None:
+            raise ValueError(f"Invalid invocation: {error.message}")
+        return invocation
+
+    def get_command_line(self, invocation: dict) -> str:
+        """Get the shell command line for a validated invocation.
+
+        The command line is generated by Boutiques (like ``bosh exec simulate``),
+        including the escaping of special characters and the writing of
+        configuration files. This uses a private method of Boutiques' executor
+        (see ``test_boutiques_private_api`` in the tests).
+        """
+        executor = LocalExecutor(self.descriptor_str, None, EXECUTOR_OPTIONS)
+        executor.in_dict = invocation
+        return executor._generateCmdLineFromInDict()
+
+    def get_env_vars(self, invocation: dict) -> dict[str, str]:
+        """Get the environment variables to set when running the command line.
+
+        Values that are the value-key of an input are replaced by the value of
+        that input in the invocation, like in ``bosh exec launch``. Variables
+        whose input is not in the invocation (i.e. optional inputs without a
+        default value) are not set.
+        """
+        inputs_by_value_key = {
+            input_info["value-key"]: input_info
+            for input_info in self.descriptor["inputs"]
+            if "value-key" in input_info
+        }
+        env_vars = {}
+        for env_var in self.descriptor.get("environment-variables", []):
+            value = env_var["value"]
+            if value in inputs_by_value_key:
+                value = invocation.get(inputs_by_value_key[value]["id"])
+                if value is None:
+                    continue
+            env_vars[env_var["name"]] = str(value)
+        return env_vars
+
+
+_descriptor_cache: OrderedDict[str, CompiledDescriptor] = OrderedDict()
+
+
+def get_compiled_descriptor(
+    descriptor_str: str, cache: Optional[OrderedDict] = None
+) -> CompiledDescriptor:
+    """Get a validated descriptor, reusing the result for identical content.
+
+    Parameters
+    ----------
+    descriptor_str : str
+        JSON string of the descriptor
+    cache : Optional[OrderedDict], optional
+        Compiled descriptors by SHA-256 hash of their content, by default the
+        module-level cache
+
+    Returns
+    -------
+    CompiledDescriptor
+    """
+    if cache is None:
+        cache = _descriptor_cache
+    key = hashlib.sha256(descriptor_str.encode()).hexdigest()
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = CompiledDescriptor(descriptor_str)
+        if len(cache) > DESCRIPTOR_CACHE_SIZE:
+            cache.popitem(last=False)
+    return cache[key]
@@ -0,0 +1,309 @@
+"""Persistent index of DICOM header information."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from pydicom.filereader import read_partial
+from pydicom.tag import BaseTag, Tag
+
+from nipoppy.env import StrOrPathLike
+from nipoppy.parallel import parallel_map
+from nipoppy.tabular.doughnut import RACY_MTIME_NS
+
+FNAME_DICOM_HEADER_INDEX = "dicom_header_index.sqlite"
+
+# incremented when the table definition changes (the index is then rebuilt)
+SCHEMA_VERSION = 1
+
+TAG_IMAGE_TYPE = Tag(0x0008, 0x0008)
+TAG_SOP_INSTANCE_UID = Tag(0x0008, 0x0018)
+TAG_SERIES_DESCRIPTION = Tag(0x0008, 0x103E)
+TAG_SERIES_INSTANCE_UID = Tag(0x0020, 0x000E)
+HEADER_TAGS = [
+    TAG_IMAGE_TYPE,
+    TAG_SOP_INSTANCE_UID,
+    TAG_SERIES_DESCRIPTION,
+    TAG_SERIES_INSTANCE_UID,
+]
+
+# separator for multi-valued elements (same as in the DICOM standard)
+VALUE_SEPARATOR = "\\"
+
+# maximum number of parameters in a single SQL query
+MAX_QUERY_PARAMS = 500
+
+
+class DicomHeaderInfo(NamedTuple):
+    """Information read from a DICOM file header.
+
+    ``error`` is set (and the other fields are None) if the file cannot be read.
+    """
+
+    image_type: Optional[tuple[str, ...]] = None
+    sop_instance_uid: Optional[str] = None
+    series_instance_uid: Optional[str] = None
+    series_description: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def is_readable(self) -> bool:
+        """Whether the file header could be read."""
+        return self.error is None
+
+    @property
+    def is_derived(self) -> bool:
+        """Whether the ImageType element has the DERIVED value."""
+        return self.image_type is not None and "DERIVED" in self.image_type
+
+
+def _stop_after_header_tags(tag: BaseTag, vr: Optional[str], length: int) -> bool:
+    return tag > HEADER_TAGS[-1]
+
+
+def _get_str(dcm_info, tag: BaseTag) -> Optional[str]:
+    if tag not in dcm_info:
+        return None
+    return str(dcm_info[tag].value)
+
+
+def read_dicom_header(fpath: StrOrPathLike) -> DicomHeaderInfo:
+    """Read the elements of interest from a DICOM file header.
+
+    Reading stops after the last element of interest, so pixel data is never read.
+    Elements missing from the file are set to None.
+    """
+    with open(fpath, "rb") as file_dicom:
+        dcm_info = read_partial(
+            file_dicom, stop_when=_stop_after_header_tags, specific_tags=HEADER_TAGS
+        )
+    image_type = None
+    if TAG_IMAGE_TYPE in dcm_info:
+        value = dcm_info[TAG_IMAGE_TYPE].value
+        if isinstance(value, str):
+            value = [value]
+        image_type = tuple(str(item) for item in value)
+    return DicomHeaderInfo(
+        image_type=image_type,
+        sop_instance_uid=_get_str(dcm_info, TAG_SOP_INSTANCE_UID),
+        series_instance_uid=_get_str(dcm_info, TAG_SERIES_INSTANCE_UID),
+        series_description=_get_str(dcm_info, TAG_SERIES_DESCRIPTION),
+    )
+
+
+def probe_dicom_header(fpath: StrOrPathLike) -> DicomHeaderInfo:
+    """Read a DICOM file header, returning the error instead of raising it."""
+    try:
+        return read_dicom_header(fpath)
+    except Exception as exception:
+        return DicomHeaderInfo(error=f"{type(exception).__name__}: {exception}")
+
+
+class DicomHeaderIndex:
+    """On-disk (SQLite) cache of DICOM header information.
+
+    Entries are keyed on the absolute file path and are only used if the file's
+    size and modification time (in nanoseconds) have not changed. Files modified
+    very recently are not indexed, since they could still be changing without
+    their modification time being updated.
+
+    All operations are protected by a lock, so an index can be shared by threads.
+    """
+
+    def __init__(self, fpath: StrOrPathLike, read_only: bool = False):
+        """Open (or create) the index.
+
+        Parameters
+        ----------
+        fpath : StrOrPathLike
+            Path to the SQLite file
+        read_only : bool, optional
+            If True, entries are never added or removed (e.g. for dry runs)
+        """
+        self.fpath = Path(fpath)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+
+        if read_only:
+            self._connection = sqlite3.connect(
+                f"{self.fpath.absolute().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        else:
+            self.fpath.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.fpath, check_same_thread=False)
+            self._create_table()
+
+    def _create_table(self) -> None:
+        with self._lock, self._connection:
+            (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS headers")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS headers ("
+                "path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " image_type TEXT,"
+                " sop_instance_uid TEXT,"
+                " series_instance_uid TEXT,"
+                " series_description TEXT,"
+                " error TEXT)"
+            )
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _get_key(fpath: StrOrPathLike) -> str:
+        return os.path.abspath(fpath)
+
+    def get_many(
+        self, stats: dict[StrOrPathLike, tuple[int, int]]
+    ) -> dict[StrOrPathLike, DicomHeaderInfo]:
+        """Get the indexed information for files that have not changed.
+
+        Parameters
+        ----------
+        stats : dict[StrOrPathLike, tuple[int, int]]
+            Mapping from file paths to current (size, mtime_ns)
+
+        Returns
+        -------
+        dict[StrOrPathLike, DicomHeaderInfo]
+            Information for the files that are indexed with the same size and
+            modification time (using the same keys as ``stats``)
+        """
+        fpaths_by_key = {self._get_key(fpath): fpath for fpath in stats}
+        keys = list(fpaths_by_key)
+        infos = {}
+        with self._lock:
+            for i_start in range(0, len(keys), MAX_QUERY_PARAMS):
+                keys_chunk = keys[i_start : i_start + MAX_QUERY_PARAMS]
+                rows = self._connection.execute(
+                    "SELECT * FROM headers WHERE path IN"
+                    f" ({','.join('?' * len(keys_chunk))})",
+                    keys_chunk,
+                )
+                for key, size, mtime_ns, image_type, *values in rows:
+                    fpath = fpaths_by_key[key]
+                    if stats[fpath] != (size, mtime_ns):
+                        continue
+                    if image_type is not None:
+                        image_type = tuple(image_type.split(VALUE_SEPARATOR))
+                    infos[fpath] = DicomHeaderInfo(image_type, *values)
+        return infos
+
+    def set_many(
+        self,
+        stats: dict[StrOrPathLike, tuple[int, int]],
+        infos: dict[StrOrPathLike, DicomHeaderInfo],
+    ) -> int:
+        """Add or replace entries (in a single transaction).
+
+        Files without an entry in ``stats`` or modified less than
+        ``RACY_MTIME_NS`` ago are skipped. Returns the number of entries written.
+        """
+        if self.read_only:
+            return 0
+        mtime_ns_max = time.time_ns() - RACY_MTIME_NS
+        rows = []
+        for fpath, info in infos.items():
+            if fpath not in stats:
+                continue
+            size, mtime_ns = stats[fpath]
+            if mtime_ns > mtime_ns_max:
+                continue
+            image_type = info.image_type
+            if image_type is not None:
+                image_type = VALUE_SEPARATOR.join(image_type)
+            rows.append((self._get_key(fpath), size, mtime_ns, image_type, *info[1:]))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def get_stats(self) -> dict[str, int]:
+        """Get the number of entries (total, unreadable and derived files)."""
+        with self._lock:
+            n_entries, n_unreadable, n_derived = self._connection.execute(
+                "SELECT COUNT(*),"
+                " COUNT(error),"
+                " COUNT(CASE WHEN"
+                f" '{VALUE_SEPARATOR}' || image_type || '{VALUE_SEPARATOR}'"
+                f" LIKE '%{VALUE_SEPARATOR}DERIVED{VALUE_SEPARATOR}%'"
+                " THEN 1 END)"
+                " FROM headers"
+            ).fetchone()
+        return {
+            "n_entries": n_entries,
+            "n_unreadable": n_unreadable,
+            "n_derived": n_derived,
+        }
+
+    def prune(self, n_jobs: int = 1) -> int:
+        """Remove the entries of files that were deleted or modified.
+
+        Files are checked with up to ``n_jobs`` threads. Returns the number of
+        entries removed (or that would be removed, for a read-only index).
+        """
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT path, size, mtime_ns FROM headers"
+            ).fetchall()
+
+        def _is_stale(entry: tuple[str, int, int]) -> bool:
+            key, size, mtime_ns = entry
+            try:
+                stat = os.stat(key)
+            except OSError:
+                return True
+            return (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns)
+
+        keys_stale = [
+            (entry[0],)
+            for entry, is_stale in zip(
+                entries, parallel_map(_is_stale, entries, n_jobs=n_jobs)
+            )
+            if is_stale
+        ]
+        if len(keys_stale) > 0 and not self.read_only:
+            with self._lock:
+                with self._connection:
+                    self._connection.executemany(
+                        "DELETE FROM headers WHERE path = ?", keys_stale
+                    )
+                self._connection.execute("VACUUM")
+        return len(keys_stale)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def get_file_stats(
+    fpaths: Iterable[StrOrPathLike],
+) -> dict[StrOrPathLike, tuple[int, int]]:
+    """Get the size and modification time (in nanoseconds) of files.
+
+    Files that cannot be accessed are skipped.
+    """
+    stats = {}
+    for fpath in fpaths:
+        try:
+            stat = os.stat(fpath)
+        except OSError:
+            continue
+        stats[fpath] = (stat.st_size, stat.st_mtime_ns)
+    return stats
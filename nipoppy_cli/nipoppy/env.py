@@ -1,10 +1,29 @@
 """Variable Definitions."""
 
 import os
-from typing import TypeVar
+from typing import Literal, TypeVar, get_args
 
 StrOrPathLike = TypeVar("StrOrPathLike", str, os.PathLike)
 
+# storage formats for tabular files ("arrow" is the Arrow IPC/Feather V2 format)
+TabularFileFormat = Literal["csv", "parquet", "arrow"]
+TABULAR_FILE_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+# ways to place files in the organized DICOM directory (see nipoppy.transfer)
+TransferMode = Literal["symlink", "hardlink", "reflink", "copy", "move"]
+TRANSFER_MODES = get_args(TransferMode)
+
+# job schedulers to which pipeline runs can be submitted (see nipoppy.hpc)
+HpcScheduler = Literal["slurm", "sge"]
+HPC_SCHEDULERS = get_args(HpcScheduler)
+# format of job time limits (HH:MM:SS)
+WALLTIME_PATTERN = r"^\d+:\d{2}:\d{2}$"
+
 # BIDS
 BIDS_SUBJECT_PREFIX = "sub-"
 BIDS_SESSION_PREFIX = "ses-"
@@ -0,0 +1,180 @@
+"""Execution of pipeline jobs (one participant-session each) in subprocesses."""
+
+from __future__ import annotations
+
+import logging
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from collections import deque
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+from nipoppy.logger import get_logger
+from nipoppy.parallel import check_n_jobs, parallel_map
+
+# number of lines of a failed job's error output to show in the log
+N_LINES_ERROR_OUTPUT = 20
+
+
+class Job(NamedTuple):
+    """Command to run in a subprocess."""
+
+    name: str
+    args: Sequence[str]
+
+
+def get_available_cpus() -> int:
+    """Get the number of CPUs that this process is allowed to use."""
+    try:
+        # takes into account CPU affinity (e.g. taskset, cgroups, HPC allocations)
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+def get_available_memory_gb() -> Optional[float]:
+    """Get the memory (in GB) that can be used, or None if it cannot be determined.
+
+    Inside a SLURM job, this is the memory allocated on the current node.
+    Otherwise, it is the total physical memory.
+    """
+    # set by SLURM if memory was requested with --mem or --mem-per-cpu (in MB)
+    if "SLURM_MEM_PER_NODE" in os.environ:
+        return int(os.environ["SLURM_MEM_PER_NODE"]) / 1024
+    if "SLURM_MEM_PER_CPU" in os.environ and "SLURM_CPUS_ON_NODE" in os.environ:
+        return (
+            int(os.environ["SLURM_MEM_PER_CPU"])
+            * int(os.environ["SLURM_CPUS_ON_NODE"])
+            / 1024
+        )
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_max_concurrent_jobs(
+    n_jobs: int,
+    n_cpus: int = 1,
+    memory_gb: Optional[float] = None,
+    n_cpus_available: Optional[int] = None,
+    memory_gb_available: Optional[float] = None,
+) -> int:
+    """Get the number of jobs that can run at the same time.
+
+    Parameters
+    ----------
+    n_jobs : int
+        Requested maximum number of concurrent jobs
+    n_cpus : int, optional
+        Number of CPUs needed by each job, by default 1
+    memory_gb : Optional[float], optional
+        Memory (in GB) needed by each job. If None, memory is not taken into account
+    n_cpus_available : Optional[int], optional
+        Number of CPUs that can be used. If None, determined automatically
+    memory_gb_available : Optional[float], optional
+        Memory (in GB) that can be used. If None, determined automatically
+
+    Returns
+    -------
+    int
+        At least 1, even if a single job does not fit in the available resources
+    """
+    n_jobs = check_n_jobs(n_jobs)
+    if n_cpus_available is None:
+        n_cpus_available = get_available_cpus()
+    n_concurrent = min(n_jobs, n_cpus_available // n_cpus)
+
+    if memory_gb is not None:
+        if memory_gb_available is None:
+            memory_gb_available = get_available_memory_gb()
+        if memory_gb_available is not None:
+            n_concurrent = min(n_concurrent, int(memory_gb_available // memory_gb))
+
+    return max(n_concurrent, 1)
+
+
+def _read_tail(file, n_lines: int) -> list[str]:
+    """Get the last lines of a (binary) file object."""
+    file.seek(0)
+    return [
+        line.decode(errors="replace").rstrip() for line in deque(file, maxlen=n_lines)
+    ]
+
+
+class LocalExecutor:
+    """Run jobs concurrently on the local machine, within CPU and memory budgets.
+
+    Each job runs in its own subprocess, with a copy of the current environment.
+    Its standard output is discarded (jobs are expected to write their own log
+    files) and the end of its error output is logged if it fails.
+    """
+
+    def __init__(
+        self,
+        n_jobs: int = 1,
+        n_cpus: int = 1,
+        memory_gb: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the executor.
+
+        Parameters
+        ----------
+        n_jobs : int, optional
+            Maximum number of jobs to run at the same time, by default 1
+        n_cpus : int, optional
+            Number of CPUs needed by each job, by default 1
+        memory_gb : Optional[float], optional
+            Memory (in GB) needed by each job, by default None (not checked)
+        logger : Optional[logging.Logger], optional
+            Logger, by default None
+        """
+        if logger is None:
+            logger = get_logger("executor")
+        self.logger = logger
+        self.n_jobs = check_n_jobs(n_jobs)
+        self.n_concurrent = get_max_concurrent_jobs(
+            n_jobs, n_cpus=n_cpus, memory_gb=memory_gb
+        )
+        if self.n_concurrent < self.n_jobs:
+            memory_str = "" if memory_gb is None else f" and {memory_gb} GB of memory"
+            self.logger.warning(
+                f"Running at most {self.n_concurrent} jobs at the same time instead"
+                f" of {self.n_jobs}, since each job needs {n_cpus} CPU(s)"
+                f"{memory_str}"
+            )
+
+    def run_job(self, job: Job) -> int:
+        """Run a job in a subprocess and return its exit code."""
+        self.logger.info(f"Starting job for {job.name}")
+        self.logger.debug(f"Job command: {shlex.join(job.args)}")
+        time_start = time.perf_counter()
+        with tempfile.TemporaryFile() as file_stderr:
+            returncode = subprocess.run(
+                job.args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=file_stderr,
+            ).returncode
+            runtime = time.perf_counter() - time_start
+            self.log_job_result(job, returncode, runtime, file_stderr)
+        return returncode
+
+    def log_job_result(self, job: Job, returncode: int, runtime: float, file_stderr):
+        """Log the outcome of a job, with the end of its error output if it failed."""
+        if returncode == 0:
+            self.logger.info(f"Job for {job.name} finished in {runtime:.1f} s")
+        else:
+            self.logger.error(
+                f"Job for {job.name} failed with exit code {returncode}"
+                f" after {runtime:.1f} s"
+            )
+            for line in _read_tail(file_stderr, N_LINES_ERROR_OUTPUT):
+                self.logger.error(f"[JOB STDERR] {line}")
+
+    def run(self, jobs: Iterable[Job]) -> list[int]:
+        """Run jobs and return their exit codes (in the same order as the jobs)."""
+        return parallel_map(self.run_job, jobs, n_jobs=self.n_concurrent)
@@ -0,0 +1,313 @@
+"""Submission of pipeline runs to HPC job schedulers (SLURM, SGE)."""
+
+from __future__ import annotations
+
+import math
+import shlex
+import subprocess
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Sequence
+
+from nipoppy.config.hpc import HpcConfig
+from nipoppy.config.pipeline_step import ResourcesConfig
+from nipoppy.env import HpcScheduler, StrOrPathLike
+
+SHEBANG = "#!/bin/bash"
+# name of the (0-based) task index variable in array job scripts
+VAR_TASK_INDEX = "I_TASK"
+
+
+def get_memory_mb(memory_gb: float) -> int:
+    """Convert a memory requirement to a (rounded up) number of megabytes."""
+    return math.ceil(memory_gb * 1024)
+
+
+class BaseScheduler(ABC):
+    """Generate and submit job scripts for a job scheduler."""
+
+    # command-line program used to submit jobs
+    submit_command: str
+    # prefix of the lines with submission options in job scripts
+    directive_prefix: str
+    # environment variable with the (1-based) index of an array task
+    var_task_id: str
+
+    def __init__(self, hpc_config: Optional[HpcConfig] = None):
+        """Initialize the scheduler.
+
+        Parameters
+        ----------
+        hpc_config : Optional[HpcConfig], optional
+            Queue, account, throttling, dependencies and additional options,
+            by default None (scheduler defaults)
+        """
+        if hpc_config is None:
+            hpc_config = HpcConfig()
+        self.hpc_config = hpc_config
+
+    @abstractmethod
+    def get_directives(
+        self,
+        job_name: str,
+        dpath_output: Path,
+        resources: ResourcesConfig,
+        n_tasks: Optional[int] = None,
+        dependencies: Optional[Sequence[str]] = None,
+    ) -> list[str]:
+        """Get the submission options for a job (one per directive).
+
+        If ``n_tasks`` is None, the job is not an array job. The job waits for the
+        jobs in the HPC config to complete successfully, and for the jobs in
+        ``dependencies`` to complete (successfully or not).
+        """
+
+    @abstractmethod
+    def get_submit_args(self, fpath_script: StrOrPathLike) -> list[str]:
+        """Get the command to submit a job script."""
+
+    @abstractmethod
+    def parse_job_id(self, output: str) -> str:
+        """Get the job ID from the output of the submit command."""
+
+    def generate_script(
+        self,
+        job_name: str,
+        dpath_output: Path,
+        resources: ResourcesConfig,
+        args: Sequence[str],
+        task_args: Optional[dict[str, Sequence[str]]] = None,
+        dependencies: Optional[Sequence[str]] = None,
+    ) -> str:
+        """Generate a job script.
+
+        Parameters
+        ----------
+        job_name : str
+            Name of the job
+        dpath_output : Path
+            Directory for the output (stdout/stderr) files of the job
+        resources : ResourcesConfig
+            Resources needed by the command (or by each array task)
+        args : Sequence[str]
+            Command to run (common to all array tasks)
+        task_args : Optional[dict[str, Sequence[str]]], optional
+            If given, the job is an array job. Keys are command-line options and
+            values are the option's value for each task, appended to ``args``
+            (e.g. ``{"--participant-id": ["01", "02"]}`` for two tasks)
+        dependencies : Optional[Sequence[str]], optional
+            IDs of jobs that must complete (successfully or not) before this one
+            starts, in addition to the ones in the HPC config
+
+        Returns
+        -------
+        str
+            The content of the job script
+
+        Raises
+        ------
+        ValueError
+            If the options in ``task_args`` do not have the same number of values
+        """
+        n_tasks = None
+        if task_args is not None:
+            n_values = {option: len(values) for option, values in task_args.items()}
+            if len(set(n_values.values())) != 1:
+                raise ValueError(
+                    "All array task options must have the same number of values"
+                    f", got {n_values}"
+                )
+            [n_tasks] = set(n_values.values())
+
+        lines = [SHEBANG]
+        lines.extend(
+            f"{self.directive_prefix} {directive}"
+            for directive in self.get_directives(
+                job_name,
+                dpath_output,
+                resources,
+                n_tasks=n_tasks,
+                dependencies=dependencies,
+            )
+        )
+        lines.extend(f"{self.directive_prefix} {arg}" for arg in self.hpc_config.ARGS)
+        lines.append("")
+        if len(self.hpc_config.PREAMBLE) > 0:
+            lines.extend(self.hpc_config.PREAMBLE)
+            lines.append("")
+
+        command = shlex.join(args)
+        if task_args is not None:
+            # values are stored in bash arrays, so one script is enough for all tasks
+            for i_option, (option, values) in enumerate(task_args.items()):
+                lines.append(f"TASK_VALUES_{i_option}=(")
+                lines.extend(f"  {shlex.quote(value)}" for value in values)
+                lines.append(")")
+                value = f"${{TASK_VALUES_{i_option}[${VAR_TASK_INDEX}]}}"
+                command += f' {shlex.quote(option)} "{value}"'
+            lines.append(f"{VAR_TASK_INDEX}=$(({self.var_task_id} - 1))")
+            lines.append("")
+        lines.append(f"exec {command}")
+        return "\n".join(lines) + "\n"
+
+    def submit(self, fpath_script: StrOrPathLike) -> str:
+        """Submit a job script and return the job ID.
+
+        Raises
+        ------
+        RuntimeError
+            If the submit command is not found or fails
+        """
+        args = self.get_submit_args(fpath_script)
+        try:
+            process = subprocess.run(args, capture_output=True, text=True, check=True)
+        except FileNotFoundError:
+            raise RuntimeError(
+                f"Job submission command not found: {self.submit_command}"
+                ". Make sure it is installed and in your PATH."
+            )
+        except subprocess.CalledProcessError as exception:
+            raise RuntimeError(
+                f"Error submitting job script {fpath_script}"
+                f" (exit code {exception.returncode}): {exception.stderr.strip()}"
+            )
+        return self.parse_job_id(process.stdout)
+
+
+class SlurmScheduler(BaseScheduler):
+    """SLURM scheduler."""
+
+    submit_command = "sbatch"
+    directive_prefix = "#SBATCH"
+    var_task_id = "SLURM_ARRAY_TASK_ID"
+
+    def get_directives(
+        self,
+        job_name: str,
+        dpath_output: Path,
+        resources: ResourcesConfig,
+        n_tasks: Optional[int] = None,
+        dependencies: Optional[Sequence[str]] = None,
+    ) -> list[str]:
+        """Get the sbatch options for a job."""
+        # %x: job name, %A: array job ID, %a: task ID, %j: job ID
+        fname_output = "%x-%j.out" if n_tasks is None else "%x-%A_%a.out"
+        directives = [
+            f"--job-name={job_name}",
+            f"--output={dpath_output / fname_output}",
+            f"--cpus-per-task={resources.N_CPUS}",
+        ]
+        if n_tasks is not None:
+            array = f"1-{n_tasks}"
+            if self.hpc_config.MAX_CONCURRENT_TASKS is not None:
+                array += f"%{self.hpc_config.MAX_CONCURRENT_TASKS}"
+            directives.append(f"--array={array}")
+        if resources.MEMORY_GB is not None:
+            directives.append(f"--mem={get_memory_mb(resources.MEMORY_GB)}M")
+        if resources.WALLTIME is not None:
+            directives.append(f"--time={resources.WALLTIME}")
+        if self.hpc_config.QUEUE is not None:
+            directives.append(f"--partition={self.hpc_config.QUEUE}")
+        if self.hpc_config.ACCOUNT is not None:
+            directives.append(f"--account={self.hpc_config.ACCOUNT}")
+        conditions = []
+        if len(self.hpc_config.DEPENDENCIES) > 0:
+            conditions.append(f"afterok:{':'.join(self.hpc_config.DEPENDENCIES)}")
+        if dependencies:
+            conditions.append(f"afterany:{':'.join(dependencies)}")
+        if len(conditions) > 0:
+            directives.append(f"--dependency={','.join(conditions)}")
+        return directives
+
+    def get_submit_args(self, fpath_script: StrOrPathLike) -> list[str]:
+        """Get the sbatch command."""
+        return [self.submit_command, "--parsable", str(fpath_script)]
+
+    def parse_job_id(self, output: str) -> str:
+        """Get the job ID from the output of sbatch --parsable (ID[;cluster])."""
+        return output.strip().split(";")[0]
+
+
+class SgeScheduler(BaseScheduler):
+    """Sun/Son of/Univa Grid Engine scheduler."""
+
+    submit_command = "qsub"
+    directive_prefix = "#$"
+    var_task_id = "SGE_TASK_ID"
+
+    def get_directives(
+        self,
+        job_name: str,
+        dpath_output: Path,
+        resources: ResourcesConfig,
+        n_tasks: Optional[int] = None,
+        dependencies: Optional[Sequence[str]] = None,
+    ) -> list[str]:
+        """Get the qsub options for a job."""
+        fname_output = (
+            "$JOB_NAME-$JOB_ID.out"
+            if n_tasks is None
+            else "$JOB_NAME-$JOB_ID.$TASK_ID.out"
+        )
+        directives = [
+            f"-N {job_name}",
+            "-S /bin/bash",
+            f"-o {dpath_output / fname_output}",
+            "-j y",
+        ]
+        if n_tasks is not None:
+            directives.append(f"-t 1-{n_tasks}")
+            if self.hpc_config.MAX_CONCURRENT_TASKS is not None:
+                directives.append(f"-tc {self.hpc_config.MAX_CONCURRENT_TASKS}")
+        if resources.N_CPUS > 1:
+            directives.append(
+                f"-pe {self.hpc_config.PARALLEL_ENVIRONMENT} {resources.N_CPUS}"
+            )
+        if resources.MEMORY_GB is not None:
+            # memory is requested per slot (CPU)
+            memory_mb = math.ceil(get_memory_mb(resources.MEMORY_GB) / resources.N_CPUS)
+            directives.append(f"-l h_vmem={memory_mb}M")
+        if resources.WALLTIME is not None:
+            directives.append(f"-l h_rt={resources.WALLTIME}")
+        if self.hpc_config.QUEUE is not None:
+            directives.append(f"-q {self.hpc_config.QUEUE}")
+        if self.hpc_config.ACCOUNT is not None:
+            directives.append(f"-P {self.hpc_config.ACCOUNT}")
+        # SGE does not distinguish between successful and failed dependencies
+        dependencies = list(self.hpc_config.DEPENDENCIES) + list(dependencies or [])
+        if len(dependencies) > 0:
+            directives.append(f"-hold_jid {','.join(dependencies)}")
+        return directives
+
+    def get_submit_args(self, fpath_script: StrOrPathLike) -> list[str]:
+        """Get the qsub command."""
+        return [self.submit_command, "-terse", str(fpath_script)]
+
+    def parse_job_id(self, output: str) -> str:
+        """Get the job ID from the output of qsub -terse (ID[.TASKS])."""
+        return output.strip().split(".")[0]
+
+
+SCHEDULERS: dict[str, type[BaseScheduler]] = {
+    "slurm": SlurmScheduler,
+    "sge": SgeScheduler,
+}
+
+
+def get_scheduler(
+    name: HpcScheduler, hpc_config: Optional[HpcConfig] = None
+) -> BaseScheduler:
+    """Get a scheduler by name.
+
+    Raises
+    ------
+    ValueError
+        If the scheduler is not supported
+    """
+    try:
+        scheduler_class = SCHEDULERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Invalid HPC scheduler: {name}. Valid schedulers are {list(SCHEDULERS)}"
+        )
+    return scheduler_class(hpc_config)
@@ -6,8 +6,9 @@ from typing import Any, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from nipoppy.backups import BackupPolicy
 from nipoppy.base import Base
-from nipoppy.env import StrOrPathLike
+from nipoppy.env import StrOrPathLike, TabularFileFormat
 from nipoppy.utils import FPATH_DEFAULT_LAYOUT, get_pipeline_tag, load_json
 
 
@@ -42,6 +43,39 @@ class OptionalFpathInfo(FpathInfo):
     _is_required = False
 
 
+class TabularFpathInfo(FpathInfo):
+    """Relative path, description and storage options for a tabular file."""
+
+    format: Optional[TabularFileFormat] = Field(
+        default=None,
+        description=(
+            "Storage format for the file (determined from the file extension"
+            " if not specified). The Parquet and Arrow formats require pyarrow"
+        ),
+    )
+    export_csv: bool = Field(
+        default=False,
+        description=(
+            "Whether to also write a human-readable CSV copy of the file"
+            " (only used for Parquet and Arrow formats)"
+        ),
+    )
+    backups: Optional[BackupPolicy] = Field(
+        default=None,
+        description=(
+            "Storage (full snapshots/deltas) and retention options for the"
+            " timestamped backups of the file. If not specified, all backups are"
+            " kept as full copies"
+        ),
+    )
+
+
+class OptionalTabularFpathInfo(TabularFpathInfo):
+    """Relative path, description and storage options for an optional tabular file."""
+
+    _is_required = False
+
+
 class LayoutConfig(BaseModel):
     """Relative paths for the dataset layout."""
 
@@ -99,14 +133,14 @@ class LayoutConfig(BaseModel):
     )
 
     fpath_config: FpathInfo = Field(description="Path to the configuration file")
-    fpath_manifest: FpathInfo = Field(description="Path to the manifest file")
-    fpath_doughnut: OptionalFpathInfo = Field(
+    fpath_manifest: TabularFpathInfo = Field(description="Path to the manifest file")
+    fpath_doughnut: OptionalTabularFpathInfo = Field(
         description=(
             "Path to the doughnut file (for tracking the "
             "DICOM-to-BIDS conversion process)"
         )
     )
-    fpath_imaging_bagel: OptionalFpathInfo = Field(
+    fpath_imaging_bagel: OptionalTabularFpathInfo = Field(
         description=(
             "Path to the imaging bagel file (for tracking imaging derivative "
             "availability at the participant level)"
@@ -210,6 +244,18 @@ class DatasetLayout(Base):
             else:
                 raise exception
 
+    def get_tabular_fpath_info(
+        self, fpath: StrOrPathLike
+    ) -> Optional[TabularFpathInfo]:
+        """Return the TabularFpathInfo object for a full file path (if any)."""
+        fpath = Path(fpath)
+        for path_info in self.config.path_infos:
+            if not isinstance(path_info, TabularFpathInfo):
+                continue
+            if self.get_full_path(path_info.path) == fpath:
+                return path_info
+        return None
+
     def get_paths(self, directory=True, include_optional=False) -> list[Path]:
         """Return a list of all directory or file paths."""
         paths = [
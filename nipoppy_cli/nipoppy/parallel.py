@@ -0,0 +1,218 @@
+"""Utilities for running (I/O-bound) tasks concurrently."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# interval (in seconds) between progress messages
+DEFAULT_LOG_INTERVAL = 10.0
+
+# maximum number of pending tasks per worker
+MAX_PENDING_PER_JOB = 2
+
+# number of seconds between checks of whether a prefetching thread should stop
+PREFETCH_POLL_INTERVAL = 0.1
+
+
+def check_n_jobs(n_jobs: int) -> int:
+    """Check that the number of concurrent jobs is valid.
+
+    Raises
+    ------
+    ValueError
+        If ``n_jobs`` is not a positive integer
+    """
+    if isinstance(n_jobs, bool) or not isinstance(n_jobs, int) or n_jobs < 1:
+        raise ValueError(f"Number of jobs must be a positive integer, got {n_jobs}")
+    return n_jobs
+
+
+class ProgressLogger:
+    """Periodically log the number of completed tasks and the throughput."""
+
+    def __init__(
+        self,
+        n_total: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+        description: str = "tasks",
+        log_interval: float = DEFAULT_LOG_INTERVAL,
+    ):
+        """Initialize the progress logger.
+
+        Parameters
+        ----------
+        n_total : Optional[int], optional
+            Total number of tasks, if known
+        logger : Optional[logging.Logger], optional
+            Logger to use. If None, nothing is logged
+        description : str, optional
+            What the tasks are, used in the log messages
+        log_interval : float, optional
+            Minimum number of seconds between two progress messages
+        """
+        self.n_total = n_total
+        self.logger = logger
+        self.description = description
+        self.log_interval = log_interval
+
+        self.n_done = 0
+        self.time_start = time.perf_counter()
+        self._time_last_log = self.time_start
+
+    @property
+    def elapsed(self) -> float:
+        """Number of seconds since the start."""
+        return time.perf_counter() - self.time_start
+
+    @property
+    def throughput(self) -> float:
+        """Number of completed tasks per second."""
+        elapsed = self.elapsed
+        if elapsed == 0:
+            return 0.0
+        return self.n_done / elapsed
+
+    def get_message(self) -> str:
+        """Get a message summarizing the progress so far."""
+        n_done = (
+            self.n_done if self.n_total is None else f"{self.n_done}/{self.n_total}"
+        )
+        return (
+            f"Processed {n_done} {self.description}"
+            f" in {self.elapsed:.1f} s ({self.throughput:.1f} {self.description}/s)"
+        )
+
+    def update(self, n_done: int = 1) -> None:
+        """Record completed tasks and log a message if needed."""
+        self.n_done += n_done
+        if self.logger is None:
+            return
+        now = time.perf_counter()
+        if now - self._time_last_log >= self.log_interval:
+            self._time_last_log = now
+            self.logger.info(self.get_message())
+
+
+def parallel_map(
+    func: Callable[[Any], Any],
+    items: Iterable,
+    n_jobs: int = 1,
+    progress: Optional[ProgressLogger] = None,
+) -> list:
+    """Apply a function to each item using up to ``n_jobs`` threads.
+
+    Results are returned in the same order as the input items, regardless of the
+    order in which the tasks complete. At most ``MAX_PENDING_PER_JOB * n_jobs``
+    tasks are submitted at any given time, so that the items can be a (long)
+    generator. If ``n_jobs`` is 1, no thread is created.
+
+    The first exception raised by the function is propagated, after the running
+    tasks have finished (pending tasks are cancelled).
+    """
+    n_jobs = check_n_jobs(n_jobs)
+
+    results = []
+    if n_jobs == 1:
+        for item in items:
+            results.append(func(item))
+            if progress is not None:
+                progress.update()
+        return results
+
+    max_pending = MAX_PENDING_PER_JOB * n_jobs
+    pending: dict[Future, int] = {}
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        try:
+            for i_item, item in enumerate(items):
+                results.append(None)
+                pending[executor.submit(func, item)] = i_item
+                if len(pending) >= max_pending:
+                    _collect_completed(pending, results, progress)
+            while len(pending) > 0:
+                _collect_completed(pending, results, progress)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return results
+
+
+def _collect_completed(
+    pending: dict[Future, int], results: list, progress: Optional[ProgressLogger]
+) -> None:
+    """Wait for at least one pending task and store the results of completed ones."""
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        results[pending.pop(future)] = future.result()
+        if progress is not None:
+            progress.update()
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Split items into lists of (at most) ``batch_size`` items, lazily."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+def _put_unless_stopped(
+    buffer: queue.Queue, stop: threading.Event, entry: tuple[bool, Any]
+) -> bool:
+    """Put an entry in a queue, unless ``stop`` is set while waiting for space."""
+    while not stop.is_set():
+        try:
+            buffer.put(entry, timeout=PREFETCH_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(items: Iterable, buffer: queue.Queue, stop: threading.Event) -> None:
+    """Put (is_done, item) entries in a queue.
+
+    The last entry is (True, exception), where exception is None if all items
+    were produced successfully.
+    """
+    try:
+        for item in items:
+            if not _put_unless_stopped(buffer, stop, (False, item)):
+                return
+    except BaseException as exception:
+        _put_unless_stopped(buffer, stop, (True, exception))
+    else:
+        _put_unless_stopped(buffer, stop, (True, None))
+
+
+def prefetch(items: Iterable, max_pending: int = 2) -> Iterator:
+    """Produce items in a background thread while the caller consumes them.
+
+    This overlaps the production of items (e.g. a directory crawl) with their
+    processing. At most ``max_pending`` items are produced in advance, so items
+    should be batches if there are many of them. Exceptions raised while producing
+    items are re-raised in the caller. If the caller stops iterating early, the
+    background thread stops too.
+    """
+    buffer = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    thread = threading.Thread(target=_produce, args=(items, buffer, stop), daemon=True)
+    thread.start()
+    try:
+        while True:
+            is_done, item = buffer.get()
+            if is_done:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -1,9 +1,11 @@
 """Class for bagel tracker files."""
 
-from typing import Optional
+from typing import ClassVar, Optional
 
+import pandas as pd
 from pydantic import Field, field_validator, model_validator
 
+from nipoppy.env import BIDS_SESSION_PREFIX, BIDS_SUBJECT_PREFIX
 from nipoppy.tabular.base import BaseTabular, BaseTabularModel
 from nipoppy.utils import (
     FIELD_DESCRIPTION_MAP,
@@ -84,6 +86,36 @@ class BagelModel(BaseTabularModel):
         if self.session is None:
             self.session = session_id_to_bids_session(self.session_id)
 
+    @classmethod
+    def _validate_columns_after_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """Check statuses and IDs, and fill in BIDS IDs (column-wise)."""
+        invalid = ~df[Bagel.col_pipeline_complete].isin(
+            [STATUS_SUCCESS, STATUS_FAIL, STATUS_INCOMPLETE, STATUS_UNAVAILABLE]
+        )
+        invalid |= cls._startswith(df[Bagel.col_participant_id], BIDS_SUBJECT_PREFIX)
+        invalid |= cls._startswith(df[Bagel.col_session_id], BIDS_SESSION_PREFIX)
+
+        for col, col_id, converter in (
+            (
+                Bagel.col_bids_participant,
+                Bagel.col_participant_id,
+                participant_id_to_bids_participant,
+            ),
+            (Bagel.col_bids_session, Bagel.col_session_id, session_id_to_bids_session),
+        ):
+            is_missing = df[col].isna()
+            df.loc[is_missing, col] = df.loc[is_missing, col_id].map(
+                converter, na_action="ignore"
+            )
+
+        return invalid
+
+    # validators reimplemented column-wise
+    _columnar_validators: ClassVar[set[str]] = BaseTabularModel._columnar_validators | {
+        "check_status",
+        "validate_after",
+    }
+
 
 class Bagel(BaseTabular):
     """A file to track data availability/processing status."""
@@ -112,6 +144,16 @@ class Bagel(BaseTabular):
         col_pipeline_version,
     ]
 
+    column_dtypes = {
+        col_participant_id: "category",
+        col_bids_participant: "category",
+        col_session_id: "category",
+        col_bids_session: "category",
+        col_pipeline_name: "category",
+        col_pipeline_version: "category",
+        col_pipeline_complete: "category",
+    }
+
     _metadata = BaseTabular._metadata + [
         "col_participant_id",
         "col_bids_id",
@@ -141,23 +183,17 @@ class Bagel(BaseTabular):
 
         Can optionally filter within a specific participant and/or session.
         """
-        if participant_id is None:
-            participant_ids = set(self[self.col_participant_id])
-        else:
-            participant_ids = {participant_id}
-        if session_id is None:
-            session_ids = set(self[self.col_session_id])
-        else:
-            session_ids = {session_id}
-
-        bagel_subset = self.loc[
-            (self[self.col_pipeline_name] == pipeline_name)
-            & (self[self.col_pipeline_version] == pipeline_version)
-            & (self[self.col_participant_id].isin(participant_ids))
-            & (self[self.col_session_id].isin(session_ids))
-            & (self[self.col_pipeline_complete] == self.status_success)
-        ]
-
-        yield from bagel_subset[
-            [self.col_participant_id, self.col_session_id]
-        ].itertuples(index=False)
+        mask = (
+            self._get_mask(self.col_pipeline_name, [pipeline_name])
+            & self._get_mask(self.col_pipeline_version, [pipeline_version])
+            & self._get_mask(self.col_pipeline_complete, [self.status_success])
+        )
+        if participant_id is not None:
+            mask &= self._get_mask(self.col_participant_id, [participant_id])
+        if session_id is not None:
+            mask &= self._get_mask(self.col_session_id, [session_id])
+
+        yield from zip(
+            self[self.col_participant_id].array[mask].tolist(),
+            self[self.col_session_id].array[mask].tolist(),
+        )
@@ -3,16 +3,58 @@
 from __future__ import annotations
 
 import contextlib
+import copy
+import hashlib
+import io
+import json
+import numbers
+import re
+import sys
+import types
+import typing
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Optional, Sequence
+from typing import Any, Callable, ClassVar, Iterator, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, ValidationError, model_validator
+from pydantic.fields import FieldInfo
 from typing_extensions import Self
 
-from nipoppy.env import StrOrPathLike
-from nipoppy.utils import save_df_with_backup
+from nipoppy.backups import BackupPolicy, BackupStore
+from nipoppy.env import StrOrPathLike, TabularFileFormat
+from nipoppy.utils import (
+    get_tabular_file_format,
+    load_json,
+    save_df_with_backup,
+    save_json,
+)
+
+# types.UnionType (for "X | Y" annotations) is not available in Python 3.9
+UNION_TYPES = {typing.Union, getattr(types, "UnionType", typing.Union)}
+
+# number of rows per chunk when reading files in chunks (see BaseTabular.iter_load)
+DEFAULT_CHUNKSIZE = 100_000
+
+# hash of missing values when comparing rows (see _hash_values)
+MISSING_VALUE_HASH = np.iinfo(np.uint64).max
+
+# type names used when hashing values, for results of pd.api.types.infer_dtype
+# (see _hash_values and _get_type_tag)
+INFERRED_TYPE_TAGS = {
+    "boolean": "bool",
+    "empty": "str",
+    "floating": "float",
+    "integer": "int",
+    "string": "str",
+}
+
+# string values accepted by Pydantic (in lax mode) for boolean fields
+BOOL_STR_MAP = {
+    **{value: True for value in ("1", "on", "t", "true", "y", "yes")},
+    **{value: False for value in ("0", "off", "f", "false", "n", "no")},
+}
 
 
 class BaseTabularModel(BaseModel):
@@ -26,6 +68,10 @@ class BaseTabularModel(BaseModel):
     but it can be thought of as a schema for each row in the tabular file.
     """
 
+    # validators that are reimplemented in the _validate_columns_*() methods
+    # models with any other validator are always validated row by row
+    _columnar_validators: ClassVar[set[str]] = {"validate_before"}
+
     @model_validator(mode="before")
     @classmethod
     def validate_before(cls, data: Any):
@@ -65,6 +111,404 @@ class BaseTabularModel(BaseModel):
         """Validate model-specific fields. To be overridden in subclass if needed."""
         return data
 
+    @classmethod
+    def _validate_columns_before_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Column-wise version of _validate_before_fields().
+
+        Should modify df in place and return a boolean mask of the rows that
+        could not be validated. To be overridden in subclass if
+        _validate_before_fields() is overridden.
+        """
+        return pd.Series(False, index=df.index)
+
+    @classmethod
+    def _validate_columns_after_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Column-wise version of the model's after validators.
+
+        Called after the field types have been checked. Should modify df in place
+        and return a boolean mask of the rows that could not be validated.
+        To be overridden in subclass if the model has after validators.
+        """
+        return pd.Series(False, index=df.index)
+
+    @staticmethod
+    def _startswith(series: pd.Series, prefix: str) -> pd.Series:
+        """Get a mask of string values that start with a prefix.
+
+        Unlike ``series.str.startswith``, this also works for columns without any
+        string values (other values are not matched).
+        """
+        return series.map(
+            lambda value: isinstance(value, str) and value.startswith(prefix)
+        ).astype(bool)
+
+    @classmethod
+    def supports_columnar_validation(cls) -> bool:
+        """Check whether the model can be validated column-wise."""
+
+        def _get_defining_class(name):
+            for klass in cls.__mro__:
+                if name in klass.__dict__:
+                    return klass
+
+        # custom before-validation logic without a column-wise equivalent
+        if not issubclass(
+            _get_defining_class("_validate_columns_before_fields"),
+            _get_defining_class("_validate_before_fields"),
+        ):
+            return False
+
+        decorators = cls.__pydantic_decorators__
+        validator_names = set()
+        for validators in (
+            decorators.validators,
+            decorators.field_validators,
+            decorators.root_validators,
+            decorators.model_validators,
+        ):
+            validator_names.update(validators.keys())
+        if not validator_names.issubset(cls._columnar_validators):
+            return False
+
+        return all(
+            _get_column_validator(field_info) is not None
+            for field_info in cls.model_fields.values()
+        )
+
+
+# strings that are converted to integers in column-wise validation
+INT_STR_PATTERN = re.compile(r"[+-]?[0-9]+")
+
+
+def _unwrap_optional(annotation) -> tuple[Any, bool]:
+    """Return the inner type of an annotation and whether it accepts None."""
+    if typing.get_origin(annotation) in UNION_TYPES:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, annotation in (Any, None, type(None))
+
+
+def _to_bool(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, str):
+        return BOOL_STR_MAP.get(value.lower())
+    return None
+
+
+def _to_int(value):
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    # other strings (e.g. Unicode digits) are left to the row-wise validation
+    if isinstance(value, str) and INT_STR_PATTERN.fullmatch(value):
+        return int(value)
+    return None
+
+
+def _validate_column_str(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    if pd.api.types.infer_dtype(series, skipna=False) == "string":
+        return series, pd.Series(False, index=series.index)
+    return series, ~series.map(lambda value: isinstance(value, str)).astype(bool)
+
+
+def _validate_column_bool(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    inferred_dtype = pd.api.types.infer_dtype(series, skipna=False)
+    if inferred_dtype == "boolean":
+        converted = series.map(bool)
+    elif inferred_dtype == "string":
+        converted = series.str.lower().map(BOOL_STR_MAP)
+    else:
+        converted = series.map(_to_bool)
+    return converted, converted.isna()
+
+
+def _validate_column_int(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    if pd.api.types.infer_dtype(series, skipna=False) == "integer":
+        converted = series.map(int)
+    else:
+        converted = series.map(_to_int)
+    return converted, converted.isna()
+
+
+def _make_column_validator_list(item_type):
+    def _is_valid_list(value) -> bool:
+        return isinstance(value, list) and (
+            item_type is None or all(isinstance(item, item_type) for item in value)
+        )
+
+    def _validate_column_list(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+        is_valid = series.map(_is_valid_list).astype(bool)
+        # copy so that rows do not share the same list object
+        converted = series.where(~is_valid, series[is_valid].map(list))
+        return converted, ~is_valid
+
+    return _validate_column_list
+
+
+def _get_column_validator(
+    field_info: FieldInfo,
+) -> Callable[[pd.Series], tuple[pd.Series, pd.Series]] | None:
+    """
+    Get a function that validates/converts a column based on the field type.
+
+    Returns None if the type is not supported for column-wise validation.
+    """
+    annotation, _ = _unwrap_optional(field_info.annotation)
+    if annotation is str:
+        return _validate_column_str
+    if annotation is bool:
+        return _validate_column_bool
+    if annotation is int:
+        return _validate_column_int
+    if annotation is list or typing.get_origin(annotation) is list:
+        item_types = typing.get_args(annotation)
+        if len(item_types) == 0 or item_types[0] is Any:
+            return _make_column_validator_list(None)
+        elif item_types[0] is str:
+            return _make_column_validator_list(str)
+    return None
+
+
+def _compact_category(series: pd.Series) -> pd.Series:
+    return series.astype("category")
+
+
+def _compact_bool(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    values = [_to_bool(value) for value in series]
+    if any(value is None for value in values):
+        # missing or invalid values, keep as is
+        return series
+    return pd.Series(values, index=series.index, dtype=bool)
+
+
+def _compact_str(series: pd.Series) -> pd.Series:
+    return pd.Series(
+        [sys.intern(value) if isinstance(value, str) else value for value in series],
+        index=series.index,
+        dtype=object,
+    )
+
+
+# converters for BaseTabular.column_dtypes
+COMPACT_DTYPE_CONVERTERS: dict[str, Callable[[pd.Series], pd.Series]] = {
+    "category": _compact_category,
+    "bool": _compact_bool,
+    "str": _compact_str,
+}
+
+
+def _to_canonical_str(series: pd.Series) -> pd.Series:
+    """Convert values to strings (with the same string for all missing values)."""
+    values = series.astype(object)
+    return values.where(values.notna(), None).astype(str)
+
+
+def _get_type_tag(value_type: type) -> str:
+    """Get a type name that is the same for Python and NumPy scalars."""
+    if issubclass(value_type, (bool, np.bool_)):
+        return "bool"
+    if issubclass(value_type, numbers.Integral):
+        return "int"
+    if issubclass(value_type, numbers.Real):
+        return "float"
+    if issubclass(value_type, str):
+        return "str"
+    return value_type.__name__
+
+
+def _hash_values(values: np.ndarray) -> np.ndarray:
+    """Hash values through their string representation and type.
+
+    Values with the same string representation but different types (e.g. 1 and
+    "1", or True and "True") have different hashes. All missing values (None,
+    NaN, etc.) have the same hash.
+    """
+    values = values.astype(object, copy=False)
+    try:
+        # values are deduplicated first, missing values get MISSING_VALUE_HASH
+        hashes = pd.util.hash_array(values)
+    except TypeError:
+        # unhashable values (e.g. lists)
+        hashes = pd.util.hash_array(
+            pd.Series(values).astype(str).to_numpy(dtype=object), categorize=False
+        )
+        hashes[pd.isna(values)] = MISSING_VALUE_HASH
+
+    # combine with a hash of the type of each value
+    inferred_type = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred_type in INFERRED_TYPE_TAGS:
+        # fast path: all non-missing values have the same type
+        type_hashes = pd.util.hash_array(
+            np.array([INFERRED_TYPE_TAGS[inferred_type]], dtype=object)
+        )[0]
+    else:
+        type_codes, value_types = pd.factorize(
+            np.array([type(value) for value in values], dtype=object)
+        )
+        type_hashes = pd.util.hash_array(
+            np.array([_get_type_tag(t) for t in value_types], dtype=object)
+        )[type_codes]
+    is_missing = hashes == MISSING_VALUE_HASH
+    hashes = (hashes * np.uint64(1000003)) ^ type_hashes
+    hashes[is_missing] = MISSING_VALUE_HASH
+    return hashes
+
+
+def _hash_column(series: pd.Series) -> np.ndarray:
+    """Hash the values of a column (independently of its dtype)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # only hash the categories, code -1 (missing value) maps to the last element
+        category_hashes = np.append(
+            _hash_values(series.cat.categories.to_numpy(dtype=object)),
+            MISSING_VALUE_HASH,
+        )
+        return category_hashes[series.cat.codes.to_numpy()]
+    return _hash_values(series.to_numpy(dtype=object))
+
+
+def _hash_rows(df: pd.DataFrame, cols: Sequence[str]) -> np.ndarray:
+    """Combine the hashes of several columns into a single 64-bit hash per row."""
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in cols:
+        # uint64 arithmetic wraps around on overflow
+        row_hashes = (row_hashes * np.uint64(1000003)) ^ _hash_column(df[col])
+    return row_hashes
+
+
+def _decategorize(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert categorical columns to object columns (for comparisons)."""
+    if not isinstance(df, pd.DataFrame):
+        return df
+    categorical_cols = [
+        col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+    ]
+    if len(categorical_cols) == 0:
+        return df
+    return df.astype({col: object for col in categorical_cols})
+
+
+def _import_pyarrow(file_format: TabularFileFormat):
+    """Import pyarrow, with an informative error message if it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            f"pyarrow is required to read {file_format} files"
+            ". Install it with: pip install nipoppy[arrow]"
+        )
+    return pyarrow
+
+
+def _arrow_to_pandas(table) -> pd.DataFrame:
+    """Convert a pyarrow Table or RecordBatch to a dataframe."""
+    pyarrow = _import_pyarrow("arrow")
+    df = table.to_pandas()
+    # list columns are read as numpy arrays
+    for field in table.schema:
+        if pyarrow.types.is_list(field.type):
+            df[field.name] = [
+                value.tolist() if isinstance(value, np.ndarray) else value
+                for value in df[field.name]
+            ]
+    return df
+
+
+def _read_arrow_file(
+    fpath: StrOrPathLike,
+    file_format: TabularFileFormat,
+    memory_map: bool = False,
+    **kwargs,
+) -> pd.DataFrame:
+    """Read a Parquet or Arrow IPC file into a dataframe."""
+    pyarrow = _import_pyarrow(file_format)
+    if file_format == "parquet":
+        table = pyarrow.parquet.read_table(fpath, memory_map=memory_map, **kwargs)
+    else:
+        table = pyarrow.feather.read_table(fpath, memory_map=memory_map, **kwargs)
+    return _arrow_to_pandas(table)
+
+
+def _normalize_filters(filters: Optional[dict[str, Any]]) -> dict[str, list]:
+    """Convert filter values to lists of allowed values."""
+    if filters is None:
+        return {}
+    return {
+        col: (
+            list(values)
+            if isinstance(values, (list, tuple, set, frozenset))
+            else [values]
+        )
+        for col, values in filters.items()
+    }
+
+
+def _iter_arrow_file(
+    fpath: StrOrPathLike,
+    file_format: TabularFileFormat,
+    chunksize: Optional[int],
+    filters: dict[str, list],
+    **kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Read a Parquet or Arrow IPC file, only loading rows that match the filters.
+
+    Filters are applied by pyarrow while reading (e.g., Parquet row groups that
+    cannot match are skipped). If chunksize is None, the file is read at once.
+    """
+    pyarrow = _import_pyarrow(file_format)
+    dataset = pyarrow.dataset.dataset(
+        fpath, format="parquet" if file_format == "parquet" else "ipc"
+    )
+    expression = None
+    for col, values in filters.items():
+        expression_col = pyarrow.compute.field(col).isin(values)
+        expression = (
+            expression_col if expression is None else expression & expression_col
+        )
+    if chunksize is None:
+        yield _arrow_to_pandas(dataset.to_table(filter=expression, **kwargs))
+    else:
+        for batch in dataset.to_batches(
+            filter=expression, batch_size=chunksize, **kwargs
+        ):
+            yield _arrow_to_pandas(batch)
+
+
+def _iter_csv_file(
+    fpath: StrOrPathLike,
+    chunksize: int,
+    filters: dict[str, list],
+    memory_map: bool = False,
+    **kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file in chunks, only keeping rows that match the filters."""
+    # all values are read as strings
+    filters = {col: [str(value) for value in values] for col, values in filters.items()}
+    with pd.read_csv(
+        fpath, dtype=str, chunksize=chunksize, memory_map=memory_map, **kwargs
+    ) as reader:
+        for chunk in reader:
+            mask = np.ones(len(chunk), dtype=bool)
+            for col, values in filters.items():
+                if col not in chunk.columns:
+                    raise ValueError(
+                        f"Cannot filter on column {col}: not in file {fpath}"
+                    )
+                mask &= chunk[col].isin(values).to_numpy()
+            yield chunk if mask.all() else chunk.loc[mask]
+
 
 class BaseTabular(pd.DataFrame, ABC):
     """
@@ -77,6 +521,14 @@ class BaseTabular(pd.DataFrame, ABC):
     index_cols = None
     _metadata = []
 
+    # memory-efficient dtypes used by compact() (keys of COMPACT_DTYPE_CONVERTERS)
+    column_dtypes: dict[str, str] = {}
+
+    # not in _metadata: the record index is specific to a single object and
+    # should not be propagated to derived dataframes (slices, copies, etc.)
+    _internal_names = pd.DataFrame._internal_names + ["_record_index"]
+    _internal_names_set = set(_internal_names)
+
     @property
     @abstractmethod
     def model(self) -> type[BaseTabularModel]:
@@ -84,17 +536,195 @@ class BaseTabular(pd.DataFrame, ABC):
         raise NotImplementedError("model must be assigned in subclass")
 
     @classmethod
-    def load(cls, fpath: StrOrPathLike, validate=True, **kwargs) -> Self:
-        """Load (and optionally validate) a tabular data file."""
+    def load(
+        cls,
+        fpath: StrOrPathLike,
+        validate=True,
+        file_format: Optional[TabularFileFormat] = None,
+        memory_map=False,
+        compact=False,
+        filters: Optional[dict[str, Any]] = None,
+        **kwargs,
+    ) -> Self:
+        """Load (and optionally validate) a tabular data file.
+
+        Parameters
+        ----------
+        fpath : nipoppy.env.StrOrPathLike
+            Path to the file
+        validate : bool, optional
+            Whether to validate the loaded data, by default True
+        file_format : Optional[nipoppy.env.TabularFileFormat], optional
+            Storage format ("csv", "parquet" or "arrow"), by default None
+            (determined from the file extension)
+        memory_map : bool, optional
+            Whether to memory-map the file instead of reading it into memory,
+            by default False
+        compact : bool, optional
+            Whether to convert columns to memory-efficient dtypes (see
+            :meth:`compact`), by default False
+        filters : Optional[dict[str, Any]], optional
+            Mapping from column names to a value or a list of values. If given,
+            only the rows matching all filters are loaded (see :meth:`iter_load`),
+            by default None
+        **kwargs
+            Passed to the reader function (pd.read_csv for CSV files,
+            pyarrow.parquet.read_table or pyarrow.feather.read_table otherwise,
+            or pyarrow.dataset.Dataset.to_table if ``filters`` is given)
+        """
+        cls._check_load_kwargs(kwargs)
+        file_format = get_tabular_file_format(fpath, file_format)
+        if filters is not None:
+            df = cls(
+                pd.concat(
+                    cls._iter_raw_chunks(
+                        fpath,
+                        file_format,
+                        chunksize=None,
+                        filters=filters,
+                        memory_map=memory_map,
+                        **kwargs,
+                    ),
+                    ignore_index=True,
+                )
+            )
+        elif file_format == "csv":
+            df = cls(pd.read_csv(fpath, dtype=str, memory_map=memory_map, **kwargs))
+        else:
+            df = cls(_read_arrow_file(fpath, file_format, memory_map, **kwargs))
+        if validate:
+            df = df.validate()
+        if compact:
+            df = df.compact()
+        return df
+
+    @classmethod
+    def iter_load(
+        cls,
+        fpath: StrOrPathLike,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        filters: Optional[dict[str, Any]] = None,
+        validate=True,
+        file_format: Optional[TabularFileFormat] = None,
+        memory_map=False,
+        compact=False,
+        **kwargs,
+    ) -> Iterator[Self]:
+        """Load (and optionally validate) a tabular data file in chunks.
+
+        Only one chunk is in memory at a time. Each chunk is validated separately,
+        so duplicate records in different chunks are not detected.
+
+        Parameters
+        ----------
+        fpath : nipoppy.env.StrOrPathLike
+            Path to the file
+        chunksize : int, optional
+            Maximum number of rows per chunk (before filtering), by default 100000
+        filters : Optional[dict[str, Any]], optional
+            Mapping from column names to a value or a list of values. Only rows
+            matching all filters are returned. For Parquet and Arrow IPC files,
+            the filters are applied by pyarrow while reading. For CSV files, values
+            are compared as strings. Chunks without any matching row are skipped
+        validate : bool, optional
+            Whether to validate each chunk, by default True
+        file_format : Optional[nipoppy.env.TabularFileFormat], optional
+            Storage format ("csv", "parquet" or "arrow"), by default None
+            (determined from the file extension)
+        memory_map : bool, optional
+            Whether to memory-map CSV files, by default False
+        compact : bool, optional
+            Whether to convert columns in each chunk to memory-efficient dtypes
+            (see :meth:`compact`), by default False
+        **kwargs
+            Passed to the reader function (pd.read_csv for CSV files,
+            pyarrow.dataset.Dataset.to_batches otherwise)
+        """
+        cls._check_load_kwargs(kwargs)
+        file_format = get_tabular_file_format(fpath, file_format)
+        for chunk in cls._iter_raw_chunks(
+            fpath,
+            file_format,
+            chunksize=chunksize,
+            filters=filters,
+            memory_map=memory_map,
+            **kwargs,
+        ):
+            if len(chunk) == 0:
+                continue
+            chunk = cls(chunk)
+            if validate:
+                chunk = chunk.validate()
+            if compact:
+                chunk = chunk.compact()
+            yield chunk
+
+    @staticmethod
+    def _check_load_kwargs(kwargs: dict):
         if "dtype" in kwargs:
             raise ValueError(
                 "This function does not accept 'dtype' as a keyword argument"
                 ". Everything is read as a string and (optionally) validated later."
             )
-        df = cls(pd.read_csv(fpath, dtype=str, **kwargs))
-        if validate:
-            df = df.validate()
-        return df
+
+    @staticmethod
+    def _iter_raw_chunks(
+        fpath: StrOrPathLike,
+        file_format: TabularFileFormat,
+        chunksize: Optional[int],
+        filters: Optional[dict[str, Any]],
+        memory_map=False,
+        **kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """Read a file in (filtered) chunks, without validation.
+
+        If chunksize is None, binary files are read at once, and CSV files are
+        read in chunks of DEFAULT_CHUNKSIZE rows.
+        """
+        filters = _normalize_filters(filters)
+        if file_format == "csv":
+            yield from _iter_csv_file(
+                fpath,
+                chunksize=chunksize or DEFAULT_CHUNKSIZE,
+                filters=filters,
+                memory_map=memory_map,
+                **kwargs,
+            )
+        else:
+            yield from _iter_arrow_file(
+                fpath, file_format, chunksize=chunksize, filters=filters, **kwargs
+            )
+
+    @classmethod
+    def load_version(
+        cls,
+        fpath_symlink: StrOrPathLike,
+        version: str,
+        dname_backups: Optional[str] = None,
+        **kwargs,
+    ) -> Self:
+        """Load a historical version of a file saved with :meth:`save_with_backup`.
+
+        Parameters
+        ----------
+        fpath_symlink : nipoppy.env.StrOrPathLike
+            Path to the file (symlink)
+        version : str
+            Name of the backup file for the version (see
+            :meth:`nipoppy.backups.BackupStore.get_versions`)
+        dname_backups : Optional[str], optional
+            Name of the backup directory, by default None (determined from
+            ``fpath_symlink``)
+        **kwargs
+            Passed to :meth:`load`
+        """
+        backup_store = BackupStore.from_symlink(fpath_symlink, dname_backups)
+        fpath_version = backup_store.get_fpath(version)
+        if fpath_version.exists():
+            return cls.load(fpath_version, **kwargs)
+        # versions stored as deltas are always CSV files
+        kwargs["file_format"] = "csv"
+        return cls.load(io.BytesIO(backup_store.read(version)), **kwargs)
 
     def __init__(self, *args, **kwargs) -> None:
         """Instantiate a tabular data object."""
@@ -105,22 +735,19 @@ class BaseTabular(pd.DataFrame, ABC):
             for col in self.model.model_fields.keys():
                 self[col] = None
 
-    def validate(self) -> Self:
-        """Validate the dataframe based on the model."""
-        records = self.to_dict(orient="records")
-        try:
-            df_validated = self.__class__(
-                [self.model(**record).model_dump() for record in records],
-            )
+    def validate(self, columnar: bool = True) -> Self:
+        """Validate the dataframe based on the model.
 
-        except Exception as exception:
-            error_message = str(exception)
-            if isinstance(exception, ValidationError):
-                error_message += str(exception.errors())
-            raise ValueError(
-                f"Error when validating the {self.__class__.__name__.lower()}"
-                f": {error_message}"
-            )
+        Parameters
+        ----------
+        columnar : bool, optional
+            Whether to check entire columns at once instead of creating a Pydantic
+            model instance for each row, by default True. Rows that fail the
+            column-wise checks are passed through the Pydantic model so that
+            error messages are the same in both modes. Models that cannot be
+            validated column-wise are always validated row by row.
+        """
+        df_validated = self._validate_records(columnar=columnar)
 
         if self.index_cols is not None:
             df_duplicated = df_validated.find_duplicates()
@@ -133,6 +760,109 @@ class BaseTabular(pd.DataFrame, ABC):
 
         return df_validated
 
+    def _validate_records(self, columnar: bool = True) -> Self:
+        """Validate each record, without checking for duplicates."""
+        try:
+            if columnar and len(self) > 0 and self.model.supports_columnar_validation():
+                df_validated = self._validate_columns()
+            else:
+                df_validated = self.__class__(
+                    [
+                        self.model(**record).model_dump()
+                        for record in self.to_dict(orient="records")
+                    ],
+                )
+
+        except Exception as exception:
+            error_message = str(exception)
+            if isinstance(exception, ValidationError):
+                error_message += str(exception.errors())
+            raise ValueError(
+                f"Error when validating the {self.__class__.__name__.lower()}"
+                f": {error_message}"
+            )
+        return df_validated
+
+    def _prepare_columns(self) -> tuple[pd.DataFrame, np.ndarray]:
+        """Handle missing values and extra columns before column-wise validation.
+
+        Uses the same logic as BaseTabularModel.validate_before. Returns an object
+        dataframe and a boolean mask of rows that are already known to be invalid.
+        """
+        model = self.model
+        n_rows = len(self)
+        columns = {}
+        invalid = np.zeros(n_rows, dtype=bool)
+
+        for field_name, field_info in model.model_fields.items():
+            if field_name in self.columns:
+                column = self[field_name].to_numpy(dtype=object).copy()
+                is_missing = pd.isna(column)
+            else:
+                column = np.full(n_rows, None, dtype=object)
+                is_missing = np.ones(n_rows, dtype=bool)
+                if field_info.is_required():
+                    invalid[:] = True
+
+            if field_info.is_required():
+                column[is_missing] = None
+            else:
+                for i_row in np.flatnonzero(is_missing):
+                    column[i_row] = copy.deepcopy(
+                        field_info.get_default(call_default_factory=True)
+                    )
+            columns[field_name] = column
+
+        extra_cols = [col for col in self.columns if col not in columns]
+        extra = model.model_config.get("extra")
+        if extra == "allow":
+            for col in extra_cols:
+                column = self[col].to_numpy(dtype=object).copy()
+                column[pd.isna(column)] = None
+                columns[col] = column
+        elif extra == "forbid" and len(extra_cols) > 0:
+            invalid[:] = True
+
+        return pd.DataFrame(columns, dtype=object), invalid
+
+    def _validate_columns(self) -> Self:
+        """Validate the dataframe one column at a time.
+
+        This is equivalent to (but much faster than) validating each row
+        through the Pydantic model.
+        """
+        model = self.model
+        df, invalid = self._prepare_columns()
+        invalid |= model._validate_columns_before_fields(df).to_numpy(dtype=bool)
+
+        # field types
+        for field_name, field_info in model.model_fields.items():
+            _, is_nullable = _unwrap_optional(field_info.annotation)
+            column = df[field_name].to_numpy(dtype=object)
+            is_none = pd.isna(column)
+            if not is_nullable:
+                invalid |= is_none
+            converted, invalid_values = _get_column_validator(field_info)(
+                pd.Series(column[~is_none], dtype=object)
+            )
+            invalid[~is_none] |= invalid_values.to_numpy(dtype=bool)
+            column[~is_none] = converted.to_numpy(dtype=object)
+            df[field_name] = column
+
+        invalid |= model._validate_columns_after_fields(df).to_numpy(dtype=bool)
+
+        # rows that fail the column-wise checks go through the Pydantic model
+        # so that error messages are exactly the same
+        data = {col: df[col].tolist() for col in df.columns}
+        for i_row, record in zip(
+            np.flatnonzero(invalid),
+            self.iloc[invalid].to_dict(orient="records"),
+        ):
+            for col, value in model(**record).model_dump().items():
+                data[col][i_row] = value
+
+        return self.__class__(data)
+
     def find_duplicates(self, cols=None) -> Self:
         """Find duplicate records."""
         if cols is None:
@@ -140,14 +870,40 @@ class BaseTabular(pd.DataFrame, ABC):
 
         return self[self.duplicated(subset=cols, keep=False)]
 
-    def get_diff(self, other: Self, cols=None) -> Self:
-        """Get the difference between two dataframes (self - other).
+    def compact(self) -> Self:
+        """Return a copy of the dataframe with memory-efficient column dtypes.
 
-        Returns a slice of self. If cols is None, the index_cols of the first
-        object is used.
+        Columns are converted based on the column_dtypes class attribute:
+        ``"category"`` columns become categoricals, ``"bool"`` columns become
+        booleans (unless there are missing/invalid values) and ``"str"`` columns
+        store interned strings. Other columns are unchanged.
         """
+        tabular = self.copy()
+        for col, dtype in self.column_dtypes.items():
+            if col in tabular.columns:
+                tabular[col] = COMPACT_DTYPE_CONVERTERS[dtype](tabular[col])
+        return tabular
+
+    def _get_mask(self, col: str, values: Sequence[Any]) -> np.ndarray:
+        """Get a boolean mask of rows where the value of ``col`` is in ``values``.
+
+        For categorical columns, the comparison is done on the integer codes.
+        """
+        series = self[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.categories.get_indexer(list(values))
+            # lookup table indexed by code (missing values have code -1)
+            is_selected = np.zeros(len(series.cat.categories) + 1, dtype=bool)
+            is_selected[codes[codes >= 0]] = True
+            return is_selected[series.cat.codes.to_numpy()]
+        return series.isin(values).to_numpy(dtype=bool)
+
+    def _check_key_cols(self, other: pd.DataFrame, cols=None) -> list[str]:
+        """Get the columns used to match rows between two dataframes."""
         if cols is None:
             cols = self.index_cols
+        if isinstance(cols, str):
+            cols = [cols]
 
         for df in [self, other]:
             col_diff = set(cols) - set(df.columns)
@@ -155,39 +911,265 @@ class BaseTabular(pd.DataFrame, ABC):
                 raise ValueError(
                     f"The columns {cols} are not present in the dataframe:\n{df}"
                 )
+        return list(cols)
+
+    def _isin(self, other: pd.DataFrame, cols: Sequence[str]) -> np.ndarray:
+        """Check whether the values in cols for each row of self are found in other."""
+        return pd.Index(_hash_rows(self, cols)).isin(_hash_rows(other, cols))
+
+    def get_diff(self, other: Self, cols=None, include_changed=False) -> Self:
+        """Get the difference between two dataframes (self - other).
+
+        Returns a slice of self. If cols is None, the index_cols of the first
+        object is used. Rows are matched through a hash of their values in cols.
+
+        If ``include_changed`` is True, rows whose values in cols are found in
+        other but that have different values in the other columns common to both
+        dataframes are also returned (i.e. new and changed rows).
+        """
+        cols = self._check_key_cols(other, cols)
+        if include_changed:
+            cols = cols + [
+                col for col in self.columns if col in other.columns and col not in cols
+            ]
+        return self.loc[~self._isin(other, cols)]
+
+    def get_intersection(self, other: Self, cols=None) -> Self:
+        """Get the rows of self whose values in cols are also found in other.
+
+        Returns a slice of self. If cols is None, the index_cols of the first
+        object is used.
+        """
+        cols = self._check_key_cols(other, cols)
+        return self.loc[self._isin(other, cols)]
+
+    def get_symmetric_diff(self, other: Self, cols=None) -> Self:
+        """Get the rows of either dataframe whose values in cols are not in the other.
 
-        index_self = pd.Index(zip(*[self.loc[:, col] for col in cols]))
-        index_other = pd.Index(zip(*[other.loc[:, col] for col in cols]))
+        The rows of self (i.e., self - other) come first, followed by the rows of
+        other (i.e., other - self). If cols is None, the index_cols of the first
+        object is used.
+        """
+        cols = self._check_key_cols(other, cols)
+        return pd.concat(
+            [
+                self.loc[~self._isin(other, cols)],
+                other.loc[~self.__class__._isin(other, self, cols)],
+            ],
+            ignore_index=True,
+        )
 
-        diff = self.loc[~index_self.isin(index_other)]
+    def add_or_update_records(
+        self, records: pd.DataFrame | list[dict] | dict, validate=True
+    ) -> Self:
+        """Add or update records (in place).
 
-        return diff
+        All records are validated at once and applied in a single step:
+        records that match an existing row (based on index_cols) overwrite the
+        values in that row, and the others are appended at the end. If several
+        records have the same index_cols values, the last one is used (as if the
+        records were applied one at a time). The dtypes of existing columns
+        (e.g. compact categorical or boolean columns) are kept.
 
-    def add_or_update_records(self, records: list[dict] | dict, validate=True) -> Self:
-        """Add or update records."""
+        Parameters
+        ----------
+        records : pd.DataFrame | list[dict] | dict
+            New records
+        validate : bool, optional
+            Whether to validate the new records, by default True. If False,
+            records can contain only a subset of the columns, in which case
+            only these columns are updated for existing rows.
+        """
         if isinstance(records, dict):
             records = [records]
 
-        # set the index (temporary)
-        self.set_index(self.index_cols, inplace=True)
+        records = self.__class__(records)
+        if validate:
+            records = records._validate_records()
+        records = records.drop_duplicates(
+            subset=self.index_cols, keep="last", ignore_index=True
+        )
 
-        # identify non-index columns
-        non_index_cols = set(self.columns) - set(self.index_cols)
+        if len(records) == 0:
+            return self
 
-        for record in records:
-            # process record data
-            if validate:
-                record = self.model(**record).model_dump()
+        positions = self._get_positions(
+            list(zip(*[records[col].to_numpy() for col in self.index_cols]))
+        )
+        is_update = positions >= 0
+        cols = [col for col in records.columns if col in self.columns]
+
+        if is_update.any():
+            positions_update = positions[is_update]
+            for col in cols:
+                values = records[col].to_numpy()[is_update]
+                self._add_categories(col, values)
+                self.iloc[positions_update, self.columns.get_loc(col)] = values
+
+        if not is_update.all():
+            records_added = records.loc[~is_update, cols].reindex(columns=self.columns)
+            if len(self) == 0:
+                combined = records_added.infer_objects()
+            else:
+                for col in self.columns:
+                    if isinstance(self[col].dtype, pd.CategoricalDtype):
+                        self._add_categories(col, records_added[col])
+                        records_added[col] = pd.Categorical(
+                            records_added[col], categories=self[col].cat.categories
+                        )
+                combined = pd.concat([self, records_added], ignore_index=True)
+            self._update_inplace(combined)
+            self._invalidate_record_index()
+        return self
+
+    def _get_record_index(self, rebuild=False) -> pd.MultiIndex:
+        """Get the hash index mapping index_cols values to row positions.
+
+        The index is built on first use and reused until rows are added, removed
+        or reordered (i.e. until the dataframe's index changes), or until
+        ``rebuild`` is True. Since index_cols values can also be edited in place,
+        positions from the index should be checked with _get_positions.
+        """
+        self._check_index_cols()
+
+        cached = getattr(self, "_record_index", None)
+        if cached is not None and not rebuild:
+            index, n_rows, record_index = cached
+            if index is self.index and n_rows == len(self):
+                return record_index
+
+        record_index = pd.MultiIndex.from_arrays(
+            [self[col].to_numpy() for col in self.index_cols], names=self.index_cols
+        )
+        if not record_index.is_unique:
+            raise ValueError(
+                f"Duplicate records found in {self.__class__.__name__.lower()}"
+                f". Columns {self.index_cols} must uniquely identify a record"
+                f". Got duplicates:\n{self.find_duplicates()}"
+            )
+        self._record_index = (self.index, len(self), record_index)
+        return record_index
+
+    def _check_index_cols(self) -> None:
+        if self.index_cols is None:
+            raise RuntimeError(
+                f"Cannot look up records in {self.__class__.__name__.lower()}"
+                ": index_cols is not set"
+            )
+
+    def _invalidate_record_index(self) -> None:
+        """Force the record index to be rebuilt on next use."""
+        self._record_index = None
+
+    def _normalize_key(self, key: Any) -> tuple:
+        """Convert a record key to a tuple of index_cols values."""
+        self._check_index_cols()
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) != len(self.index_cols):
+            raise ValueError(
+                f"Invalid record key: {key}. Expected values for columns"
+                f" {self.index_cols}"
+            )
+        return key
+
+    def _get_positions(self, keys: list[tuple]) -> np.ndarray:
+        """Get the row positions of records (-1 for records that are not found).
+
+        The records at the positions from the cached index are checked against
+        the keys (only these rows are read). If a record is missing or has changed
+        (e.g. if an ID was edited in place), the index is rebuilt once.
+        """
+        if len(keys) == 0:
+            return np.array([], dtype=np.intp)
+
+        def lookup(record_index: pd.MultiIndex) -> np.ndarray:
+            if len(keys) == 1:
+                # get_loc is much faster than get_indexer for a single key
+                try:
+                    return np.array([record_index.get_loc(keys[0])], dtype=np.intp)
+                except KeyError:
+                    return np.array([-1], dtype=np.intp)
+            return record_index.get_indexer(pd.MultiIndex.from_tuples(keys))
+
+        positions = lookup(self._get_record_index())
+        if (positions < 0).any() or (
+            list(zip(*[self[col].array.take(positions) for col in self.index_cols]))
+            != keys
+        ):
+            positions = lookup(self._get_record_index(rebuild=True))
+        return positions
+
+    def get_record_positions(self, keys: Sequence[Any]) -> np.ndarray:
+        """Get the row positions of records identified by their index_cols values.
 
-            # add/update
-            for col in non_index_cols:
-                self.loc[tuple(record[col] for col in self.index_cols), col] = record[
-                    col
-                ]
+        Raises a KeyError if any record is not found.
+        """
+        keys = [self._normalize_key(key) for key in keys]
+        positions = self._get_positions(keys)
+        if (positions < 0).any():
+            missing = [key for key, pos in zip(keys, positions) if pos < 0]
+            raise KeyError(f"Records not found: {missing}")
+        return positions
+
+    def has_records(self, keys: Sequence[Any]) -> np.ndarray:
+        """Check which records (identified by their index_cols values) exist."""
+        return self._get_positions([self._normalize_key(key) for key in keys]) >= 0
+
+    def _get_position(self, key: Any) -> int:
+        key = self._normalize_key(key)
+        position = self._get_positions([key])[0]
+        if position < 0:
+            raise KeyError(key)
+        return position
+
+    def get_value(self, key: Any, col: str) -> Any:
+        """Get a single value from the record identified by ``key``.
+
+        Parameters
+        ----------
+        key : Any
+            Values of the index_cols columns (a tuple if there are several)
+        col : str
+            Column to get the value from
+        """
+        return self.iat[self._get_position(key), self.columns.get_loc(col)]
+
+    def set_value(self, key: Any, col: str, value: Any) -> Self:
+        """Set a single value (in place) for an existing record."""
+        position = self._get_position(key)
+        self._add_categories(col, [value])
+        self.iat[position, self.columns.get_loc(col)] = value
+        return self
 
-        self.reset_index(inplace=True)
+    def get_values(self, keys: Sequence[Any], col: str) -> np.ndarray:
+        """Get the values of a column for several existing records."""
+        return self[col].to_numpy()[self.get_record_positions(keys)]
+
+    def set_values(self, keys: Sequence[Any], col: str, values: Any) -> Self:
+        """Set the values of a column (in place) for several existing records.
+
+        ``values`` can be a single value or a sequence with the same length
+        as ``keys``.
+        """
+        positions = self.get_record_positions(keys)
+        if len(positions) > 0:
+            self._add_categories(
+                col, values if pd.api.types.is_list_like(values) else [values]
+            )
+            self.iloc[positions, self.columns.get_loc(col)] = values
         return self
 
+    def _add_categories(self, col: str, values: Sequence[Any]) -> None:
+        """Add new values to the categories of a categorical column (in place)."""
+        series = self[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            new_categories = (
+                pd.Index(values).dropna().unique().difference(series.cat.categories)
+            )
+            if len(new_categories) > 0:
+                self[col] = series.cat.add_categories(new_categories)
+
     def concatenate(self, other: Self, validate=True) -> Self:
         """Concatenate two dataframes."""
         concatenated: Self = pd.concat([self, other], ignore_index=True)
@@ -202,30 +1184,138 @@ class BaseTabular(pd.DataFrame, ABC):
         use_relative_path=True,
         sort=True,
         dry_run=False,
+        file_format: Optional[TabularFileFormat] = None,
+        export_csv=False,
+        backup_policy: Optional[BackupPolicy] = None,
     ) -> Path | None:
-        """Save the dataframe to a file with a backup."""
+        """Save the dataframe to a file with a backup.
+
+        For binary formats (Parquet/Arrow IPC), columns in index_cols are stored as
+        categoricals, and other columns keep their dtype (e.g. booleans). If
+        ``export_csv`` is True, a CSV copy of the data is also written next to
+        ``fpath_symlink`` (see :meth:`export_csv`), unless ``fpath_symlink``
+        already has a ``.csv`` extension. If the data has not changed, no new
+        backup is created, but the CSV copy is still written if it is missing.
+        Older backups are stored/deleted according to ``backup_policy`` (see
+        :func:`nipoppy.utils.save_df_with_backup`).
+        """
+        fpath_symlink = Path(fpath_symlink)
+        file_format = get_tabular_file_format(fpath_symlink, file_format)
+        fpath_csv = fpath_symlink.with_suffix(".csv")
+        export_csv = export_csv and fpath_csv != fpath_symlink and not dry_run
+
+        # fast path: compare with the hash of the last saved content
+        content_hash = self.get_content_hash(ordered=not sort)
+        hash_info = self._get_hash_info(content_hash, fpath_symlink, file_format)
+        fpath_hash = self._get_fpath_hash(fpath_symlink)
+        with contextlib.suppress(Exception):
+            if hash_info is not None and load_json(fpath_hash) == hash_info:
+                if export_csv and not fpath_csv.exists():
+                    (self.sort_values() if sort else self).export_csv(fpath_csv)
+                return None
+
         tabular_new = self.sort_values() if sort else self
         if fpath_symlink.exists():
             with contextlib.suppress(Exception):
-                tabular_old = self.load(fpath_symlink)
+                tabular_old = self.load(fpath_symlink, file_format=file_format)
                 if sort:
                     tabular_old = tabular_old.sort_values()
                 if tabular_new.equals(tabular_old):
+                    if not dry_run:
+                        save_json(hash_info, fpath_hash)
+                    if export_csv and not fpath_csv.exists():
+                        tabular_new.export_csv(fpath_csv)
                     return None
-        return save_df_with_backup(
-            tabular_new,
+        fpath_backup = save_df_with_backup(
+            tabular_new._get_typed_df() if file_format != "csv" else tabular_new,
             fpath_symlink=fpath_symlink,
             dname_backups=dname_backups,
             use_relative_path=use_relative_path,
             dry_run=dry_run,
+            file_format=file_format,
+            backup_policy=backup_policy,
         )
+        if not dry_run:
+            save_json(
+                self._get_hash_info(content_hash, fpath_symlink, file_format),
+                fpath_hash,
+            )
+        if export_csv:
+            tabular_new.export_csv(fpath_csv)
+        return fpath_backup
+
+    def get_content_hash(self, ordered=False) -> str:
+        """Get a hash of the column names and values of the dataframe.
+
+        Values are compared through their string representation, so the hash
+        does not depend on column dtypes (e.g. categorical vs object). If
+        ``ordered`` is False, the hash does not depend on the row or column order.
+        """
+        cols = list(self.columns) if ordered else sorted(self.columns)
+        if len(cols) > 0:
+            row_hashes = pd.util.hash_pandas_object(
+                pd.DataFrame({col: _to_canonical_str(self[col]) for col in cols}),
+                index=False,
+            ).to_numpy()
+        else:
+            row_hashes = np.zeros(len(self), dtype=np.uint64)
+        if not ordered:
+            row_hashes = np.sort(row_hashes)
+
+        content_hash = hashlib.sha256(json.dumps([str(col) for col in cols]).encode())
+        content_hash.update(row_hashes.tobytes())
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def _get_fpath_hash(fpath_symlink: Path) -> Path:
+        """Get the path to the sidecar file with the hash of the saved content."""
+        return fpath_symlink.parent / f".{fpath_symlink.name}.hash.json"
+
+    @staticmethod
+    def _get_hash_info(
+        content_hash: str, fpath_symlink: Path, file_format: TabularFileFormat
+    ) -> Optional[dict]:
+        """Get the information stored in the hash sidecar file.
+
+        The file that the symlink points to is also identified, so that changes
+        made outside of save_with_backup are detected. Returns None if the file
+        does not exist.
+        """
+        try:
+            stat = fpath_symlink.stat()
+        except OSError:
+            return None
+        return {
+            "hash": content_hash,
+            "file_format": file_format,
+            "target": str(fpath_symlink.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _get_typed_df(self) -> pd.DataFrame:
+        """Get a copy of the data with typed columns, for binary storage formats."""
+        df = pd.DataFrame(self).reset_index(drop=True)
+        for col in self.index_cols or []:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+
+    def export_csv(self, fpath: StrOrPathLike) -> Path:
+        """Write the data to a plain (human-readable) CSV file, without backups."""
+        fpath = Path(fpath)
+        if fpath.is_symlink():
+            # do not overwrite a backup file
+            fpath.unlink()
+        self.to_csv(fpath, index=False)
+        return fpath
 
     def equals(self, other: object) -> Self:
         """Check if two dataframes are equal."""
         try:
             pd.testing.assert_frame_equal(
-                self,
-                other,
+                _decategorize(self),
+                _decategorize(other),
                 check_like=True,
                 obj=str(self.__class__.__name__),
             )
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import ClassVar, Optional
 
+import pandas as pd
 from pydantic import Field, model_validator
 from typing_extensions import Self
 
+from nipoppy.env import BIDS_SESSION_PREFIX, BIDS_SUBJECT_PREFIX
 from nipoppy.layout import DEFAULT_LAYOUT_INFO
 from nipoppy.tabular.base import BaseTabular, BaseTabularModel
 from nipoppy.tabular.manifest import Manifest
@@ -30,7 +32,9 @@ class DicomDirMapModel(BaseTabularModel):
         title="Participant's raw DICOM directory",
         description=(
             "Path to the participant's raw DICOM directory, relative to the dataset's"
-            f" raw DICOM directory ({DEFAULT_LAYOUT_INFO.dpath_raw_imaging})"
+            f" raw DICOM directory ({DEFAULT_LAYOUT_INFO.dpath_raw_imaging}). Can also"
+            " be a zip or tar archive (e.g. .zip, .tar.gz), whose files are extracted"
+            " directly into the organized DICOM directory"
         ),
     )
 
@@ -41,6 +45,18 @@ class DicomDirMapModel(BaseTabularModel):
         check_session_id(self.session_id, raise_error=True)
         return self
 
+    @classmethod
+    def _validate_columns_after_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """Check participant and session IDs (column-wise)."""
+        return cls._startswith(
+            df[DicomDirMap.col_participant_id], BIDS_SUBJECT_PREFIX
+        ) | cls._startswith(df[DicomDirMap.col_session_id], BIDS_SESSION_PREFIX)
+
+    # validators reimplemented column-wise
+    _columnar_validators: ClassVar[set[str]] = BaseTabularModel._columnar_validators | {
+        "validate_after"
+    }
+
 
 class DicomDirMap(BaseTabular):
     """
@@ -56,6 +72,12 @@ class DicomDirMap(BaseTabular):
 
     index_cols = [col_participant_id, col_session_id]
 
+    column_dtypes = {
+        col_participant_id: "category",
+        col_session_id: "category",
+        col_participant_dicom_dir: "str",
+    }
+
     # set the model
     model = DicomDirMapModel
 
@@ -131,4 +153,6 @@ class DicomDirMap(BaseTabular):
         session_id : str
             Session, with the BIDS prefix
         """
-        return self.set_index(self.index_cols).loc[participant_id, session_id].item()
+        return self.get_value(
+            (participant_id, session_id), self.col_participant_dicom_dir
+        )
@@ -3,17 +3,28 @@
 from __future__ import annotations
 
 import logging
+import os
+import time
+from collections import defaultdict
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
+import numpy as np
 from pydantic import Field
 from typing_extensions import Self
 
+from nipoppy.archives import archive_has_members, is_archive
 from nipoppy.env import StrOrPathLike
 from nipoppy.logger import get_logger
+from nipoppy.parallel import ProgressLogger, parallel_map
 from nipoppy.tabular.dicom_dir_map import DicomDirMap
 from nipoppy.tabular.manifest import Manifest, ManifestModel
-from nipoppy.utils import participant_id_to_bids_participant, session_id_to_bids_session
+from nipoppy.utils import (
+    load_json,
+    participant_id_to_bids_participant,
+    save_json,
+    session_id_to_bids_session,
+)
 
 
 class DoughnutModel(ManifestModel):
@@ -59,6 +70,14 @@ class Doughnut(Manifest):
 
     index_cols = [Manifest.col_participant_id, Manifest.col_session_id]
 
+    column_dtypes = {
+        **Manifest.column_dtypes,
+        col_participant_dicom_dir: "str",
+        col_in_raw_imaging: "bool",
+        col_in_sourcedata: "bool",
+        col_in_bids: "bool",
+    }
+
     _metadata = Manifest._metadata + [
         "col_participant_dicom_dir",
         "col_in_raw_imaging",
@@ -83,7 +102,7 @@ class Doughnut(Manifest):
     def get_status(self, participant_id: str, session_id: str, col: str) -> bool:
         """Get one of the statuses for an existing record."""
         col = self._check_status_col(col)
-        return self.set_index(self.index_cols).loc[(participant_id, session_id), col]
+        return self.get_value((participant_id, session_id), col)
 
     def set_status(
         self, participant_id: str, session_id: str, col: str, status: bool
@@ -91,9 +110,15 @@ class Doughnut(Manifest):
         """Set one of the statuses for an existing record."""
         col = self._check_status_col(col)
         status = self._check_status_value(status)
-        self.set_index(self.index_cols, inplace=True)
-        self.loc[(participant_id, session_id), col] = status
-        return self.reset_index(inplace=True)
+        return self.set_value((participant_id, session_id), col, status)
+
+    def set_statuses(
+        self, participants_sessions: Sequence[tuple[str, str]], col: str, status: bool
+    ) -> Self:
+        """Set one of the statuses for several existing records at once."""
+        col = self._check_status_col(col)
+        status = self._check_status_value(status)
+        return self.set_values(participants_sessions, col, status)
 
     def _get_participant_sessions_helper(
         self,
@@ -102,9 +127,11 @@ class Doughnut(Manifest):
         session_id: Optional[str] = None,
     ):
         """Get subset of participants/sessions based on a status column."""
-        doughnut_subset: Doughnut = self.loc[self[status_col]]
-        return doughnut_subset.get_participants_sessions(
-            participant_id=participant_id, session_id=session_id
+        return self._iter_participants_sessions(
+            self[status_col].eq(True).to_numpy()
+            & self._get_participants_sessions_mask(
+                participant_id=participant_id, session_id=session_id
+            )
         )
 
     def get_downloaded_participants_sessions(
@@ -140,6 +167,360 @@ class Doughnut(Manifest):
         )
 
 
+def _split_path(path: StrOrPathLike) -> tuple[str, ...]:
+    """Split a relative path into its components (faster than Path.parts)."""
+    return tuple(
+        part
+        for part in os.fspath(path).replace(os.sep, "/").split("/")
+        if part not in ("", ".")
+    )
+
+
+# directories modified less than this many nanoseconds before being listed are not
+# stored in the directory index, since later changes could have the same mtime
+RACY_MTIME_NS = 2_000_000_000
+
+
+class DirectoryIndex:
+    """Last-seen state of directories, used to avoid listing unchanged directories.
+
+    For each root directory, the index maps relative paths (with "/" separators)
+    to ``[mtime_ns, is_nonempty, subdirs]`` lists, where ``subdirs`` contains the
+    names of all subdirectories and archives (or is None if the directory was not
+    fully listed). Adding/removing entries in a directory changes its mtime, so a
+    directory whose mtime is the same as in the index does not need to be listed
+    again. Archives are stored like leaf directories, so unchanged archives are
+    not opened again.
+    """
+
+    def __init__(self, entries: Optional[dict[str, dict[str, list]]] = None):
+        """Initialize the index.
+
+        Parameters
+        ----------
+        entries : Optional[dict[str, dict[str, list]]], optional
+            Mapping from root directory to relative path to directory state,
+            by default None (empty index)
+        """
+        if entries is None:
+            entries = {}
+        self.entries = entries
+        self._visited: dict[str, set[str]] = defaultdict(set)
+
+    @staticmethod
+    def get_fpath(fpath_doughnut: StrOrPathLike) -> Path:
+        """Get the path to the index (sidecar) file for a doughnut file."""
+        fpath_doughnut = Path(fpath_doughnut)
+        return fpath_doughnut.parent / f".{fpath_doughnut.name}.mtimes.json"
+
+    @classmethod
+    def load(cls, fpath: StrOrPathLike) -> Self:
+        """Load an index file. An empty index is returned if it cannot be read."""
+        try:
+            entries = load_json(fpath)["roots"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+        return cls(entries)
+
+    def save(self, fpath: StrOrPathLike) -> None:
+        """Save the index to a file."""
+        save_json({"roots": self.entries}, fpath, indent=None)
+
+    @staticmethod
+    def _get_key(parts: tuple[str, ...]) -> str:
+        return "/".join(parts)
+
+    def get(self, dpath_root: StrOrPathLike, parts: tuple[str, ...]) -> Optional[list]:
+        """Get the last-seen state of a directory (None if unknown)."""
+        return self.entries.get(str(dpath_root), {}).get(self._get_key(parts))
+
+    def set(
+        self,
+        dpath_root: StrOrPathLike,
+        parts: tuple[str, ...],
+        entry: Optional[list],
+    ) -> None:
+        """Set (or remove, if ``entry`` is None) the state of a visited directory."""
+        entries_root = self.entries.setdefault(str(dpath_root), {})
+        key = self._get_key(parts)
+        if entry is None:
+            entries_root.pop(key, None)
+        else:
+            entries_root[key] = entry
+        self._visited[str(dpath_root)].add(key)
+
+    def get_visited_dpaths(self) -> list[str]:
+        """Get the full paths of the directories visited since the last prune."""
+        return [
+            os.path.join(dpath_root, *key.split("/")) if key else dpath_root
+            for dpath_root, keys in self._visited.items()
+            for key in sorted(keys)
+        ]
+
+    def prune(self) -> None:
+        """Remove the directories that were not visited since the last prune."""
+        self.entries = {
+            dpath_root: {
+                key: entry
+                for key, entry in entries_root.items()
+                if key in self._visited[dpath_root]
+            }
+            for dpath_root, entries_root in self.entries.items()
+            if dpath_root in self._visited
+        }
+        self._visited = defaultdict(set)
+
+
+def _is_dir_or_archive(entry: os.DirEntry) -> bool:
+    return entry.is_dir() or (is_archive(entry.name) and entry.is_file())
+
+
+def _scan_dir(
+    dpath: StrOrPathLike, dnames_needed: set[str], list_all: bool = False
+) -> Optional[tuple[bool, list[str]]]:
+    """List a directory.
+
+    Returns None if the path is not a directory (or archive). Otherwise, returns
+    whether the directory is non-empty and which of the needed subdirectories
+    exist in it (or all subdirectories if ``list_all`` is True). Archive files are
+    treated as leaf directories that are non-empty if they contain at least one
+    file (see nipoppy.archives).
+    """
+    is_nonempty = False
+    subdirs = []
+    try:
+        with os.scandir(dpath) as entries:
+            for entry in entries:
+                is_nonempty = True
+                if len(dnames_needed) == 0:
+                    # leaf directory: no need to list all of its content
+                    break
+                if (list_all or entry.name in dnames_needed) and _is_dir_or_archive(
+                    entry
+                ):
+                    subdirs.append(entry.name)
+    except NotADirectoryError:
+        if is_archive(dpath):
+            return archive_has_members(dpath), []
+        return None
+    except OSError:
+        # does not exist
+        return None
+    return is_nonempty, subdirs
+
+
+def _scan_dir_if_changed(
+    dpath: StrOrPathLike, dnames_needed: set[str], entry_old: Optional[list]
+) -> tuple[Optional[list], bool]:
+    """List a directory only if its mtime differs from the last-seen one.
+
+    Returns the new state of the directory (see DirectoryIndex, None if the path
+    is not a directory) and whether the directory was listed.
+    """
+    try:
+        mtime_ns = os.stat(dpath).st_mtime_ns
+    except OSError:
+        return None, False
+    if (
+        entry_old is not None
+        and entry_old[0] == mtime_ns
+        and (len(dnames_needed) == 0 or entry_old[2] is not None)
+    ):
+        return entry_old, False
+
+    result = _scan_dir(dpath, dnames_needed, list_all=True)
+    if result is None:
+        return None, True
+    is_nonempty, subdirs = result
+    return [mtime_ns, is_nonempty, subdirs if len(dnames_needed) > 0 else None], True
+
+
+def _is_nonempty_dir(dpath: StrOrPathLike) -> bool:
+    """Check whether a path is a non-empty directory (or archive)."""
+    dpath = Path(dpath)
+    if is_archive(dpath) and dpath.is_file():
+        return archive_has_members(dpath)
+    return dpath.is_dir() and next(dpath.iterdir(), None) is not None
+
+
+def _get_targets_and_children(
+    relative_paths: Iterable[tuple[str, ...]],
+) -> tuple[set[tuple[str, ...]], dict[tuple[str, ...], set[str]]]:
+    """Get the (non-empty) requested paths and their prefixes grouped by parent."""
+    targets = set()
+    children = defaultdict(set)
+    for parts in relative_paths:
+        if len(parts) == 0:
+            continue
+        targets.add(parts)
+        for i_part in range(len(parts)):
+            children[parts[:i_part]].add(parts[i_part])
+    return targets, children
+
+
+def _find_nonempty_dirs(
+    dpath_roots: Sequence[Optional[StrOrPathLike]],
+    relative_paths: Sequence[Iterable[tuple[str, ...]]],
+    logger: logging.Logger,
+    n_jobs: int = 1,
+    dir_index: Optional[DirectoryIndex] = None,
+) -> list[set[tuple[str, ...]]]:
+    """Find which relative paths are non-empty directories under root directories.
+
+    Relative paths are given as tuples of path components, with one list of paths
+    per root directory. The directory trees are listed with os.scandir level by
+    level, only descending into directories that are (or contain) one of the
+    requested paths. Each of these directories is listed exactly once, so the
+    number of system calls is proportional to the number of existing directories
+    rather than the number of requested paths. Directories at the same level
+    (from all root directories) are listed concurrently with up to ``n_jobs``
+    threads.
+
+    If ``dir_index`` is given, directories whose mtime has not changed since they
+    were last listed are not listed again, and the index is updated in place.
+
+    Returns one set of non-empty directories per root directory.
+    """
+    targets = []
+    children = []
+    for paths in relative_paths:
+        targets_root, children_root = _get_targets_and_children(paths)
+        targets.append(targets_root)
+        children.append(children_root)
+
+    def probe(task: tuple[int, tuple[str, ...]]) -> tuple[Optional[list], bool]:
+        i_root, parts = task
+        dpath = os.path.join(dpath_roots[i_root], *parts)
+        dnames_needed = children[i_root].get(parts, set())
+        if dir_index is None:
+            result = _scan_dir(dpath, dnames_needed)
+            return (None if result is None else [None, *result]), True
+        return _scan_dir_if_changed(
+            dpath, dnames_needed, dir_index.get(dpath_roots[i_root], parts)
+        )
+
+    time_start_ns = time.time_ns()
+    nonempty_dirs = [set() for _ in dpath_roots]
+    n_listed = 0
+    progress = ProgressLogger(logger=logger, description="directories")
+    to_scan = [
+        (i_root, ())
+        for i_root, dpath_root in enumerate(dpath_roots)
+        if dpath_root is not None
+    ]
+    while len(to_scan) > 0:
+        to_scan_next = []
+        for (i_root, parts), (entry, is_listed) in zip(
+            to_scan, parallel_map(probe, to_scan, n_jobs=n_jobs, progress=progress)
+        ):
+            n_listed += is_listed
+            if dir_index is not None:
+                is_racy = entry is not None and time_start_ns - entry[0] < RACY_MTIME_NS
+                dir_index.set(dpath_roots[i_root], parts, None if is_racy else entry)
+            if entry is None:
+                continue
+            _, is_nonempty, subdirs = entry
+            if is_nonempty and parts in targets[i_root]:
+                nonempty_dirs[i_root].add(parts)
+            dnames_needed = children[i_root].get(parts, set())
+            to_scan_next.extend(
+                (i_root, parts + (subdir,))
+                for subdir in (subdirs or [])
+                if subdir in dnames_needed
+            )
+        to_scan = to_scan_next
+
+    for dpath_root, targets_root, nonempty_dirs_root in zip(
+        dpath_roots, targets, nonempty_dirs
+    ):
+        if dpath_root is not None:
+            logger.debug(
+                f"Found {len(nonempty_dirs_root)} non-empty directories out of"
+                f" {len(targets_root)} under {dpath_root}"
+            )
+    logger.info(progress.get_message())
+    if dir_index is not None:
+        logger.info(
+            f"Listed {n_listed} new/changed directories out of {progress.n_done}"
+        )
+    return nonempty_dirs
+
+
+def _get_statuses(
+    dpath_roots: Sequence[Optional[StrOrPathLike]],
+    relative_paths: Sequence[Sequence[StrOrPathLike | tuple[str, ...]]],
+    logger: logging.Logger,
+    n_jobs: int = 1,
+    dir_index: Optional[DirectoryIndex] = None,
+) -> list[list[bool]]:
+    """Check whether relative paths are non-empty directories under root directories.
+
+    Paths can be given as strings/path-like objects or as tuples of path
+    components, with one list of paths per root directory. Paths that go up the
+    directory tree (i.e. with "..") or that are absolute are checked one at a time
+    (and are not stored in ``dir_index``).
+
+    Returns one list of statuses per root directory, in the same order as the
+    relative paths.
+    """
+    all_parts = [
+        [path if isinstance(path, tuple) else _split_path(path) for path in paths]
+        for paths in relative_paths
+    ]
+    nonempty_dirs = _find_nonempty_dirs(
+        dpath_roots,
+        [
+            [parts for parts in parts_root if ".." not in parts]
+            for parts_root in all_parts
+        ],
+        logger=logger,
+        n_jobs=n_jobs,
+        dir_index=dir_index,
+    )
+
+    to_check_separately = sorted(
+        {
+            (
+                (i_root, parts, os.path.join(dpath_roots[i_root], *parts))
+                if isinstance(path, tuple)
+                else (i_root, parts, os.path.join(dpath_roots[i_root], path))
+            )
+            for i_root, (paths, parts_root) in enumerate(zip(relative_paths, all_parts))
+            if dpath_roots[i_root] is not None
+            for path, parts in zip(paths, parts_root)
+            if ".." in parts or (not isinstance(path, tuple) and os.path.isabs(path))
+        }
+    )
+    for (i_root, parts, _), is_nonempty in zip(
+        to_check_separately,
+        parallel_map(
+            _is_nonempty_dir, [dpath for _, _, dpath in to_check_separately], n_jobs
+        ),
+    ):
+        if is_nonempty:
+            nonempty_dirs[i_root].add(parts)
+        else:
+            nonempty_dirs[i_root].discard(parts)
+
+    return [
+        [parts in nonempty_dirs_root for parts in parts_root]
+        for parts_root, nonempty_dirs_root in zip(all_parts, nonempty_dirs)
+    ]
+
+
+def _get_bids_dirs(
+    participant_ids: Iterable[str], session_ids: Iterable[str]
+) -> list[tuple[str, str]]:
+    """Get the BIDS participant/session directories as tuples of path components."""
+    return [
+        (
+            participant_id_to_bids_participant(participant_id),
+            session_id_to_bids_session(session_id),
+        )
+        for participant_id, session_id in zip(participant_ids, session_ids)
+    ]
+
+
 def generate_doughnut(
     manifest: Manifest,
     dicom_dir_map: DicomDirMap,
@@ -148,26 +529,19 @@ def generate_doughnut(
     dpath_bidsified: Optional[StrOrPathLike] = None,
     empty=False,
     logger: Optional[logging.Logger] = None,
+    n_jobs: int = 1,
+    dir_index: Optional[DirectoryIndex] = None,
 ) -> Doughnut:
-    """Generate a doughnut object."""
-
-    def check_status(
-        dpath: Optional[StrOrPathLike],
-        dname_subdirectory: StrOrPathLike,
-    ):
-        dname_subdirectory = Path(dname_subdirectory)
-        if dpath is None:
-            status = False
-        else:
-            dpath = Path(dpath)
-            dpath_participant: Path = dpath / dname_subdirectory
-            if dpath_participant.exists():
-                status = next(dpath_participant.iterdir(), None) is not None
-            else:
-                status = False
-            logger.debug(f"Status for {dpath_participant}: {status}")
-        return status
-
+    """Generate a doughnut object.
+
+    The statuses are determined by listing each of the downloaded/organized/BIDS
+    directories once (see _find_nonempty_dirs), instead of checking the
+    participant-session directories one at a time. The three directory trees
+    are listed concurrently using up to ``n_jobs`` threads, which can reduce
+    runtime on high-latency (e.g. network) filesystems. If ``dir_index`` is given,
+    directories that have not changed since the index was last updated are not
+    listed again (see DirectoryIndex).
+    """
     if logger is None:
         logger = get_logger("generate_doughnut")
 
@@ -176,56 +550,102 @@ def generate_doughnut(
     manifest_imaging_only = manifest.get_imaging_subset()
     logger.debug(f"Imaging-only manifest:\n{manifest_imaging_only}")
 
-    doughnut_records = []
-    for _, manifest_record in manifest_imaging_only.iterrows():
-        participant_id = manifest_record[manifest.col_participant_id]
-        session_id = manifest_record[manifest.col_session_id]
+    participant_ids = manifest_imaging_only[manifest.col_participant_id].tolist()
+    session_ids = manifest_imaging_only[manifest.col_session_id].tolist()
 
-        # get DICOM dir
-        participant_dicom_dir = dicom_dir_map.get_dicom_dir(
-            participant_id=participant_id, session_id=session_id
-        )
-
-        # get BIDS IDs
-        bids_participant = participant_id_to_bids_participant(participant_id)
-        bids_session = session_id_to_bids_session(session_id)
+    # get DICOM dirs
+    participant_dicom_dirs = dicom_dir_map.get_values(
+        list(zip(participant_ids, session_ids)),
+        dicom_dir_map.col_participant_dicom_dir,
+    ).tolist()
 
-        if empty:
-            status_downloaded = False
-            status_organized = False
-            status_bidsified = False
-        else:
-            status_downloaded = check_status(
-                dpath=dpath_downloaded,
-                dname_subdirectory=participant_dicom_dir,
-            )
-            status_organized = check_status(
-                dpath=dpath_organized,
-                dname_subdirectory=Path(bids_participant, bids_session),
-            )
-            status_bidsified = check_status(
-                dpath=dpath_bidsified,
-                dname_subdirectory=Path(bids_participant, bids_session),
-            )
+    # get BIDS IDs
+    bids_dirs = _get_bids_dirs(participant_ids, session_ids)
 
-        doughnut_records.append(
-            {
-                Doughnut.col_participant_id: participant_id,
-                Doughnut.col_visit_id: manifest_record[Manifest.col_visit_id],
-                Doughnut.col_session_id: session_id,
-                Doughnut.col_datatype: manifest_record[Manifest.col_datatype],
-                Doughnut.col_participant_dicom_dir: participant_dicom_dir,
-                Doughnut.col_in_raw_imaging: status_downloaded,
-                Doughnut.col_in_sourcedata: status_organized,
-                Doughnut.col_in_bids: status_bidsified,
-            }
+    if empty:
+        status_downloaded = status_organized = status_bidsified = [False] * len(
+            participant_ids
+        )
+    else:
+        status_downloaded, status_organized, status_bidsified = _get_statuses(
+            [dpath_downloaded, dpath_organized, dpath_bidsified],
+            [participant_dicom_dirs, bids_dirs, bids_dirs],
+            logger=logger,
+            n_jobs=n_jobs,
+            dir_index=dir_index,
         )
 
-    doughnut = Doughnut(doughnut_records)
+    doughnut = Doughnut(
+        {
+            Doughnut.col_participant_id: participant_ids,
+            Doughnut.col_visit_id: manifest_imaging_only[
+                Manifest.col_visit_id
+            ].tolist(),
+            Doughnut.col_session_id: session_ids,
+            Doughnut.col_datatype: manifest_imaging_only[
+                Manifest.col_datatype
+            ].tolist(),
+            Doughnut.col_participant_dicom_dir: participant_dicom_dirs,
+            Doughnut.col_in_raw_imaging: status_downloaded,
+            Doughnut.col_in_sourcedata: status_organized,
+            Doughnut.col_in_bids: status_bidsified,
+        }
+    )
     logger.debug(f"Generated doughnut:\n{doughnut}")
     return doughnut
 
 
+def refresh_doughnut(
+    doughnut: Doughnut,
+    dpath_downloaded: Optional[StrOrPathLike] = None,
+    dpath_organized: Optional[StrOrPathLike] = None,
+    dpath_bidsified: Optional[StrOrPathLike] = None,
+    logger: Optional[logging.Logger] = None,
+    n_jobs: int = 1,
+    dir_index: Optional[DirectoryIndex] = None,
+) -> Doughnut:
+    """Re-check the statuses of all records of a doughnut (in place).
+
+    If ``dir_index`` is given, only directories that changed since the index was
+    last updated are listed (see DirectoryIndex), so refreshing a doughnut for a
+    dataset that did not change much is fast. Only the status columns of records
+    whose statuses changed are modified.
+    """
+    if logger is None:
+        logger = get_logger("refresh_doughnut")
+
+    participant_dicom_dirs = doughnut[doughnut.col_participant_dicom_dir].tolist()
+    bids_dirs = _get_bids_dirs(
+        doughnut[doughnut.col_participant_id], doughnut[doughnut.col_session_id]
+    )
+    statuses = _get_statuses(
+        [dpath_downloaded, dpath_organized, dpath_bidsified],
+        [participant_dicom_dirs, bids_dirs, bids_dirs],
+        logger=logger,
+        n_jobs=n_jobs,
+        dir_index=dir_index,
+    )
+
+    statuses_old = {
+        col: doughnut[col].to_numpy(dtype=bool) for col in doughnut.status_cols
+    }
+    statuses_new = {
+        col: np.array(statuses_col, dtype=bool)
+        for col, statuses_col in zip(doughnut.status_cols, statuses)
+    }
+    positions = np.flatnonzero(
+        np.logical_or.reduce(
+            [statuses_old[col] != statuses_new[col] for col in doughnut.status_cols]
+        )
+    )
+    for col in doughnut.status_cols:
+        doughnut.iloc[positions, doughnut.columns.get_loc(col)] = statuses_new[col][
+            positions
+        ]
+    logger.info(f"Updated the statuses of {len(positions)} existing records")
+    return doughnut
+
+
 def update_doughnut(
     doughnut: Doughnut,
     manifest: Manifest,
@@ -235,20 +655,42 @@ def update_doughnut(
     dpath_bidsified: Optional[StrOrPathLike] = None,
     empty=False,
     logger: Optional[logging.Logger] = None,
+    n_jobs: int = 1,
+    refresh=False,
+    dir_index: Optional[DirectoryIndex] = None,
 ) -> Doughnut:
-    """Update an existing doughnut file."""
+    """Update an existing doughnut file.
+
+    Records are generated for manifest rows that are not in the doughnut, or whose
+    manifest columns (e.g. visit ID, datatype) have changed since the doughnut
+    was created. Other records are kept as is, unless ``refresh`` is True, in which
+    case their statuses are re-checked (see refresh_doughnut).
+    """
     if logger is None:
         logger = get_logger("update_doughnut")
 
     logger.debug(f"Original doughnut:\n{doughnut}")
     logger.debug(f"Manifest:\n{manifest}")
-    manifest_subset = manifest.get_diff(doughnut, cols=doughnut.index_cols)
+    manifest_subset = manifest.get_diff(
+        doughnut, cols=doughnut.index_cols, include_changed=True
+    )
     logger.debug(
-        "Manifest subset (difference between manifest and doughnut)"
+        "Manifest subset (new or changed records compared to the doughnut)"
         f":\n{manifest_subset}"
     )
 
-    updated_doughnut = doughnut.concatenate(
+    updated_doughnut = doughnut.copy()
+    if refresh:
+        refresh_doughnut(
+            updated_doughnut,
+            dpath_downloaded=dpath_downloaded,
+            dpath_organized=dpath_organized,
+            dpath_bidsified=dpath_bidsified,
+            logger=logger,
+            n_jobs=n_jobs,
+            dir_index=dir_index,
+        )
+    updated_doughnut.add_or_update_records(
         generate_doughnut(
             manifest=manifest_subset,
             dicom_dir_map=dicom_dir_map,
@@ -257,6 +699,8 @@ def update_doughnut(
             dpath_bidsified=dpath_bidsified,
             empty=empty,
             logger=logger,
+            n_jobs=n_jobs,
+            dir_index=dir_index,
         )
     )
 
@@ -2,16 +2,81 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import ast
+import sys
+from functools import lru_cache
+from typing import ClassVar, Iterable, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 from pydantic import ConfigDict, Field, model_validator
 from typing_extensions import Self
 
+from nipoppy.env import BIDS_SESSION_PREFIX, BIDS_SUBJECT_PREFIX
 from nipoppy.tabular.base import BaseTabular, BaseTabularModel
 from nipoppy.utils import FIELD_DESCRIPTION_MAP, check_participant_id, check_session_id
 
 
+@lru_cache(maxsize=None)
+def _parse_datatype_str(datatype: str) -> tuple[str, ...]:
+    """Parse the string representation of a list of datatypes.
+
+    Results are cached since most manifest rows share a few distinct values,
+    and the datatype strings are interned.
+    """
+    parsed = ast.literal_eval(datatype)
+    if not isinstance(parsed, (list, tuple)):
+        raise TypeError(f"Expected a list, got {type(parsed)}")
+    return tuple(sys.intern(item) if isinstance(item, str) else item for item in parsed)
+
+
+def parse_datatype(datatype) -> list[str] | None:
+    """Convert a datatype value (e.g. "['anat', 'dwi']") to a list of datatypes.
+
+    Lists and missing values are returned as-is.
+    """
+    if datatype is None or isinstance(datatype, list):
+        return datatype
+    try:
+        return list(_parse_datatype_str(datatype))
+    except Exception:
+        raise ValueError(
+            f"Invalid datatype: {datatype} ({type(datatype)}))"
+            ". Must be a list, a string representation of a list"
+            ", or left empty"
+        )
+
+
+def parse_datatypes(datatypes: Iterable, errors="raise") -> list[list[str] | None]:
+    """Convert many datatype values (e.g. an entire column) at once.
+
+    Parameters
+    ----------
+    datatypes : Iterable
+        Values to convert, see :func:`parse_datatype`
+    errors : str, optional
+        If "raise", invalid values raise a ValueError.
+        If "coerce", invalid values are set to None. By default "raise"
+
+    Returns
+    -------
+    list[list[str] | None]
+        Parsed values. Each row gets its own list object.
+    """
+    if errors not in ("raise", "coerce"):
+        raise ValueError(f"Invalid value for errors: {errors}")
+
+    parsed = []
+    for datatype in datatypes:
+        try:
+            parsed.append(parse_datatype(datatype))
+        except ValueError:
+            if errors == "raise":
+                raise
+            parsed.append(None)
+    return parsed
+
+
 class ManifestModel(BaseTabularModel):
     """
     A user-provided listing of participant and visits available in the dataset.
@@ -35,18 +100,28 @@ class ManifestModel(BaseTabularModel):
     @classmethod
     def _validate_before_fields(cls, data: dict):
         """Validate manifest-specific fields."""
-        datatype = data.get(Manifest.col_datatype)
-        if datatype is not None and not isinstance(datatype, list):
-            try:
-                data[Manifest.col_datatype] = pd.eval(datatype)
-            except Exception:
-                raise ValueError(
-                    f"Invalid datatype: {datatype} ({type(datatype)}))"
-                    ". Must be a list, a string representation of a list"
-                    ", or left empty"
-                )
+        if Manifest.col_datatype in data:
+            data[Manifest.col_datatype] = parse_datatype(data[Manifest.col_datatype])
         return data
 
+    @classmethod
+    def _validate_columns_before_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """Validate manifest-specific fields (column-wise)."""
+        datatypes = df[Manifest.col_datatype]
+        to_parse = datatypes.notna() & ~datatypes.map(
+            lambda value: isinstance(value, list)
+        ).astype(bool)
+
+        df[Manifest.col_datatype] = datatypes.where(
+            ~to_parse,
+            pd.Series(
+                parse_datatypes(datatypes[to_parse], errors="coerce"),
+                index=datatypes.index[to_parse],
+                dtype=object,
+            ),
+        )
+        return df[Manifest.col_datatype].isna() & to_parse
+
     @model_validator(mode="after")
     def validate_after(self) -> Self:
         """Validate fields after instance creation."""
@@ -54,6 +129,18 @@ class ManifestModel(BaseTabularModel):
         check_session_id(self.session_id, raise_error=True)
         return self
 
+    @classmethod
+    def _validate_columns_after_fields(cls, df: pd.DataFrame) -> pd.Series:
+        """Check participant and session IDs (column-wise)."""
+        return cls._startswith(
+            df[Manifest.col_participant_id], BIDS_SUBJECT_PREFIX
+        ) | cls._startswith(df[Manifest.col_session_id], BIDS_SESSION_PREFIX)
+
+    # validators reimplemented column-wise
+    _columnar_validators: ClassVar[set[str]] = BaseTabularModel._columnar_validators | {
+        "validate_after"
+    }
+
     # allow extra columns
     model_config = ConfigDict(extra="allow")
 
@@ -69,6 +156,12 @@ class Manifest(BaseTabular):
 
     index_cols = [col_participant_id, col_visit_id]
 
+    column_dtypes = {
+        col_participant_id: "category",
+        col_visit_id: "category",
+        col_session_id: "category",
+    }
+
     # set the model
     model = ManifestModel
 
@@ -83,10 +176,22 @@ class Manifest(BaseTabular):
 
     @classmethod
     def load(
-        cls, *args, session_ids=None, visit_ids=None, validate=True, **kwargs
+        cls,
+        *args,
+        session_ids=None,
+        visit_ids=None,
+        validate=True,
+        compact_datatypes=False,
+        **kwargs,
     ) -> Self:
-        """Load the manifest."""
+        """Load the manifest.
+
+        If compact_datatypes is True, the datatype column is stored as a
+        categorical column (see :meth:`compact_datatypes`).
+        """
         manifest = super().load(*args, validate=validate, **kwargs)
+        if compact_datatypes:
+            manifest = manifest.compact_datatypes()
         manifest.session_ids = session_ids
         manifest.visit_ids = visit_ids
         return manifest
@@ -115,32 +220,140 @@ class Manifest(BaseTabular):
             )
         return self
 
-    def get_imaging_subset(self, session_id: Optional[str] = None):
-        """Get records with imaging data."""
+    def _factorize_datatypes(self) -> tuple[np.ndarray, list[tuple[str, ...]]]:
+        """Get an integer code for each row and the distinct datatype lists.
+
+        Missing values have code -1.
+        """
+        datatypes = self[self.col_datatype]
+        if isinstance(datatypes.dtype, pd.CategoricalDtype):
+            codes = datatypes.cat.codes.to_numpy()
+            uniques = datatypes.cat.categories
+        else:
+            codes, uniques = pd.factorize(
+                pd.Series(
+                    [
+                        tuple(datatype) if isinstance(datatype, list) else datatype
+                        for datatype in datatypes
+                    ],
+                    dtype=object,
+                )
+            )
+        uniques = [
+            unique if isinstance(unique, tuple) else tuple(parse_datatype(unique))
+            for unique in uniques
+        ]
+        return codes, uniques
+
+    def compact_datatypes(self) -> Self:
+        """Store the datatype column as a categorical column.
+
+        Each distinct list of datatypes is stored only once, as its string
+        representation (i.e. the same way it is written to disk), instead of
+        having a separate Python list for each row. Use :meth:`expand_datatypes`
+        to convert the column back to lists.
+        """
+        codes, uniques = self._factorize_datatypes()
+        manifest = self.copy()
+        manifest[self.col_datatype] = pd.Categorical.from_codes(
+            codes, categories=[str(list(unique)) for unique in uniques]
+        )
+        return manifest
+
+    def expand_datatypes(self) -> Self:
+        """Store the datatype column as lists (inverse of compact_datatypes)."""
+        manifest = self.copy()
+        manifest[self.col_datatype] = pd.Series(
+            parse_datatypes(
+                self[self.col_datatype]
+                .astype(object)
+                .where(self[self.col_datatype].notna(), None)
+            ),
+            index=self.index,
+            dtype=object,
+        )
+        return manifest
+
+    def get_datatype_bitmasks(self) -> tuple[np.ndarray, list[str]]:
+        """Encode the datatype column as integer bitmasks.
+
+        Works with both the list and compact (categorical) representations.
+
+        Returns
+        -------
+        np.ndarray
+            One bitmask per row (0 for missing values)
+        list[str]
+            The datatype associated with each bit
+        """
+        codes, uniques = self._factorize_datatypes()
+        datatypes_all = sorted({datatype for unique in uniques for datatype in unique})
+        if len(datatypes_all) > 64:
+            raise ValueError(
+                f"Cannot encode more than 64 distinct datatypes, got {datatypes_all}"
+            )
+        bits = {datatype: 1 << i_bit for i_bit, datatype in enumerate(datatypes_all)}
+
+        # one bitmask per distinct value, plus one for missing values (code -1)
+        bitmasks_unique = np.array(
+            [sum(bits[datatype] for datatype in set(unique)) for unique in uniques]
+            + [0],
+            dtype=np.uint64,
+        )
+        return bitmasks_unique[codes], datatypes_all
+
+    def has_datatypes(self, datatypes: Sequence[str] | str) -> pd.Series:
+        """Get a boolean mask of records that have all the given datatypes."""
+        if isinstance(datatypes, str):
+            datatypes = [datatypes]
+        bitmasks, datatypes_all = self.get_datatype_bitmasks()
+        if not set(datatypes).issubset(datatypes_all):
+            return pd.Series(False, index=self.index)
+        required = np.uint64(
+            sum(1 << datatypes_all.index(datatype) for datatype in set(datatypes))
+        )
+        return pd.Series((bitmasks & required) == required, index=self.index)
+
+    def get_imaging_subset(
+        self,
+        session_id: Optional[str] = None,
+        datatypes: Optional[Sequence[str] | str] = None,
+    ):
+        """Get records with imaging data.
+
+        If datatypes is given, only records with all of these datatypes are kept.
+        """
         manifest = self[self[self.col_session_id].notna()]
         if session_id is not None:
-            return manifest[manifest[self.col_session_id] == session_id]
+            manifest = manifest[manifest[self.col_session_id] == session_id]
+        if datatypes is not None:
+            manifest = manifest[manifest.has_datatypes(datatypes)]
         return manifest
 
+    def _get_participants_sessions_mask(
+        self, participant_id: Optional[str] = None, session_id: Optional[str] = None
+    ) -> np.ndarray:
+        """Get a boolean mask of records with a session (optionally filtered)."""
+        mask = self[self.col_session_id].notna().to_numpy()
+        if participant_id is not None:
+            mask &= self._get_mask(self.col_participant_id, [participant_id])
+        if session_id is not None:
+            mask &= self._get_mask(self.col_session_id, [session_id])
+        return mask
+
+    def _iter_participants_sessions(self, mask: np.ndarray):
+        """Yield participant ID and session ID pairs for the selected records."""
+        yield from zip(
+            self[self.col_participant_id].array[mask].tolist(),
+            self[self.col_session_id].array[mask].tolist(),
+        )
+
     def get_participants_sessions(
         self, participant_id: Optional[str] = None, session_id: Optional[str] = None
     ):
         """Get participant IDs and session IDs."""
-        if participant_id is None:
-            participant_ids = set(self[self.col_participant_id])
-        else:
-            participant_ids = {participant_id}
-        if session_id is None:
-            session_ids = self[self.col_session_id]
-            session_ids = set(session_ids[session_ids.notna()])
-        else:
-            session_ids = {session_id}
-
-        manifest_subset = self[
-            (self[self.col_participant_id].isin(participant_ids))
-            & (self[self.col_session_id].isin(session_ids))
-        ]
-
-        yield from manifest_subset[
-            [self.col_participant_id, self.col_session_id]
-        ].itertuples(index=False)
+        yield from self._iter_participants_sessions(
+            self._get_participants_sessions_mask(
+                participant_id=participant_id, session_id=session_id
+            )
+        )
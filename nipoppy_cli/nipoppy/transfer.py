@@ -0,0 +1,322 @@
+"""Transfer of files between directories (links, copies and moves)."""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from nipoppy.env import TRANSFER_MODES, StrOrPathLike, TransferMode
+from nipoppy.parallel import parallel_map
+
+DEFAULT_TRANSFER_MODE = "symlink"
+
+# mode to use instead when a mode is not supported (copy is always supported)
+FALLBACK_MODES = {
+    "symlink": "hardlink",
+    "hardlink": "reflink",
+    "reflink": "copy",
+}
+
+# errors indicating that a mode is not supported for a source/destination pair
+UNSUPPORTED_ERRNOS = {
+    "symlink": {errno.EPERM, errno.EOPNOTSUPP},
+    "hardlink": {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP},
+    "reflink": {
+        errno.EXDEV,
+        errno.EOPNOTSUPP,
+        errno.EINVAL,
+        errno.ENOTTY,
+        errno.ENOSYS,
+        errno.EBADF,
+    },
+}
+
+# ioctl request to share the data blocks of a file (Linux)
+FICLONE = 0x40049409
+
+# number of files copied at the same time
+N_JOBS_COPY = 4
+
+
+@lru_cache(maxsize=1024)
+def _get_relative_dpath(dpath_source: str, dpath_dest: str) -> str:
+    return os.path.relpath(dpath_source, dpath_dest)
+
+
+def symlink_file(fpath_source: StrOrPathLike, fpath_dest: StrOrPathLike) -> int:
+    """Create a relative symlink to the source file. Returns 0 (bytes copied)."""
+    fpath_source = os.fspath(fpath_source)
+    fpath_dest = os.fspath(fpath_dest)
+    dpath_source_relative = _get_relative_dpath(
+        os.path.dirname(fpath_source), os.path.dirname(fpath_dest)
+    )
+    os.symlink(
+        os.path.join(dpath_source_relative, os.path.basename(fpath_source)),
+        fpath_dest,
+    )
+    return 0
+
+
+def hardlink_file(fpath_source: StrOrPathLike, fpath_dest: StrOrPathLike) -> int:
+    """Create a hard link to the source file. Returns 0 (bytes copied)."""
+    os.link(fpath_source, fpath_dest)
+    return 0
+
+
+def reflink_file(fpath_source: StrOrPathLike, fpath_dest: StrOrPathLike) -> int:
+    """Create a copy-on-write clone of the source file (Linux only).
+
+    The clone shares the source's data blocks, so no data is copied. Only some
+    filesystems support this (e.g. Btrfs, XFS, ZFS 2.2+). Returns the file size.
+
+    Raises
+    ------
+    OSError
+        If reflinks are not supported (the destination file is not created)
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux")
+    import fcntl
+
+    with open(fpath_source, "rb") as file_source:
+        with open(fpath_dest, "xb") as file_dest:
+            try:
+                fcntl.ioctl(file_dest.fileno(), FICLONE, file_source.fileno())
+            except OSError:
+                file_dest.close()
+                os.unlink(fpath_dest)
+                raise
+        n_bytes = os.fstat(file_source.fileno()).st_size
+    shutil.copystat(fpath_source, fpath_dest)
+    return n_bytes
+
+
+def _copy_file_range(file_source, file_dest) -> int:
+    """Copy file contents with copy_file_range (in the kernel).
+
+    Raises
+    ------
+    OSError
+        If copy_file_range is not supported
+    """
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    n_bytes = 0
+    while True:
+        n_bytes_chunk = os.copy_file_range(
+            file_source.fileno(), file_dest.fileno(), 1 << 30
+        )
+        if n_bytes_chunk == 0:
+            return n_bytes
+        n_bytes += n_bytes_chunk
+
+
+def copy_file(fpath_source: StrOrPathLike, fpath_dest: StrOrPathLike) -> int:
+    """Copy a file's contents and metadata (like shutil.copy2).
+
+    The contents are copied with copy_file_range if possible, which avoids copying
+    data to user space and can use server-side copies or reflinks depending on the
+    filesystem. Otherwise, shutil.copyfile is used (which uses sendfile on Linux).
+    Returns the number of bytes copied.
+    """
+    with open(fpath_source, "rb") as file_source:
+        with open(fpath_dest, "xb") as file_dest:
+            try:
+                n_bytes = _copy_file_range(file_source, file_dest)
+            except OSError as exception:
+                if exception.errno not in (
+                    errno.ENOSYS,
+                    errno.EXDEV,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                    errno.EBADF,
+                ):
+                    raise
+                n_bytes = None
+    if n_bytes is None:
+        shutil.copyfile(fpath_source, fpath_dest)
+        n_bytes = os.stat(fpath_dest).st_size
+    shutil.copystat(fpath_source, fpath_dest)
+    return n_bytes
+
+
+def move_file(fpath_source: StrOrPathLike, fpath_dest: StrOrPathLike) -> int:
+    """Move a file without overwriting an existing destination file.
+
+    Within a filesystem, the file is hard-linked to its new path and then unlinked
+    (or renamed if hard links are not supported), so no data is copied. Otherwise,
+    it is copied and the source file is deleted. Returns the number of bytes copied.
+
+    Raises
+    ------
+    FileExistsError
+        If the destination file already exists
+    """
+    n_bytes = 0
+    try:
+        os.link(fpath_source, fpath_dest, follow_symlinks=False)
+    except OSError as exception:
+        if exception.errno == errno.EXDEV:
+            n_bytes = copy_file(fpath_source, fpath_dest)
+        elif exception.errno in UNSUPPORTED_ERRNOS["hardlink"]:
+            # os.rename would silently replace the destination file
+            if os.path.lexists(fpath_dest):
+                raise FileExistsError(
+                    errno.EEXIST, "File exists", os.fspath(fpath_dest)
+                )
+            os.rename(fpath_source, fpath_dest)
+            return 0
+        else:
+            raise
+    os.unlink(fpath_source)
+    return n_bytes
+
+
+TRANSFER_FUNCTIONS: dict[str, Callable[[StrOrPathLike, StrOrPathLike], int]] = {
+    "symlink": symlink_file,
+    "hardlink": hardlink_file,
+    "reflink": reflink_file,
+    "copy": copy_file,
+    "move": move_file,
+}
+
+
+def check_transfer_mode(mode: str) -> TransferMode:
+    """Check that a transfer mode is valid.
+
+    Raises
+    ------
+    ValueError
+        If the mode is not one of ``TRANSFER_MODES``
+    """
+    if mode not in TRANSFER_MODES:
+        raise ValueError(
+            f"Invalid transfer mode: {mode}. Must be one of {TRANSFER_MODES}"
+        )
+    return mode
+
+
+class FileTransferer:
+    """Transfer files with a given mode, falling back to others if unsupported.
+
+    If a file cannot be transferred because the mode is not supported (e.g. hard
+    links across filesystems), the next mode in ``FALLBACK_MODES`` is used for
+    that file and all following ones. The number of files and bytes transferred
+    with each mode and the time spent (summed over threads) are recorded.
+    """
+
+    def __init__(
+        self,
+        mode: TransferMode = DEFAULT_TRANSFER_MODE,
+        n_jobs_copy: int = N_JOBS_COPY,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the transferer.
+
+        Parameters
+        ----------
+        mode : TransferMode, optional
+            Requested transfer mode
+        n_jobs_copy : int, optional
+            Number of files copied at the same time (copy mode only)
+        logger : Optional[logging.Logger], optional
+            Logger to use
+        """
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.mode_requested = check_transfer_mode(mode)
+        self.mode = self.mode_requested
+        self.n_jobs_copy = n_jobs_copy
+        self.logger = logger
+
+        # mode -> [n_files, n_bytes, seconds]
+        self.stats: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _update_stats(self, mode: str, n_files: int, n_bytes: int, start: float):
+        with self._lock:
+            stats = self.stats.setdefault(mode, [0, 0, 0.0])
+            stats[0] += n_files
+            stats[1] += n_bytes
+            stats[2] += time.perf_counter() - start
+
+    def _fall_back(self, mode: str, fpath_dest: Path, exception: OSError):
+        with self._lock:
+            # another thread may have already fallen back
+            if self.mode == mode:
+                self.mode = FALLBACK_MODES[mode]
+                self.logger.warning(
+                    f"Transfer mode '{mode}' is not supported for {fpath_dest}"
+                    f" ({exception}), using '{self.mode}' instead"
+                )
+
+    def _copy_many(self, fpaths_source: Sequence[Path], fpaths_dest: Sequence[Path]):
+        start = time.perf_counter()
+        n_bytes = sum(
+            parallel_map(
+                lambda fpaths: copy_file(*fpaths),
+                zip(fpaths_source, fpaths_dest),
+                n_jobs=self.n_jobs_copy,
+            )
+        )
+        self._update_stats("copy", len(fpaths_source), n_bytes, start)
+
+    def transfer(self, fpaths_source: Sequence[Path], fpaths_dest: Sequence[Path]):
+        """Transfer files to their destination paths.
+
+        Raises
+        ------
+        OSError
+            If a file cannot be transferred for another reason than the mode being
+            unsupported (e.g. the destination already exists)
+        """
+        i_file = 0
+        while i_file < len(fpaths_source):
+            mode = self.mode
+            if mode == "copy":
+                self._copy_many(fpaths_source[i_file:], fpaths_dest[i_file:])
+                return
+
+            transfer_function = TRANSFER_FUNCTIONS[mode]
+            start = time.perf_counter()
+            n_files = 0
+            n_bytes = 0
+            try:
+                for fpath_source, fpath_dest in zip(
+                    fpaths_source[i_file:], fpaths_dest[i_file:]
+                ):
+                    n_bytes += transfer_function(fpath_source, fpath_dest)
+                    n_files += 1
+            except OSError as exception:
+                if exception.errno not in UNSUPPORTED_ERRNOS.get(mode, set()):
+                    raise
+                self._fall_back(mode, fpath_dest, exception)
+            finally:
+                self._update_stats(mode, n_files, n_bytes, start)
+            i_file += n_files
+
+    def get_messages(self) -> list[str]:
+        """Get messages summarizing the throughput of each mode used."""
+        messages = []
+        for mode, (n_files, n_bytes, seconds) in self.stats.items():
+            if n_files == 0:
+                continue
+            seconds = max(seconds, 1e-6)
+            rate = f"{n_files / seconds:.1f} files/s"
+            size = ""
+            if n_bytes > 0:
+                size = f" ({n_bytes / 1e6:.1f} MB)"
+                rate += f", {n_bytes / 1e6 / seconds:.1f} MB/s"
+            messages.append(
+                f"Transferred {n_files} files{size} with mode '{mode}'"
+                f" in {seconds:.1f} s ({rate})"
+            )
+        return messages
@@ -8,12 +8,20 @@ import os
 import re
 import warnings
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Iterable, List, Optional, Sequence
 
 import bids
 import pandas as pd
 
-from nipoppy.env import BIDS_SESSION_PREFIX, BIDS_SUBJECT_PREFIX, StrOrPathLike
+from nipoppy.backups import BackupPolicy, BackupStore, get_dpath_backups
+from nipoppy.env import (
+    BIDS_SESSION_PREFIX,
+    BIDS_SUBJECT_PREFIX,
+    TABULAR_FILE_EXTENSIONS,
+    WALLTIME_PATTERN,
+    StrOrPathLike,
+    TabularFileFormat,
+)
 
 # user configs (pipeline configs, invocations, descriptors)
 TEMPLATE_REPLACE_PATTERN = re.compile("\\[\\[NIPOPPY\\_(.*?)\\]\\]")
@@ -248,12 +256,40 @@ def add_path_timestamp(
     return add_path_suffix(path=path, suffix=timestamp, sep=sep)
 
 
+def parse_walltime(walltime: str) -> int:
+    """Convert a time limit in HH:MM:SS format to a number of seconds."""
+    if re.match(WALLTIME_PATTERN, walltime) is None:
+        raise ValueError(f"Invalid walltime: {walltime}. Expected format: HH:MM:SS")
+    hours, minutes, seconds = (int(part) for part in walltime.split(":"))
+    return 3600 * hours + 60 * minutes + seconds
+
+
+def get_tabular_file_format(
+    fpath: StrOrPathLike, file_format: Optional[TabularFileFormat] = None
+) -> TabularFileFormat:
+    """Get the storage format of a tabular file.
+
+    If ``file_format`` is None, the format is determined from the file extension
+    (defaulting to CSV for unknown extensions).
+    """
+    if file_format is None:
+        file_format = TABULAR_FILE_EXTENSIONS.get(Path(fpath).suffix.lower(), "csv")
+    if file_format not in TABULAR_FILE_EXTENSIONS.values():
+        raise ValueError(
+            f"Invalid tabular file format: {file_format}. Must be one of"
+            f" {sorted(set(TABULAR_FILE_EXTENSIONS.values()))}"
+        )
+    return file_format
+
+
 def save_df_with_backup(
     df: pd.DataFrame,
     fpath_symlink: StrOrPathLike,
     dname_backups: Optional[str] = None,
     use_relative_path=True,
     dry_run=False,
+    file_format: Optional[TabularFileFormat] = None,
+    backup_policy: Optional[BackupPolicy] = None,
     **kwargs,
 ) -> Path | None:
     """Save a dataframe as a symlink pointing to a timestamped "backup" file.
@@ -271,6 +307,14 @@ def save_df_with_backup(
         Use relative instead of absolute path for the symlink, by default True
     dry_run : bool, optional
         Return the file path but do not save the file, by default False
+    file_format : Optional[nipoppy.env.TabularFileFormat], optional
+        Storage format ("csv", "parquet" or "arrow"), by default None
+        (determined from the extension of ``fpath_symlink``). The Parquet and
+        Arrow formats require ``pyarrow``
+    backup_policy : Optional[nipoppy.backups.BackupPolicy], optional
+        Storage and retention options for the older backup files (see
+        :class:`nipoppy.backups.BackupStore`), by default None (all backup files
+        are kept as full copies)
 
     Returns
     -------
@@ -281,16 +325,27 @@ def save_df_with_backup(
         kwargs["index"] = False
 
     fpath_symlink = Path(fpath_symlink)
+    file_format = get_tabular_file_format(fpath_symlink, file_format)
 
     fname_backup = add_path_timestamp(fpath_symlink.name)
-    if dname_backups is None:
-        dname_backups = f".{fpath_symlink.stem}s"
-
-    fpath_backup_full: Path = fpath_symlink.parent / dname_backups / fname_backup
+    fpath_backup_full: Path = (
+        get_dpath_backups(fpath_symlink, dname_backups) / fname_backup
+    )
+    backup_store = BackupStore(fpath_backup_full.parent, fpath_symlink.name)
 
     if not dry_run:
         fpath_backup_full.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(fpath_backup_full, **kwargs)
+        if backup_policy is not None:
+            backup_store.detach(fpath_backup_full.name)
+        if file_format == "parquet":
+            df.to_parquet(fpath_backup_full, **kwargs)
+        elif file_format == "arrow":
+            # the Arrow IPC/Feather writer does not store non-default indexes
+            index = kwargs.pop("index")
+            df = df.reset_index() if index else df.reset_index(drop=True)
+            df.to_feather(fpath_backup_full, **kwargs)
+        else:
+            df.to_csv(fpath_backup_full, **kwargs)
 
         if use_relative_path:
             fpath_backup_to_link = os.path.relpath(
@@ -303,9 +358,126 @@ def save_df_with_backup(
             fpath_symlink.unlink()
         fpath_symlink.symlink_to(fpath_backup_to_link)
 
+        if backup_policy is not None:
+            backup_store.add_version(fpath_backup_full.name, backup_policy)
+
     return Path(fpath_backup_full)
 
 
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """Template string with its static template strings already replaced.
+
+    The string is parsed once into literal text and the names of the template
+    strings whose values change between renders (``dynamic_keys``). Other template
+    strings are replaced when compiling, with values from kwargs or objects, so
+    rendering only needs to join strings.
+    """
+
+    def __init__(
+        self,
+        template_str: str,
+        resolve_paths=True,
+        objs=None,
+        dynamic_keys: Iterable[str] = (),
+        **kwargs,
+    ):
+        """Parse the template string and replace its static template strings.
+
+        Parameters
+        ----------
+        template_str : str
+            String with ``[[NIPOPPY_<KEY>]]`` template strings
+        resolve_paths : bool, optional
+            Whether to resolve ``Path`` values, by default True
+        objs : list, optional
+            Objects whose attributes can be used as values, by default None
+        dynamic_keys : Iterable[str], optional
+            Keys (lowercase) whose values are only given when rendering. These take
+            precedence over kwargs and object attributes
+        **kwargs
+            Values for the template strings (take precedence over objects)
+        """
+        if objs is None:
+            objs = []
+
+        self.resolve_paths = resolve_paths
+        self.dynamic_keys = frozenset(dynamic_keys)
+
+        # literal text before/between/after the dynamic template strings
+        self.literals: list[str] = []
+        self.keys: list[str] = []
+
+        replacements: dict[str, str] = {}
+        parts = []
+        position = 0
+        for match in TEMPLATE_REPLACE_PATTERN.finditer(template_str):
+            to_replace = match.group()
+            replacement_key = match.group(1).lower()  # always convert to lowercase
+            if not str.isidentifier(replacement_key):
+                raise ValueError(
+                    f"Invalid identifier name {replacement_key} in {template_str}"
+                )
+
+            parts.append(template_str[position : match.start()])
+            position = match.end()
+
+            if replacement_key in self.dynamic_keys:
+                self.literals.append("".join(parts))
+                self.keys.append(replacement_key)
+                parts = []
+                continue
+
+            if replacement_key not in replacements:
+                if replacement_key in kwargs:
+                    replacements[replacement_key] = self._to_str(
+                        kwargs[replacement_key]
+                    )
+                else:
+                    for obj in objs:
+                        # single lookup, since attributes can be properties
+                        value = getattr(obj, replacement_key, _MISSING)
+                        if value is not _MISSING:
+                            replacements[replacement_key] = self._to_str(value)
+                            break
+                    else:
+                        warnings.warn(
+                            f"Unable to replace {to_replace} in {template_str}"
+                        )
+                        replacements[replacement_key] = to_replace
+            parts.append(replacements[replacement_key])
+
+        parts.append(template_str[position:])
+        self.literals.append("".join(parts))
+
+    def _to_str(self, value) -> str:
+        if self.resolve_paths and isinstance(value, Path):
+            value = value.resolve()
+        return str(value)
+
+    def render(self, **kwargs) -> str:
+        """Get the string with the dynamic template strings replaced.
+
+        Raises
+        ------
+        ValueError
+            If a dynamic template string in the template has no value
+        """
+        if len(self.keys) == 0:
+            return self.literals[0]
+
+        values = {key: self._to_str(value) for key, value in kwargs.items()}
+        parts = [None] * (2 * len(self.keys) + 1)
+        parts[::2] = self.literals
+        try:
+            parts[1::2] = [values[key] for key in self.keys]
+        except KeyError as exception:
+            raise ValueError(f"No value for template string {exception}")
+        return "".join(parts)
+
+
 def process_template_str(
     template_str: str,
     resolve_paths=True,
@@ -313,42 +485,9 @@ def process_template_str(
     **kwargs,
 ) -> str:
     """Replace template strings with values from kwargs or objects."""
-
-    def replace(json_str: str, to_replace: str, replacement):
-        if resolve_paths and isinstance(replacement, Path):
-            replacement = replacement.resolve()
-        return json_str.replace(to_replace, str(replacement))
-
-    def replace_from_objs(json_str: str, to_replace: str, objs):
-        for obj in objs:
-            if hasattr(obj, replacement_key):
-                return replace(json_str, to_replace, getattr(obj, replacement_key))
-        warnings.warn(f"Unable to replace {to_replace} in {template_str_original}")
-        return json_str
-
-    if objs is None:
-        objs = []
-
-    template_str_original = template_str
-
-    matches = TEMPLATE_REPLACE_PATTERN.finditer(template_str)
-    for match in matches:
-        if len(match.groups()) != 1:
-            raise ValueError(f"Expected exactly one match group for match: {match}")
-        to_replace = match.group()
-        replacement_key = match.groups()[0].lower()  # always convert to lowercase
-
-        if not str.isidentifier(replacement_key):
-            raise ValueError(
-                f"Invalid identifier name {replacement_key} in {template_str}"
-            )
-
-        if replacement_key in kwargs:
-            template_str = replace(template_str, to_replace, kwargs[replacement_key])
-        else:
-            template_str = replace_from_objs(template_str, to_replace, objs)
-
-    return template_str
+    return CompiledTemplate(
+        template_str, resolve_paths=resolve_paths, objs=objs, **kwargs
+    ).render()
 
 
 def apply_substitutions_to_json(
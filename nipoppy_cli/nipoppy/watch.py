@@ -0,0 +1,279 @@
+"""Monitoring of directories for changes (inotify or polling)."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from nipoppy.env import StrOrPathLike
+
+# number of seconds during which changes are batched together
+DEFAULT_DEBOUNCE = 5.0
+# number of seconds between two checks if no change is reported
+DEFAULT_POLL_INTERVAL = 60.0
+
+# filesystems on which inotify does not report changes made from other machines
+NETWORK_FILESYSTEMS = (
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smbfs",
+    "smb3",
+    "lustre",
+    "gpfs",
+    "beegfs",
+    "ceph",
+    "fuse.sshfs",
+    "afs",
+    "panfs",
+)
+
+# inotify constants (see inotify(7))
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+# adding/removing entries changes whether a directory exists/is empty
+INOTIFY_MASK = (
+    IN_CREATE
+    | IN_DELETE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+INOTIFY_EVENT_STRUCT = struct.Struct("iIII")
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+
+def get_filesystem_type(path: StrOrPathLike) -> Optional[str]:
+    """Get the type of the filesystem containing a path (Linux only).
+
+    Returns None if it cannot be determined.
+    """
+    path = os.path.realpath(path)
+    fs_type = None
+    mount_point_len = -1
+    try:
+        with open("/proc/self/mounts") as file_mounts:
+            for line in file_mounts:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # spaces in mount points are escaped as \040
+                mount_point = fields[1].replace("\\040", " ")
+                if (
+                    path == mount_point
+                    or path.startswith(mount_point.rstrip("/") + "/")
+                ) and len(mount_point) > mount_point_len:
+                    fs_type = fields[2]
+                    mount_point_len = len(mount_point)
+    except OSError:
+        return None
+    return fs_type
+
+
+def is_network_filesystem(path: StrOrPathLike) -> bool:
+    """Check whether a path is on a network/parallel filesystem."""
+    return get_filesystem_type(path) in NETWORK_FILESYSTEMS
+
+
+class PollingWatcher:
+    """Watcher that does not receive events: changes are checked periodically."""
+
+    name = "polling"
+
+    def set_dirs(self, dpaths: Iterable[StrOrPathLike]) -> None:
+        """Set the directories to watch (no-op)."""
+
+    def wait(self, timeout: float, debounce: float = 0) -> bool:
+        """Wait for ``timeout`` seconds.
+
+        Returns False, since no change events are received.
+        """
+        time.sleep(timeout)
+        return False
+
+    def close(self) -> None:
+        """Release resources (no-op)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class InotifyWatcher(PollingWatcher):
+    """Watcher using the Linux inotify API (through ctypes).
+
+    inotify is not recursive, so each directory of interest must be watched. Only
+    the creation/deletion/renaming of entries in these directories is reported.
+    """
+
+    name = "inotify"
+
+    def __init__(self):
+        """Initialize the inotify instance.
+
+        Raises
+        ------
+        OSError
+            If inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        try:
+            self._inotify_add_watch = libc.inotify_add_watch
+            self._inotify_rm_watch = libc.inotify_rm_watch
+            inotify_init1 = libc.inotify_init1
+        except AttributeError:
+            raise OSError("inotify is not available in the C library")
+        self._inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self._inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        self.watches: dict[str, int] = {}
+
+    def _add_watch(self, dpath: str) -> None:
+        wd = self._inotify_add_watch(self.fd, os.fsencode(dpath), INOTIFY_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # removed since it was listed: the parent directory is watched
+                return
+            raise OSError(
+                error, f"Cannot watch directory {dpath}: {os.strerror(error)}"
+            )
+        self.watches[dpath] = wd
+
+    def set_dirs(self, dpaths: Iterable[StrOrPathLike]) -> None:
+        """Set the directories to watch.
+
+        Watches are added for new directories and removed for directories that
+        are not in ``dpaths`` anymore.
+
+        Raises
+        ------
+        OSError
+            If a directory cannot be watched (e.g. because the maximum number of
+            watches has been reached)
+        """
+        dpaths = {os.fspath(dpath) for dpath in dpaths}
+        for dpath in set(self.watches) - dpaths:
+            self._inotify_rm_watch(self.fd, self.watches.pop(dpath))
+        for dpath in sorted(dpaths - set(self.watches)):
+            self._add_watch(dpath)
+
+    def _read_events(self) -> int:
+        """Read all available events and return how many were relevant."""
+        n_events = 0
+        wds_removed = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, name_len = INOTIFY_EVENT_STRUCT.unpack_from(buffer, offset)
+                offset += INOTIFY_EVENT_STRUCT.size + name_len
+                if mask & IN_IGNORED:
+                    # watch removed by the kernel (e.g. directory deleted)
+                    wds_removed.add(wd)
+                else:
+                    # includes IN_Q_OVERFLOW (some events were lost)
+                    n_events += 1
+        if wds_removed:
+            self.watches = {
+                dpath: wd for dpath, wd in self.watches.items() if wd not in wds_removed
+            }
+        return n_events
+
+    def _wait_for_events(self, timeout: float) -> bool:
+        """Read events until one is relevant or ``timeout`` seconds have passed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if ready and self._read_events() > 0:
+                return True
+
+    def wait(self, timeout: float, debounce: float = 0) -> bool:
+        """Wait for changes for at most ``timeout`` seconds.
+
+        After the first change, the events received during the next ``debounce``
+        seconds are consumed too, so that a burst of changes (e.g. a download) is
+        reported once. Returns True if changes were detected.
+        """
+        if not self._wait_for_events(timeout):
+            return False
+        deadline = time.monotonic() + debounce
+        while time.monotonic() < deadline:
+            self._wait_for_events(deadline - time.monotonic())
+        return True
+
+    def close(self) -> None:
+        """Close the inotify instance."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self.watches = {}
+
+
+def get_watcher(
+    dpaths_roots: Iterable[Optional[StrOrPathLike]],
+    logger: Optional[logging.Logger] = None,
+) -> PollingWatcher:
+    """Get an inotify watcher if possible, otherwise a polling watcher.
+
+    Polling is used if inotify is not available or if one of the root directories
+    is on a network filesystem (where inotify does not report remote changes).
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    for dpath_root in dpaths_roots:
+        if dpath_root is None:
+            continue
+        # the root directory itself may not exist yet
+        dpath_existing = Path(dpath_root).absolute()
+        while not dpath_existing.exists() and dpath_existing != dpath_existing.parent:
+            dpath_existing = dpath_existing.parent
+        if is_network_filesystem(dpath_existing):
+            logger.info(
+                f"{dpath_root} is on a network filesystem ("
+                f"{get_filesystem_type(dpath_existing)}), using polling"
+            )
+            return PollingWatcher()
+
+    try:
+        return InotifyWatcher()
+    except OSError as exception:
+        logger.info(f"inotify not available ({exception}), using polling")
+        return PollingWatcher()
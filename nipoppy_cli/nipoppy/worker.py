@@ -0,0 +1,333 @@
+"""Packing of many participant-session jobs into a single (HPC) allocation."""
+
+from __future__ import annotations
+
+import csv
+import fcntl
+import logging
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterable, NamedTuple, Optional
+
+from nipoppy.env import StrOrPathLike
+from nipoppy.executor import Job, LocalExecutor, get_available_cpus
+
+# seconds before the walltime at which workers stop, to return unfinished work
+DEFAULT_WALLTIME_MARGIN = 60
+# seconds between checks for finished jobs
+DEFAULT_POLL_INTERVAL = 1.0
+# seconds to wait for stopped jobs to exit before killing them
+TERMINATE_TIMEOUT = 10
+
+
+class WorkItem(NamedTuple):
+    """Participant-session to run."""
+
+    participant_id: str
+    session_id: str
+
+
+class WorkList:
+    """Participant-sessions to run, shared by workers through a TSV file.
+
+    Each row is a participant-session and the ID of the worker that claimed it
+    (empty if it has not been claimed yet, or ``done`` once it has been run).
+    Finished rows are kept so that the list is not filled again by the next
+    worker. The file is locked during each operation, so workers on different
+    nodes can use the same list (as long as the file system supports ``flock``).
+
+    If a worker is killed before it can return its claimed participant-sessions,
+    they stay claimed: reset the list (or delete the file) to start over.
+    """
+
+    columns = ["participant_id", "session_id", "worker"]
+    # value of the worker column for participant-sessions that have been run
+    done = "done"
+
+    def __init__(self, fpath: StrOrPathLike):
+        """Initialize the work list (the file is created when it is populated)."""
+        self.fpath = Path(fpath)
+        self.fpath_lock = self.fpath.with_name(f"{self.fpath.name}.lock")
+
+    @contextmanager
+    def _locked(self):
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.fpath_lock, "a") as file_lock:
+            fcntl.flock(file_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file_lock, fcntl.LOCK_UN)
+
+    def _read(self) -> dict[WorkItem, str]:
+        if not self.fpath.exists():
+            return {}
+        with open(self.fpath, newline="") as file:
+            reader = csv.reader(file, delimiter="\t")
+            next(reader, None)  # header
+            return {
+                WorkItem(participant_id, session_id): worker
+                for participant_id, session_id, worker in reader
+            }
+
+    def _write(self, claims: dict[WorkItem, str]):
+        # replace the file at once so that it is never partially written
+        fpath_tmp = self.fpath.with_name(f"{self.fpath.name}.tmp")
+        with open(fpath_tmp, "w", newline="") as file:
+            writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+            writer.writerow(self.columns)
+            writer.writerows((*item, worker) for item, worker in claims.items())
+        os.replace(fpath_tmp, self.fpath)
+
+    def populate(
+        self, get_items: Callable[[], Iterable[tuple[str, str]]], reset=False
+    ) -> bool:
+        """Create the work list, unless it already exists.
+
+        ``get_items`` is only called if the list does not exist yet (or if
+        ``reset`` is True), so participant-sessions that were already run or
+        claimed by running workers are not added again.
+
+        Returns
+        -------
+        bool
+            Whether the list was (re)created
+        """
+        with self._locked():
+            if self.fpath.exists() and not reset:
+                return False
+            self._write({WorkItem(*item): "" for item in get_items()})
+            return True
+
+    def claim(self, worker_id: str, n_items: int) -> list[WorkItem]:
+        """Claim up to ``n_items`` participant-sessions that are not claimed yet."""
+        with self._locked():
+            claims = self._read()
+            items = [item for item, worker in claims.items() if worker == ""]
+            items = items[:n_items]
+            if len(items) > 0:
+                claims.update((item, worker_id) for item in items)
+                self._write(claims)
+            return items
+
+    def complete(self, items: Iterable[WorkItem]):
+        """Mark participant-sessions as run."""
+        with self._locked():
+            claims = self._read()
+            claims.update((item, self.done) for item in items if item in claims)
+            self._write(claims)
+
+    def release(self, items: Iterable[WorkItem]):
+        """Return claimed participant-sessions to the list, for another worker."""
+        with self._locked():
+            claims = self._read()
+            claims.update(
+                (item, "")
+                for item in items
+                if item in claims and claims[item] != self.done
+            )
+            self._write(claims)
+
+    def get_n_remaining(self) -> int:
+        """Get the number of participant-sessions that have not been run yet."""
+        with self._locked():
+            return sum(worker != self.done for worker in self._read().values())
+
+
+class _RunningJob(NamedTuple):
+    job: Job
+    process: subprocess.Popen
+    file_stderr: IO[bytes]
+    time_start: float
+
+
+def _exit_on_signal(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+@contextmanager
+def _exit_on_sigterm():
+    """Turn SIGTERM (e.g. sent by the scheduler at the walltime) into SystemExit.
+
+    This way, the running jobs can be stopped and returned to the work list.
+    """
+    try:
+        previous_handler = signal.signal(signal.SIGTERM, _exit_on_signal)
+    except ValueError:  # can only be set from the main thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+
+
+class Worker(LocalExecutor):
+    """Run participant-sessions from a work list until it is drained or time is up.
+
+    Jobs are packed into the CPUs and memory available to the process (e.g. a
+    whole HPC allocation) according to the resources declared for each job, and
+    new jobs are started as soon as running ones finish. Jobs that could not
+    finish before the walltime are not started, and jobs still running shortly
+    before the walltime are stopped. Their participant-sessions are returned to
+    the work list for the next worker.
+    """
+
+    def __init__(
+        self,
+        work_list: WorkList,
+        n_cpus: int = 1,
+        memory_gb: Optional[float] = None,
+        walltime: Optional[float] = None,
+        job_walltime: Optional[float] = None,
+        walltime_margin: float = DEFAULT_WALLTIME_MARGIN,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the worker.
+
+        Parameters
+        ----------
+        work_list : WorkList
+            Participant-sessions to run
+        n_cpus : int, optional
+            Number of CPUs needed by each job, by default 1
+        memory_gb : Optional[float], optional
+            Memory (in GB) needed by each job, by default None (not checked)
+        walltime : Optional[float], optional
+            Time limit of the worker in seconds (counted from now), by default None
+            (run until the work list is drained)
+        job_walltime : Optional[float], optional
+            Maximum run time of a single job in seconds, by default None (jobs are
+            started until the walltime is reached)
+        walltime_margin : float, optional
+            Seconds before the walltime at which running jobs are stopped
+        poll_interval : float, optional
+            Seconds between checks for finished jobs
+        logger : Optional[logging.Logger], optional
+            Logger, by default None
+        """
+        # each job needs at least one CPU
+        super().__init__(
+            n_jobs=max(get_available_cpus() // n_cpus, 1),
+            n_cpus=n_cpus,
+            memory_gb=memory_gb,
+            logger=logger,
+        )
+        self.work_list = work_list
+        self.walltime = walltime
+        self.job_walltime = job_walltime
+        self.walltime_margin = walltime_margin
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.time_start = time.monotonic()
+
+    def get_time_left(self) -> Optional[float]:
+        """Get the number of seconds until jobs must be stopped (None if no limit)."""
+        if self.walltime is None:
+            return None
+        time_elapsed = time.monotonic() - self.time_start
+        return self.walltime - self.walltime_margin - time_elapsed
+
+    def can_start_job(self, time_left: Optional[float]) -> bool:
+        """Check whether a new job would have time to finish."""
+        return time_left is None or (
+            time_left > 0
+            and (self.job_walltime is None or time_left >= self.job_walltime)
+        )
+
+    def start_job(self, job: Job) -> _RunningJob:
+        """Start a job in a subprocess, without waiting for it."""
+        self.logger.info(f"Starting job for {job.name}")
+        file_stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen(
+            job.args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=file_stderr,
+            # so that the job's own subprocesses can be stopped with it
+            start_new_session=True,
+        )
+        return _RunningJob(job, process, file_stderr, time.perf_counter())
+
+    def finish_job(self, running_job: _RunningJob) -> int:
+        """Log the result of a job that has exited and return its exit code."""
+        returncode = running_job.process.returncode
+        runtime = time.perf_counter() - running_job.time_start
+        with running_job.file_stderr:
+            self.log_job_result(
+                running_job.job, returncode, runtime, running_job.file_stderr
+            )
+        return returncode
+
+    def stop_jobs(self, running: dict[WorkItem, _RunningJob]):
+        """Stop running jobs and return their participant-sessions to the list."""
+        if len(running) == 0:
+            return
+        for running_job in running.values():
+            self.logger.warning(f"Stopping job for {running_job.job.name}")
+            os.killpg(running_job.process.pid, signal.SIGTERM)
+        for running_job in running.values():
+            try:
+                running_job.process.wait(timeout=TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                os.killpg(running_job.process.pid, signal.SIGKILL)
+                running_job.process.wait()
+            running_job.file_stderr.close()
+        self.work_list.release(running)
+        self.logger.warning(
+            f"Returned {len(running)} participant-session pairs to the work list"
+            f" {self.work_list.fpath}"
+        )
+
+    def run(self, get_job: Callable[[WorkItem], Job]) -> dict[WorkItem, int]:
+        """Run jobs for the participant-sessions in the work list.
+
+        Parameters
+        ----------
+        get_job : Callable[[WorkItem], Job]
+            Function that returns the job to run for a participant-session
+
+        Returns
+        -------
+        dict[WorkItem, int]
+            Exit codes of the jobs that were run until the end
+        """
+        returncodes = {}
+        running: dict[WorkItem, _RunningJob] = {}
+        with _exit_on_sigterm():
+            try:
+                while True:
+                    finished = [
+                        item
+                        for item, running_job in running.items()
+                        if running_job.process.poll() is not None
+                    ]
+                    for item in finished:
+                        returncodes[item] = self.finish_job(running.pop(item))
+                    if len(finished) > 0:
+                        self.work_list.complete(finished)
+
+                    time_left = self.get_time_left()
+                    if time_left is not None and time_left <= 0:
+                        self.logger.warning("Walltime almost reached")
+                        break
+
+                    n_free = self.n_concurrent - len(running)
+                    if n_free > 0 and self.can_start_job(time_left):
+                        for item in self.work_list.claim(self.worker_id, n_free):
+                            running[item] = self.start_job(get_job(item))
+
+                    if len(running) == 0:
+                        break
+                    time.sleep(self.poll_interval)
+            finally:
+                # walltime reached, or interrupted
+                self.stop_jobs(running)
+        return returncodes
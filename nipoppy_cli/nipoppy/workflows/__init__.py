@@ -1,5 +1,6 @@
 """Classes for running workflows on datasets."""
 
+from .backups import BackupCompactionWorkflow
 from .base import BaseWorkflow
 from .bids_conversion import BidsConversionRunner
 from .dataset_init import InitWorkflow
@@ -0,0 +1,80 @@
+"""Workflow for compact command."""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from nipoppy.backups import BackupStore
+from nipoppy.env import LogColor, StrOrPathLike
+from nipoppy.layout import TabularFpathInfo
+from nipoppy.workflows.base import BaseWorkflow
+
+
+class BackupCompactionWorkflow(BaseWorkflow):
+    """Workflow for compacting the backups of a dataset's tabular files.
+
+    Old backups are deleted according to the retention options in the layout, and
+    the remaining ones are stored as full snapshots or deltas. Files without backup
+    options in the layout are skipped (all their backups are kept as full copies).
+    """
+
+    def __init__(
+        self,
+        dpath_root: Path,
+        fpath_layout: Optional[StrOrPathLike] = None,
+        logger: Optional[logging.Logger] = None,
+        dry_run: bool = False,
+    ):
+        """Initialize the workflow."""
+        super().__init__(
+            dpath_root=dpath_root,
+            name="compact",
+            fpath_layout=fpath_layout,
+            logger=logger,
+            dry_run=dry_run,
+        )
+
+    def run_main(self):
+        """Compact the backup directory of each tabular file in the layout."""
+        for path_info in self.layout.config.path_infos:
+            if not isinstance(path_info, TabularFpathInfo):
+                continue
+
+            backup_policy = path_info.backups
+            if backup_policy is None:
+                self.logger.debug(
+                    f"No backup options in the layout for {path_info.path}"
+                    ", keeping all backups as full copies"
+                )
+                continue
+
+            backup_store = BackupStore.from_symlink(
+                self.layout.get_full_path(path_info.path)
+            )
+            if not backup_store.dpath_backups.exists():
+                self.logger.debug(
+                    f"No backup directory found at {backup_store.dpath_backups}"
+                )
+                continue
+
+            versions = backup_store.get_versions()
+            self.logger.info(
+                f"Compacting {len(versions)} backups in {backup_store.dpath_backups}"
+                f" ({backup_policy})"
+            )
+            if self.dry_run:
+                continue
+
+            versions_deleted = backup_store.prune(backup_policy)
+            n_deltas = backup_store.compact(backup_policy)
+            self.logger.info(
+                f"Deleted {len(versions_deleted)} old backups, stored"
+                f" {n_deltas} backups as deltas"
+            )
+
+    def run_cleanup(self):
+        """Log a success message."""
+        self.logger.info(
+            f"[{LogColor.SUCCESS}]Successfully compacted the dataset's backups![/]"
+        )
+        return super().run_cleanup()
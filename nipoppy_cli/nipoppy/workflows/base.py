@@ -185,9 +185,34 @@ class BaseWorkflow(Base, ABC):
 
         return run_output
 
+    def _get_tabular_file_kwargs(self, fpath: Path) -> dict:
+        """Get the storage options specified in the layout for a tabular file."""
+        path_info = self.layout.get_tabular_fpath_info(fpath)
+        if path_info is None:
+            return {}
+        return {"file_format": path_info.format}
+
+    def load_tabular_file(
+        self, tabular_class: type[BaseTabular], fpath: Path, **kwargs
+    ) -> BaseTabular:
+        """Load a tabular file, using the storage format specified in the layout."""
+        return tabular_class.load(
+            fpath, **self._get_tabular_file_kwargs(fpath), **kwargs
+        )
+
     def save_tabular_file(self, tabular: BaseTabular, fpath: Path):
         """Save a tabular file."""
-        fpath_backup = tabular.save_with_backup(fpath, dry_run=self.dry_run)
+        path_info = self.layout.get_tabular_fpath_info(fpath)
+        save_kwargs = {}
+        if path_info is not None:
+            save_kwargs = {
+                "file_format": path_info.format,
+                "export_csv": path_info.export_csv,
+                "backup_policy": path_info.backups,
+            }
+        fpath_backup = tabular.save_with_backup(
+            fpath, dry_run=self.dry_run, **save_kwargs
+        )
         if fpath_backup is not None:
             self.logger.info(f"Saved to {fpath} (-> {fpath_backup})")
         else:
@@ -299,7 +324,8 @@ class BaseWorkflow(Base, ABC):
         expected_session_ids = self.config.SESSION_IDS
         expected_visit_ids = self.config.VISIT_IDS
         try:
-            return Manifest.load(
+            return self.load_tabular_file(
+                Manifest,
                 fpath_manifest,
                 session_ids=expected_session_ids,
                 visit_ids=expected_visit_ids,
@@ -313,7 +339,7 @@ class BaseWorkflow(Base, ABC):
         logger = self.logger
         fpath_doughnut = Path(self.layout.fpath_doughnut)
         try:
-            return Doughnut.load(fpath_doughnut)
+            return self.load_tabular_file(Doughnut, fpath_doughnut)
         except FileNotFoundError:
             self.logger.warning(
                 f"Doughnut file not found: {fpath_doughnut}"
@@ -330,10 +356,7 @@ class BaseWorkflow(Base, ABC):
             )
 
             if not self.dry_run:
-                fpath_doughnut_backup = doughnut.save_with_backup(fpath_doughnut)
-                logger.info(
-                    f"Saved doughnut to {fpath_doughnut} (-> {fpath_doughnut_backup})"
-                )
+                self.save_tabular_file(doughnut, fpath_doughnut)
             else:
                 logger.info(
                     f"Not writing doughnut to {fpath_doughnut} since this is a dry run"
@@ -7,14 +7,19 @@ from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
+from nipoppy.cli.parser import COMMAND_BIDS_CONVERSION, COMMAND_DOUGHNUT
 from nipoppy.config.pipeline import BidsPipelineConfig
-from nipoppy.env import StrOrPathLike
+from nipoppy.config.pipeline_step import ResourcesConfig
+from nipoppy.env import HpcScheduler, StrOrPathLike
+from nipoppy.utils import get_pipeline_tag
 from nipoppy.workflows.runner import PipelineRunner
 
 
 class BidsConversionRunner(PipelineRunner):
     """Convert data to BIDS."""
 
+    cli_command = COMMAND_BIDS_CONVERSION
+
     def __init__(
         self,
         dpath_root: StrOrPathLike,
@@ -24,6 +29,9 @@ class BidsConversionRunner(PipelineRunner):
         participant_id: str = None,
         session_id: str = None,
         simulate: bool = False,
+        n_jobs: int = 1,
+        hpc: Optional[HpcScheduler] = None,
+        update_doughnut: bool = True,
         fpath_layout: Optional[StrOrPathLike] = None,
         logger: Optional[logging.Logger] = None,
         dry_run: bool = False,
@@ -36,11 +44,18 @@ class BidsConversionRunner(PipelineRunner):
             participant_id=participant_id,
             session_id=session_id,
             simulate=simulate,
+            n_jobs=n_jobs,
+            hpc=hpc,
             fpath_layout=fpath_layout,
             logger=logger,
             dry_run=dry_run,
         )
         self.name = "bids_conversion"
+        # False when the doughnut is updated by another process
+        # (e.g. the parent process of concurrent jobs)
+        self.update_doughnut = update_doughnut
+        # participant-sessions converted to BIDS but not yet marked in the doughnut
+        self.doughnut_records: list[tuple[str, str]] = []
 
     @cached_property
     def dpaths_to_check(self) -> list[Path]:
@@ -74,6 +89,7 @@ class BidsConversionRunner(PipelineRunner):
     def run_single(self, participant_id: str, session_id: str):
         """Run BIDS conversion on a single participant/session."""
         # get container command
+        container_env = {}
         container_command = self.process_container_config(
             participant_id=participant_id,
             session_id=session_id,
@@ -81,23 +97,95 @@ class BidsConversionRunner(PipelineRunner):
                 self.layout.dpath_sourcedata,
                 self.layout.dpath_bids,
             ],
+            env=container_env,
         )
 
         # run pipeline with Boutiques
         invocation_and_descriptor = self.launch_boutiques_run(
-            participant_id, session_id, container_command=container_command
+            participant_id,
+            session_id,
+            container_env=container_env,
+            container_command=container_command,
         )
 
-        # update status
-        self.doughnut.set_status(
-            participant_id=participant_id,
-            session_id=session_id,
-            col=self.doughnut.col_in_bids,
-            status=True,
-        )
+        # update status (the doughnut is updated in bulk after all participants)
+        self.add_doughnut_record(participant_id, session_id)
 
         return invocation_and_descriptor
 
+    def add_doughnut_record(self, participant_id: str, session_id: str):
+        """Record that a participant-session has been converted to BIDS."""
+        self.doughnut_records.append((participant_id, session_id))
+
+    def get_job_args(
+        self, participant_id: Optional[str] = None, session_id: Optional[str] = None
+    ) -> list[str]:
+        """Get the command to run BIDS conversion in a separate process.
+
+        The doughnut is updated by the parent process (or by a separate HPC job)
+        instead of by each job.
+        """
+        return super().get_job_args(participant_id, session_id) + [
+            "--no-update-doughnut"
+        ]
+
+    def handle_job_success(self, participant_id: str, session_id: str):
+        """Record the BIDS conversion status of a participant-session run in a job."""
+        self.add_doughnut_record(participant_id, session_id)
+
+    def submit_hpc_job(
+        self, participants_sessions: list[tuple[str, str]]
+    ) -> Optional[str]:
+        """Submit an array job with one task per participant-session.
+
+        If the doughnut should be updated, also submit a job that refreshes it
+        once all the tasks have finished.
+        """
+        job_id = super().submit_hpc_job(participants_sessions)
+        if self._should_update_doughnut():
+            script = self.hpc_scheduler.generate_script(
+                job_name=f"nipoppy-{COMMAND_DOUGHNUT}",
+                dpath_output=self.dpath_hpc,
+                resources=ResourcesConfig(),
+                args=self.get_nipoppy_args(COMMAND_DOUGHNUT) + ["--refresh"],
+                dependencies=None if job_id is None else [job_id],
+            )
+            self.submit_hpc_script(
+                script,
+                fname_stem=get_pipeline_tag(
+                    f"{COMMAND_DOUGHNUT}-{self.pipeline_name}",
+                    self.pipeline_version,
+                    pipeline_step=self.pipeline_step,
+                ),
+            )
+        return job_id
+
+    def _should_update_doughnut(self) -> bool:
+        return (
+            self.update_doughnut
+            and not self.simulate
+            and self.pipeline_config.get_update_doughnut(step_name=self.pipeline_step)
+        )
+
+    def flush_doughnut_records(self):
+        """Add the BIDS conversion statuses from run_single to the doughnut."""
+        if len(self.doughnut_records) > 0:
+            # only update existing records: the records only have the status, so
+            # new rows would be missing required columns
+            present, missing = [], []
+            for key, is_present in zip(
+                self.doughnut_records, self.doughnut.has_records(self.doughnut_records)
+            ):
+                (present if is_present else missing).append(key)
+            if len(missing) > 0:
+                self.logger.warning(
+                    "Not updating BIDS status for participant-session pairs that"
+                    f" are not in the doughnut: {missing}"
+                )
+            self.doughnut.set_statuses(present, self.doughnut.col_in_bids, True)
+            self.doughnut_records = []
+        return self.doughnut
+
     def run_cleanup(self, **kwargs):
         """
         Clean up after main BIDS conversion part is run.
@@ -105,9 +193,8 @@ class BidsConversionRunner(PipelineRunner):
         Specifically:
         - Write updated doughnut file
         """
-        update_doughnut = self.pipeline_config.get_update_doughnut(
-            step_name=self.pipeline_step
-        )
-        if update_doughnut and not self.simulate:
+        self.flush_doughnut_records()
+        # for HPC runs, the doughnut is updated by a separate job
+        if self._should_update_doughnut() and self.hpc is None:
             self.save_tabular_file(self.doughnut, self.layout.fpath_doughnut)
         return super().run_cleanup(**kwargs)
@@ -5,12 +5,14 @@ from pathlib import Path
 from typing import Optional
 
 from nipoppy.env import LogColor, StrOrPathLike
+from nipoppy.tabular.manifest import Manifest
 from nipoppy.utils import (
     DPATH_DESCRIPTORS,
     DPATH_INVOCATIONS,
     DPATH_TRACKER_CONFIGS,
     FPATH_SAMPLE_CONFIG,
     FPATH_SAMPLE_MANIFEST,
+    get_tabular_file_format,
 )
 from nipoppy.workflows.base import BaseWorkflow
 
@@ -81,9 +83,23 @@ class InitWorkflow(BaseWorkflow):
         self.copy(
             FPATH_SAMPLE_CONFIG, self.layout.fpath_config, log_level=logging.DEBUG
         )
-        self.copy(
-            FPATH_SAMPLE_MANIFEST, self.layout.fpath_manifest, log_level=logging.DEBUG
+        manifest_format = get_tabular_file_format(
+            self.layout.fpath_manifest,
+            self._get_tabular_file_kwargs(self.layout.fpath_manifest).get(
+                "file_format"
+            ),
         )
+        if manifest_format == "csv":
+            self.copy(
+                FPATH_SAMPLE_MANIFEST,
+                self.layout.fpath_manifest,
+                log_level=logging.DEBUG,
+            )
+        else:
+            # the sample manifest is a CSV file
+            self.save_tabular_file(
+                Manifest.load(FPATH_SAMPLE_MANIFEST), self.layout.fpath_manifest
+            )
 
         # inform user to edit the sample files
         self.logger.warning(
@@ -0,0 +1,80 @@
+"""Workflow for dicom-index command."""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from nipoppy.dicom_index import FNAME_DICOM_HEADER_INDEX, DicomHeaderIndex
+from nipoppy.env import LogColor, StrOrPathLike
+from nipoppy.parallel import check_n_jobs
+from nipoppy.workflows.base import BaseWorkflow
+
+
+class DicomHeaderIndexWorkflow(BaseWorkflow):
+    """Workflow for reporting on (and pruning) the DICOM header index.
+
+    The index is created by the reorg command when DICOM files are checked, so
+    that the headers of unchanged files are not read again.
+    """
+
+    def __init__(
+        self,
+        dpath_root: Path,
+        prune: bool = False,
+        n_jobs: int = 1,
+        fpath_layout: Optional[StrOrPathLike] = None,
+        logger: Optional[logging.Logger] = None,
+        dry_run: bool = False,
+    ):
+        """Initialize the workflow."""
+        super().__init__(
+            dpath_root=dpath_root,
+            name="dicom_index",
+            fpath_layout=fpath_layout,
+            logger=logger,
+            dry_run=dry_run,
+        )
+        self.prune = prune
+        self.n_jobs = check_n_jobs(n_jobs)
+
+    @property
+    def fpath_dicom_header_index(self) -> Path:
+        """Path to the DICOM header index."""
+        return self.layout.dpath_scratch / FNAME_DICOM_HEADER_INDEX
+
+    def _log_stats(self, index: DicomHeaderIndex):
+        stats = index.get_stats()
+        size_mb = self.fpath_dicom_header_index.stat().st_size / 1e6
+        self.logger.info(
+            f"DICOM header index at {self.fpath_dicom_header_index} ({size_mb:.1f} MB)"
+            f": {stats['n_entries']} files, including {stats['n_derived']} derived"
+            f" and {stats['n_unreadable']} unreadable"
+        )
+
+    def run_main(self):
+        """Log index statistics and remove stale entries if requested."""
+        if not self.fpath_dicom_header_index.exists():
+            self.logger.warning(
+                f"No DICOM header index found at {self.fpath_dicom_header_index}."
+                " It is created when running the reorg command with --check-dicoms"
+            )
+            return
+
+        with DicomHeaderIndex(
+            self.fpath_dicom_header_index, read_only=self.dry_run
+        ) as index:
+            self._log_stats(index)
+            if not self.prune:
+                return
+
+            n_removed = index.prune(n_jobs=self.n_jobs)
+            if self.dry_run:
+                self.logger.info(
+                    f"Would remove {n_removed} entries for deleted or modified files"
+                )
+                return
+            self.logger.info(
+                f"[{LogColor.SUCCESS}]Removed {n_removed} entries for deleted or"
+                " modified files[/]"
+            )
+            self._log_stats(index)
@@ -3,25 +3,121 @@
 import logging
 import os
 from pathlib import Path
-from typing import Optional
-
-import pydicom
+from typing import Iterable, Iterator, Optional
 
+from nipoppy.archives import (
+    is_archive,
+    iter_archive_files,
+    list_archive_members,
+    write_archive_file,
+)
+from nipoppy.dicom_index import (
+    FNAME_DICOM_HEADER_INDEX,
+    DicomHeaderIndex,
+    DicomHeaderInfo,
+    get_file_stats,
+    probe_dicom_header,
+    read_dicom_header,
+)
 from nipoppy.env import LogColor, ReturnCode, StrOrPathLike
+from nipoppy.parallel import (
+    ProgressLogger,
+    check_n_jobs,
+    iter_batches,
+    parallel_map,
+    prefetch,
+)
 from nipoppy.tabular.doughnut import update_doughnut
+from nipoppy.transfer import FileTransferer, TransferMode, check_transfer_mode
 from nipoppy.utils import participant_id_to_bids_participant, session_id_to_bids_session
 from nipoppy.workflows.base import BaseWorkflow
 
+# number of threads used to check the DICOM files of a participant-session
+N_JOBS_CHECK_DICOMS = 8
+# maximum number of unreadable files listed in error messages
+N_ERRORS_IN_MESSAGE = 5
+# number of files enumerated/reorganized together
+REORG_BATCH_SIZE = 1000
+
 
-def is_derived_dicom(fpath: Path) -> bool:
+def is_derived_dicom(fpath: StrOrPathLike) -> bool:
     """
     Read a DICOM file's header and check if it is a derived file.
 
     Some BIDS converters (e.g. Heudiconv) do not support derived DICOM files.
+    Only the beginning of the header is read (see
+    :func:`nipoppy.dicom_index.read_dicom_header`). Raises an error if the file
+    cannot be read.
+    """
+    return read_dicom_header(fpath).is_derived
+
+
+def check_dicom_headers(
+    fpaths: Iterable[Path],
+    n_jobs: int = N_JOBS_CHECK_DICOMS,
+    index: Optional[DicomHeaderIndex] = None,
+    logger: Optional[logging.Logger] = None,
+) -> tuple[list[Path], dict[Path, str]]:
+    """Check DICOM file headers concurrently.
+
+    Parameters
+    ----------
+    fpaths : Iterable[Path]
+        Paths to the DICOM files
+    n_jobs : int, optional
+        Maximum number of files read at the same time
+    index : Optional[DicomHeaderIndex], optional
+        Index of previously read headers. Only files that are new or changed since
+        they were indexed are read, and the index is updated with them
+    logger : Optional[logging.Logger], optional
+        Logger to use
+
+    Returns
+    -------
+    tuple[list[Path], dict[Path, str]]
+        The paths to derived DICOM files, and the error messages for files that
+        cannot be read (or do not have an ImageType element)
     """
-    dcm_info = pydicom.dcmread(fpath)
-    img_types = dcm_info.ImageType
-    return "DERIVED" in img_types
+    fpaths = list(fpaths)
+    infos = {}
+    if index is not None:
+        stats = get_file_stats(fpaths)
+        infos = index.get_many(stats)
+
+    fpaths_to_read = [fpath for fpath in fpaths if fpath not in infos]
+    infos_new = dict(
+        zip(
+            fpaths_to_read,
+            parallel_map(probe_dicom_header, fpaths_to_read, n_jobs=n_jobs),
+        )
+    )
+    if index is not None:
+        index.set_many(stats, infos_new)
+    if logger is not None:
+        logger.debug(
+            f"Read {len(infos_new)} DICOM file headers"
+            f" ({len(infos)} others found in the index)"
+        )
+    infos.update(infos_new)
+
+    fpaths_derived = []
+    errors = {}
+    for fpath in fpaths:
+        info: DicomHeaderInfo = infos[fpath]
+        if not info.is_readable:
+            errors[fpath] = info.error
+        elif info.image_type is None:
+            errors[fpath] = "No ImageType element"
+        elif info.is_derived:
+            fpaths_derived.append(fpath)
+    return fpaths_derived, errors
+
+
+def _iter_fpaths(dpath: Path) -> Iterator[Path]:
+    """Iterate over the paths of all files in a directory tree."""
+    for dpath_current, _, fnames in os.walk(dpath):
+        for fname in fnames:
+            yield Path(dpath_current, fname)
 
 
 class DicomReorgWorkflow(BaseWorkflow):
@@ -32,6 +128,8 @@ class DicomReorgWorkflow(BaseWorkflow):
         dpath_root: StrOrPathLike,
         copy_files: bool = False,
         check_dicoms: bool = False,
+        n_jobs: int = 1,
+        transfer_mode: Optional[TransferMode] = None,
         fpath_layout: Optional[StrOrPathLike] = None,
         logger: Optional[logging.Logger] = None,
         dry_run: bool = False,
@@ -46,24 +144,54 @@ class DicomReorgWorkflow(BaseWorkflow):
         )
         self.copy_files = copy_files
         self.check_dicoms = check_dicoms
+        self.n_jobs = check_n_jobs(n_jobs)
+
+        # copy_files is a shortcut for the copy transfer mode
+        if transfer_mode is None:
+            transfer_mode = "copy" if copy_files else "symlink"
+        elif copy_files and transfer_mode != "copy":
+            raise ValueError(
+                f"Cannot copy files with transfer mode {transfer_mode}"
+                ", use only one of copy_files and transfer_mode"
+            )
+        self.transfer_mode = check_transfer_mode(transfer_mode)
+        self.file_transferer = FileTransferer(
+            mode=self.transfer_mode, logger=self.logger
+        )
+
+        # opened in run_main if DICOM files are checked
+        self.dicom_header_index: Optional[DicomHeaderIndex] = None
 
         # the message logged in run_cleanup will depend on
         # the final values for these attributes (updated in run_main)
         self.n_success = 0
         self.n_total = 0
 
-    def get_fpaths_to_reorg(
+    def _get_dpath_downloaded(self, participant_id: str, session_id: str) -> Path:
+        """Get the raw DICOM directory (or archive) of a participant-session."""
+        return self.layout.dpath_raw_imaging / self.dicom_dir_map.get_dicom_dir(
+            participant_id=participant_id, session_id=session_id
+        )
+
+    def _get_dpath_reorganized(self, participant_id: str, session_id: str) -> Path:
+        """Get the organized DICOM directory of a participant-session."""
+        return (
+            self.layout.dpath_sourcedata
+            / participant_id_to_bids_participant(participant_id)
+            / session_id_to_bids_session(session_id)
+        )
+
+    def iter_fpaths_to_reorg(
         self,
         participant_id: str,
         session_id: str,
-    ) -> list[Path]:
-        """Get file paths to reorganize for a single participant and session."""
-        dpath_downloaded = (
-            self.layout.dpath_raw_imaging
-            / self.dicom_dir_map.get_dicom_dir(
-                participant_id=participant_id, session_id=session_id
-            )
-        )
+    ) -> Iterator[Path]:
+        """Iterate over file paths to reorganize for a single participant and session.
+
+        The directory tree is crawled lazily, as the paths are consumed. An error is
+        raised immediately if the directory does not exist.
+        """
+        dpath_downloaded = self._get_dpath_downloaded(participant_id, session_id)
 
         # make sure directory exists
         if not dpath_downloaded.exists():
@@ -72,11 +200,15 @@ class DicomReorgWorkflow(BaseWorkflow):
                 f" session {session_id}: {dpath_downloaded}"
             )
 
-        # crawl through directory tree and get all file paths
-        fpaths = []
-        for dpath, _, fnames in os.walk(dpath_downloaded):
-            fpaths.extend(Path(dpath, fname) for fname in fnames)
-        return fpaths
+        return _iter_fpaths(dpath_downloaded)
+
+    def get_fpaths_to_reorg(
+        self,
+        participant_id: str,
+        session_id: str,
+    ) -> list[Path]:
+        """Get file paths to reorganize for a single participant and session."""
+        return list(self.iter_fpaths_to_reorg(participant_id, session_id))
 
     def apply_fname_mapping(
         self, fname_source: str, participant_id: str, session_id: str
@@ -90,58 +222,196 @@ class DicomReorgWorkflow(BaseWorkflow):
         """
         return fname_source
 
-    def run_single(self, participant_id: str, session_id: str):
-        """Reorganize downloaded DICOM files for a single participant and session."""
-        # get paths to reorganize
-        fpaths_to_reorg = self.get_fpaths_to_reorg(participant_id, session_id)
+    def check_dicoms_single(
+        self, fpaths: list[Path], participant_id: str, session_id: str
+    ):
+        """Check the DICOM files of a participant-session for derived images.
 
-        dpath_reorganized: Path = (
-            self.layout.dpath_sourcedata
-            / participant_id_to_bids_participant(participant_id)
-            / session_id_to_bids_session(session_id)
+        Derived files are logged as a single warning. A single error is raised
+        for all the files that cannot be read.
+        """
+        fpaths_derived, errors = check_dicom_headers(
+            fpaths, index=self.dicom_header_index, logger=self.logger
         )
+        if len(fpaths_derived) > 0:
+            self.logger.warning(
+                f"Derived DICOM files detected for participant {participant_id}"
+                f" session {session_id} ({len(fpaths_derived)} out of"
+                f" {len(fpaths)} files): "
+                + ", ".join(str(fpath) for fpath in fpaths_derived)
+            )
+        if len(errors) > 0:
+            raise RuntimeError(
+                f"Error checking DICOM files for participant {participant_id}"
+                f" session {session_id} ({len(errors)} out of {len(fpaths)} files"
+                " cannot be read): "
+                + "; ".join(
+                    f"{fpath}: {error}"
+                    for fpath, error in list(errors.items())[:N_ERRORS_IN_MESSAGE]
+                )
+                + (
+                    f" and {len(errors) - N_ERRORS_IN_MESSAGE} more"
+                    if len(errors) > N_ERRORS_IN_MESSAGE
+                    else ""
+                )
+            )
+
+    def run_single(self, participant_id: str, session_id: str):
+        """Reorganize downloaded DICOM files for a single participant and session.
+
+        If the raw DICOM path of the participant-session is an archive, its files
+        are extracted directly into the organized directory (see _reorg_archive).
+        This method does not update the doughnut, so that it can be called
+        concurrently for different participants/sessions.
+        """
+        fpath_archive = self._get_dpath_downloaded(participant_id, session_id)
+        if is_archive(fpath_archive) and fpath_archive.is_file():
+            self._reorg_archive(fpath_archive, participant_id, session_id)
+            return
+
+        # get paths to reorganize (lazily)
+        fpaths_to_reorg = self.iter_fpaths_to_reorg(participant_id, session_id)
+
+        dpath_reorganized = self._get_dpath_reorganized(participant_id, session_id)
         self.mkdir(dpath_reorganized)
 
-        # do reorg
-        for fpath_source in fpaths_to_reorg:
-            # check file (though only error out if DICOM cannot be read)
-            if self.check_dicoms:
-                try:
-                    if is_derived_dicom(fpath_source):
-                        self.logger.warning(
-                            f"Derived DICOM file detected: {fpath_source}"
-                        )
-                except Exception as exception:
-                    raise RuntimeError(
-                        f"Error checking DICOM file {fpath_source}: {exception}"
-                    )
-
-            fpath_dest = dpath_reorganized / self.apply_fname_mapping(
-                fpath_source.name, participant_id=participant_id, session_id=session_id
-            )
+        # check all files before reorganizing any of them
+        # (though only error out if DICOMs cannot be read)
+        if self.check_dicoms:
+            fpaths_to_reorg = list(fpaths_to_reorg)
+            self.check_dicoms_single(fpaths_to_reorg, participant_id, session_id)
+
+        fnames_dest = self._list_fnames_dest(dpath_reorganized)
 
-            # do not overwrite existing files
-            if fpath_dest.exists():
-                raise FileExistsError(
-                    f"Cannot move file {fpath_source} to {fpath_dest}"
-                    " because it already exists"
+        # the directory tree is crawled in a background thread
+        n_files = 0
+        for fpaths_source in prefetch(iter_batches(fpaths_to_reorg, REORG_BATCH_SIZE)):
+            fpaths_dest = [
+                self._get_fpath_dest(
+                    fpath_source,
+                    fpath_source.name,
+                    dpath_reorganized,
+                    fnames_dest,
+                    participant_id=participant_id,
+                    session_id=session_id,
                 )
+                for fpath_source in fpaths_source
+            ]
+            self._reorg_files(fpaths_source, fpaths_dest)
+            n_files += len(fpaths_dest)
+            self.logger.debug(f"Reorganized {n_files} files into {dpath_reorganized}")
 
-            # either create symlinks or copy original files
-            if not self.dry_run:
-                if self.copy_files:
-                    self.copy(fpath_source, fpath_dest)
-                else:
-                    fpath_source = os.path.relpath(fpath_source, fpath_dest.parent)
-                    self.create_symlink(path_source=fpath_source, path_dest=fpath_dest)
-
-        # update doughnut entry
-        self.doughnut.set_status(
+        self.logger.info(
+            f"Reorganized {n_files} files into {dpath_reorganized}"
+            f" (transfer mode: {self.file_transferer.mode})"
+        )
+
+    @staticmethod
+    def _list_fnames_dest(dpath_reorganized: Path) -> set[str]:
+        """List the destination directory once instead of checking each file."""
+        try:
+            return set(os.listdir(dpath_reorganized))
+        except FileNotFoundError:
+            # not created in dry runs
+            return set()
+
+    def _get_fpath_dest(
+        self,
+        source: StrOrPathLike,
+        fname_source: str,
+        dpath_reorganized: Path,
+        fnames_dest: set[str],
+        participant_id: str,
+        session_id: str,
+    ) -> Path:
+        """Get the destination path of a file and add it to ``fnames_dest``.
+
+        Raises
+        ------
+        FileExistsError
+            If the destination file already exists (including files reorganized
+            earlier in the same run)
+        """
+        fname_dest = self.apply_fname_mapping(
+            fname_source,
             participant_id=participant_id,
             session_id=session_id,
-            col=self.doughnut.col_in_sourcedata,
-            status=True,
         )
+        if fname_dest in fnames_dest:
+            raise FileExistsError(
+                f"Cannot move file {source} to"
+                f" {dpath_reorganized / fname_dest} because it already exists"
+            )
+        fnames_dest.add(fname_dest)
+        return dpath_reorganized / fname_dest
+
+    def _reorg_archive(self, fpath_archive: Path, participant_id: str, session_id: str):
+        """Extract the files of an archive into the organized directory.
+
+        Members are streamed from the archive one at a time, without extracting the
+        archive to the raw imaging directory (whatever the transfer mode). In dry
+        runs, only the archive listing is read. DICOM files are checked after they
+        are extracted (except in dry runs), and the extracted files are deleted if
+        the check or the extraction fails.
+        """
+        dpath_reorganized = self._get_dpath_reorganized(participant_id, session_id)
+        self.mkdir(dpath_reorganized)
+        fnames_dest = self._list_fnames_dest(dpath_reorganized)
+
+        if self.dry_run:
+            members = [(member, None) for member in list_archive_members(fpath_archive)]
+        else:
+            members = iter_archive_files(fpath_archive)
+
+        fpaths_dest = []
+        try:
+            for member, file_member in members:
+                fpath_dest = self._get_fpath_dest(
+                    f"{fpath_archive}:{member.name}",
+                    member.fname,
+                    dpath_reorganized,
+                    fnames_dest,
+                    participant_id=participant_id,
+                    session_id=session_id,
+                )
+                # added before writing so that partially written files (e.g. from
+                # a truncated archive) are deleted too
+                fpaths_dest.append(fpath_dest)
+                if file_member is not None:
+                    try:
+                        write_archive_file(file_member, member, fpath_dest)
+                    except FileExistsError:
+                        # not created by this run, so it should not be deleted
+                        fpaths_dest.pop()
+                        raise
+            if self.check_dicoms and not self.dry_run:
+                self.check_dicoms_single(fpaths_dest, participant_id, session_id)
+        except Exception:
+            if not self.dry_run:
+                for fpath_dest in fpaths_dest:
+                    fpath_dest.unlink(missing_ok=True)
+            raise
+
+        self.logger.info(
+            f"Extracted {len(fpaths_dest)} files from {fpath_archive}"
+            f" into {dpath_reorganized}"
+        )
+
+    def _reorg_files(self, fpaths_source: list[Path], fpaths_dest: list[Path]):
+        """Transfer files to the organized directory (except in dry runs)."""
+        if self.dry_run:
+            return
+        self.file_transferer.transfer(fpaths_source, fpaths_dest)
+
+    def _run_single_or_error(
+        self, participant_session: tuple[str, str]
+    ) -> Optional[Exception]:
+        """Call run_single and return the exception raised (if any)."""
+        try:
+            self.run_single(*participant_session)
+        except Exception as exception:
+            return exception
+        return None
 
     def get_participants_sessions_to_run(self):
         """Return participant-session pairs to reorganize."""
@@ -164,22 +434,81 @@ class DicomReorgWorkflow(BaseWorkflow):
             logger=self.logger,
         )
 
+    @property
+    def fpath_dicom_header_index(self) -> Path:
+        """Path to the DICOM header index."""
+        return self.layout.dpath_scratch / FNAME_DICOM_HEADER_INDEX
+
+    def _open_dicom_header_index(self) -> Optional[DicomHeaderIndex]:
+        """Open the DICOM header index (read-only in dry runs)."""
+        if self.dry_run:
+            if not self.fpath_dicom_header_index.exists():
+                return None
+            return DicomHeaderIndex(self.fpath_dicom_header_index, read_only=True)
+        return DicomHeaderIndex(self.fpath_dicom_header_index)
+
     def run_main(self):
-        """Reorganize all downloaded DICOM files."""
-        for (
-            participant_id,
-            session_id,
-        ) in self.get_participants_sessions_to_run():
-            self.n_total += 1
-            try:
-                self.run_single(participant_id, session_id)
-                self.n_success += 1
-            except Exception as exception:
+        """Reorganize all downloaded DICOM files.
+
+        If ``n_jobs`` is larger than 1, participant-sessions are reorganized
+        concurrently (in threads). The doughnut is only updated at the end, by the
+        main thread.
+        """
+        if self.check_dicoms:
+            self.dicom_header_index = self._open_dicom_header_index()
+        try:
+            self._run_main()
+        finally:
+            if self.dicom_header_index is not None:
+                self.dicom_header_index.close()
+                self.dicom_header_index = None
+
+    def _run_main(self):
+        participants_sessions = list(self.get_participants_sessions_to_run())
+        self.n_total += len(participants_sessions)
+        if self.n_jobs > 1:
+            self.logger.info(
+                f"Reorganizing {len(participants_sessions)} participant-session pairs"
+                f" with {self.n_jobs} concurrent jobs"
+            )
+            # load the DICOM directory mapping before starting the threads
+            self.dicom_dir_map
+
+        progress = ProgressLogger(
+            n_total=len(participants_sessions),
+            logger=self.logger,
+            description="participant-sessions",
+        )
+        exceptions = parallel_map(
+            self._run_single_or_error,
+            participants_sessions,
+            n_jobs=self.n_jobs,
+            progress=progress,
+        )
+
+        participants_sessions_success = []
+        for (participant_id, session_id), exception in zip(
+            participants_sessions, exceptions
+        ):
+            if exception is None:
+                participants_sessions_success.append((participant_id, session_id))
+            else:
                 self.return_code = ReturnCode.PARTIAL_SUCCESS
                 self.logger.error(
                     "Error reorganizing DICOM files for participant "
                     f"{participant_id} session {session_id}: {exception}"
                 )
+        self.n_success += len(participants_sessions_success)
+
+        for message in self.file_transferer.get_messages():
+            self.logger.info(message)
+
+        # update all doughnut entries at once
+        self.doughnut.set_statuses(
+            participants_sessions_success,
+            col=self.doughnut.col_in_sourcedata,
+            status=True,
+        )
 
     def run_cleanup(self):
         """
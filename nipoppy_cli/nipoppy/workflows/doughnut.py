@@ -1,14 +1,36 @@
 """Workflow for init command."""
 
 import logging
+import os
 from pathlib import Path
 from typing import Optional
 
 from nipoppy.env import LogColor, StrOrPathLike
-from nipoppy.tabular.doughnut import Doughnut, generate_doughnut, update_doughnut
+from nipoppy.parallel import check_n_jobs
+from nipoppy.tabular.doughnut import (
+    DirectoryIndex,
+    Doughnut,
+    generate_doughnut,
+    refresh_doughnut,
+    update_doughnut,
+)
+from nipoppy.watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_POLL_INTERVAL,
+    PollingWatcher,
+    get_watcher,
+)
 from nipoppy.workflows.base import BaseWorkflow
 
 
+def _get_mtime(fpath: Path) -> Optional[int]:
+    """Get the modification time of a file (None if it does not exist)."""
+    try:
+        return os.stat(fpath).st_mtime_ns
+    except OSError:
+        return None
+
+
 class DoughnutWorkflow(BaseWorkflow):
     """Workflow for creating/updating a dataset's doughnut file."""
 
@@ -17,6 +39,11 @@ class DoughnutWorkflow(BaseWorkflow):
         dpath_root: Path,
         empty: bool = False,
         regenerate: bool = False,
+        refresh: bool = False,
+        n_jobs: int = 1,
+        watch: bool = False,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
         fpath_layout: Optional[StrOrPathLike] = None,
         logger: Optional[logging.Logger] = None,
         dry_run: bool = False,
@@ -32,6 +59,12 @@ class DoughnutWorkflow(BaseWorkflow):
 
         self.empty = empty
         self.regenerate = regenerate
+        # watch mode keeps refreshing the statuses of all records
+        self.refresh = refresh or watch
+        self.n_jobs = check_n_jobs(n_jobs)
+        self.watch = watch
+        self.debounce = debounce
+        self.poll_interval = poll_interval
 
     def run_main(self):
         """Generate/update the dataset's doughnut file."""
@@ -42,8 +75,12 @@ class DoughnutWorkflow(BaseWorkflow):
         empty = self.empty
         logger = self.logger
 
+        # last-seen state of the directories, to only re-check changed ones
+        fpath_dir_index = DirectoryIndex.get_fpath(fpath_doughnut)
+        dir_index = DirectoryIndex.load(fpath_dir_index) if self.refresh else None
+
         if fpath_doughnut.exists() and not self.regenerate:
-            old_doughnut = Doughnut.load(fpath_doughnut)
+            old_doughnut = self.load_tabular_file(Doughnut, fpath_doughnut)
             logger.info(f"Found existing doughnut (shape: {old_doughnut.shape})")
             doughnut = update_doughnut(
                 doughnut=old_doughnut,
@@ -54,6 +91,9 @@ class DoughnutWorkflow(BaseWorkflow):
                 dpath_bidsified=dpath_bidsified,
                 empty=empty,
                 logger=logger,
+                n_jobs=self.n_jobs,
+                refresh=self.refresh,
+                dir_index=dir_index,
             )
 
         else:
@@ -69,11 +109,121 @@ class DoughnutWorkflow(BaseWorkflow):
                 dpath_bidsified=dpath_bidsified,
                 empty=empty,
                 logger=logger,
+                n_jobs=self.n_jobs,
+                dir_index=dir_index,
             )
 
         logger.info(f"New/updated doughnut shape: {doughnut.shape}")
         self.save_tabular_file(doughnut, fpath_doughnut)
 
+        if dir_index is not None:
+            dpaths_visited = self._save_dir_index(dir_index, fpath_dir_index)
+            if self.watch:
+                self.run_watch(doughnut, dir_index, dpaths_visited)
+
+    def _save_dir_index(
+        self, dir_index: DirectoryIndex, fpath_dir_index: Path
+    ) -> list[str]:
+        """Prune and save the directory index after all records have been checked.
+
+        Returns the directories that were visited.
+        """
+        dpaths_visited = dir_index.get_visited_dpaths()
+        dir_index.prune()
+        if not self.dry_run:
+            dir_index.save(fpath_dir_index)
+            self.logger.debug(f"Saved directory index to {fpath_dir_index}")
+        return dpaths_visited
+
+    def _set_watched_dirs(
+        self, watcher: PollingWatcher, dpaths: list[str]
+    ) -> PollingWatcher:
+        """Update the watched directories, falling back to polling on error."""
+        try:
+            watcher.set_dirs(dpaths)
+        except OSError as exception:
+            self.logger.warning(f"{exception}. Falling back to polling")
+            watcher.close()
+            watcher = PollingWatcher()
+        return watcher
+
+    def run_watch(
+        self,
+        doughnut: Doughnut,
+        dir_index: DirectoryIndex,
+        dpaths_visited: list[str],
+        n_cycles: Optional[int] = None,
+    ):
+        """Keep the doughnut up to date until interrupted.
+
+        The raw imaging, sourcedata and BIDS directories are monitored with inotify
+        if possible, otherwise (or if they are on a network filesystem) they are
+        checked every ``poll_interval`` seconds. Changes received within
+        ``debounce`` seconds of each other are processed together, and the doughnut
+        is rewritten at most once per batch, only if some statuses changed. The
+        statuses are also re-checked every ``poll_interval`` seconds even if no
+        change was reported. If the manifest is modified, it is reloaded and
+        records are added for its new participants/sessions.
+        """
+        fpath_doughnut = self.layout.fpath_doughnut
+        dpaths = dict(
+            dpath_downloaded=self.layout.dpath_raw_imaging,
+            dpath_organized=self.layout.dpath_sourcedata,
+            dpath_bidsified=self.layout.dpath_bids,
+        )
+        fpath_dir_index = DirectoryIndex.get_fpath(fpath_doughnut)
+        mtime_doughnut = _get_mtime(fpath_doughnut)
+        fpath_manifest = self.layout.fpath_manifest
+        mtime_manifest = _get_mtime(fpath_manifest)
+
+        watcher = get_watcher(dpaths.values(), logger=self.logger)
+        self.logger.info(f"Watching for changes ({watcher.name}), press Ctrl+C to stop")
+        i_cycle = 0
+        try:
+            while n_cycles is None or i_cycle < n_cycles:
+                watcher = self._set_watched_dirs(watcher, dpaths_visited)
+                if watcher.wait(self.poll_interval, debounce=self.debounce):
+                    self.logger.info("Changes detected")
+
+                # the doughnut may have been updated by another command
+                if _get_mtime(fpath_doughnut) != mtime_doughnut:
+                    self.logger.info(f"Reloading doughnut from {fpath_doughnut}")
+                    doughnut = self.load_tabular_file(Doughnut, fpath_doughnut)
+
+                if _get_mtime(fpath_manifest) != mtime_manifest:
+                    self.logger.info(f"Reloading manifest from {fpath_manifest}")
+                    mtime_manifest = _get_mtime(fpath_manifest)
+                    # the DICOM directory map can be generated from the manifest
+                    for attr in ("manifest", "dicom_dir_map"):
+                        self.__dict__.pop(attr, None)
+                    doughnut = update_doughnut(
+                        doughnut=doughnut,
+                        manifest=self.manifest,
+                        dicom_dir_map=self.dicom_dir_map,
+                        empty=self.empty,
+                        logger=self.logger,
+                        n_jobs=self.n_jobs,
+                        refresh=True,
+                        dir_index=dir_index,
+                        **dpaths,
+                    )
+                else:
+                    refresh_doughnut(
+                        doughnut,
+                        logger=self.logger,
+                        n_jobs=self.n_jobs,
+                        dir_index=dir_index,
+                        **dpaths,
+                    )
+                self.save_tabular_file(doughnut, fpath_doughnut)
+                mtime_doughnut = _get_mtime(fpath_doughnut)
+                dpaths_visited = self._save_dir_index(dir_index, fpath_dir_index)
+                i_cycle += 1
+        except KeyboardInterrupt:
+            self.logger.info("Stopped watching for changes")
+        finally:
+            watcher.close()
+
     def run_cleanup(self):
         """Log a success message."""
         self.logger.info(
@@ -8,10 +8,10 @@ import re
 from abc import ABC, abstractmethod
 from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
 import bids
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
 from nipoppy.config.boutiques import (
     BoutiquesConfig,
@@ -26,6 +26,7 @@ from nipoppy.env import (
     StrOrPathLike,
 )
 from nipoppy.utils import (
+    CompiledTemplate,
     add_pybids_ignore_patterns,
     check_participant_id,
     check_session_id,
@@ -33,11 +34,18 @@ from nipoppy.utils import (
     get_pipeline_tag,
     load_json,
     participant_id_to_bids_participant,
-    process_template_str,
     session_id_to_bids_session,
 )
 from nipoppy.workflows.base import BaseWorkflow
 
+# template strings that change between participants/sessions
+TEMPLATE_PARTICIPANT_KEYS = (
+    "participant_id",
+    "session_id",
+    "bids_participant",
+    "bids_session",
+)
+
 
 class BasePipelineWorkflow(BaseWorkflow, ABC):
     """A workflow for a pipeline that has a Boutiques descriptor."""
@@ -73,6 +81,9 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
         self.n_success = 0
         self.n_total = 0
 
+        # compiled templates, by attribute name and dynamic keys
+        self._compiled_templates: dict[tuple, CompiledTemplate] = {}
+
     @cached_property
     def dpaths_to_check(self) -> list[Path]:
         """Directory paths to create if needed during the setup phase."""
@@ -223,9 +234,61 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
         self.logger.info(f"Loaded Boutiques config from descriptor: {boutiques_config}")
         return boutiques_config
 
+    def compile_template_json(
+        self,
+        template_json: dict | list,
+        objs: Optional[list] = None,
+        dynamic_keys: Iterable[str] = (),
+        **kwargs,
+    ) -> CompiledTemplate:
+        """Serialize a JSON object and replace its static template strings.
+
+        Template strings for the participant/session IDs (and ``dynamic_keys``) are
+        left for :meth:`process_template_json`. Other ones are replaced with values
+        from kwargs, ``objs`` or the workflow and its layout.
+        """
+        objs = [*(objs or []), self, self.layout]
+        self.logger.debug(
+            f"Compiling template with attributes from: {objs}"
+            + (f" and values for: {list(kwargs)}" if len(kwargs) > 0 else "")
+        )
+        return CompiledTemplate(
+            json.dumps(template_json),
+            objs=objs,
+            dynamic_keys=[*TEMPLATE_PARTICIPANT_KEYS, *dynamic_keys],
+            **kwargs,
+        )
+
+    def get_compiled_template(
+        self, name: str, dynamic_keys: Iterable[str] = ()
+    ) -> CompiledTemplate:
+        """Get the compiled template for a JSON attribute of the workflow.
+
+        The template is compiled the first time it is requested, and reused for the
+        other participants/sessions of the run.
+
+        Parameters
+        ----------
+        name : str
+            Name of the attribute (e.g. ``"descriptor"``). Pydantic models are
+            converted to dictionaries
+        dynamic_keys : Iterable[str], optional
+            Template strings to replace in :meth:`process_template_json` in addition
+            to the participant/session IDs
+        """
+        cache_key = (name, frozenset(dynamic_keys))
+        if cache_key not in self._compiled_templates:
+            template_json = getattr(self, name)
+            if isinstance(template_json, BaseModel):
+                template_json = template_json.model_dump()
+            self._compiled_templates[cache_key] = self.compile_template_json(
+                template_json, dynamic_keys=dynamic_keys
+            )
+        return self._compiled_templates[cache_key]
+
     def process_template_json(
         self,
-        template_json: dict,
+        template_json: dict | list | CompiledTemplate,
         participant_id: str,
         session_id: str,
         bids_participant: Optional[str] = None,
@@ -234,7 +297,12 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
         return_str: bool = False,
         **kwargs,
     ):
-        """Replace template strings in a JSON object."""
+        """Replace template strings in a JSON object.
+
+        ``template_json`` can be a template compiled with ``kwargs`` as dynamic
+        keys, in which case ``objs`` is not used and the JSON is not serialized
+        again.
+        """
         if not (isinstance(participant_id, str) and isinstance(session_id, str)):
             raise ValueError(
                 "participant_id and session_id must be strings"
@@ -247,26 +315,23 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
         if bids_session is None:
             bids_session = session_id_to_bids_session(session_id)
 
-        if objs is None:
-            objs = []
-        objs.extend([self, self.layout])
-
         kwargs["participant_id"] = participant_id
         kwargs["session_id"] = session_id
         kwargs["bids_participant"] = bids_participant
         kwargs["bids_session"] = bids_session
 
-        self.logger.debug("Available replacement strings: ")
-        max_len = max(len(k) for k in kwargs)
-        for k, v in kwargs.items():
-            self.logger.debug(f"\t{k}:".ljust(max_len + 3) + v)
-        self.logger.debug(f"\t+ all attributes in: {objs}")
+        if not isinstance(template_json, CompiledTemplate):
+            template_json = self.compile_template_json(
+                template_json, objs=objs, dynamic_keys=kwargs
+            )
 
-        template_json_str = process_template_str(
-            json.dumps(template_json),
-            objs=objs,
-            **kwargs,
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Available replacement strings: ")
+            max_len = max(len(k) for k in kwargs)
+            for k, v in kwargs.items():
+                self.logger.debug(f"\t{k}:".ljust(max_len + 3) + str(v))
+
+        template_json_str = template_json.render(**kwargs)
 
         return template_json_str if return_str else json.loads(template_json_str)
 
@@ -371,6 +436,11 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
 
     def run_cleanup(self):
         """Log a summary message."""
+        self.log_summary()
+        return super().run_cleanup()
+
+    def log_summary(self):
+        """Log how many participant-session pairs were run successfully."""
         if self.n_total == 0:
             self.logger.warning(
                 "No participant-session pairs to run. Make sure there are no mistakes "
@@ -397,8 +467,6 @@ class BasePipelineWorkflow(BaseWorkflow, ABC):
                 )
             )
 
-        return super().run_cleanup()
-
     @abstractmethod
     def get_participants_sessions_to_run(
         self, participant_id: Optional[str], session_id: Optional[str]
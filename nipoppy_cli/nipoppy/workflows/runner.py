@@ -1,21 +1,50 @@
 """PipelineRunner workflow."""
 
+import json
 import logging
+import os
+import shlex
+import sys
 from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
-from boutiques import bosh
-
+from nipoppy.cli.parser import COMMAND_PIPELINE_RUN, VERBOSITY_TO_LOG_LEVEL_MAP
 from nipoppy.config.boutiques import BoutiquesConfig
 from nipoppy.config.container import ContainerConfig, prepare_container
-from nipoppy.env import StrOrPathLike
+from nipoppy.descriptor import get_compiled_descriptor
+from nipoppy.env import HpcScheduler, ReturnCode, StrOrPathLike
+from nipoppy.executor import Job, LocalExecutor
+from nipoppy.hpc import BaseScheduler, get_scheduler
+from nipoppy.parallel import check_n_jobs
 from nipoppy.tabular.bagel import Bagel
+from nipoppy.utils import add_path_timestamp, get_pipeline_tag, parse_walltime
+from nipoppy.worker import Worker, WorkList
 from nipoppy.workflows.pipeline import BasePipelineWorkflow
 
 
 class PipelineRunner(BasePipelineWorkflow):
-    """Pipeline runner."""
+    """Pipeline runner.
+
+    If ``n_jobs`` is greater than 1, each participant-session is run in its own
+    subprocess (a ``nipoppy`` command for that participant-session only, with its
+    own log file) and up to ``n_jobs`` of them run at the same time, within the
+    CPU/memory budgets given by the RESOURCES field of the pipeline step config.
+
+    If ``hpc`` is given, the participant-sessions are instead submitted to the
+    job scheduler as a single array job (one participant-session per task), with
+    the resources of the pipeline step and the options in the HPC_CONFIG field of
+    the dataset config.
+
+    If ``worker`` is True, participant-sessions are taken from a work list shared
+    with other workers (created from the participant-sessions to run if it does
+    not exist yet, or if ``reset_work_list`` is True) and run in subprocesses
+    packed into the CPUs/memory available to the process (e.g. a whole HPC
+    allocation), until the list is drained or the ``walltime`` is almost reached.
+    """
+
+    # subcommand used to run a single participant-session in a subprocess
+    cli_command = COMMAND_PIPELINE_RUN
 
     def __init__(
         self,
@@ -26,6 +55,11 @@ class PipelineRunner(BasePipelineWorkflow):
         participant_id: str = None,
         session_id: str = None,
         simulate: bool = False,
+        n_jobs: int = 1,
+        hpc: Optional[HpcScheduler] = None,
+        worker: bool = False,
+        walltime: Optional[str] = None,
+        reset_work_list: bool = False,
         fpath_layout: Optional[StrOrPathLike] = None,
         logger: Optional[logging.Logger] = None,
         dry_run: bool = False,
@@ -43,6 +77,27 @@ class PipelineRunner(BasePipelineWorkflow):
             dry_run=dry_run,
         )
         self.simulate = simulate
+        self.n_jobs = check_n_jobs(n_jobs)
+        if hpc is not None and n_jobs != 1:
+            raise ValueError(
+                "Cannot use both n_jobs and hpc (jobs are run by the HPC scheduler)"
+            )
+        self.hpc = hpc
+        self.hpc_job_id: Optional[str] = None
+        if worker and (hpc is not None or n_jobs != 1):
+            raise ValueError(
+                "Cannot use worker with n_jobs or hpc (workers use all the available"
+                " CPUs and are meant to run inside an HPC job)"
+            )
+        if walltime is not None:
+            if not worker:
+                raise ValueError("walltime can only be used with worker")
+            parse_walltime(walltime)
+        if reset_work_list and not worker:
+            raise ValueError("reset_work_list can only be used with worker")
+        self.worker = worker
+        self.walltime = walltime
+        self.reset_work_list = reset_work_list
 
     @cached_property
     def dpaths_to_check(self) -> list[Path]:
@@ -52,21 +107,54 @@ class PipelineRunner(BasePipelineWorkflow):
             self.dpath_pipeline_work,
         ]
 
+    @cached_property
+    def dpath_hpc(self) -> Path:
+        """Return the path to the directory for HPC job scripts and outputs."""
+        self.check_pipeline_version()
+        return (
+            self.layout.dpath_logs
+            / self.name
+            / get_pipeline_tag(self.pipeline_name, self.pipeline_version)
+            / "hpc"
+        )
+
+    @cached_property
+    def fpath_work_list(self) -> Path:
+        """Return the path to the work list shared by workers."""
+        tag = get_pipeline_tag(
+            self.pipeline_name, self.pipeline_version, pipeline_step=self.pipeline_step
+        )
+        return self.dpath_hpc / f"worklist-{tag}.tsv"
+
+    @cached_property
+    def hpc_scheduler(self) -> BaseScheduler:
+        """Get the HPC job scheduler, with the options from the dataset config."""
+        return get_scheduler(self.hpc, self.config.HPC_CONFIG)
+
+    @cached_property
+    def container_config(self) -> ContainerConfig:
+        """Get the pipeline's container config, before template string replacement."""
+        return self.pipeline_config.get_container_config()
+
     def process_container_config(
         self,
         participant_id: str,
         session_id: str,
         bind_paths: Optional[list[StrOrPathLike]] = None,
+        env: Optional[dict[str, str]] = None,
     ) -> str:
-        """Update container config and generate container command."""
+        """Update container config and generate container command.
+
+        The container's environment variables are set in ``env`` if it is given,
+        otherwise in ``os.environ``.
+        """
         if bind_paths is None:
             bind_paths = []
 
         # get and process container config
-        container_config = self.pipeline_config.get_container_config()
         container_config = ContainerConfig(
             **self.process_template_json(
-                container_config.model_dump(),
+                self.get_compiled_template("container_config"),
                 participant_id=participant_id,
                 session_id=session_id,
             )
@@ -76,7 +164,7 @@ class PipelineRunner(BasePipelineWorkflow):
         # get and process Boutiques config
         boutiques_config = BoutiquesConfig(
             **self.process_template_json(
-                self.boutiques_config.model_dump(),
+                self.get_compiled_template("boutiques_config"),
                 participant_id=participant_id,
                 session_id=session_id,
             )
@@ -99,6 +187,7 @@ class PipelineRunner(BasePipelineWorkflow):
             subcommand=boutiques_config.CONTAINER_SUBCOMMAND,
             check=True,
             logger=self.logger,
+            env=env,
         )
 
         return container_command
@@ -108,13 +197,29 @@ class PipelineRunner(BasePipelineWorkflow):
         participant_id: str,
         session_id: str,
         objs: Optional[list] = None,
+        container_env: Optional[dict[str, str]] = None,
         **kwargs,
     ):
-        """Launch a pipeline run using Boutiques."""
+        """Launch a pipeline run using Boutiques.
+
+        The descriptor is only validated once for identical content, and the
+        command line is generated in the current process and run directly.
+
+        ``container_env`` contains environment variables to add to the current
+        environment for the pipeline subprocess only.
+        """
+        # templates are compiled once per run, unless objects are given (these can
+        # differ between participants/sessions)
+        if objs is None:
+            descriptor_template = self.get_compiled_template("descriptor", kwargs)
+            invocation_template = self.get_compiled_template("invocation", kwargs)
+        else:
+            descriptor_template, invocation_template = self.descriptor, self.invocation
+
         # process and validate the descriptor
         self.logger.info("Processing the JSON descriptor")
         descriptor_str = self.process_template_json(
-            self.descriptor,
+            descriptor_template,
             participant_id=participant_id,
             session_id=session_id,
             objs=objs,
@@ -123,12 +228,12 @@ class PipelineRunner(BasePipelineWorkflow):
         )
         self.logger.debug(f"Descriptor string: {descriptor_str}")
         self.logger.info("Validating the JSON descriptor")
-        bosh(["validate", descriptor_str])
+        descriptor = get_compiled_descriptor(descriptor_str)
 
         # process and validate the invocation
         self.logger.info("Processing the JSON invocation")
         invocation_str = self.process_template_json(
-            self.invocation,
+            invocation_template,
             participant_id=participant_id,
             session_id=session_id,
             objs=objs,
@@ -137,16 +242,26 @@ class PipelineRunner(BasePipelineWorkflow):
         )
         self.logger.debug(f"Invocation string: {invocation_str}")
         self.logger.info("Validating the JSON invocation")
-        bosh(["invocation", "-i", invocation_str, descriptor_str])
+        invocation = descriptor.validate_invocation(json.loads(invocation_str))
+        command = descriptor.get_command_line(invocation)
 
-        # run as a subprocess so that stdout/error are captured in the log
         if self.simulate:
+            # same output as bosh exec simulate
+            for line in ["Generated Command:", command]:
+                self.logger.info(f"{self.log_prefix_run_stdout} {line}")
+            return descriptor_str, invocation_str
+
+        # run as a subprocess so that stdout/error are captured in the log
+        env = {**os.environ, **(container_env or {})}
+        if descriptor.has_container_image:
+            # Boutiques sets up the container itself
             self.run_command(
-                ["bosh", "exec", "simulate", "-i", invocation_str, descriptor_str]
+                ["bosh", "exec", "launch", "--stream", descriptor_str, invocation_str],
+                env=env,
             )
         else:
             self.run_command(
-                ["bosh", "exec", "launch", "--stream", descriptor_str, invocation_str]
+                command, shell=True, env={**env, **descriptor.get_env_vars(invocation)}
             )
 
         return descriptor_str, invocation_str
@@ -162,7 +277,18 @@ class PipelineRunner(BasePipelineWorkflow):
         """
         self.check_pipeline_version()  # in case this is called outside of run()
         if self.layout.fpath_imaging_bagel.exists():
-            bagel = Bagel.load(self.layout.fpath_imaging_bagel)
+            # only load the rows for this pipeline (and participant/session)
+            filters = {
+                Bagel.col_pipeline_name: self.pipeline_name,
+                Bagel.col_pipeline_version: self.pipeline_version,
+            }
+            if participant_id is not None:
+                filters[Bagel.col_participant_id] = participant_id
+            if session_id is not None:
+                filters[Bagel.col_session_id] = session_id
+            bagel = self.load_tabular_file(
+                Bagel, self.layout.fpath_imaging_bagel, compact=True, filters=filters
+            )
             participants_sessions_completed = set(
                 bagel.get_completed_participants_sessions(
                     pipeline_name=self.pipeline_name,
@@ -190,6 +316,7 @@ class PipelineRunner(BasePipelineWorkflow):
         )
 
         # get container command
+        container_env = {}
         container_command = self.process_container_config(
             participant_id=participant_id,
             session_id=session_id,
@@ -199,11 +326,221 @@ class PipelineRunner(BasePipelineWorkflow):
                 self.dpath_pipeline_work,
                 self.dpath_pipeline_bids_db,
             ],
+            env=container_env,
         )
 
         # run pipeline with Boutiques
         return self.launch_boutiques_run(
-            participant_id, session_id, container_command=container_command
+            participant_id,
+            session_id,
+            container_env=container_env,
+            container_command=container_command,
+        )
+
+    def get_nipoppy_args(self, command: str) -> list[str]:
+        """Get the start of a nipoppy command for this dataset.
+
+        Paths are made absolute so that the command can run from any directory.
+        """
+        args = [
+            sys.executable,
+            "-m",
+            "nipoppy",
+            command,
+            "--dataset-root",
+            str(self.dpath_root.absolute()),
+        ]
+        if self.fpath_layout is not None:
+            args.extend(["--layout", str(Path(self.fpath_layout).absolute())])
+        for verbosity, log_level in VERBOSITY_TO_LOG_LEVEL_MAP.items():
+            if log_level == self.logger.level:
+                args.extend(["--verbosity", verbosity])
+        if self.dry_run:
+            args.append("--dry-run")
+        return args
+
+    def get_job_args(
+        self, participant_id: Optional[str] = None, session_id: Optional[str] = None
+    ) -> list[str]:
+        """Get the command to run the pipeline in a separate process.
+
+        The participant/session options are omitted if the IDs are None (e.g. for
+        HPC array jobs, where they are added for each task).
+        """
+        args = self.get_nipoppy_args(self.cli_command) + [
+            "--pipeline",
+            self.pipeline_name,
+            "--pipeline-version",
+            self.pipeline_version,
+        ]
+        if self.pipeline_step is not None:
+            args.extend(["--pipeline-step", self.pipeline_step])
+        if self.simulate:
+            args.append("--simulate")
+        if participant_id is not None:
+            args.extend(["--participant-id", participant_id])
+        if session_id is not None:
+            args.extend(["--session-id", session_id])
+        return args
+
+    def get_job(self, participant_id: str, session_id: str) -> Job:
+        """Get the job that runs the pipeline on a single participant-session."""
+        return Job(
+            name=f"participant {participant_id}, session {session_id}",
+            args=self.get_job_args(participant_id, session_id),
+        )
+
+    def handle_job_success(self, participant_id: str, session_id: str):
+        """Update the parent workflow after a job ran successfully.
+
+        Called in the parent process for each participant-session that was run in
+        its own subprocess.
+        """
+
+    def submit_hpc_script(self, script: str, fname_stem: str) -> Optional[str]:
+        """Write a job script and submit it to the HPC scheduler.
+
+        Returns the job ID, or None in dry runs (where the script is not written).
+        """
+        fpath_script = self.dpath_hpc / add_path_timestamp(f"{fname_stem}.sh")
+        self.logger.debug(f"Job script for {fpath_script}:\n{script}")
+        self.log_command(shlex.join(self.hpc_scheduler.get_submit_args(fpath_script)))
+        if self.dry_run:
+            return None
+
+        self.mkdir(self.dpath_hpc, log_level=logging.DEBUG)
+        fpath_script.write_text(script)
+        job_id = self.hpc_scheduler.submit(fpath_script)
+        self.logger.info(f"Submitted job {job_id} with script {fpath_script}")
+        return job_id
+
+    def submit_hpc_job(
+        self, participants_sessions: list[tuple[str, str]]
+    ) -> Optional[str]:
+        """Submit an array job with one task per participant-session.
+
+        Returns the job ID, or None in dry runs.
+        """
+        tag = get_pipeline_tag(
+            self.pipeline_name, self.pipeline_version, pipeline_step=self.pipeline_step
+        )
+        participant_ids, session_ids = zip(*participants_sessions)
+        script = self.hpc_scheduler.generate_script(
+            job_name=f"nipoppy-{self.cli_command}-{tag}",
+            dpath_output=self.dpath_hpc,
+            resources=self.pipeline_config.get_resources(step_name=self.pipeline_step),
+            args=self.get_job_args(),
+            task_args={
+                "--participant-id": participant_ids,
+                "--session-id": session_ids,
+            },
+        )
+        return self.submit_hpc_script(script, fname_stem=tag)
+
+    def handle_job_results(self, returncodes: dict[tuple[str, str], int]):
+        """Update the run counts and return code with the results of jobs."""
+        self.n_total += len(returncodes)
+        for (participant_id, session_id), returncode in returncodes.items():
+            if returncode == ReturnCode.SUCCESS:
+                self.n_success += 1
+                self.handle_job_success(participant_id, session_id)
+            else:
+                self.return_code = ReturnCode.PARTIAL_SUCCESS
+
+    def run_worker(self):
+        """Run participant-sessions from the shared work list."""
+        work_list = WorkList(self.fpath_work_list)
+        if self.dry_run:
+            self.logger.info(
+                "Would run participant-session pairs from the work list"
+                f" {work_list.fpath}"
+            )
+            return
+
+        if work_list.populate(
+            lambda: self.get_participants_sessions_to_run(
+                self.participant_id, self.session_id
+            ),
+            reset=self.reset_work_list,
+        ):
+            self.logger.info(f"Created work list {work_list.fpath}")
+        else:
+            self.logger.info(
+                f"Using existing work list {work_list.fpath} with"
+                f" {work_list.get_n_remaining()} participant-session pairs left"
+                " (use --reset-work-list to create it again)"
+            )
+
+        resources = self.pipeline_config.get_resources(step_name=self.pipeline_step)
+        worker = Worker(
+            work_list,
+            n_cpus=resources.N_CPUS,
+            memory_gb=resources.MEMORY_GB,
+            walltime=None if self.walltime is None else parse_walltime(self.walltime),
+            job_walltime=(
+                None
+                if resources.WALLTIME is None
+                else parse_walltime(resources.WALLTIME)
+            ),
+            logger=self.logger,
+        )
+        self.logger.info(
+            f"Running participant-session pairs from the work list {work_list.fpath}"
+            f" with up to {worker.n_concurrent} concurrent jobs"
+        )
+        self.handle_job_results(worker.run(lambda item: self.get_job(*item)))
+
+    def run_main(self):
+        """Run the pipeline, with up to ``n_jobs`` participant-sessions at once.
+
+        Or submit the participant-sessions to an HPC scheduler if ``hpc`` is set,
+        or run participant-sessions from the shared work list if ``worker`` is set.
+        """
+        if self.worker:
+            return self.run_worker()
+        if self.n_jobs == 1 and self.hpc is None:
+            return super().run_main()
+
+        participants_sessions = list(
+            self.get_participants_sessions_to_run(self.participant_id, self.session_id)
+        )
+        if len(participants_sessions) == 0:
+            return
+
+        if self.hpc is not None:
+            self.n_total += len(participants_sessions)
+            self.logger.info(
+                f"Submitting {len(participants_sessions)} participant-session pairs"
+                f" to {self.hpc}"
+            )
+            self.hpc_job_id = self.submit_hpc_job(participants_sessions)
+            return
+
+        resources = self.pipeline_config.get_resources(step_name=self.pipeline_step)
+        executor = LocalExecutor(
+            n_jobs=self.n_jobs,
+            n_cpus=resources.N_CPUS,
+            memory_gb=resources.MEMORY_GB,
+            logger=self.logger,
+        )
+        self.logger.info(
+            f"Running {len(participants_sessions)} participant-session pairs with"
+            f" up to {executor.n_concurrent} concurrent jobs"
+        )
+        returncodes = executor.run(
+            self.get_job(participant_id, session_id)
+            for participant_id, session_id in participants_sessions
+        )
+        self.handle_job_results(dict(zip(participants_sessions, returncodes)))
+
+    def log_summary(self):
+        """Log a summary message (number of submitted pairs for HPC runs)."""
+        if self.hpc is None or self.n_total == 0:
+            return super().log_summary()
+        job_id_str = "" if self.hpc_job_id is None else f" (job ID {self.hpc_job_id})"
+        self.logger.info(
+            f"Submitted {self.n_total} participant-session pairs to {self.hpc}"
+            f"{job_id_str}. Check the job outputs in {self.dpath_hpc}"
         )
 
     def run_cleanup(self):
@@ -1,6 +1,7 @@
 """PipelineTracker workflow."""
 
 import logging
+from functools import cached_property
 from typing import List, Optional
 
 from pydantic import TypeAdapter
@@ -38,11 +39,12 @@ class PipelineTracker(BasePipelineWorkflow):
             dry_run=dry_run,
         )
         self.bagel: Bagel = Bagel()  # may get overwritten
+        self.bagel_records: list[dict] = []  # new results not yet in the bagel
 
     def run_setup(self):
         """Load/initialize the bagel file."""
         if self.layout.fpath_imaging_bagel.exists():
-            self.bagel = Bagel.load(self.layout.fpath_imaging_bagel)
+            self.bagel = self.load_tabular_file(Bagel, self.layout.fpath_imaging_bagel)
             self.logger.info(
                 f"Found existing bagel with shape {self.bagel.shape}"
                 f" at {self.layout.fpath_imaging_bagel}"
@@ -74,18 +76,22 @@ class PipelineTracker(BasePipelineWorkflow):
             participant_id=participant_id, session_id=session_id
         )
 
-    def run_single(self, participant_id: str, session_id: str):
-        """Run tracker on a single participant/session."""
-        # load tracker configs from file
+    @cached_property
+    def tracker_config_json(self) -> list:
+        """Load the tracker configs, before template string replacement."""
         fpath_tracker_config = self.pipeline_config.TRACKER_CONFIG_FILE
         if fpath_tracker_config is None:
             raise ValueError(
                 f"No tracker config file specified for pipeline {self.pipeline_name}"
                 f" {self.pipeline_version}"
             )
+        return load_json(fpath_tracker_config)
+
+    def run_single(self, participant_id: str, session_id: str):
+        """Run tracker on a single participant/session."""
         # replace template strings
         tracker_configs = self.process_template_json(
-            load_json(fpath_tracker_config),
+            self.get_compiled_template("tracker_config_json"),
             participant_id=participant_id,
             session_id=session_id,
         )
@@ -103,9 +109,9 @@ class PipelineTracker(BasePipelineWorkflow):
             )
         tracker_config = tracker_configs[0]
 
-        # check status and update bagel
+        # check status (the bagel is updated in bulk after all participants)
         status = self.check_status(tracker_config.PATHS)
-        self.bagel = self.bagel.add_or_update_records(
+        self.bagel_records.append(
             {
                 Bagel.col_participant_id: participant_id,
                 Bagel.col_session_id: session_id,
@@ -116,8 +122,16 @@ class PipelineTracker(BasePipelineWorkflow):
         )
         return status
 
+    def flush_bagel_records(self):
+        """Add the tracking results from run_single to the bagel."""
+        if len(self.bagel_records) > 0:
+            self.bagel = self.bagel.add_or_update_records(self.bagel_records)
+            self.bagel_records = []
+        return self.bagel
+
     def run_cleanup(self):
         """Save the bagel file."""
+        self.flush_bagel_records()
         self.logger.info(f"New/updated bagel shape: {self.bagel.shape}")
         self.save_tabular_file(self.bagel, self.layout.fpath_imaging_bagel)
         return super().run_cleanup()
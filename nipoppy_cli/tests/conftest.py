@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 import datetime
+import io
+import tarfile
+import zipfile
 from pathlib import Path
 from typing import Optional
 
@@ -257,6 +260,40 @@ def fake_dicoms_organized(
     )
 
 
+def make_archive(
+    fpath_archive: Path, contents: dict[str, bytes], dnames: Optional[list[str]] = None
+) -> Path:
+    """Create a zip or tar archive (compression depends on the suffix).
+
+    ``contents`` maps member names to file contents, and ``dnames`` are directory
+    members to add to the archive.
+    """
+    fpath_archive.parent.mkdir(parents=True, exist_ok=True)
+    dnames = dnames or []
+    if fpath_archive.suffix == ".zip":
+        with zipfile.ZipFile(fpath_archive, "w", zipfile.ZIP_DEFLATED) as file_zip:
+            for dname in dnames:
+                file_zip.writestr(f"{dname}/", b"")
+            for name, content in contents.items():
+                file_zip.writestr(name, content)
+        return fpath_archive
+
+    compression = {".gz": "gz", ".bz2": "bz2", ".xz": "xz"}.get(
+        fpath_archive.suffix, ""
+    )
+    with tarfile.open(fpath_archive, f"w:{compression}") as file_tar:
+        for dname in dnames:
+            info = tarfile.TarInfo(dname)
+            info.type = tarfile.DIRTYPE
+            file_tar.addfile(info)
+        for name, content in contents.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mtime = 1_000_000_000
+            file_tar.addfile(info, io.BytesIO(content))
+    return fpath_archive
+
+
 def prepare_dataset(
     participants_and_sessions_manifest: dict[str, list[str]],
     participants_and_sessions_downloaded: Optional[dict[str, list[str]]] = None,
@@ -348,3 +385,29 @@ def check_doughnut(
                         participant_id in participants_and_sessions_true
                         and session_id in participants_and_sessions_true[participant_id]
                     )
+
+
+def make_fake_submit_command(
+    dpath_bin: Path, command: str, job_ids: list[str], returncode: int = 0
+) -> Path:
+    """Create a stand-in for sbatch/qsub that does not submit anything.
+
+    Each call appends its arguments (one line per call) to ``<command>.calls``
+    in ``dpath_bin`` and prints the next job ID from ``job_ids``. ``dpath_bin``
+    should be prepended to PATH.
+    """
+    dpath_bin.mkdir(parents=True, exist_ok=True)
+    fpath_calls = dpath_bin / f"{command}.calls"
+    fpath_job_ids = dpath_bin / f"{command}.job_ids"
+    fpath_job_ids.write_text("".join(f"{job_id}\n" for job_id in job_ids))
+    fpath_command = dpath_bin / command
+    fpath_command.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> "{fpath_calls}"\n'
+        f'n_calls=$(wc -l < "{fpath_calls}")\n'
+        f'sed -n "${{n_calls}}p" "{fpath_job_ids}"\n'
+        f'[ {returncode} -eq 0 ] || echo "submission failed" >&2\n'
+        f"exit {returncode}\n"
+    )
+    fpath_command.chmod(0o755)
+    return fpath_calls
@@ -0,0 +1,134 @@
+"""Tests for reading files from archives."""
+
+import os
+import tarfile
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from nipoppy import archives
+from nipoppy.archives import (
+    archive_has_members,
+    is_archive,
+    iter_archive_files,
+    iter_archive_members,
+    list_archive_members,
+    write_archive_file,
+)
+
+from .conftest import make_archive
+
+CONTENTS = {
+    "P01/BL/series1/1.dcm": b"first",
+    "P01/BL/series2/2.dcm": b"second file",
+    "3.dcm": b"",
+}
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("P01.zip", True),
+        ("P01/BL.tar", True),
+        ("P01.TAR.GZ", True),
+        ("P01.tgz", True),
+        ("P01.tar.bz2", True),
+        ("P01.tar.xz", True),
+        (Path("P01.zip"), True),
+        ("P01", False),
+        ("P01.gz", False),
+        ("file.dcm", False),
+    ],
+)
+def test_is_archive(path, expected):
+    assert is_archive(path) == expected
+
+
+@pytest.mark.parametrize("fname", ["P01.zip", "P01.tar", "P01.tar.gz", "P01.tar.xz"])
+def test_iter_archive_members(fname: str, tmp_path: Path):
+    fpath_archive = make_archive(tmp_path / fname, CONTENTS, dnames=["P01", "P01/BL"])
+    members = list(iter_archive_members(fpath_archive))
+    assert [member.name for member in members] == list(CONTENTS)
+    assert [member.fname for member in members] == ["1.dcm", "2.dcm", "3.dcm"]
+    assert [member.size for member in members] == [
+        len(content) for content in CONTENTS.values()
+    ]
+
+
+def test_iter_archive_members_invalid_names(tmp_path: Path):
+    fpath_archive = make_archive(
+        tmp_path / "P01.tar", {"P01/..": b"", "P01/file.dcm": b"content"}
+    )
+    assert [member.name for member in iter_archive_members(fpath_archive)] == [
+        "P01/file.dcm"
+    ]
+
+
+def test_list_archive_members_cached(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    fpath_archive = make_archive(tmp_path / "P01.tar.gz", CONTENTS)
+    spy = mocker.spy(archives.tarfile, "open")
+
+    members = list_archive_members(fpath_archive)
+    assert list_archive_members(fpath_archive) == members
+    assert spy.call_count == 1
+
+    # modified archive is listed again
+    make_archive(fpath_archive, {"new.dcm": b"new"})
+    os.utime(fpath_archive, ns=(0, 0))
+    spy.reset_mock()
+    assert [member.name for member in list_archive_members(fpath_archive)] == [
+        "new.dcm"
+    ]
+    assert spy.call_count == 1
+
+
+@pytest.mark.parametrize("fname", ["P01.zip", "P01.tar.gz"])
+def test_archive_has_members(fname: str, tmp_path: Path):
+    assert archive_has_members(make_archive(tmp_path / fname, CONTENTS))
+    assert not archive_has_members(
+        make_archive(tmp_path / "empty" / fname, {}, dnames=["P01"])
+    )
+
+
+def test_archive_has_members_first_member_only(
+    tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    fpath_archive = make_archive(tmp_path / "P01.tar", CONTENTS)
+    spy = mocker.spy(tarfile.TarInfo, "fromtarfile")
+    assert archive_has_members(fpath_archive)
+    # only the first header is read
+    assert spy.call_count == 1
+
+
+@pytest.mark.parametrize("fname", ["P01.zip", "P01.tar.gz", "P01.tar"])
+def test_archive_has_members_invalid(fname: str, tmp_path: Path):
+    fpath_archive = tmp_path / fname
+    fpath_archive.write_bytes(b"not an archive" * 100)
+    assert not archive_has_members(fpath_archive)
+
+
+@pytest.mark.parametrize("fname", ["P01.zip", "P01.tar.bz2"])
+def test_iter_archive_files(fname: str, tmp_path: Path):
+    fpath_archive = make_archive(tmp_path / fname, CONTENTS)
+    dpath_dest = tmp_path / "dest"
+    dpath_dest.mkdir()
+
+    for member, file_member in iter_archive_files(fpath_archive):
+        fpath_dest = dpath_dest / member.fname
+        assert write_archive_file(file_member, member, fpath_dest) == member.size
+        assert fpath_dest.stat().st_mtime == pytest.approx(member.mtime)
+
+    assert {fpath.name: fpath.read_bytes() for fpath in dpath_dest.iterdir()} == {
+        name.split("/")[-1]: content for name, content in CONTENTS.items()
+    }
+
+
+def test_write_archive_file_exists(tmp_path: Path):
+    fpath_archive = make_archive(tmp_path / "P01.zip", CONTENTS)
+    fpath_dest = tmp_path / "1.dcm"
+    fpath_dest.write_bytes(b"existing")
+    member, file_member = next(iter_archive_files(fpath_archive))
+    with pytest.raises(FileExistsError):
+        write_archive_file(file_member, member, fpath_dest)
+    assert fpath_dest.read_bytes() == b"existing"
@@ -0,0 +1,208 @@
+"""Tests for the backup store."""
+
+import datetime
+from pathlib import Path
+
+import pytest
+
+from nipoppy.backups import (
+    BackupPolicy,
+    BackupStore,
+    apply_delta,
+    compute_delta,
+    get_dpath_backups,
+)
+
+
+def _make_content(n_rows: int, changed: dict = None) -> bytes:
+    changed = changed or {}
+    lines = ["participant_id,session_id,status\n"]
+    for i_row in range(n_rows):
+        lines.append(f"{i_row:03d},BL,{changed.get(i_row, 'FAIL')}\n")
+    return "".join(lines).encode()
+
+
+def _make_store(tmp_path: Path, contents: list[bytes], fname="test.csv"):
+    dpath_backups = tmp_path / ".tests"
+    dpath_backups.mkdir(exist_ok=True)
+    store = BackupStore(dpath_backups, fname)
+    stem, suffix = fname.split(".")
+    versions = []
+    for i_version, content in enumerate(contents):
+        version = f"{stem}-20240101_{i_version:04d}.{suffix}"
+        (dpath_backups / version).write_bytes(content)
+        versions.append(version)
+    return store, versions
+
+
+@pytest.mark.parametrize(
+    "fpath_symlink,dname_backups,expected",
+    [
+        ("my_dataset/doughnut.csv", None, "my_dataset/.doughnuts"),
+        ("bagel.parquet", None, ".bagels"),
+        ("my_dataset/doughnut.csv", "backups", "my_dataset/backups"),
+    ],
+)
+def test_get_dpath_backups(fpath_symlink, dname_backups, expected):
+    assert get_dpath_backups(fpath_symlink, dname_backups) == Path(expected)
+
+
+@pytest.mark.parametrize(
+    "content_old,content_new",
+    [
+        (_make_content(5), _make_content(5)),
+        (_make_content(5), _make_content(5, {1: "SUCCESS", 3: "SUCCESS"})),
+        (_make_content(5), _make_content(8)),
+        (_make_content(8), _make_content(5)),
+        (_make_content(0), _make_content(3)),
+        (b"", _make_content(3)),
+        (_make_content(3), b""),
+        (b"a,b\n1,2\n1,2\n3,4", b"a,b\n1,2\n3,4\n"),
+        (b"a\n\xe9\xff\n", b"a\n"),
+    ],
+)
+def test_compute_apply_delta(content_old: bytes, content_new: bytes):
+    delta = compute_delta(content_old, content_new)
+    assert delta is not None
+    assert apply_delta(content_new, delta) == content_old
+
+
+def test_compute_delta_reordered():
+    assert compute_delta(b"a\n1\n2\n", b"a\n2\n1\n") is None
+
+
+def test_compute_delta_small():
+    content_old = _make_content(100)
+    content_new = _make_content(100, {50: "SUCCESS"})
+    delta = compute_delta(content_old, content_new)
+    assert delta["removed"] == [51]
+    assert delta["inserted"] == [[51, "050,BL,FAIL\n"]]
+
+
+def test_add_version(tmp_path: Path):
+    contents = [_make_content(20, {i: "SUCCESS" for i in range(n)}) for n in range(7)]
+    store, versions = _make_store(tmp_path, contents[:1])
+    policy = BackupPolicy(snapshot_interval=3)
+
+    for i_version, content in enumerate(contents[1:], start=1):
+        version = f"test-20240101_{i_version:04d}.csv"
+        store.get_fpath(version).write_bytes(content)
+        store.add_version(version, policy)
+        versions.append(version)
+
+    assert store.get_versions() == versions
+    assert [store.is_snapshot(version) for version in versions] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+        True,
+    ]
+    for version, content in zip(versions, contents):
+        assert store.read(version) == content
+
+
+def test_add_version_interval_1(tmp_path: Path):
+    store, versions = _make_store(tmp_path, [_make_content(5), _make_content(6)])
+    store.add_version(versions[-1], BackupPolicy(snapshot_interval=1))
+    assert all(store.is_snapshot(version) for version in versions)
+
+
+def test_add_version_binary(tmp_path: Path):
+    store, versions = _make_store(
+        tmp_path, [_make_content(5), _make_content(6)], fname="test.parquet"
+    )
+    store.add_version(versions[-1], BackupPolicy(snapshot_interval=10))
+    assert all(store.is_snapshot(version) for version in versions)
+
+
+def test_add_version_large_delta(tmp_path: Path):
+    # completely different content: a delta would be bigger than the file
+    store, versions = _make_store(tmp_path, [b"a\n1\n2\n", b"b\n3\n4\n"])
+    store.add_version(versions[-1], BackupPolicy())
+    assert store.is_snapshot(versions[0])
+
+
+def test_detach(tmp_path: Path):
+    store, versions = _make_store(tmp_path, [_make_content(5), _make_content(6)])
+    store.add_version(versions[-1], BackupPolicy())
+    assert not store.is_snapshot(versions[0])
+
+    # overwrite the latest version
+    store.detach(versions[-1])
+    store.get_fpath(versions[-1]).write_bytes(_make_content(7))
+    assert store.is_snapshot(versions[0])
+    assert store.read(versions[0]) == _make_content(5)
+
+    # no error for a version that does not exist yet
+    store.detach("test-20250101_0000.csv")
+
+
+def test_read_not_found(tmp_path: Path):
+    store, _ = _make_store(tmp_path, [_make_content(5)])
+    with pytest.raises(FileNotFoundError, match="Version .* not found"):
+        store.read("test-20250101_0000.csv")
+
+
+def test_restore(tmp_path: Path):
+    store, versions = _make_store(tmp_path, [_make_content(5), _make_content(6)])
+    store.add_version(versions[-1], BackupPolicy())
+    fpath = store.restore(versions[0], tmp_path / "restored.csv")
+    assert fpath.read_bytes() == _make_content(5)
+
+
+@pytest.mark.parametrize(
+    "policy,n_kept",
+    [
+        (BackupPolicy(), 5),
+        (BackupPolicy(max_versions=2), 2),
+        (BackupPolicy(max_versions=10), 5),
+        (BackupPolicy(max_age_days=1), 1),
+        (BackupPolicy(max_age_days=1000), 5),
+    ],
+)
+def test_prune(policy: BackupPolicy, n_kept: int, tmp_path: Path):
+    contents = [_make_content(n) for n in range(5)]
+    store, versions = _make_store(tmp_path, contents)
+    for version in versions[1:]:
+        store.add_version(version, BackupPolicy(snapshot_interval=2))
+
+    deleted = store.prune(policy, now=datetime.datetime(2024, 1, 10))
+
+    assert deleted == versions[: len(versions) - n_kept]
+    assert store.get_versions() == versions[len(versions) - n_kept :]
+    for version, content in zip(versions, contents):
+        if version not in deleted:
+            assert store.read(version) == content
+
+
+def test_prune_unknown_timestamp(tmp_path: Path):
+    store, versions = _make_store(tmp_path, [_make_content(1), _make_content(2)])
+    store.get_fpath(versions[0]).rename(store.get_fpath("test-0_old.csv"))
+    assert store.prune(BackupPolicy(max_age_days=1)) == []
+
+
+@pytest.mark.parametrize("snapshot_interval,n_deltas", [(1, 0), (3, 5), (10, 7)])
+def test_compact(snapshot_interval, n_deltas, tmp_path: Path):
+    contents = [_make_content(10 + n) for n in range(8)]
+    store, versions = _make_store(tmp_path, contents)
+
+    assert store.compact(BackupPolicy(snapshot_interval=snapshot_interval)) == n_deltas
+    assert store.get_versions() == versions
+    assert sum(not store.is_snapshot(version) for version in versions) == n_deltas
+    assert store.is_snapshot(versions[-1])
+    for version, content in zip(versions, contents):
+        assert store.read(version) == content
+
+    # idempotent, and can go back to full snapshots
+    assert store.compact(BackupPolicy(snapshot_interval=snapshot_interval)) == n_deltas
+    assert store.compact(BackupPolicy(snapshot_interval=1)) == 0
+    for version, content in zip(versions, contents):
+        assert store.read(version) == content
+
+
+def test_compact_empty(tmp_path: Path):
+    store, _ = _make_store(tmp_path, [])
+    assert store.compact(BackupPolicy()) == 0
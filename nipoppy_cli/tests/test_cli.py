@@ -153,3 +153,35 @@ def test_cli_pipeline_track(tmp_path: Path):
         )
         == 1
     )
+
+
+def test_cli_compact(tmp_path: Path):
+    dpath_root = tmp_path / "my_dataset"
+    try:
+        cli(["nipoppy", "compact", "--dataset-root", str(dpath_root)])
+    except BaseException:
+        pass
+
+    # check that a logfile was created
+    assert (
+        len(list((dpath_root / ATTR_TO_DPATH_MAP["dpath_logs"]).glob("compact/*.log")))
+        == 1
+    )
+
+
+def test_cli_dicom_index(tmp_path: Path):
+    dpath_root = tmp_path / "my_dataset"
+    try:
+        cli(["nipoppy", "dicom-index", "--dataset-root", str(dpath_root), "--prune"])
+    except BaseException:
+        pass
+
+    # check that a logfile was created
+    assert (
+        len(
+            list(
+                (dpath_root / ATTR_TO_DPATH_MAP["dpath_logs"]).glob("dicom_index/*.log")
+            )
+        )
+        == 1
+    )
@@ -278,3 +278,17 @@ def test_set_container_env_vars(env_vars: dict):
     for key, value in env_vars.items():
         assert os.environ[f"SINGULARITYENV_{key}"] == value
         assert os.environ[f"APPTAINERENV_{key}"] == value
+
+
+def test_set_container_env_vars_env():
+    env = {}
+    set_container_env_vars({"VAR5": "value"}, env=env)
+    assert env == {"APPTAINERENV_VAR5": "value", "SINGULARITYENV_VAR5": "value"}
+    assert "APPTAINERENV_VAR5" not in os.environ
+
+
+def test_prepare_container_env():
+    env = {}
+    prepare_container(ContainerConfig(ENV_VARS={"VAR6": "value"}), check=False, env=env)
+    assert env["APPTAINERENV_VAR6"] == "value"
+    assert "APPTAINERENV_VAR6" not in os.environ
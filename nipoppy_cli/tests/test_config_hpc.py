@@ -0,0 +1,40 @@
+"""Tests for the HPC configuration model."""
+
+import pytest
+from pydantic import ValidationError
+
+from nipoppy.config.hpc import HpcConfig
+
+FIELDS_HPC = [
+    "QUEUE",
+    "ACCOUNT",
+    "MAX_CONCURRENT_TASKS",
+    "DEPENDENCIES",
+    "PARALLEL_ENVIRONMENT",
+    "ARGS",
+    "PREAMBLE",
+]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"QUEUE": "cpu", "ACCOUNT": "def-lab"},
+        {"MAX_CONCURRENT_TASKS": 10, "DEPENDENCIES": ["1234"]},
+        {"ARGS": ["--qos=normal"], "PREAMBLE": ["module load apptainer"]},
+    ],
+)
+def test_fields(data):
+    hpc_config = HpcConfig(**data)
+    for field in FIELDS_HPC:
+        assert hasattr(hpc_config, field)
+    assert len(set(hpc_config.model_dump())) == len(FIELDS_HPC)
+
+
+@pytest.mark.parametrize(
+    "data", [{"MAX_CONCURRENT_TASKS": 0}, {"not_a_field": "value"}]
+)
+def test_invalid(data):
+    with pytest.raises(ValidationError):
+        HpcConfig(**data)
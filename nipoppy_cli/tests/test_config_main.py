@@ -21,6 +21,7 @@ FIELDS_CONFIG = REQUIRED_FIELDS_CONFIG + [
     "BIDS_PIPELINES",
     "CUSTOM",
     "CONTAINER_CONFIG",
+    "HPC_CONFIG",
     "DICOM_DIR_MAP_FILE",
     "DICOM_DIR_PARTICIPANT_FIRST",
 ]
@@ -167,6 +167,19 @@ def test_get_descriptor_file(valid_data, step_name, descriptor_file):
     assert pipeline_config.get_descriptor_file(step_name) == descriptor_file
 
 
+@pytest.mark.parametrize("step_name,n_cpus", [("step1", 1), ("step2", 4), (None, 1)])
+def test_get_resources(valid_data, step_name, n_cpus):
+    pipeline_config = ProcPipelineConfig(
+        **valid_data,
+        STEPS=[
+            ProcPipelineStepConfig(NAME="step1"),
+            ProcPipelineStepConfig(NAME="step2", RESOURCES={"N_CPUS": 4}),
+        ],
+    )
+
+    assert pipeline_config.get_resources(step_name).N_CPUS == n_cpus
+
+
 # @pytest.mark.parametrize(
 #     "step_name,pybids_ignore_file",
 #     [("step1", Path("patterns1.json")), ("step2", Path("patterns2.json"))],
@@ -14,6 +14,7 @@ FIELDS_STEP_BASE = [
     "DESCRIPTOR_FILE",
     "INVOCATION_FILE",
     "CONTAINER_CONFIG",
+    "RESOURCES",
 ]
 
 FIELDS_STEP_PROC = FIELDS_STEP_BASE + ["PYBIDS_IGNORE_FILE"]
@@ -31,6 +32,7 @@ FIELDS_STEP_BIDS = FIELDS_STEP_BASE + ["UPDATE_DOUGHNUT"]
                 {"DESCRIPTOR_FILE": "PATH_TO_DESCRIPTOR_FILE"},
                 {"INVOCATION_FILE": "PATH_TO_INVOCATION_FILE"},
                 {"CONTAINER_CONFIG": {}},
+                {"RESOURCES": {"N_CPUS": 4, "MEMORY_GB": 8}},
             ],
         ),
         (
@@ -61,3 +63,11 @@ def test_field_base(step_class: type[BaseModel], fields, data_list):
 def test_no_extra_field(model_class):
     with pytest.raises(ValidationError, match="Extra inputs are not permitted"):
         model_class(not_a_field="a")
+
+
+@pytest.mark.parametrize(
+    "resources", [{"N_CPUS": 0}, {"MEMORY_GB": 0}, {"MEMORY_GB": -1}, {"GPUS": 1}]
+)
+def test_resources_invalid(resources):
+    with pytest.raises(ValidationError):
+        ProcPipelineStepConfig(RESOURCES=resources)
@@ -0,0 +1,176 @@
+"""Tests for in-process handling of Boutiques descriptors and invocations."""
+
+import json
+from collections import OrderedDict
+
+import pytest
+import pytest_mock
+from boutiques import bosh
+from boutiques.localExec import LocalExecutor
+from boutiques.validator import DescriptorValidationError
+
+from nipoppy import descriptor as descriptor_module
+from nipoppy.descriptor import CompiledDescriptor, get_compiled_descriptor
+from nipoppy.utils import DPATH_DESCRIPTORS, DPATH_INVOCATIONS
+
+DESCRIPTOR = {
+    "name": "dummy_pipeline",
+    "tool-version": "1.0.0",
+    "description": "A dummy pipeline for testing",
+    "schema-version": "0.5",
+    "command-line": "echo [NAME] [N_ITER] [VERBOSE]",
+    "inputs": [
+        {
+            "id": "name",
+            "name": "name",
+            "type": "String",
+            "command-line-flag": "--name",
+            "value-key": "[NAME]",
+        },
+        {
+            "id": "n_iter",
+            "name": "n_iter",
+            "type": "Number",
+            "integer": True,
+            "optional": True,
+            "default-value": 10,
+            "command-line-flag": "--n-iter",
+            "value-key": "[N_ITER]",
+        },
+        {
+            "id": "verbose",
+            "name": "verbose",
+            "type": "Flag",
+            "optional": True,
+            "command-line-flag": "-v",
+            "value-key": "[VERBOSE]",
+        },
+    ],
+    "environment-variables": [
+        {"name": "MY_NAME", "value": "[NAME]"},
+        {"name": "MY_CONSTANT", "value": "constant"},
+        {"name": "MY_VERBOSE", "value": "[VERBOSE]"},
+    ],
+}
+
+
+@pytest.fixture
+def compiled_descriptor() -> CompiledDescriptor:
+    return CompiledDescriptor(json.dumps(DESCRIPTOR))
+
+
+def test_invalid_descriptor():
+    with pytest.raises(DescriptorValidationError):
+        CompiledDescriptor(json.dumps({**DESCRIPTOR, "command-line": 123}))
+
+
+def test_validate_invocation(compiled_descriptor: CompiledDescriptor):
+    invocation = {"name": "my name"}
+    assert compiled_descriptor.validate_invocation(invocation) == {
+        "name": "my name",
+        "n_iter": 10,
+    }
+    # the original invocation is not modified
+    assert invocation == {"name": "my name"}
+
+
+@pytest.mark.parametrize(
+    "invocation",
+    [{}, {"name": "my name", "n_iter": 1.5}, {"name": "my name", "other": 1}],
+)
+def test_validate_invocation_invalid(
+    invocation: dict, compiled_descriptor: CompiledDescriptor
+):
+    with pytest.raises(ValueError, match="Invalid invocation"):
+        compiled_descriptor.validate_invocation(invocation)
+
+
+def test_get_command_line(compiled_descriptor: CompiledDescriptor):
+    invocation = compiled_descriptor.validate_invocation(
+        {"name": "my name", "verbose": True}
+    )
+    assert (
+        compiled_descriptor.get_command_line(invocation)
+        == "echo --name 'my name' --n-iter 10 -v"
+    )
+
+
+@pytest.mark.parametrize(
+    "fname_descriptor,fname_invocation",
+    [
+        ("mriqc-23.1.0.json", "mriqc-23.1.0.json"),
+        ("fmriprep-23.1.3.json", "fmriprep-23.1.3.json"),
+        ("heudiconv-0.12.2.json", "heudiconv-0.12.2-convert.json"),
+    ],
+)
+def test_get_command_line_same_as_bosh(fname_descriptor, fname_invocation):
+    descriptor_str = (DPATH_DESCRIPTORS / fname_descriptor).read_text()
+    invocation_str = (DPATH_INVOCATIONS / fname_invocation).read_text()
+    compiled_descriptor = CompiledDescriptor(descriptor_str)
+    invocation = compiled_descriptor.validate_invocation(json.loads(invocation_str))
+    expected = bosh(["exec", "simulate", "-i", invocation_str, descriptor_str])
+    assert compiled_descriptor.get_command_line(invocation) == expected.stdout
+
+
+def test_boutiques_private_api():
+    # get_command_line relies on a private method of Boutiques' LocalExecutor
+    assert hasattr(LocalExecutor, "_generateCmdLineFromInDict"), (
+        "LocalExecutor._generateCmdLineFromInDict is not available in this version"
+        " of Boutiques, CompiledDescriptor.get_command_line needs to be updated"
+    )
+
+
+def test_get_env_vars(compiled_descriptor: CompiledDescriptor):
+    assert compiled_descriptor.get_env_vars({"name": "my name", "verbose": True}) == {
+        "MY_NAME": "my name",
+        "MY_CONSTANT": "constant",
+        "MY_VERBOSE": "True",
+    }
+
+
+def test_get_env_vars_optional_input(compiled_descriptor: CompiledDescriptor):
+    # optional input without default value that is not in the invocation
+    invocation = compiled_descriptor.validate_invocation({"name": "my name"})
+    assert compiled_descriptor.get_env_vars(invocation) == {
+        "MY_NAME": "my name",
+        "MY_CONSTANT": "constant",
+    }
+
+
+def test_has_container_image():
+    assert not CompiledDescriptor(json.dumps(DESCRIPTOR)).has_container_image
+    assert CompiledDescriptor(
+        json.dumps(
+            {**DESCRIPTOR, "container-image": {"type": "docker", "image": "a/b"}}
+        )
+    ).has_container_image
+
+
+def test_get_compiled_descriptor_cache(mocker: pytest_mock.MockerFixture):
+    mocked_bosh = mocker.patch.object(descriptor_module, "bosh", wraps=bosh)
+    cache = OrderedDict()
+    descriptor_str = json.dumps(DESCRIPTOR)
+
+    compiled_descriptor = get_compiled_descriptor(descriptor_str, cache=cache)
+    # equal content (different string object) is not validated again
+    assert get_compiled_descriptor(json.dumps(DESCRIPTOR), cache=cache) is (
+        compiled_descriptor
+    )
+    assert mocked_bosh.call_count == 1
+
+    get_compiled_descriptor(json.dumps({**DESCRIPTOR, "name": "other"}), cache=cache)
+    assert mocked_bosh.call_count == 2
+    assert len(cache) == 2
+
+
+def test_get_compiled_descriptor_cache_size(mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(descriptor_module, "DESCRIPTOR_CACHE_SIZE", 2)
+    cache = OrderedDict()
+    descriptor_strs = [
+        json.dumps({**DESCRIPTOR, "name": f"pipeline{i}"}) for i in range(3)
+    ]
+    for descriptor_str in descriptor_strs:
+        get_compiled_descriptor(descriptor_str, cache=cache)
+    assert [
+        compiled_descriptor.descriptor_str for compiled_descriptor in cache.values()
+    ] == descriptor_strs[1:]
@@ -0,0 +1,153 @@
+"""Tests for the DICOM header index."""
+
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from nipoppy.dicom_index import (
+    DicomHeaderIndex,
+    DicomHeaderInfo,
+    get_file_stats,
+    probe_dicom_header,
+    read_dicom_header,
+)
+
+from .conftest import DPATH_TEST_DATA
+
+
+def _copy_dicoms(dpath: Path, n_copies: int = 2) -> list[Path]:
+    """Copy the test DICOM files and set their mtime to the past."""
+    fpaths = []
+    mtime = time.time() - 3600
+    for i_copy in range(n_copies):
+        for fname in ("dicom-derived.dcm", "dicom-not_derived.dcm"):
+            fpath = dpath / f"{i_copy}-{fname}"
+            shutil.copyfile(DPATH_TEST_DATA / fname, fpath)
+            os.utime(fpath, (mtime, mtime))
+            fpaths.append(fpath)
+    return fpaths
+
+
+@pytest.mark.parametrize(
+    "fname,image_type",
+    [
+        ("dicom-derived.dcm", ("DERIVED", "SECONDARY")),
+        ("dicom-not_derived.dcm", ("ORIGINAL", "PRIMARY", "M", "NONE")),
+    ],
+)
+def test_read_dicom_header(fname, image_type):
+    info = read_dicom_header(DPATH_TEST_DATA / fname)
+    assert info.image_type == image_type
+    assert info.is_derived == ("DERIVED" in image_type)
+    assert info.is_readable
+    assert info.sop_instance_uid is not None
+    assert info.series_instance_uid is not None
+
+
+def test_probe_dicom_header_error(tmp_path: Path):
+    fpath = tmp_path / "invalid.dcm"
+    fpath.write_text("not a DICOM file")
+    info = probe_dicom_header(fpath)
+    assert not info.is_readable
+    assert not info.is_derived
+    assert "InvalidDicomError" in info.error
+
+
+def test_index_get_set(tmp_path: Path):
+    fpaths = _copy_dicoms(tmp_path)
+    fpath_invalid = tmp_path / "invalid.dcm"
+    fpath_invalid.touch()
+    os.utime(fpath_invalid, (0, 0))
+    fpaths.append(fpath_invalid)
+
+    stats = get_file_stats(fpaths + [tmp_path / "missing.dcm"])
+    assert list(stats) == fpaths
+    infos = {fpath: probe_dicom_header(fpath) for fpath in fpaths}
+
+    fpath_index = tmp_path / "scratch" / "index.sqlite"
+    with DicomHeaderIndex(fpath_index) as index:
+        assert index.get_many(stats) == {}
+        assert index.set_many(stats, infos) == len(fpaths)
+
+    # persisted on disk
+    with DicomHeaderIndex(fpath_index) as index:
+        assert index.get_many(stats) == infos
+        assert index.get_stats() == {"n_entries": 5, "n_derived": 2, "n_unreadable": 1}
+
+        # changed files are not returned
+        stats_changed = dict(stats)
+        stats_changed[fpaths[0]] = (stats[fpaths[0]][0] + 1, stats[fpaths[0]][1])
+        stats_changed[fpaths[1]] = (stats[fpaths[1]][0], stats[fpaths[1]][1] + 1)
+        assert set(index.get_many(stats_changed)) == set(fpaths[2:])
+
+
+def test_index_relative_paths(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    fpath = _copy_dicoms(tmp_path, n_copies=1)[0]
+    stats = get_file_stats([fpath])
+    with DicomHeaderIndex(tmp_path / "index.sqlite") as index:
+        index.set_many(stats, {fpath: probe_dicom_header(fpath)})
+        monkeypatch.chdir(tmp_path)
+        fpath_relative = Path(fpath.name)
+        assert fpath_relative in index.get_many({fpath_relative: stats[fpath]})
+
+
+def test_index_skip_recent(tmp_path: Path):
+    fpath = tmp_path / "recent.dcm"
+    shutil.copyfile(DPATH_TEST_DATA / "dicom-derived.dcm", fpath)
+    stats = get_file_stats([fpath])
+    with DicomHeaderIndex(tmp_path / "index.sqlite") as index:
+        assert index.set_many(stats, {fpath: probe_dicom_header(fpath)}) == 0
+        assert index.get_many(stats) == {}
+
+
+def test_index_read_only(tmp_path: Path):
+    fpaths = _copy_dicoms(tmp_path, n_copies=1)
+    stats = get_file_stats(fpaths)
+    infos = {fpath: probe_dicom_header(fpath) for fpath in fpaths}
+    fpath_index = tmp_path / "index.sqlite"
+    with DicomHeaderIndex(fpath_index) as index:
+        index.set_many({fpaths[0]: stats[fpaths[0]]}, infos)
+
+    with DicomHeaderIndex(fpath_index, read_only=True) as index:
+        assert index.set_many(stats, infos) == 0
+        fpaths[0].unlink()
+        assert index.prune() == 1
+        assert index.get_stats()["n_entries"] == 1
+
+
+def test_index_read_only_missing(tmp_path: Path):
+    with pytest.raises(sqlite3.OperationalError):
+        DicomHeaderIndex(tmp_path / "index.sqlite", read_only=True)
+
+
+def test_index_schema_version(tmp_path: Path):
+    fpath_index = tmp_path / "index.sqlite"
+    connection = sqlite3.connect(fpath_index)
+    connection.execute("CREATE TABLE headers (path TEXT PRIMARY KEY, data TEXT)")
+    connection.execute("INSERT INTO headers VALUES ('/some/path', 'old')")
+    connection.commit()
+    connection.close()
+
+    # table from an older version is recreated
+    with DicomHeaderIndex(fpath_index) as index:
+        assert index.get_stats()["n_entries"] == 0
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_index_prune(n_jobs, tmp_path: Path):
+    fpaths = _copy_dicoms(tmp_path, n_copies=3)
+    stats = get_file_stats(fpaths)
+    with DicomHeaderIndex(tmp_path / "index.sqlite") as index:
+        index.set_many(stats, {fpath: DicomHeaderInfo() for fpath in fpaths})
+
+        fpaths[0].unlink()
+        os.utime(fpaths[1])
+        with fpaths[2].open("ab") as file_dicom:
+            file_dicom.write(b"\0")
+        assert index.prune(n_jobs=n_jobs) == 3
+        assert set(index.get_many(get_file_stats(fpaths))) == set(fpaths[3:])
+        assert index.prune(n_jobs=n_jobs) == 0
@@ -0,0 +1,141 @@
+"""Tests for running jobs in subprocesses."""
+
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from nipoppy import executor
+from nipoppy.executor import (
+    Job,
+    LocalExecutor,
+    get_available_cpus,
+    get_available_memory_gb,
+    get_max_concurrent_jobs,
+)
+
+
+def _make_job(name: str, code: str) -> Job:
+    return Job(name=name, args=[sys.executable, "-c", code])
+
+
+def test_get_available_cpus():
+    assert get_available_cpus() >= 1
+
+
+def test_get_available_cpus_no_affinity(mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(
+        executor.os, "sched_getaffinity", create=True, side_effect=AttributeError
+    )
+    mocker.patch.object(executor.os, "cpu_count", return_value=3)
+    assert get_available_cpus() == 3
+
+
+def test_get_available_memory_gb(monkeypatch: pytest.MonkeyPatch):
+    for var in ["SLURM_MEM_PER_NODE", "SLURM_MEM_PER_CPU"]:
+        monkeypatch.delenv(var, raising=False)
+    memory_gb = get_available_memory_gb()
+    assert memory_gb is None or memory_gb > 0
+
+
+@pytest.mark.parametrize(
+    "env,expected",
+    [
+        ({"SLURM_MEM_PER_NODE": "16384"}, 16),
+        ({"SLURM_MEM_PER_CPU": "2048", "SLURM_CPUS_ON_NODE": "4"}, 8),
+    ],
+)
+def test_get_available_memory_gb_slurm(env, expected, monkeypatch: pytest.MonkeyPatch):
+    for var, value in env.items():
+        monkeypatch.setenv(var, value)
+    assert get_available_memory_gb() == expected
+
+
+@pytest.mark.parametrize(
+    "n_jobs,n_cpus,memory_gb,n_cpus_available,memory_gb_available,expected",
+    [
+        (8, 1, None, 64, None, 8),
+        (8, 16, None, 64, None, 4),
+        (8, 4, 32, 64, 128, 4),
+        (8, 1, 16, 64, 100, 6),
+        (8, 128, None, 64, None, 1),
+        (8, 1, 256, 64, 128, 1),
+    ],
+)
+def test_get_max_concurrent_jobs(
+    n_jobs, n_cpus, memory_gb, n_cpus_available, memory_gb_available, expected
+):
+    assert (
+        get_max_concurrent_jobs(
+            n_jobs,
+            n_cpus=n_cpus,
+            memory_gb=memory_gb,
+            n_cpus_available=n_cpus_available,
+            memory_gb_available=memory_gb_available,
+        )
+        == expected
+    )
+
+
+def test_get_max_concurrent_jobs_unknown_memory(mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(executor, "get_available_memory_gb", return_value=None)
+    assert get_max_concurrent_jobs(4, memory_gb=1000, n_cpus_available=8) == 4
+
+
+def test_get_max_concurrent_jobs_invalid():
+    with pytest.raises(ValueError, match="Number of jobs must be a positive integer"):
+        get_max_concurrent_jobs(0)
+
+
+def test_executor_budget_warning(
+    mocker: pytest_mock.MockerFixture, caplog: pytest.LogCaptureFixture
+):
+    mocker.patch.object(executor, "get_available_cpus", return_value=8)
+    local_executor = LocalExecutor(n_jobs=4, n_cpus=4)
+    assert local_executor.n_concurrent == 2
+    assert "Running at most 2 jobs at the same time instead of 4" in caplog.text
+
+
+def test_executor_run(caplog: pytest.LogCaptureFixture):
+    jobs = [
+        _make_job("job0", "pass"),
+        _make_job("job1", "import sys; print('error message', file=sys.stderr); 1/0"),
+        _make_job("job2", "import sys; sys.exit(3)"),
+    ]
+    assert LocalExecutor(n_jobs=2).run(jobs) == [0, 1, 3]
+    assert "Job for job0 finished" in caplog.text
+    assert "Job for job1 failed with exit code 1" in caplog.text
+    assert "[JOB STDERR] error message" in caplog.text
+    assert "[JOB STDERR] ZeroDivisionError" in caplog.text
+    assert "Job for job2 failed with exit code 3" in caplog.text
+
+
+def test_executor_run_concurrently(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(executor, "get_available_cpus", return_value=4)
+    # each job waits until all the jobs have started
+    n_jobs = 3
+    code = (
+        "import pathlib, sys, time\n"
+        f"dpath = pathlib.Path({str(tmp_path)!r})\n"
+        "(dpath / sys.argv[1]).touch()\n"
+        "for _ in range(200):\n"
+        f"    if len(list(dpath.iterdir())) == {n_jobs}:\n"
+        "        sys.exit(0)\n"
+        "    time.sleep(0.05)\n"
+        "sys.exit(1)\n"
+    )
+    jobs = [
+        Job(name=str(i_job), args=[sys.executable, "-c", code, str(i_job)])
+        for i_job in range(n_jobs)
+    ]
+    assert LocalExecutor(n_jobs=n_jobs).run(jobs) == [0] * n_jobs
+
+
+def test_executor_run_environment_isolated(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("NIPOPPY_TEST_VAR", "parent")
+    job = _make_job(
+        "job",
+        "import os, sys; sys.exit(os.environ['NIPOPPY_TEST_VAR'] != 'parent')",
+    )
+    assert LocalExecutor().run([job]) == [0]
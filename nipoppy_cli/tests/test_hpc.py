@@ -0,0 +1,226 @@
+"""Tests for submitting jobs to HPC schedulers."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from nipoppy.config.hpc import HpcConfig
+from nipoppy.config.pipeline_step import ResourcesConfig
+from nipoppy.hpc import SgeScheduler, SlurmScheduler, get_memory_mb, get_scheduler
+
+from .conftest import make_fake_submit_command
+
+TASK_ARGS = {
+    "--participant-id": ["01", "02", "with space"],
+    "--session-id": ["BL", "M12", "BL"],
+}
+
+
+def test_get_memory_mb():
+    assert get_memory_mb(8) == 8192
+    assert get_memory_mb(0.5) == 512
+    assert get_memory_mb(0.0001) == 1
+
+
+@pytest.mark.parametrize(
+    "name,scheduler_class", [("slurm", SlurmScheduler), ("sge", SgeScheduler)]
+)
+def test_get_scheduler(name, scheduler_class):
+    hpc_config = HpcConfig(QUEUE="queue")
+    scheduler = get_scheduler(name, hpc_config)
+    assert isinstance(scheduler, scheduler_class)
+    assert scheduler.hpc_config is hpc_config
+
+
+def test_get_scheduler_invalid():
+    with pytest.raises(ValueError, match="Invalid HPC scheduler"):
+        get_scheduler("pbs")
+
+
+def test_slurm_directives():
+    scheduler = SlurmScheduler(
+        HpcConfig(
+            QUEUE="cpu",
+            ACCOUNT="def-lab",
+            MAX_CONCURRENT_TASKS=10,
+            DEPENDENCIES=["100", "101"],
+        )
+    )
+    directives = scheduler.get_directives(
+        "my_job",
+        Path("/logs"),
+        ResourcesConfig(N_CPUS=4, MEMORY_GB=8, WALLTIME="12:00:00"),
+        n_tasks=50,
+        dependencies=["102"],
+    )
+    assert directives == [
+        "--job-name=my_job",
+        "--output=/logs/%x-%A_%a.out",
+        "--cpus-per-task=4",
+        "--array=1-50%10",
+        "--mem=8192M",
+        "--time=12:00:00",
+        "--partition=cpu",
+        "--account=def-lab",
+        "--dependency=afterok:100:101,afterany:102",
+    ]
+
+
+def test_slurm_directives_defaults():
+    assert SlurmScheduler().get_directives(
+        "my_job", Path("/logs"), ResourcesConfig()
+    ) == ["--job-name=my_job", "--output=/logs/%x-%j.out", "--cpus-per-task=1"]
+
+
+def test_sge_directives():
+    scheduler = SgeScheduler(
+        HpcConfig(
+            QUEUE="all.q",
+            ACCOUNT="lab",
+            MAX_CONCURRENT_TASKS=10,
+            DEPENDENCIES=["100"],
+            PARALLEL_ENVIRONMENT="threads",
+        )
+    )
+    directives = scheduler.get_directives(
+        "my_job",
+        Path("/logs"),
+        ResourcesConfig(N_CPUS=4, MEMORY_GB=8, WALLTIME="12:00:00"),
+        n_tasks=50,
+        dependencies=["102"],
+    )
+    assert directives == [
+        "-N my_job",
+        "-S /bin/bash",
+        "-o /logs/$JOB_NAME-$JOB_ID.$TASK_ID.out",
+        "-j y",
+        "-t 1-50",
+        "-tc 10",
+        "-pe threads 4",
+        # per slot
+        "-l h_vmem=2048M",
+        "-l h_rt=12:00:00",
+        "-q all.q",
+        "-P lab",
+        "-hold_jid 100,102",
+    ]
+
+
+def test_sge_directives_defaults():
+    assert SgeScheduler().get_directives(
+        "my_job", Path("/logs"), ResourcesConfig()
+    ) == ["-N my_job", "-S /bin/bash", "-o /logs/$JOB_NAME-$JOB_ID.out", "-j y"]
+
+
+@pytest.mark.parametrize("scheduler_class", [SlurmScheduler, SgeScheduler])
+def test_generate_script(scheduler_class):
+    scheduler = scheduler_class(
+        HpcConfig(ARGS=["--extra-option"], PREAMBLE=["module load apptainer"])
+    )
+    script = scheduler.generate_script(
+        "my_job",
+        Path("/logs"),
+        ResourcesConfig(),
+        args=["nipoppy", "run", "--pipeline", "my pipeline"],
+        task_args=TASK_ARGS,
+    )
+    lines = script.splitlines()
+    assert lines[0] == "#!/bin/bash"
+    assert f"{scheduler.directive_prefix} --extra-option" in lines
+    assert "module load apptainer" in lines
+    assert lines[-1].startswith("exec nipoppy run --pipeline 'my pipeline'")
+    # the values of all tasks are in the script
+    assert "  'with space'" in lines
+    assert "  M12" in lines
+
+
+@pytest.mark.parametrize("scheduler_class", [SlurmScheduler, SgeScheduler])
+@pytest.mark.parametrize("task_id", [1, 2, 3])
+def test_generate_script_run_task(scheduler_class, task_id, tmp_path: Path):
+    # run the script for one task, with a command that prints its arguments
+    script = scheduler_class().generate_script(
+        "my_job",
+        tmp_path,
+        ResourcesConfig(),
+        args=[sys.executable, "-c", "import sys; print(sys.argv[1:])"],
+        task_args=TASK_ARGS,
+    )
+    fpath_script = tmp_path / "job.sh"
+    fpath_script.write_text(script)
+    output = subprocess.run(
+        ["bash", str(fpath_script)],
+        env={**os.environ, scheduler_class.var_task_id: str(task_id)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    i_task = task_id - 1
+    assert output.strip() == str(
+        [
+            "--participant-id",
+            TASK_ARGS["--participant-id"][i_task],
+            "--session-id",
+            TASK_ARGS["--session-id"][i_task],
+        ]
+    )
+
+
+def test_generate_script_not_array():
+    script = SlurmScheduler().generate_script(
+        "my_job", Path("/logs"), ResourcesConfig(), args=["nipoppy", "doughnut"]
+    )
+    assert "--array" not in script
+    assert "TASK_VALUES" not in script
+    assert script.splitlines()[-1] == "exec nipoppy doughnut"
+
+
+def test_generate_script_invalid_task_args():
+    with pytest.raises(ValueError, match="same number of values"):
+        SlurmScheduler().generate_script(
+            "my_job",
+            Path("/logs"),
+            ResourcesConfig(),
+            args=["nipoppy"],
+            task_args={"--participant-id": ["01", "02"], "--session-id": ["BL"]},
+        )
+
+
+@pytest.mark.parametrize(
+    "scheduler_class,output,expected_args",
+    [
+        (SlurmScheduler, "1234;cluster", ["--parsable"]),
+        (SgeScheduler, "1234.1-3:1", ["-terse"]),
+    ],
+)
+def test_submit(
+    scheduler_class,
+    output: str,
+    expected_args: list[str],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    dpath_bin = tmp_path / "bin"
+    fpath_calls = make_fake_submit_command(
+        dpath_bin, scheduler_class.submit_command, [output]
+    )
+    monkeypatch.setenv("PATH", f"{dpath_bin}{os.pathsep}{os.environ['PATH']}")
+
+    assert scheduler_class().submit(tmp_path / "job.sh") == "1234"
+    assert fpath_calls.read_text().split() == expected_args + [str(tmp_path / "job.sh")]
+
+
+def test_submit_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    dpath_bin = tmp_path / "bin"
+    make_fake_submit_command(dpath_bin, "sbatch", [""], returncode=1)
+    monkeypatch.setenv("PATH", f"{dpath_bin}{os.pathsep}{os.environ['PATH']}")
+    with pytest.raises(RuntimeError, match="submission failed"):
+        SlurmScheduler().submit(tmp_path / "job.sh")
+
+
+def test_submit_command_not_found(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    with pytest.raises(RuntimeError, match="command not found: qsub"):
+        SgeScheduler().submit(tmp_path / "job.sh")
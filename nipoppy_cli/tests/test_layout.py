@@ -6,7 +6,7 @@ from pathlib import Path
 import pytest
 from pydantic import ValidationError
 
-from nipoppy.layout import DatasetLayout, PathInfo
+from nipoppy.layout import DatasetLayout, PathInfo, TabularFpathInfo
 from nipoppy.utils import DPATH_LAYOUTS, FPATH_DEFAULT_LAYOUT
 
 from .conftest import (
@@ -186,6 +186,29 @@ def test_validate_error(dpath_root: Path, paths_to_delete: list[str]):
         layout.validate()
 
 
+@pytest.mark.parametrize(
+    "path_label,expected",
+    [
+        ("fpath_manifest", True),
+        ("fpath_doughnut", True),
+        ("fpath_imaging_bagel", True),
+        ("fpath_config", False),
+        ("dpath_bids", False),
+    ],
+)
+def test_get_tabular_fpath_info(path_label, expected):
+    layout = DatasetLayout("my_dataset")
+    path_info = layout.get_tabular_fpath_info(getattr(layout, path_label))
+    if expected:
+        assert isinstance(path_info, TabularFpathInfo)
+        assert path_info is layout.config.get_path_info(path_label)
+        assert path_info.format is None
+        assert not path_info.export_csv
+        assert path_info.backups is None
+    else:
+        assert path_info is None
+
+
 @pytest.mark.parametrize(
     "pipeline_name,pipeline_version,expected",
     [
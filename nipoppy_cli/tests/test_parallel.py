@@ -0,0 +1,171 @@
+"""Tests for the concurrency utilities."""
+
+import logging
+import threading
+import time
+
+import pytest
+
+from nipoppy.parallel import (
+    MAX_PENDING_PER_JOB,
+    ProgressLogger,
+    check_n_jobs,
+    iter_batches,
+    parallel_map,
+    prefetch,
+)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 8])
+def test_check_n_jobs(n_jobs):
+    assert check_n_jobs(n_jobs) == n_jobs
+
+
+@pytest.mark.parametrize("n_jobs", [0, -1, 1.5, "2", True])
+def test_check_n_jobs_invalid(n_jobs):
+    with pytest.raises(ValueError, match="Number of jobs must be a positive integer"):
+        check_n_jobs(n_jobs)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2, 5])
+def test_parallel_map_order(n_jobs):
+    def func(item):
+        # later items finish first
+        time.sleep(0.001 * (10 - item))
+        return item**2
+
+    assert parallel_map(func, range(10), n_jobs=n_jobs) == [
+        item**2 for item in range(10)
+    ]
+
+
+def test_parallel_map_concurrency_limit():
+    n_jobs = 3
+    lock = threading.Lock()
+    n_running = 0
+    max_running = 0
+    n_submitted = 0
+
+    def items():
+        nonlocal n_submitted
+        for item in range(30):
+            n_submitted += 1
+            yield item
+
+    def func(item):
+        nonlocal n_running, max_running
+        with lock:
+            n_running += 1
+            max_running = max(max_running, n_running)
+            # generator is consumed lazily
+            assert n_submitted - item <= MAX_PENDING_PER_JOB * n_jobs
+        time.sleep(0.005)
+        with lock:
+            n_running -= 1
+        return item
+
+    assert parallel_map(func, items(), n_jobs=n_jobs) == list(range(30))
+    assert 1 < max_running <= n_jobs
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_parallel_map_error(n_jobs):
+    def func(item):
+        if item == 3:
+            raise RuntimeError("Bad item")
+        return item
+
+    with pytest.raises(RuntimeError, match="Bad item"):
+        parallel_map(func, range(10), n_jobs=n_jobs)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_parallel_map_progress(n_jobs):
+    progress = ProgressLogger(n_total=10)
+    parallel_map(lambda item: item, range(10), n_jobs=n_jobs, progress=progress)
+    assert progress.n_done == 10
+
+
+def test_parallel_map_empty():
+    assert parallel_map(lambda item: item, [], n_jobs=4) == []
+
+
+@pytest.mark.parametrize(
+    "n_total,expected",
+    [(None, "Processed 3 directories in"), (10, "Processed 3/10 directories in")],
+)
+def test_progress_logger_message(n_total, expected):
+    progress = ProgressLogger(n_total=n_total, description="directories")
+    progress.update(3)
+    message = progress.get_message()
+    assert message.startswith(expected)
+    assert message.endswith("directories/s)")
+
+
+@pytest.mark.parametrize("log_interval,n_messages", [(0, 3), (3600, 0)])
+def test_progress_logger_interval(
+    log_interval, n_messages, caplog: pytest.LogCaptureFixture
+):
+    progress = ProgressLogger(
+        n_total=3, logger=logging.getLogger("test"), log_interval=log_interval
+    )
+    with caplog.at_level(logging.INFO):
+        for _ in range(3):
+            progress.update()
+    assert len(caplog.records) == n_messages
+
+
+@pytest.mark.parametrize(
+    "n_items,batch_size,expected",
+    [(5, 2, [[0, 1], [2, 3], [4]]), (4, 2, [[0, 1], [2, 3]]), (0, 3, [])],
+)
+def test_iter_batches(n_items, batch_size, expected):
+    assert list(iter_batches(iter(range(n_items)), batch_size)) == expected
+
+
+def test_prefetch():
+    n_produced = 0
+
+    def items():
+        nonlocal n_produced
+        for item in range(20):
+            n_produced += 1
+            yield item
+
+    consumed = []
+    for item in prefetch(items(), max_pending=3):
+        consumed.append(item)
+        time.sleep(0.001)
+        # at most max_pending items in the queue and one waiting to be put
+        assert n_produced - len(consumed) <= 4
+    assert consumed == list(range(20))
+
+
+def test_prefetch_error():
+    def items():
+        yield 1
+        raise RuntimeError("Bad item")
+
+    consumed = []
+    with pytest.raises(RuntimeError, match="Bad item"):
+        for item in prefetch(items()):
+            consumed.append(item)
+    assert consumed == [1]
+
+
+def test_prefetch_stop_early():
+    n_produced = 0
+
+    def items():
+        nonlocal n_produced
+        for item in range(1000):
+            n_produced += 1
+            yield item
+
+    n_threads = threading.active_count()
+    for item in prefetch(items(), max_pending=2):
+        if item == 2:
+            break
+    # background thread stopped
+    assert threading.active_count() == n_threads
+    assert n_produced < 10
@@ -7,12 +7,15 @@ import pytest
 from nipoppy.cli.parser import (
     add_arg_dataset_root,
     add_arg_dry_run,
+    add_arg_n_jobs,
     add_arg_pipeline_step,
     add_arg_simulate,
     add_arg_verbosity,
     add_args_participant_and_session,
     add_args_pipeline,
     add_subparser_bids_conversion,
+    add_subparser_compact,
+    add_subparser_dicom_index,
     add_subparser_dicom_reorg,
     add_subparser_doughnut,
     add_subparser_init,
@@ -75,6 +78,22 @@ def test_add_arg_dry_run():
     assert parser.parse_args(["--dry-run"])
 
 
+def test_add_arg_n_jobs():
+    parser = ArgumentParser()
+    parser = add_arg_n_jobs(parser)
+    assert parser.parse_args([]).n_jobs == 1
+    assert parser.parse_args(["--n-jobs", "4"]).n_jobs == 4
+
+
+@pytest.mark.parametrize("n_jobs", ["0", "-1", "x"])
+def test_add_arg_n_jobs_invalid(n_jobs):
+    parser = ArgumentParser()
+    parser = add_arg_n_jobs(parser)
+    with pytest.raises(SystemExit) as exception:
+        parser.parse_args(["--n-jobs", n_jobs])
+    assert exception.value.code != 0, "Parsing of invalid argument should fail."
+
+
 @pytest.mark.parametrize("verbosity", ["2", "3"])
 def test_add_arg_verbosity(verbosity):
     parser = ArgumentParser()
@@ -105,6 +124,18 @@ def test_add_subparser_init():
         ["--dataset-root", "my_dataset", "--empty"],
         ["--dataset-root", "my_dataset", "--regenerate"],
         ["--dataset-root", "my_dataset", "--empty", "--regenerate"],
+        ["--dataset-root", "my_dataset", "--n-jobs", "8"],
+        ["--dataset-root", "my_dataset", "--refresh"],
+        ["--dataset-root", "my_dataset", "--watch"],
+        [
+            "--dataset-root",
+            "my_dataset",
+            "--watch",
+            "--debounce",
+            "0.5",
+            "--poll-interval",
+            "300",
+        ],
     ],
 )
 def test_add_subparser_doughnut(args):
@@ -114,12 +145,31 @@ def test_add_subparser_doughnut(args):
     assert parser.parse_args(["doughnut"] + args)
 
 
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--debounce", "0"],
+        ["--poll-interval", "-1"],
+        ["--poll-interval", "x"],
+    ],
+)
+def test_add_subparser_doughnut_invalid(args):
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers()
+    add_subparser_doughnut(subparsers)
+    with pytest.raises(SystemExit) as exception:
+        parser.parse_args(["doughnut", "--dataset-root", "my_dataset"] + args)
+    assert exception.value.code != 0, "Parsing of invalid argument should fail."
+
+
 @pytest.mark.parametrize(
     "args",
     [
         ["--dataset-root", "my_dataset"],
         ["--dataset-root", "my_dataset", "--copy-files"],
         ["--dataset-root", "my_dataset", "--check-dicoms"],
+        ["--dataset-root", "my_dataset", "--n-jobs", "4"],
+        ["--dataset-root", "my_dataset", "--transfer-mode", "hardlink"],
     ],
 )
 def test_add_subparser_dicom_reorg(args):
@@ -129,6 +179,22 @@ def test_add_subparser_dicom_reorg(args):
     assert parser.parse_args(["reorg"] + args)
 
 
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--transfer-mode", "teleport"],
+        ["--transfer-mode", "move", "--copy-files"],
+    ],
+)
+def test_add_subparser_dicom_reorg_invalid(args):
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers()
+    add_subparser_dicom_reorg(subparsers)
+    with pytest.raises(SystemExit) as exception:
+        parser.parse_args(["reorg", "--dataset-root", "my_dataset"] + args)
+    assert exception.value.code != 0, "Parsing of invalid argument should fail."
+
+
 @pytest.mark.parametrize(
     "args",
     [
@@ -142,6 +208,16 @@ def test_add_subparser_dicom_reorg(args):
             "--pipeline-step",
             "step1",
         ],
+        [
+            "--dataset-root",
+            "my_dataset",
+            "--pipeline",
+            "pipeline1",
+            "--n-jobs",
+            "4",
+            "--no-update-doughnut",
+        ],
+        ["--dataset-root", "my_dataset", "--pipeline", "pipeline1", "--hpc", "sge"],
     ],
 )
 def test_add_subparser_bids_conversion(args):
@@ -192,6 +268,18 @@ def test_add_subparser_bids_conversion(args):
             "--session-id",
             "BL",
         ],
+        ["--dataset-root", "my_dataset", "--pipeline", "pipeline1", "--n-jobs", "8"],
+        ["--dataset-root", "my_dataset", "--pipeline", "pipeline1", "--hpc", "slurm"],
+        [
+            "--dataset-root",
+            "my_dataset",
+            "--pipeline",
+            "pipeline1",
+            "--worker",
+            "--walltime",
+            "12:00:00",
+            "--reset-work-list",
+        ],
     ],
 )
 def test_add_subparser_pipeline_run(args):
@@ -201,6 +289,18 @@ def test_add_subparser_pipeline_run(args):
     assert parser.parse_args(["run"] + args)
 
 
+@pytest.mark.parametrize("args", [["--hpc", "pbs"], ["--worker", "--walltime", "12h"]])
+def test_add_subparser_pipeline_run_invalid(args):
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers()
+    add_subparser_pipeline_run(subparsers)
+    with pytest.raises(SystemExit) as exception:
+        parser.parse_args(
+            ["run", "--dataset-root", "my_dataset", "--pipeline", "p"] + args
+        )
+    assert exception.value.code != 0, "Parsing of invalid argument should fail."
+
+
 @pytest.mark.parametrize(
     "args",
     [
@@ -222,6 +322,27 @@ def test_add_subparser_pipeline_track(args):
     assert parser.parse_args(["track"] + args)
 
 
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--dataset-root", "my_dataset"],
+        ["--dataset-root", "my_dataset", "--prune", "--n-jobs", "4"],
+    ],
+)
+def test_add_subparser_dicom_index(args):
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers()
+    add_subparser_dicom_index(subparsers)
+    assert parser.parse_args(["dicom-index"] + args)
+
+
+def test_add_subparser_compact():
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers()
+    add_subparser_compact(subparsers)
+    assert parser.parse_args(["compact", "--dataset-root", "my_dataset"])
+
+
 @pytest.mark.parametrize(
     "args",
     [
@@ -230,9 +351,11 @@ def test_add_subparser_pipeline_track(args):
         ["init", "--dataset-root", "my_dataset"],
         ["doughnut", "--dataset-root", "my_dataset", "--regenerate"],
         ["reorg", "--dataset-root", "my_dataset", "--copy-files"],
+        ["dicom-index", "--dataset-root", "my_dataset", "--prune"],
         ["bidsify", "--dataset-root", "my_dataset", "--pipeline", "a_bids_pipeline"],
         ["run", "--dataset-root", "my_dataset", "--pipeline", "a_pipeline"],
         ["track", "--dataset-root", "my_dataset", "--pipeline", "another_pipeline"],
+        ["compact", "--dataset-root", "my_dataset"],
     ],
 )
 def test_global_parser(args: list[str]):
@@ -1,5 +1,6 @@
 """Tests for the bagel."""
 
+import pandas as pd
 import pytest
 from pydantic import ValidationError
 
@@ -85,6 +86,71 @@ def test_model_status_invalid():
         )
 
 
+@pytest.mark.parametrize(
+    "data,is_valid",
+    [
+        (
+            [
+                ["01", None, "1", "pipeline1", "1.0", Bagel.status_success],
+                ["02", "sub-02", "1", "pipeline1", "1.0", Bagel.status_fail],
+            ],
+            True,
+        ),
+        ([["01", None, "1", "pipeline1", "1.0", "BAD_STATUS"]], False),
+        ([["sub-01", None, "1", "pipeline1", "1.0", Bagel.status_success]], False),
+        ([["01", None, "ses-1", "pipeline1", "1.0", Bagel.status_success]], False),
+    ],
+)
+def test_validate_columnar(data, is_valid):
+    bagel = Bagel(
+        data,
+        columns=[
+            Bagel.col_participant_id,
+            Bagel.col_bids_participant,
+            Bagel.col_session_id,
+            Bagel.col_pipeline_name,
+            Bagel.col_pipeline_version,
+            Bagel.col_pipeline_complete,
+        ],
+    )
+    if is_valid:
+        pd.testing.assert_frame_equal(
+            bagel.validate(columnar=True), bagel.validate(columnar=False)
+        )
+    else:
+        for columnar in (True, False):
+            with pytest.raises(ValueError, match="Error when validating"):
+                bagel.validate(columnar=columnar)
+
+
+@pytest.mark.parametrize("i_col", [0, 2])
+def test_validate_columnar_error_non_str_ids(i_col):
+    data = [
+        ["01", None, "1", "pipeline1", "1.0", Bagel.status_success],
+        ["02", None, "1", "pipeline1", "1.0", Bagel.status_success],
+    ]
+    # whole participant/session ID column without any string value
+    for i_row, row in enumerate(data):
+        row[i_col] = i_row + 1
+    bagel = Bagel(
+        data,
+        columns=[
+            Bagel.col_participant_id,
+            Bagel.col_bids_participant,
+            Bagel.col_session_id,
+            Bagel.col_pipeline_name,
+            Bagel.col_pipeline_version,
+            Bagel.col_pipeline_complete,
+        ],
+    )
+    error_messages = []
+    for columnar in (True, False):
+        with pytest.raises(ValueError, match="Error when validating") as exc_info:
+            bagel.validate(columnar=columnar)
+        error_messages.append(str(exc_info.value))
+    assert error_messages[0] == error_messages[1]
+
+
 @pytest.mark.parametrize(
     "data_orig,data_new,data_expected",
     [
@@ -252,8 +318,9 @@ def test_add_or_update_records(data_orig, data_new, data_expected):
         ),
     ],
 )
+@pytest.mark.parametrize("compact", [False, True])
 def test_get_completed_participants_sessions(
-    data, pipeline_name, pipeline_version, participant_id, session_id, expected
+    data, pipeline_name, pipeline_version, participant_id, session_id, expected, compact
 ):
     bagel = Bagel(
         data,
@@ -265,6 +332,8 @@ def test_get_completed_participants_sessions(
             Bagel.col_pipeline_complete,
         ],
     ).validate()
+    if compact:
+        bagel = bagel.compact()
 
     assert [
         tuple(x)
@@ -275,3 +344,19 @@ def test_get_completed_participants_sessions(
             session_id=session_id,
         )
     ] == expected
+
+
+def test_compact():
+    bagel = Bagel(
+        data={
+            Bagel.col_participant_id: ["01", "01"],
+            Bagel.col_session_id: ["1", "2"],
+            Bagel.col_pipeline_name: ["my_pipeline", "my_pipeline"],
+            Bagel.col_pipeline_version: ["1.0", "1.0"],
+            Bagel.col_pipeline_complete: [Bagel.status_success, Bagel.status_fail],
+        }
+    ).validate()
+    bagel_compact = bagel.compact()
+    for col in Bagel.column_dtypes:
+        assert isinstance(bagel_compact[col].dtype, pd.CategoricalDtype)
+    assert bagel_compact.equals(bagel)
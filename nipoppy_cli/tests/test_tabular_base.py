@@ -1,13 +1,19 @@
 """Tests for the tabular module."""
 
+import datetime
+import sys
 from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional
 
 import pandas as pd
 import pytest
+import pytest_mock
+from pydantic import field_validator
 
+from nipoppy.backups import BackupPolicy, BackupStore
 from nipoppy.tabular.base import BaseTabular, BaseTabularModel
+from nipoppy.utils import load_json
 
 from .conftest import DPATH_TEST_DATA
 
@@ -26,6 +32,39 @@ class TabularWithModel(BaseTabular):
     index_cols = ["b"]
 
 
+class TabularWithModelBool(BaseTabular):
+    class _Model(BaseTabularModel):
+        a: str
+        flag: bool
+        d: Optional[str] = "default"
+
+    model: BaseTabularModel = _Model
+    index_cols = ["a"]
+
+
+class TabularWithCustomValidator(BaseTabular):
+    class _Model(BaseTabularModel):
+        a: str
+
+        @field_validator("a")
+        @classmethod
+        def check_a(cls, value):
+            return value.upper()
+
+    model: BaseTabularModel = _Model
+
+
+class TabularWithColumnDtypes(BaseTabular):
+    class _Model(BaseTabularModel):
+        a: str
+        flag: bool
+        d: Optional[str] = None
+
+    model: BaseTabularModel = _Model
+    index_cols = ["a"]
+    column_dtypes = {"a": "category", "flag": "bool", "d": "str"}
+
+
 class TabularWithModelNoList(BaseTabular):
     class _Model(BaseTabularModel):
         a: str
@@ -71,14 +110,83 @@ def test_load_error(dtype):
         ([{"a": "A", "b": "b"}], False),
     ],
 )
-def test_validate(data, is_valid):
+@pytest.mark.parametrize("columnar", [True, False])
+def test_validate(data, is_valid, columnar):
     tabular = TabularWithModel(data)
     with (
         pytest.raises(ValueError, match="Error when validating")
         if not is_valid
         else nullcontext()
     ):
-        assert isinstance(tabular.validate(), TabularWithModel)
+        assert isinstance(tabular.validate(columnar=columnar), TabularWithModel)
+
+
+@pytest.mark.parametrize(
+    "tabular_class,data",
+    [
+        (
+            TabularWithModel,
+            [
+                {"a": "A", "b": 1, "c": ["x"]},
+                {"a": "B", "b": "2", "c": []},
+                {"a": "C", "b": None},
+                {"a": "D", "b": 4.0, "c": ["y", "z"]},
+            ],
+        ),
+        (TabularWithModel, [{"a": "A", "b": "+1"}, {"a": "B", "b": "-2"}]),
+        (TabularWithModel, [{"a": "A"}, {"a": "B", "b": 1, "extra": "x"}]),
+        (
+            TabularWithModelBool,
+            [
+                {"a": "A", "flag": True},
+                {"a": "B", "flag": "False"},
+                {"a": "C", "flag": "yes", "d": None},
+                {"a": "D", "flag": "T", "d": "d"},
+            ],
+        ),
+        (TabularWithCustomValidator, [{"a": "a"}, {"a": "b"}]),
+    ],
+)
+def test_validate_columnar_same_as_rows(tabular_class: type[BaseTabular], data):
+    tabular = tabular_class(data)
+    pd.testing.assert_frame_equal(
+        tabular.validate(columnar=True), tabular.validate(columnar=False)
+    )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [{"a": "A", "flag": True}, {"a": "B", "flag": "maybe"}],
+        [{"a": "A", "flag": True}, {"a": 1, "flag": True}],
+        [{"a": "A", "flag": None}],
+        [{"a": "A"}],
+        [{"a": "A", "b": "\u0663"}],
+        [{"a": "A", "b": "\u00b2"}],
+        [{"a": "A", "b": "+-1"}],
+    ],
+)
+def test_validate_columnar_error_same_as_rows(data):
+    tabular_class = TabularWithModel if "b" in data[0] else TabularWithModelBool
+    tabular = tabular_class(data)
+    error_messages = []
+    for columnar in (True, False):
+        with pytest.raises(ValueError, match="Error when validating") as exc_info:
+            tabular.validate(columnar=columnar)
+        error_messages.append(str(exc_info.value))
+    assert error_messages[0] == error_messages[1]
+
+
+@pytest.mark.parametrize(
+    "tabular_class,expected",
+    [
+        (TabularWithModel, True),
+        (TabularWithModelBool, True),
+        (TabularWithCustomValidator, False),
+    ],
+)
+def test_supports_columnar_validation(tabular_class: type[BaseTabular], expected):
+    assert tabular_class.model.supports_columnar_validation() == expected
 
 
 def test_validate_all_required_fields_present():
@@ -138,6 +246,65 @@ def test_get_diff_cols(cols, expected_count):
     assert len(diff) == expected_count
 
 
+@pytest.mark.parametrize(
+    "include_changed,expected", [(False, ["D"]), (True, ["B", "D"])]
+)
+def test_get_diff_include_changed(include_changed, expected):
+    tabular1 = TabularWithModel(
+        {"a": ["A", "B", "C", "D"], "b": [1, 2, 3, 4], "d": ["x", "y", "z", "w"]}
+    )
+    # column "d" is not in the other dataframe: not used for comparison
+    tabular2 = TabularWithModel({"a": ["A", "Z", "C"], "b": [1, 2, 3]})
+    diff = tabular1.get_diff(tabular2, include_changed=include_changed)
+    assert diff["a"].tolist() == expected
+
+
+def test_get_diff_categorical():
+    tabular1 = TabularWithModel({"a": ["A", "B", None], "b": [1, 2, 3]})
+    tabular2 = TabularWithModel({"a": ["B", None, "A"], "b": [2, 3, 4]})
+    tabular2["a"] = tabular2["a"].astype("category")
+    diff = tabular1.get_diff(tabular2, cols=["a", "b"])
+    assert diff["b"].tolist() == [1]
+
+
+@pytest.mark.parametrize(
+    "values1,values2",
+    [
+        ([1, 2], ["1", "2"]),
+        ([True, False], ["True", "False"]),
+        ([1, "2"], ["1", 2]),
+        (["A", 1], [None, "1"]),
+    ],
+)
+def test_get_diff_types(values1, values2):
+    tabular1 = TabularWithModel({"a": values1})
+    tabular2 = TabularWithModel({"a": values2})
+    assert len(tabular1.get_diff(tabular2, cols=["a"])) == len(values1)
+    assert len(tabular1.get_diff(tabular1.copy(), cols=["a"])) == 0
+    assert len(tabular1.get_intersection(tabular2, cols=["a"])) == 0
+
+
+def test_get_intersection():
+    data1 = {"a": ["A", "B", "C", "A", "B", "C"], "b": [1, 1, 1, 2, 2, 2]}
+    data2 = {"a": ["A", "A", "C"], "b": [1, 3, 2]}
+    intersection = TabularWithModel(data1).get_intersection(
+        TabularWithModel(data2), cols=["a", "b"]
+    )
+    assert isinstance(intersection, TabularWithModel)
+    assert intersection.index.tolist() == [0, 5]
+
+
+def test_get_symmetric_diff():
+    data1 = {"a": ["A", "B", "C"], "b": [1, 2, 3]}
+    data2 = {"a": ["A", "C", "D"], "b": [1, 3, 4]}
+    symmetric_diff = TabularWithModel(data1).get_symmetric_diff(
+        TabularWithModel(data2), cols="a"
+    )
+    assert isinstance(symmetric_diff, TabularWithModel)
+    assert symmetric_diff["a"].tolist() == ["B", "D"]
+    assert symmetric_diff.index.tolist() == [0, 1]
+
+
 def test_get_diff_invalid_cols():
     data1 = {"a": ["A"], "b": [1]}
     data2 = {"a": ["A"]}
@@ -182,6 +349,226 @@ def test_concatenate_error(data1: list[dict], data2: list[dict]):
         tabular1.concatenate(tabular2, validate=True)
 
 
+@pytest.mark.parametrize("as_dataframe", [False, True])
+def test_add_or_update_records(as_dataframe):
+    class _Tabular(TabularWithModel):
+        index_cols = ["a", "b"]
+
+    tabular = _Tabular(
+        [{"a": "A", "b": 1, "c": ["x"]}, {"a": "B", "b": 1, "c": ["y"]}]
+    ).validate()
+    records = [
+        {"a": "C", "b": 1, "c": ["z"]},
+        {"a": "A", "b": 1, "c": []},
+        {"a": "A", "b": 2},
+    ]
+    if as_dataframe:
+        records = pd.DataFrame(records)
+
+    assert tabular.add_or_update_records(records) is tabular
+    assert tabular.equals(
+        _Tabular(
+            [
+                {"a": "A", "b": 1, "c": []},
+                {"a": "B", "b": 1, "c": ["y"]},
+                {"a": "C", "b": 1, "c": ["z"]},
+                {"a": "A", "b": 2, "c": []},
+            ]
+        ).validate()
+    )
+
+
+def test_add_or_update_records_invalid():
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    with pytest.raises(ValueError, match="Error when validating"):
+        tabular.add_or_update_records({"b": 2})
+    assert len(tabular) == 1
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_add_or_update_records_duplicates(validate):
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    # same as applying the records one at a time
+    tabular.add_or_update_records(
+        [
+            {"a": "B", "b": 2, "c": []},
+            {"a": "X", "b": 1, "c": []},
+            {"a": "C", "b": 2, "c": []},
+            {"a": "Y", "b": 1, "c": []},
+        ],
+        validate=validate,
+    )
+    assert tabular["a"].tolist() == ["Y", "C"]
+    assert tabular["b"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_add_or_update_records_compact_dtypes(validate):
+    tabular = (
+        TabularWithColumnDtypes([{"a": "A", "flag": False}, {"a": "B", "flag": False}])
+        .validate()
+        .compact()
+    )
+    tabular.add_or_update_records(
+        [{"a": "B", "flag": True, "d": "x"}, {"a": "C", "flag": True, "d": "y"}],
+        validate=validate,
+    )
+    assert tabular["a"].tolist() == ["A", "B", "C"]
+    assert tabular["flag"].tolist() == [False, True, True]
+    assert tabular["d"].tolist() == [None, "x", "y"]
+    assert isinstance(tabular["a"].dtype, pd.CategoricalDtype)
+    assert tabular["flag"].dtype == bool
+    assert tabular.get_value("C", "flag")
+
+
+def test_add_or_update_records_no_validation():
+    class _Tabular(TabularWithModelBool):
+        index_cols = ["a"]
+
+    tabular = _Tabular(
+        [{"a": "A", "flag": False}, {"a": "B", "flag": False}]
+    ).validate()
+    tabular.add_or_update_records(
+        [{"a": "B", "flag": True}, {"a": "A", "flag": True}, {"a": "A", "flag": False}],
+        validate=False,
+    )
+    assert tabular["flag"].tolist() == [False, True]
+    assert tabular["d"].tolist() == ["default", "default"]
+    assert tabular["flag"].dtype == bool
+
+
+def test_add_or_update_records_empty():
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    tabular.add_or_update_records([])
+    assert len(tabular) == 1
+
+
+@pytest.mark.parametrize(
+    "key,col,expected",
+    [(1, "a", "A"), ((2,), "a", "B"), (3, "c", ["x"])],
+)
+def test_get_value(key, col, expected):
+    tabular = TabularWithModel(
+        [{"a": "A", "b": 1}, {"a": "B", "b": 2}, {"a": "C", "b": 3, "c": ["x"]}]
+    ).validate()
+    assert tabular.get_value(key, col) == expected
+
+
+def test_get_value_missing():
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    with pytest.raises(KeyError):
+        tabular.get_value(2, "a")
+
+
+def test_get_value_invalid_key():
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    with pytest.raises(ValueError, match="Invalid record key"):
+        tabular.get_value((1, 2), "a")
+
+
+def test_get_value_duplicates():
+    tabular = TabularWithModel([{"a": "A", "b": 1}, {"a": "B", "b": 1}])
+    with pytest.raises(ValueError, match="Duplicate records found"):
+        tabular.get_value(1, "a")
+
+
+def test_get_value_no_index_cols():
+    with pytest.raises(RuntimeError, match="index_cols is not set"):
+        Tabular([{"a": "A"}]).get_value("A", "a")
+
+
+def test_set_value():
+    tabular = TabularWithModel([{"a": "A", "b": 1}, {"a": "B", "b": 2}]).validate()
+    assert tabular.set_value(2, "a", "Z") is tabular
+    assert tabular["a"].tolist() == ["A", "Z"]
+
+
+def test_get_set_values():
+    tabular = TabularWithModel(
+        [{"a": "A", "b": 1}, {"a": "B", "b": 2}, {"a": "C", "b": 3}]
+    ).validate()
+    assert tabular.get_values([3, 1], "a").tolist() == ["C", "A"]
+    tabular.set_values([3, 1], "a", ["X", "Y"])
+    assert tabular["a"].tolist() == ["Y", "B", "X"]
+    tabular.set_values([2, 3], "a", "Z")
+    assert tabular["a"].tolist() == ["Y", "Z", "Z"]
+    assert tabular.get_values([], "a").tolist() == []
+    with pytest.raises(KeyError, match="Records not found"):
+        tabular.get_values([1, 4], "a")
+
+
+def test_has_records():
+    tabular = TabularWithModel([{"a": "A", "b": 1}, {"a": "B", "b": 2}]).validate()
+    assert tabular.has_records([2, 3, (1,)]).tolist() == [True, False, True]
+    assert tabular.has_records([]).tolist() == []
+
+
+def test_record_index_reused():
+    tabular = TabularWithModel([{"a": "A", "b": 1}, {"a": "B", "b": 2}]).validate()
+    record_index = tabular._get_record_index()
+    tabular.set_value(1, "a", "Z")
+    assert tabular._get_record_index() is record_index
+    assert getattr(tabular.iloc[:1], "_record_index", None) is None
+
+
+def test_record_index_add_or_update_records():
+    class _Tabular(TabularWithModel):
+        index_cols = ["a", "b"]
+
+    tabular = _Tabular([{"a": "A", "b": 1}]).validate()
+    assert tabular.get_value(("A", 1), "c") == []
+    tabular.add_or_update_records(
+        [{"a": "B", "b": 2, "c": ["x"]}, {"a": "A", "b": 1, "c": ["y"]}]
+    )
+    assert tabular.get_value(("A", 1), "c") == ["y"]
+    assert tabular.get_value(("B", 2), "c") == ["x"]
+
+
+def test_record_index_ids_edited_in_place():
+    class _Tabular(TabularWithModel):
+        index_cols = ["a", "b"]
+
+    tabular = _Tabular([{"a": "A", "b": 1}, {"a": "B", "b": 2}]).validate()
+    assert tabular.get_value(("B", 2), "c") == []
+    tabular.loc[1, "b"] = 3
+    tabular["a"] = ["A", "C"]
+    assert tabular.get_value(("C", 3), "c") == []
+    assert tabular.has_records([("A", 1), ("B", 2), ("C", 3)]).tolist() == [
+        True,
+        False,
+        True,
+    ]
+    assert tabular.get_record_positions([("C", 3), ("A", 1)]).tolist() == [1, 0]
+    with pytest.raises(KeyError):
+        tabular.get_value(("B", 2), "c")
+
+
+def test_record_index_categorical_ids_edited_in_place():
+    tabular = TabularWithColumnDtypes(
+        [{"a": "A", "flag": True}, {"a": "B", "flag": False}]
+    ).validate()
+    assert not tabular.get_value("B", "flag")
+    tabular.set_value("B", "a", "C")
+    assert not tabular.get_value("C", "flag")
+    assert tabular.has_records(["B"]).tolist() == [False]
+
+
+def test_record_index_concatenate():
+    tabular1 = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    tabular1.get_value(1, "a")
+    tabular2 = TabularWithModel([{"a": "B", "b": 2}]).validate()
+    concatenated = tabular1.concatenate(tabular2)
+    assert concatenated.get_value(2, "a") == "B"
+
+
+def test_record_index_sort_values():
+    tabular = TabularWithModel([{"a": "B", "b": 2}, {"a": "A", "b": 1}]).validate()
+    tabular.get_value(1, "a")
+    tabular.sort_values(inplace=True)
+    tabular.set_value(1, "a", "Z")
+    assert tabular["a"].tolist() == ["Z", "B"]
+
+
 @pytest.mark.parametrize("dname_backups", [None, ".tests"])
 @pytest.mark.parametrize(
     "fname,dname_backups_processed",
@@ -238,6 +625,374 @@ def test_save_with_backup_invalid_existing(bad_data, tmp_path: Path):
     assert tabular.save_with_backup(fpath_symlink) is not None
 
 
+def test_save_with_backup_hash_sidecar(
+    tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    fpath_symlink = tmp_path / "test.csv"
+    fpath_hash = tmp_path / ".test.csv.hash.json"
+    tabular = TabularWithModelNoList([{"a": "A", "b": 1}, {"a": "B", "b": 2}])
+    assert tabular.save_with_backup(fpath_symlink) is not None
+    assert fpath_hash.exists()
+
+    # no reloading if the hash matches
+    mocked_load = mocker.spy(TabularWithModelNoList, "load")
+    tabular_reordered = TabularWithModelNoList(
+        [{"a": "B", "b": 2}, {"a": "A", "b": 1}]
+    ).validate()
+    assert tabular_reordered.save_with_backup(fpath_symlink) is None
+    mocked_load.assert_not_called()
+
+    # changed content
+    tabular_new = TabularWithModelNoList([{"a": "A", "b": 1}, {"a": "C", "b": 2}])
+    assert tabular_new.save_with_backup(fpath_symlink) is not None
+    assert load_json(fpath_hash)["hash"] == tabular_new.get_content_hash()
+
+
+def test_save_with_backup_hash_sidecar_file_modified(tmp_path: Path):
+    fpath_symlink = tmp_path / "test.csv"
+    tabular = TabularWithModelNoList([{"a": "A", "b": 1}])
+    fpath_backup = tabular.save_with_backup(fpath_symlink)
+
+    # file modified outside of save_with_backup
+    fpath_backup.write_text("a,b\nZ,1\n")
+    assert tabular.save_with_backup(fpath_symlink) is not None
+    assert TabularWithModelNoList.load(fpath_symlink).equals(tabular.validate())
+
+
+def test_save_with_backup_hash_sidecar_created(tmp_path: Path):
+    # no sidecar (e.g. file saved with an older version)
+    fpath_symlink = tmp_path / "test.csv"
+    fpath_hash = tmp_path / ".test.csv.hash.json"
+    tabular = TabularWithModelNoList([{"a": "A", "b": 1}])
+    tabular.save_with_backup(fpath_symlink)
+    fpath_hash.unlink()
+
+    assert tabular.save_with_backup(fpath_symlink, dry_run=True) is None
+    assert not fpath_hash.exists()
+    assert tabular.save_with_backup(fpath_symlink) is None
+    assert fpath_hash.exists()
+
+
+def test_save_with_backup_hash_sidecar_dry_run(tmp_path: Path):
+    fpath_symlink = tmp_path / "test.csv"
+    tabular = TabularWithModelNoList([{"a": "A", "b": 1}])
+    tabular.save_with_backup(fpath_symlink, dry_run=True)
+    assert not (tmp_path / ".test.csv.hash.json").exists()
+
+
+def test_save_with_backup_hash_sidecar_no_sort(tmp_path: Path):
+    fpath_symlink = tmp_path / "test.csv"
+    tabular = TabularWithModelNoList([{"a": "A", "b": 1}, {"a": "B", "b": 2}])
+    tabular.save_with_backup(fpath_symlink, sort=False)
+    tabular_reordered = TabularWithModelNoList([{"a": "B", "b": 2}, {"a": "A", "b": 1}])
+    assert tabular_reordered.save_with_backup(fpath_symlink, sort=False) is not None
+
+
+@pytest.mark.parametrize(
+    "data1,data2,equal",
+    [
+        ([{"a": "A", "b": 1}], [{"a": "A", "b": 1}], True),
+        ([{"a": "A", "b": 1}], [{"a": "A", "b": "1"}], True),
+        ([{"a": "A", "b": 1}], [{"b": 1, "a": "A"}], True),
+        (
+            [{"a": "A", "b": 1}, {"a": "B", "b": 2}],
+            [{"a": "B", "b": 2}, {"a": "A", "b": 1}],
+            True,
+        ),
+        ([{"a": "A", "b": 1}], [{"a": "A", "b": 2}], False),
+        ([{"a": "A", "b": 1}], [{"a": "A"}], False),
+        ([{"a": "A", "b": None}], [{"a": "A", "b": float("nan")}], True),
+        ([{"a": "A", "b": 1}], [{"a": "A", "b": 1}, {"a": "A", "b": 1}], False),
+        ([], [], True),
+    ],
+)
+def test_get_content_hash(data1, data2, equal):
+    hash1 = pd.DataFrame(data1).pipe(TabularWithModelNoList).get_content_hash()
+    hash2 = pd.DataFrame(data2).pipe(TabularWithModelNoList).get_content_hash()
+    assert (hash1 == hash2) == equal
+
+
+def test_get_content_hash_ordered():
+    tabular1 = TabularWithModelNoList([{"a": "A", "b": 1}, {"a": "B", "b": 2}])
+    tabular2 = TabularWithModelNoList([{"a": "B", "b": 2}, {"a": "A", "b": 1}])
+    assert tabular1.get_content_hash(ordered=True) != tabular2.get_content_hash(
+        ordered=True
+    )
+
+
+def test_get_content_hash_compact():
+    tabular = TabularWithColumnDtypes(
+        [{"a": "A", "flag": True}, {"a": "B", "flag": False}]
+    ).validate()
+    assert tabular.compact().get_content_hash() == tabular.get_content_hash()
+
+
+@pytest.mark.parametrize(
+    "fname,file_format",
+    [
+        ("test.parquet", None),
+        ("test.arrow", None),
+        ("test.feather", None),
+        ("test.dat", "parquet"),
+        ("test.dat", "arrow"),
+    ],
+)
+@pytest.mark.parametrize("memory_map", [False, True])
+def test_save_with_backup_binary(fname, file_format, memory_map, tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    fpath_symlink = tmp_path / fname
+    tabular = TabularWithModelBool(
+        [{"a": "B", "flag": True}, {"a": "A", "flag": False, "d": None}]
+    ).validate()
+    fpath_backup = tabular.save_with_backup(fpath_symlink, file_format=file_format)
+
+    assert fpath_symlink.is_symlink()
+    assert fpath_backup.suffix == fpath_symlink.suffix
+
+    # typed columns
+    tabular_raw = TabularWithModelBool.load(
+        fpath_symlink, validate=False, file_format=file_format
+    )
+    assert isinstance(tabular_raw["a"].dtype, pd.CategoricalDtype)
+    assert tabular_raw["flag"].dtype == bool
+
+    tabular_loaded = TabularWithModelBool.load(
+        fpath_symlink, file_format=file_format, memory_map=memory_map
+    )
+    assert tabular_loaded.equals(tabular.sort_values())
+
+    # no change
+    assert tabular.save_with_backup(fpath_symlink, file_format=file_format) is None
+
+
+def test_save_with_backup_binary_list_column(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    fpath_symlink = tmp_path / "test.parquet"
+    tabular = TabularWithModel(
+        [{"a": "A", "b": 1, "c": ["x", "y"]}, {"a": "B", "b": 2}]
+    ).validate()
+    tabular.save_with_backup(fpath_symlink)
+    tabular_loaded = TabularWithModel.load(fpath_symlink, validate=False)
+    assert tabular_loaded["c"].tolist() == [["x", "y"], []]
+
+
+@pytest.mark.parametrize("fname", ["test.parquet", "test.arrow"])
+def test_save_with_backup_export_csv(fname, tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    fpath_symlink = tmp_path / fname
+    tabular = TabularWithModelBool([{"a": "A", "flag": True}]).validate()
+    tabular.save_with_backup(fpath_symlink, export_csv=True)
+
+    fpath_csv = tmp_path / "test.csv"
+    assert fpath_csv.exists()
+    assert not fpath_csv.is_symlink()
+    assert TabularWithModelBool.load(fpath_csv).equals(tabular)
+
+
+@pytest.mark.parametrize("remove_hash_file", [False, True])
+def test_save_with_backup_export_csv_unchanged(remove_hash_file, tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    fpath_symlink = tmp_path / "test.parquet"
+    tabular = TabularWithModelBool([{"a": "A", "flag": True}]).validate()
+    tabular.save_with_backup(fpath_symlink)
+    if remove_hash_file:
+        # compare with the saved file instead of the hash
+        TabularWithModelBool._get_fpath_hash(fpath_symlink).unlink()
+
+    # no new backup, but the missing CSV copy is written
+    assert tabular.save_with_backup(fpath_symlink, export_csv=True) is None
+    assert TabularWithModelBool.load(tmp_path / "test.csv").equals(tabular)
+
+
+def test_save_with_backup_export_csv_dry_run(tmp_path: Path):
+    tabular = TabularWithModel([{"a": "A", "b": 1}]).validate()
+    tabular.save_with_backup(tmp_path / "test.parquet", export_csv=True, dry_run=True)
+    assert not (tmp_path / "test.csv").exists()
+
+
+def test_save_with_backup_policy_load_version(
+    mocker: pytest_mock.MockerFixture, tmp_path: Path
+):
+    mocked_datetime = mocker.patch("nipoppy.utils.datetime")
+    mocked_datetime.datetime.now.side_effect = [
+        datetime.datetime(2024, 1, 1, 0, i_version) for i_version in range(4)
+    ]
+    fpath_symlink = tmp_path / "test.csv"
+    versions = []
+    for i_version in range(4):
+        tabular = TabularWithModelBool(
+            [{"a": str(i_row), "flag": i_row < i_version} for i_row in range(50)]
+        ).validate()
+        fpath_backup = tabular.save_with_backup(
+            fpath_symlink, backup_policy=BackupPolicy(snapshot_interval=10)
+        )
+        versions.append((fpath_backup.name, tabular))
+
+    backup_store = BackupStore.from_symlink(fpath_symlink)
+    assert backup_store.get_versions() == [version for version, _ in versions]
+    assert sum(backup_store.is_snapshot(version) for version, _ in versions) == 1
+    for version, tabular in versions:
+        assert TabularWithModelBool.load_version(fpath_symlink, version).equals(
+            tabular.sort_values()
+        )
+
+
+@pytest.fixture
+def fpath_large(tmp_path: Path) -> Path:
+    fpath = tmp_path / "large.csv"
+    TabularWithModelBool(
+        {
+            "a": [str(i_row) for i_row in range(100)],
+            "flag": [i_row % 3 == 0 for i_row in range(100)],
+            "d": [f"group{i_row % 4}" for i_row in range(100)],
+        }
+    ).to_csv(fpath, index=False)
+    return fpath
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet", "arrow"])
+@pytest.mark.parametrize(
+    "chunksize,filters,expected_lengths",
+    [
+        (30, None, [30, 30, 30, 10]),
+        (100, None, [100]),
+        (30, {"d": "group1"}, [8, 7, 8, 2]),
+        (30, {"d": ["group1", "group2"]}, [15, 15, 15, 5]),
+        (30, {"d": "group1", "a": ["1", "5", "99"]}, [2]),
+        (30, {"d": "group0", "flag": True}, [3, 2, 3, 1]),
+        (30, {"d": "other"}, []),
+    ],
+)
+def test_iter_load(
+    fpath_large: Path, file_format, chunksize, filters, expected_lengths, tmp_path
+):
+    if file_format != "csv":
+        pytest.importorskip("pyarrow")
+        fpath = tmp_path / f"large.{file_format}"
+        tabular = TabularWithModelBool.load(fpath_large)
+        if file_format == "parquet":
+            tabular.to_parquet(fpath)
+        else:
+            tabular.to_feather(fpath)
+    else:
+        fpath = fpath_large
+
+    chunks = list(
+        TabularWithModelBool.iter_load(fpath, chunksize=chunksize, filters=filters)
+    )
+
+    assert [len(chunk) for chunk in chunks] == expected_lengths
+    for chunk in chunks:
+        assert isinstance(chunk, TabularWithModelBool)
+        assert chunk["flag"].dtype == bool
+        for col, values in (filters or {}).items():
+            values = values if isinstance(values, list) else [values]
+            assert chunk[col].isin(values).all()
+
+
+def test_iter_load_compact(fpath_large: Path):
+    for chunk in TabularWithColumnDtypes.iter_load(
+        fpath_large, chunksize=50, compact=True
+    ):
+        assert isinstance(chunk["a"].dtype, pd.CategoricalDtype)
+
+
+def test_iter_load_invalid_filter(fpath_large: Path):
+    with pytest.raises(ValueError, match="Cannot filter on column"):
+        list(TabularWithModelBool.iter_load(fpath_large, filters={"x": "1"}))
+
+
+@pytest.mark.parametrize(
+    "filters,expected_length",
+    [(None, 100), ({"d": "group3"}, 25), ({"d": "other"}, 0)],
+)
+def test_load_filters(fpath_large: Path, filters, expected_length):
+    tabular = TabularWithModelBool.load(fpath_large, filters=filters)
+    assert isinstance(tabular, TabularWithModelBool)
+    assert len(tabular) == expected_length
+    assert tabular.columns.tolist() == ["a", "flag", "d"]
+
+
+def test_load_invalid_format(tmp_path: Path):
+    with pytest.raises(ValueError, match="Invalid tabular file format"):
+        TabularWithModel.load(tmp_path / "test.csv", file_format="xlsx")
+
+
+def test_export_csv(tmp_path: Path):
+    tabular = TabularWithModelBool([{"a": "A", "flag": False}]).validate()
+    fpath_csv = tabular.export_csv(tmp_path / "test.csv")
+    assert TabularWithModelBool.load(fpath_csv).equals(tabular)
+
+
+def test_compact():
+    tabular = TabularWithColumnDtypes(
+        [{"a": "A", "flag": "true", "d": "x" * 100}, {"a": "B", "flag": "0"}]
+    )
+    compact = tabular.compact()
+    assert isinstance(compact, TabularWithColumnDtypes)
+    assert isinstance(compact["a"].dtype, pd.CategoricalDtype)
+    assert compact["flag"].tolist() == [True, False]
+    assert compact["flag"].dtype == bool
+    assert compact["d"].dtype == object
+    assert compact["d"].iloc[0] is sys.intern("x" * 100)
+    assert pd.isna(compact["d"].iloc[1])
+    # original is unchanged
+    assert tabular["a"].dtype == object
+
+
+@pytest.mark.parametrize("flag", [None, "invalid"])
+def test_compact_bool_invalid(flag):
+    tabular = TabularWithColumnDtypes(
+        [{"a": "A", "flag": True}, {"a": "B", "flag": flag}]
+    )
+    assert tabular.compact()["flag"].dtype == object
+
+
+def test_load_compact():
+    tabular = TabularWithModel.load(DPATH_TEST_DATA / "manifest1.csv", validate=False)
+    assert tabular.compact().equals(tabular)
+
+    tabular = TabularWithColumnDtypes(
+        [{"a": "A", "flag": True}, {"a": "B", "flag": False}]
+    ).validate()
+    assert tabular.compact().equals(tabular)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize(
+    "values,expected",
+    [
+        (["A"], [True, False, False, False]),
+        (["B", "C"], [False, True, True, False]),
+        (["D"], [False, False, False, False]),
+        ([], [False, False, False, False]),
+    ],
+)
+def test_get_mask(values, expected, compact):
+    tabular = TabularWithColumnDtypes(
+        {"a": ["A", "B", "C", None], "flag": [True, True, False, False]}
+    )
+    if compact:
+        tabular = tabular.compact()
+    assert tabular._get_mask("a", values).tolist() == expected
+
+
+@pytest.mark.parametrize("values", ["C", ["C", "D"]])
+def test_set_values_new_category(values):
+    tabular = TabularWithColumnDtypes(
+        [
+            {"a": "A", "flag": True, "d": "x"},
+            {"a": "B", "flag": True, "d": "y"},
+        ]
+    ).validate()
+    tabular = tabular.compact()
+    tabular["d"] = tabular["d"].astype("category")
+    tabular.set_values(["A", "B"], "d", values)
+    tabular.set_value("A", "d", "E")
+    assert tabular["d"].tolist()[0] == "E"
+    assert tabular["d"].tolist()[1] == (values if isinstance(values, str) else "D")
+
+
 @pytest.mark.parametrize(
     "data1,data2,equal",
     [
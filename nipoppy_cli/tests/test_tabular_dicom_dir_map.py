@@ -35,6 +35,27 @@ def test_load_invalid(fname):
         DicomDirMap.load(DPATH_TEST_DATA / fname)
 
 
+@pytest.mark.parametrize(
+    "col", [DicomDirMap.col_participant_id, DicomDirMap.col_session_id]
+)
+def test_validate_columnar_error_non_str_ids(col):
+    dicom_dir_map = DicomDirMap(
+        {
+            DicomDirMap.col_participant_id: ["01", "02"],
+            DicomDirMap.col_session_id: ["BL", "BL"],
+            DicomDirMap.col_participant_dicom_dir: ["01", "02"],
+        }
+    )
+    # whole column without any string value
+    dicom_dir_map[col] = [1, 2]
+    error_messages = []
+    for columnar in (True, False):
+        with pytest.raises(ValueError, match="Error when validating") as exc_info:
+            dicom_dir_map.validate(columnar=columnar)
+        error_messages.append(str(exc_info.value))
+    assert error_messages[0] == error_messages[1]
+
+
 @pytest.mark.parametrize(
     "fpath_dicom_dir_map",
     [
@@ -77,3 +98,35 @@ def test_load_or_generate_generate(
     )
 
     assert dicom_dir_map[DicomDirMap.col_participant_dicom_dir].tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "participant_id,session_id,expected",
+    [("01", "1", "01/1"), ("02", "2", "02/2")],
+)
+def test_get_dicom_dir(participant_id, session_id, expected):
+    dicom_dir_map = DicomDirMap(
+        data={
+            DicomDirMap.col_participant_id: ["01", "02"],
+            DicomDirMap.col_session_id: ["1", "2"],
+            DicomDirMap.col_participant_dicom_dir: ["01/1", "02/2"],
+        }
+    )
+    assert (
+        dicom_dir_map.get_dicom_dir(
+            participant_id=participant_id, session_id=session_id
+        )
+        == expected
+    )
+
+
+def test_get_dicom_dir_missing():
+    dicom_dir_map = DicomDirMap(
+        data={
+            DicomDirMap.col_participant_id: ["01"],
+            DicomDirMap.col_session_id: ["1"],
+            DicomDirMap.col_participant_dicom_dir: ["01/1"],
+        }
+    )
+    with pytest.raises(KeyError):
+        dicom_dir_map.get_dicom_dir(participant_id="01", session_id="2")
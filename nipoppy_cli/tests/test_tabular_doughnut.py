@@ -1,15 +1,30 @@
 """Tests for the doughnut."""
 
+import os
+import time
 from contextlib import nullcontext
 from pathlib import Path
 
+import pandas as pd
 import pytest
+import pytest_mock
 
 from nipoppy.env import StrOrPathLike
+from nipoppy.logger import get_logger
+from nipoppy.tabular import doughnut as doughnut_module
 from nipoppy.tabular.dicom_dir_map import DicomDirMap
-from nipoppy.tabular.doughnut import Doughnut, generate_doughnut, update_doughnut
+from nipoppy.tabular.doughnut import (
+    DirectoryIndex,
+    Doughnut,
+    _find_nonempty_dirs,
+    _get_statuses,
+    generate_doughnut,
+    refresh_doughnut,
+    update_doughnut,
+)
+from nipoppy.tabular.manifest import Manifest
 
-from .conftest import DPATH_TEST_DATA, check_doughnut, prepare_dataset
+from .conftest import DPATH_TEST_DATA, check_doughnut, make_archive, prepare_dataset
 
 
 @pytest.fixture
@@ -115,6 +130,34 @@ def test_set_status(data, participant_id, session_id, col, status):
     )
 
 
+def test_set_status_missing(data):
+    doughnut = Doughnut(data)
+    with pytest.raises(KeyError):
+        doughnut.set_status(
+            participant_id="03",
+            session_id="BL",
+            col=Doughnut.col_in_bids,
+            status=True,
+        )
+    assert len(doughnut) == len(data[Doughnut.col_participant_id])
+
+
+def test_set_statuses(data):
+    doughnut = Doughnut(data)
+    doughnut.set_statuses([("01", "M12"), ("02", "BL")], Doughnut.col_in_bids, True)
+    assert doughnut.get_status("01", "M12", Doughnut.col_in_bids)
+    assert doughnut.get_status("02", "BL", Doughnut.col_in_bids)
+    assert doughnut.set_statuses([], Doughnut.col_in_bids, True).equals(doughnut)
+
+
+def test_set_statuses_invalid(data):
+    doughnut = Doughnut(data)
+    with pytest.raises(ValueError, match="Invalid status column"):
+        doughnut.set_statuses([("01", "BL")], "invalid_col", True)
+    with pytest.raises(KeyError):
+        doughnut.set_statuses([("03", "BL")], Doughnut.col_in_bids, True)
+
+
 @pytest.mark.parametrize(
     "status_col,participant_id,session_id,expected_count",
     [
@@ -126,10 +169,13 @@ def test_set_status(data, participant_id, session_id, col, status):
         (Doughnut.col_in_bids, "01", "BL", 1),
     ],
 )
+@pytest.mark.parametrize("compact", [False, True])
 def test_get_participant_sessions_helper(
-    data, status_col, participant_id, session_id, expected_count
+    data, status_col, participant_id, session_id, expected_count, compact
 ):
     doughnut = Doughnut(data)
+    if compact:
+        doughnut = doughnut.compact()
     count = 0
     for _ in doughnut._get_participant_sessions_helper(
         status_col=status_col, participant_id=participant_id, session_id=session_id
@@ -138,6 +184,22 @@ def test_get_participant_sessions_helper(
     assert count == expected_count
 
 
+def test_compact(data):
+    doughnut = Doughnut(data).compact()
+    for col in [
+        Doughnut.col_participant_id,
+        Doughnut.col_visit_id,
+        Doughnut.col_session_id,
+    ]:
+        assert isinstance(doughnut[col].dtype, pd.CategoricalDtype)
+    for col in Doughnut.status_cols:
+        assert doughnut[col].dtype == bool
+
+    # statuses can still be updated
+    doughnut.set_status("02", "M12", Doughnut.col_in_bids, True)
+    assert doughnut.get_status("02", "M12", Doughnut.col_in_bids)
+
+
 @pytest.mark.parametrize(
     (
         "participants_and_sessions_manifest1"
@@ -260,6 +322,383 @@ def test_generate_and_update(
     )
 
 
+def test_update_doughnut_changed_records(tmp_path: Path):
+    participants_and_sessions = {"01": ["BL", "M12"], "02": ["BL"]}
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions
+    )
+    dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    doughnut = generate_doughnut(
+        manifest=manifest, dicom_dir_map=dicom_dir_map, empty=True
+    ).validate()
+    doughnut.set_status("01", "M12", Doughnut.col_in_bids, True)
+    doughnut.set_status("02", "BL", Doughnut.col_in_bids, True)
+
+    # change the datatype of an existing record
+    manifest.at[1, Manifest.col_datatype] = ["anat", "dwi"]
+
+    updated_doughnut = update_doughnut(
+        doughnut=doughnut, manifest=manifest, dicom_dir_map=dicom_dir_map, empty=True
+    )
+
+    assert len(updated_doughnut) == len(manifest)
+    record = manifest.iloc[1]
+    participant_id = record[Manifest.col_participant_id]
+    session_id = record[Manifest.col_session_id]
+    assert updated_doughnut.get_value(
+        (participant_id, session_id), Doughnut.col_datatype
+    ) == ["anat", "dwi"]
+    # the changed record has been regenerated, the other ones are unchanged
+    assert not updated_doughnut.get_status(
+        participant_id, session_id, Doughnut.col_in_bids
+    )
+    assert updated_doughnut[Doughnut.col_in_bids].sum() == 1
+    # original doughnut is unchanged
+    assert doughnut[Doughnut.col_in_bids].sum() == 2
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_find_nonempty_dirs(
+    n_jobs: int, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    for dpath in ["01/BL", "01/M12", "02/BL", "03/a/b/c", "unrelated/x/y"]:
+        (tmp_path / dpath).mkdir(parents=True)
+    for fpath in ["01/BL/file.dcm", "02/BL/file.dcm", "03/a/b/c/file.dcm", "04"]:
+        (tmp_path / fpath).touch()
+    (tmp_path / "05").symlink_to(tmp_path / "01")
+    spy = mocker.spy(os, "scandir")
+
+    nonempty_dirs = _find_nonempty_dirs(
+        [tmp_path, tmp_path / "01", None],
+        [
+            [
+                ("01", "BL"),
+                ("01", "M12"),
+                ("02", "BL"),
+                ("02", "M12"),
+                ("03", "a", "b", "c"),
+                ("04", "BL"),
+                ("05", "BL"),
+                (),
+            ],
+            [("BL",), ("M12",)],
+            [("01", "BL")],
+        ],
+        logger=get_logger(),
+        n_jobs=n_jobs,
+    )
+
+    assert nonempty_dirs == [
+        {("01", "BL"), ("02", "BL"), ("03", "a", "b", "c"), ("05", "BL")},
+        {("BL",)},
+        set(),
+    ]
+    # each directory leading to a requested path is listed once (not "unrelated")
+    assert spy.call_count == 12 + 3
+
+
+def test_find_nonempty_dirs_no_root(tmp_path: Path):
+    assert _find_nonempty_dirs(
+        [None, tmp_path / "missing"],
+        [[("01", "BL")], [("01", "BL")]],
+        logger=get_logger(),
+    ) == [set(), set()]
+
+
+def test_find_nonempty_dirs_archives(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    make_archive(tmp_path / "01" / "BL.zip", {"series/file.dcm": b"content"})
+    make_archive(tmp_path / "01" / "M12.tar.gz", {}, dnames=["series"])
+    make_archive(tmp_path / "02.tar", {"BL/file.dcm": b"content"})
+    (tmp_path / "03.zip").write_text("not an archive")
+    (tmp_path / "04.zip").mkdir()
+    (tmp_path / "04.zip" / "file.dcm").touch()
+    relative_paths = [
+        [("01", "BL.zip"), ("01", "M12.tar.gz"), ("02.tar",), ("03.zip",), ("04.zip",)]
+    ]
+    spy = mocker.spy(doughnut_module, "archive_has_members")
+    dir_index = DirectoryIndex()
+
+    def find_nonempty_dirs():
+        return _find_nonempty_dirs(
+            [tmp_path], relative_paths, logger=get_logger(), dir_index=dir_index
+        )
+
+    assert find_nonempty_dirs() == [{("01", "BL.zip"), ("02.tar",), ("04.zip",)}]
+    assert spy.call_count == 4
+
+    # unchanged archives are not opened again
+    # (once they are old enough to be stored in the index)
+    _set_old_mtimes(tmp_path)
+    for fpath in tmp_path.rglob("*.*"):
+        os.utime(fpath, (time.time() - 3600,) * 2)
+    find_nonempty_dirs()
+    spy.reset_mock()
+    assert find_nonempty_dirs() == [{("01", "BL.zip"), ("02.tar",), ("04.zip",)}]
+    assert spy.call_count == 0
+
+    # modified archive
+    make_archive(tmp_path / "01" / "M12.tar.gz", {"series/file.dcm": b"content"})
+    assert find_nonempty_dirs() == [
+        {("01", "BL.zip"), ("01", "M12.tar.gz"), ("02.tar",), ("04.zip",)}
+    ]
+    assert spy.call_count == 1
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_get_statuses(n_jobs: int, tmp_path: Path):
+    dpath_root = tmp_path / "root"
+    for dpath in [dpath_root / "01" / "BL", tmp_path / "other" / "BL"]:
+        dpath.mkdir(parents=True)
+        (dpath / "file.dcm").touch()
+
+    make_archive(tmp_path / "other" / "M24.zip", {"file.dcm": b"content"})
+
+    assert _get_statuses(
+        [dpath_root, None],
+        [
+            [
+                "01/BL",
+                Path("01", "BL"),
+                ("01", "BL"),
+                "01/M12",
+                "../other/BL",
+                "../other/M12",
+                "../other/M24.zip",
+            ],
+            ["01/BL", "../other/BL"],
+        ],
+        logger=get_logger(),
+        n_jobs=n_jobs,
+    ) == [[True, True, True, False, True, False, True], [False, False]]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 3])
+def test_generate_n_jobs(n_jobs: int, tmp_path: Path):
+    participants_and_sessions = {"01": ["BL", "M12"], "02": ["BL"], "03": ["M12"]}
+    participants_and_sessions_downloaded = {"01": ["BL"], "03": ["M12"]}
+    dpath_downloaded = tmp_path / "downloaded"
+    dpath_organized = tmp_path / "organized"
+    dpath_bidsified = tmp_path / "bids"
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_downloaded=participants_and_sessions_downloaded,
+        participants_and_sessions_organized={"01": ["BL", "M12"]},
+        participants_and_sessions_bidsified={"02": ["BL"]},
+        dpath_downloaded=dpath_downloaded,
+        dpath_organized=dpath_organized,
+        dpath_bidsified=dpath_bidsified,
+    )
+    doughnut = generate_doughnut(
+        manifest=manifest,
+        dicom_dir_map=DicomDirMap.load_or_generate(
+            manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+        ),
+        dpath_downloaded=dpath_downloaded,
+        dpath_organized=dpath_organized,
+        dpath_bidsified=dpath_bidsified,
+        n_jobs=n_jobs,
+    )
+    check_doughnut(
+        doughnut=doughnut,
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_downloaded=participants_and_sessions_downloaded,
+        participants_and_sessions_organized={"01": ["BL", "M12"]},
+        participants_and_sessions_bidsified={"02": ["BL"]},
+        empty=False,
+    )
+
+
+def _set_old_mtimes(dpath_root: Path, seconds_ago: int = 3600):
+    """Set the mtime of all directories to the past (not within the racy window)."""
+    mtime = time.time() - seconds_ago
+    for dpath in [dpath_root, *dpath_root.rglob("*")]:
+        if dpath.is_dir():
+            os.utime(dpath, (mtime, mtime))
+
+
+def test_directory_index_get_fpath():
+    assert DirectoryIndex.get_fpath("my_dataset/doughnut.csv") == Path(
+        "my_dataset/.doughnut.csv.mtimes.json"
+    )
+
+
+def test_directory_index_save_load(tmp_path: Path):
+    fpath = tmp_path / "index.json"
+    dir_index = DirectoryIndex()
+    dir_index.set("root", ("01", "BL"), [1, True, None])
+    dir_index.set("root", (), [2, True, ["01"]])
+    dir_index.save(fpath)
+
+    dir_index_loaded = DirectoryIndex.load(fpath)
+    assert dir_index_loaded.entries == dir_index.entries
+    assert dir_index_loaded.get("root", ("01", "BL")) == [1, True, None]
+    assert dir_index_loaded.get("root", ("02", "BL")) is None
+    assert dir_index_loaded.get("other_root", ()) is None
+
+
+@pytest.mark.parametrize("content", [None, "not json", '{"other": {}}'])
+def test_directory_index_load_invalid(content, tmp_path: Path):
+    fpath = tmp_path / "index.json"
+    if content is not None:
+        fpath.write_text(content)
+    assert DirectoryIndex.load(fpath).entries == {}
+
+
+def test_directory_index_set_none_and_prune():
+    dir_index = DirectoryIndex(
+        {"root1": {"": [1, True, ["01"]], "01": [2, True, None]}, "root2": {}}
+    )
+    dir_index.set("root1", ("01",), None)
+    dir_index.set("root1", (), [3, True, ["01"]])
+    assert dir_index.entries["root1"] == {"": [3, True, ["01"]]}
+
+    assert dir_index.get_visited_dpaths() == ["root1", os.path.join("root1", "01")]
+
+    dir_index.prune()
+    assert dir_index.entries == {"root1": {"": [3, True, ["01"]]}}
+    assert dir_index.get_visited_dpaths() == []
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_find_nonempty_dirs_index(
+    n_jobs: int, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    for dpath in ["01/BL", "01/M12", "02/BL"]:
+        (tmp_path / dpath).mkdir(parents=True)
+    (tmp_path / "01/BL/file.dcm").touch()
+    _set_old_mtimes(tmp_path)
+    relative_paths = [[("01", "BL"), ("01", "M12"), ("02", "BL"), ("03", "BL")]]
+    dir_index = DirectoryIndex()
+    spy = mocker.spy(os, "scandir")
+
+    def find_nonempty_dirs():
+        return _find_nonempty_dirs(
+            [tmp_path],
+            relative_paths,
+            logger=get_logger(),
+            n_jobs=n_jobs,
+            dir_index=dir_index,
+        )
+
+    # no index: everything is listed
+    assert find_nonempty_dirs() == [{("01", "BL")}]
+    assert spy.call_count == 6
+
+    # nothing changed: nothing is listed
+    spy.reset_mock()
+    assert find_nonempty_dirs() == [{("01", "BL")}]
+    assert spy.call_count == 0
+
+    # new file in a session directory: only that directory is listed
+    spy.reset_mock()
+    (tmp_path / "01/M12/file.dcm").touch()
+    assert find_nonempty_dirs() == [{("01", "BL"), ("01", "M12")}]
+    assert spy.call_count == 1
+
+    # directory modified very recently: not stored in the index
+    assert dir_index.get(tmp_path, ("01", "M12")) is None
+    spy.reset_mock()
+    assert find_nonempty_dirs() == [{("01", "BL"), ("01", "M12")}]
+    assert spy.call_count == 1
+
+    # new participant directory, and new path requested for an existing directory
+    (tmp_path / "03/BL").mkdir(parents=True)
+    (tmp_path / "03/BL/file.dcm").touch()
+    relative_paths[0].append(("02", "M12"))
+    _set_old_mtimes(tmp_path / "03")
+    mtime = time.time() - 60
+    os.utime(tmp_path, (mtime, mtime))
+    spy.reset_mock()
+    assert find_nonempty_dirs() == [{("01", "BL"), ("01", "M12"), ("03", "BL")}]
+    # root (new subdirectory), 01/M12 (not in index), 03 and 03/BL (new)
+    # but not 02 (all of its subdirectories are in the index)
+    assert spy.call_count == 4
+
+
+def test_refresh_doughnut(tmp_path: Path):
+    participants_and_sessions = {"01": ["BL", "M12"], "02": ["BL"]}
+    participants_and_sessions_bidsified = {"01": ["BL"], "02": ["BL"]}
+    dpath_downloaded = tmp_path / "downloaded"
+    dpath_bidsified = tmp_path / "bids"
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_downloaded=participants_and_sessions,
+        participants_and_sessions_bidsified=participants_and_sessions_bidsified,
+        dpath_downloaded=dpath_downloaded,
+        dpath_bidsified=dpath_bidsified,
+    )
+    dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    doughnut = generate_doughnut(
+        manifest=manifest,
+        dicom_dir_map=dicom_dir_map,
+        dpath_downloaded=dpath_downloaded,
+        dpath_bidsified=dpath_bidsified,
+        empty=True,
+    ).compact()
+    index_before = doughnut.index.copy()
+
+    dir_index = DirectoryIndex()
+    assert (
+        refresh_doughnut(
+            doughnut,
+            dpath_downloaded=dpath_downloaded,
+            dpath_bidsified=dpath_bidsified,
+            dir_index=dir_index,
+        )
+        is doughnut
+    )
+    check_doughnut(
+        doughnut=doughnut,
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_downloaded=participants_and_sessions,
+        participants_and_sessions_organized={},
+        participants_and_sessions_bidsified=participants_and_sessions_bidsified,
+        empty=False,
+    )
+    assert doughnut.index.equals(index_before)
+    assert str(dpath_bidsified) in dir_index.entries
+
+
+def test_update_doughnut_refresh(tmp_path: Path):
+    participants_and_sessions = {"01": ["BL", "M12"], "02": ["BL"]}
+    dpath_bidsified = tmp_path / "bids"
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_bidsified={"01": ["M12"]},
+        dpath_bidsified=dpath_bidsified,
+    )
+    dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    doughnut = generate_doughnut(
+        manifest=manifest,
+        dicom_dir_map=dicom_dir_map,
+        dpath_bidsified=dpath_bidsified,
+    )
+    assert doughnut[Doughnut.col_in_bids].tolist() == [False, True, False]
+
+    # new BIDS data for an existing record
+    (dpath_bidsified / "sub-02" / "ses-BL").mkdir(parents=True)
+    (dpath_bidsified / "sub-02" / "ses-BL" / "file.nii.gz").touch()
+
+    for refresh, expected in [
+        (False, [False, True, False]),
+        (True, [False, True, True]),
+    ]:
+        updated_doughnut = update_doughnut(
+            doughnut=doughnut,
+            manifest=manifest,
+            dicom_dir_map=dicom_dir_map,
+            dpath_bidsified=dpath_bidsified,
+            refresh=refresh,
+        )
+        assert updated_doughnut[Doughnut.col_in_bids].tolist() == expected
+
+
 def test_generate_missing_paths(tmp_path: Path):
     participants_and_sessions = {
         "01": ["BL", "M12"],
@@ -5,7 +5,7 @@ from contextlib import nullcontext
 import pandas as pd
 import pytest
 
-from nipoppy.tabular.manifest import Manifest
+from nipoppy.tabular.manifest import Manifest, parse_datatype, parse_datatypes
 
 from .conftest import DPATH_TEST_DATA
 
@@ -42,10 +42,46 @@ def test_load_keep_extra_cols():
         (DPATH_TEST_DATA / "manifest_invalid4.csv", False),
     ],
 )
-def test_validate(fpath, is_valid):
+@pytest.mark.parametrize("columnar", [True, False])
+def test_validate(fpath, is_valid, columnar):
     manifest = Manifest.load(fpath, validate=False)
     with pytest.raises(ValueError) if not is_valid else nullcontext():
-        assert isinstance(manifest.validate(), Manifest)
+        assert isinstance(manifest.validate(columnar=columnar), Manifest)
+
+
+@pytest.mark.parametrize(
+    "fpath",
+    [
+        DPATH_TEST_DATA / "manifest1.csv",
+        DPATH_TEST_DATA / "manifest2.csv",
+        DPATH_TEST_DATA / "manifest3.csv",
+    ],
+)
+def test_validate_columnar_same_as_rows(fpath):
+    manifest = Manifest.load(fpath, validate=False)
+    pd.testing.assert_frame_equal(
+        manifest.validate(columnar=True), manifest.validate(columnar=False)
+    )
+
+
+@pytest.mark.parametrize("col", [Manifest.col_participant_id, Manifest.col_session_id])
+def test_validate_columnar_error_non_str_ids(col):
+    manifest = Manifest(
+        {
+            Manifest.col_participant_id: ["01", "02"],
+            Manifest.col_visit_id: ["BL", "BL"],
+            Manifest.col_session_id: ["BL", "BL"],
+            Manifest.col_datatype: [[], []],
+        }
+    )
+    # whole column without any string value
+    manifest[col] = [1, 2]
+    error_messages = []
+    for columnar in (True, False):
+        with pytest.raises(ValueError, match="Error when validating") as exc_info:
+            manifest.validate(columnar=columnar)
+        error_messages.append(str(exc_info.value))
+    assert error_messages[0] == error_messages[1]
 
 
 @pytest.mark.parametrize(
@@ -68,6 +104,94 @@ def test_validate_sessions_visits(session_ids, visit_ids, is_valid):
         assert isinstance(Manifest.validate(manifest), Manifest)
 
 
+@pytest.mark.parametrize(
+    "datatype,expected",
+    [
+        ("['anat']", ["anat"]),
+        ("['anat','dwi']", ["anat", "dwi"]),
+        ('["anat", "func"]', ["anat", "func"]),
+        ("[]", []),
+        (["anat"], ["anat"]),
+        (None, None),
+    ],
+)
+def test_parse_datatype(datatype, expected):
+    assert parse_datatype(datatype) == expected
+
+
+@pytest.mark.parametrize("datatype", ["anat", "['anat'", "1", 1])
+def test_parse_datatype_invalid(datatype):
+    with pytest.raises(ValueError, match="Invalid datatype"):
+        parse_datatype(datatype)
+
+
+def test_parse_datatypes():
+    parsed = parse_datatypes(["['anat']", "['anat']", None, "['anat','dwi']"])
+    assert parsed == [["anat"], ["anat"], None, ["anat", "dwi"]]
+    # rows should not share list objects
+    assert parsed[0] is not parsed[1]
+
+
+@pytest.mark.parametrize(
+    "errors,expected", [("coerce", [["anat"], None]), ("raise", ValueError)]
+)
+def test_parse_datatypes_errors(errors, expected):
+    datatypes = ["['anat']", "anat"]
+    if expected is ValueError:
+        with pytest.raises(ValueError, match="Invalid datatype"):
+            parse_datatypes(datatypes, errors=errors)
+    else:
+        assert parse_datatypes(datatypes, errors=errors) == expected
+
+
+@pytest.mark.parametrize(
+    "fpath",
+    [
+        DPATH_TEST_DATA / "manifest1.csv",
+        DPATH_TEST_DATA / "manifest2.csv",
+        DPATH_TEST_DATA / "manifest3.csv",
+    ],
+)
+def test_compact_datatypes(fpath):
+    manifest = Manifest.load(fpath)
+    manifest_compact = Manifest.load(fpath, compact_datatypes=True)
+    assert isinstance(manifest_compact, Manifest)
+    assert isinstance(
+        manifest_compact[Manifest.col_datatype].dtype, pd.CategoricalDtype
+    )
+    assert manifest_compact.expand_datatypes().equals(manifest)
+    assert manifest_compact.validate().equals(manifest)
+    assert manifest_compact.to_csv(index=False) == manifest.to_csv(index=False)
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_get_datatype_bitmasks(compact):
+    manifest = Manifest.load(DPATH_TEST_DATA / "manifest1.csv")
+    if compact:
+        manifest = manifest.compact_datatypes()
+    bitmasks, datatypes = manifest.get_datatype_bitmasks()
+    assert datatypes == ["anat", "dwi"]
+    assert bitmasks.tolist() == [1, 1, 3, 3]
+
+
+@pytest.mark.parametrize(
+    "datatypes,expected",
+    [
+        ("anat", [True, True, True, True]),
+        (["dwi"], [False, False, True, True]),
+        (["anat", "dwi"], [False, False, True, True]),
+        (["func"], [False, False, False, False]),
+        ([], [True, True, True, True]),
+    ],
+)
+@pytest.mark.parametrize("compact", [True, False])
+def test_has_datatypes(datatypes, expected, compact):
+    manifest = Manifest.load(DPATH_TEST_DATA / "manifest1.csv")
+    if compact:
+        manifest = manifest.compact_datatypes()
+    assert manifest.has_datatypes(datatypes).tolist() == expected
+
+
 @pytest.mark.parametrize(
     "data,session_id,expected_count",
     [
@@ -103,7 +227,8 @@ def test_validate_sessions_visits(session_ids, visit_ids, is_valid):
         ),
     ],
 )
-def test_get_imaging_subset(data, session_id, expected_count):
+@pytest.mark.parametrize("compact", [True, False])
+def test_get_imaging_subset(data, session_id, expected_count, compact):
     manifest = Manifest(
         {
             Manifest.col_participant_id: data[0],
@@ -112,11 +237,22 @@ def test_get_imaging_subset(data, session_id, expected_count):
             Manifest.col_datatype: data[3],
         }
     )
+    if compact:
+        manifest = manifest.compact_datatypes()
     manifest_with_imaging_only = manifest.get_imaging_subset(session_id=session_id)
     assert isinstance(manifest_with_imaging_only, Manifest)
     assert len(manifest_with_imaging_only) == expected_count
 
 
+@pytest.mark.parametrize(
+    "datatypes,expected_count", [(None, 3), ("anat", 3), ("dwi", 2), ("func", 0)]
+)
+def test_get_imaging_subset_datatypes(datatypes, expected_count):
+    manifest = Manifest.load(DPATH_TEST_DATA / "manifest1.csv")
+    manifest.loc[0, Manifest.col_session_id] = None
+    assert len(manifest.get_imaging_subset(datatypes=datatypes)) == expected_count
+
+
 @pytest.mark.parametrize(
     "participant_id,session_id,expected_count",
     [
@@ -164,3 +300,36 @@ def get_participants_sessions(participant_id, session_id, expected_count):
     ):
         count += 1
     assert count == expected_count
+
+
+@pytest.mark.parametrize(
+    "participant_id,session_id,expected",
+    [
+        (None, None, [("01", "BL"), ("01", "M12"), ("02", "BL")]),
+        ("01", None, [("01", "BL"), ("01", "M12")]),
+        (None, "BL", [("01", "BL"), ("02", "BL")]),
+        ("02", "M12", []),
+        ("03", None, []),
+        ("04", None, []),
+    ],
+)
+@pytest.mark.parametrize("compact", [False, True])
+def test_get_participants_sessions(participant_id, session_id, expected, compact):
+    manifest = Manifest(
+        {
+            Manifest.col_participant_id: ["01", "01", "02", "04"],
+            Manifest.col_visit_id: ["BL", "M12", "BL", "SC"],
+            Manifest.col_session_id: ["BL", "M12", "BL", None],
+            Manifest.col_datatype: [["anat"], ["anat"], ["anat"], []],
+        }
+    ).validate()
+    if compact:
+        manifest = manifest.compact()
+    assert (
+        list(
+            manifest.get_participants_sessions(
+                participant_id=participant_id, session_id=session_id
+            )
+        )
+        == expected
+    )
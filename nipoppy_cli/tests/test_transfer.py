@@ -0,0 +1,213 @@
+"""Tests for file transfers."""
+
+import errno
+import os
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from nipoppy import transfer
+from nipoppy.transfer import (
+    FileTransferer,
+    check_transfer_mode,
+    copy_file,
+    hardlink_file,
+    move_file,
+    reflink_file,
+    symlink_file,
+)
+
+
+def _make_files(dpath: Path, n_files: int = 3) -> tuple[list[Path], list[Path]]:
+    dpath_source = dpath / "source" / "series"
+    dpath_dest = dpath / "dest"
+    dpath_source.mkdir(parents=True)
+    dpath_dest.mkdir(parents=True)
+    fpaths_source = []
+    for i_file in range(n_files):
+        fpath = dpath_source / f"{i_file}.dcm"
+        fpath.write_text(f"file {i_file}")
+        fpaths_source.append(fpath)
+    fpaths_dest = [dpath_dest / fpath.name for fpath in fpaths_source]
+    return fpaths_source, fpaths_dest
+
+
+def test_symlink_file(tmp_path: Path):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    assert symlink_file(fpath_source, fpath_dest) == 0
+    assert fpath_dest.is_symlink()
+    assert not os.path.isabs(os.readlink(fpath_dest))
+    assert fpath_dest.read_text() == fpath_source.read_text()
+
+
+def test_hardlink_file(tmp_path: Path):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    assert hardlink_file(fpath_source, fpath_dest) == 0
+    assert fpath_dest.stat().st_ino == fpath_source.stat().st_ino
+
+
+def test_reflink_file_unsupported(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    mocker.patch("fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "Not supported"))
+    with pytest.raises(OSError) as exc_info:
+        reflink_file(fpath_source, fpath_dest)
+    assert exc_info.value.errno == errno.EOPNOTSUPP
+    # no empty file left behind
+    assert not fpath_dest.exists()
+
+
+def test_reflink_file_not_linux(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    mocker.patch.object(transfer.sys, "platform", "darwin")
+    with pytest.raises(OSError, match="only supported on Linux"):
+        reflink_file(fpath_source, fpath_dest)
+
+
+@pytest.mark.parametrize("copy_file_range_available", [True, False])
+def test_copy_file(
+    copy_file_range_available: bool,
+    tmp_path: Path,
+    mocker: pytest_mock.MockerFixture,
+):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    os.utime(fpath_source, (0, 0))
+    if not copy_file_range_available:
+        mocker.patch.object(
+            transfer.os,
+            "copy_file_range",
+            side_effect=OSError(errno.ENOSYS, "Not implemented"),
+            create=True,
+        )
+    spy = mocker.spy(transfer.shutil, "copyfile")
+
+    assert copy_file(fpath_source, fpath_dest) == fpath_source.stat().st_size
+    assert not fpath_dest.is_symlink()
+    assert fpath_dest.read_text() == fpath_source.read_text()
+    assert fpath_dest.stat().st_mtime == 0
+    assert spy.called != copy_file_range_available
+
+
+def test_copy_file_exists(tmp_path: Path):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    fpath_dest.write_text("existing")
+    with pytest.raises(FileExistsError):
+        copy_file(fpath_source, fpath_dest)
+    assert fpath_dest.read_text() == "existing"
+
+
+@pytest.mark.parametrize(
+    "link_errno,n_bytes_expected", [(None, 0), (errno.EXDEV, 6), (errno.EPERM, 0)]
+)
+def test_move_file(
+    link_errno, n_bytes_expected, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    content = fpath_source.read_text()
+    if link_errno is not None:
+        mocker.patch.object(
+            transfer.os, "link", side_effect=OSError(link_errno, "Link failed")
+        )
+    assert move_file(fpath_source, fpath_dest) == n_bytes_expected
+    assert not fpath_source.exists()
+    assert fpath_dest.read_text() == content
+
+
+@pytest.mark.parametrize("link_errno", [None, errno.EXDEV, errno.EPERM])
+def test_move_file_exists(
+    link_errno, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    [fpath_source], [fpath_dest] = _make_files(tmp_path, n_files=1)
+    fpath_dest.write_text("existing")
+    if link_errno is not None:
+        mocker.patch.object(
+            transfer.os, "link", side_effect=OSError(link_errno, "Link failed")
+        )
+    with pytest.raises(FileExistsError):
+        move_file(fpath_source, fpath_dest)
+    assert fpath_source.exists()
+    assert fpath_dest.read_text() == "existing"
+
+
+def test_check_transfer_mode():
+    assert check_transfer_mode("reflink") == "reflink"
+    with pytest.raises(ValueError, match="Invalid transfer mode"):
+        check_transfer_mode("teleport")
+
+
+@pytest.mark.parametrize("mode", ["symlink", "hardlink", "copy", "move"])
+def test_transferer(mode: str, tmp_path: Path):
+    fpaths_source, fpaths_dest = _make_files(tmp_path)
+    contents = [fpath.read_text() for fpath in fpaths_source]
+
+    transferer = FileTransferer(mode=mode, n_jobs_copy=2)
+    transferer.transfer(fpaths_source, fpaths_dest)
+
+    assert [fpath.read_text() for fpath in fpaths_dest] == contents
+    assert transferer.mode == mode
+    assert transferer.stats[mode][0] == len(fpaths_source)
+    [message] = transferer.get_messages()
+    assert f"Transferred {len(fpaths_source)} files" in message
+    assert f"with mode '{mode}'" in message
+
+
+def test_transferer_fallback(
+    tmp_path: Path,
+    mocker: pytest_mock.MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    fpaths_source, fpaths_dest = _make_files(tmp_path)
+    mocker.patch.object(
+        transfer.os, "link", side_effect=OSError(errno.EXDEV, "Cross-device")
+    )
+    mocker.patch("fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "Unsupported"))
+
+    transferer = FileTransferer(mode="hardlink")
+    transferer.transfer(fpaths_source, fpaths_dest)
+
+    assert transferer.mode_requested == "hardlink"
+    assert transferer.mode == "copy"
+    assert transferer.stats["hardlink"][0] == 0
+    assert transferer.stats["reflink"][0] == 0
+    assert transferer.stats["copy"][0] == len(fpaths_source)
+    assert all(not fpath.is_symlink() for fpath in fpaths_dest)
+    assert "Transfer mode 'hardlink' is not supported" in caplog.text
+    assert "Transfer mode 'reflink' is not supported" in caplog.text
+    assert len(transferer.get_messages()) == 1
+
+
+def test_transferer_fallback_partial(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    fpaths_source, fpaths_dest = _make_files(tmp_path)
+    link = os.link
+
+    def _link(fpath_source, fpath_dest):
+        # last file is on another filesystem
+        if Path(fpath_source) == fpaths_source[-1]:
+            raise OSError(errno.EXDEV, "Cross-device")
+        link(fpath_source, fpath_dest)
+
+    mocker.patch.object(transfer.os, "link", side_effect=_link)
+    mocker.patch("fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "Unsupported"))
+
+    transferer = FileTransferer(mode="hardlink")
+    transferer.transfer(fpaths_source, fpaths_dest)
+    assert transferer.stats["hardlink"][0] == len(fpaths_source) - 1
+    assert transferer.stats["copy"][0] == 1
+    assert [fpath.read_text() for fpath in fpaths_dest] == [
+        fpath.read_text() for fpath in fpaths_source
+    ]
+
+
+@pytest.mark.parametrize("mode", ["symlink", "hardlink", "copy", "move"])
+def test_transferer_error(mode: str, tmp_path: Path):
+    fpaths_source, fpaths_dest = _make_files(tmp_path)
+    fpaths_dest[1].write_text("existing")
+    transferer = FileTransferer(mode=mode)
+    with pytest.raises(FileExistsError):
+        transferer.transfer(fpaths_source, fpaths_dest)
+    # errors other than unsupported modes do not cause a fallback
+    assert transferer.mode == mode
+
+
+def test_transferer_no_messages():
+    assert FileTransferer().get_messages() == []
@@ -1,5 +1,6 @@
 """Tests for the utils module."""
 
+import io
 import json
 import re
 from contextlib import nullcontext
@@ -10,8 +11,10 @@ import pandas as pd
 import pytest
 from fids import fids
 
+from nipoppy.backups import BackupPolicy, BackupStore
 from nipoppy.layout import DatasetLayout
 from nipoppy.utils import (
+    CompiledTemplate,
     add_path_suffix,
     add_path_timestamp,
     add_pybids_ignore_patterns,
@@ -19,7 +22,9 @@ from nipoppy.utils import (
     check_participant_id,
     check_session_id,
     get_pipeline_tag,
+    get_tabular_file_format,
     load_json,
+    parse_walltime,
     participant_id_to_bids_participant,
     process_template_str,
     save_df_with_backup,
@@ -225,6 +230,19 @@ def test_add_path_timestamp(timestamp_format, expected, datetime_fixture):  # no
     assert add_path_timestamp(path=path, timestamp_format=timestamp_format) == expected
 
 
+@pytest.mark.parametrize(
+    "walltime,expected", [("00:00:30", 30), ("1:30:00", 5400), ("48:00:01", 172801)]
+)
+def test_parse_walltime(walltime, expected):
+    assert parse_walltime(walltime) == expected
+
+
+@pytest.mark.parametrize("walltime", ["1:00", "1:2:3", "01:00:00:00", "1h"])
+def test_parse_walltime_invalid(walltime):
+    with pytest.raises(ValueError, match="Invalid walltime"):
+        parse_walltime(walltime)
+
+
 @pytest.mark.parametrize("dname_backups", [None, ".tests"])
 @pytest.mark.parametrize(
     "fname,dname_backups_processed",
@@ -248,6 +266,68 @@ def test_save_df_with_backup(
     assert fpath_backup.parent == fpath_symlink.parent / dname_backups
 
 
+@pytest.mark.parametrize(
+    "fname,file_format,expected",
+    [
+        ("test.csv", None, "csv"),
+        ("test.tsv", None, "csv"),
+        ("test.parquet", None, "parquet"),
+        ("test.PARQUET", None, "parquet"),
+        ("test.arrow", None, "arrow"),
+        ("test.feather", None, "arrow"),
+        ("test.csv", "parquet", "parquet"),
+    ],
+)
+def test_get_tabular_file_format(fname, file_format, expected):
+    assert get_tabular_file_format(fname, file_format) == expected
+
+
+def test_get_tabular_file_format_invalid():
+    with pytest.raises(ValueError, match="Invalid tabular file format"):
+        get_tabular_file_format("test.csv", "xlsx")
+
+
+@pytest.mark.parametrize(
+    "fname,file_format,read_func",
+    [
+        ("test.parquet", None, pd.read_parquet),
+        ("test.arrow", None, pd.read_feather),
+        ("test.csv", "parquet", pd.read_parquet),
+    ],
+)
+def test_save_df_with_backup_binary(fname, file_format, read_func, tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    fpath_symlink = tmp_path / fname
+    df = pd.DataFrame({"a": [1, 2], "b": [True, False]}, index=[3, 4])
+    fpath_backup = save_df_with_backup(df, fpath_symlink, file_format=file_format)
+
+    assert fpath_symlink.is_symlink()
+    assert fpath_backup.exists()
+    pd.testing.assert_frame_equal(read_func(fpath_symlink), df.reset_index(drop=True))
+
+
+def test_save_df_with_backup_policy(datetime_fixture, tmp_path: Path):  # noqa F811
+    fpath_symlink = tmp_path / "test.csv"
+    dpath_backups = tmp_path / ".tests"
+    dpath_backups.mkdir()
+    df_old = pd.DataFrame({"a": range(100), "b": 0})
+    df_old.to_csv(dpath_backups / "test-20240101_0000.csv", index=False)
+    df_new = df_old.copy()
+    df_new.loc[0, "b"] = 1
+
+    fpath_backup = save_df_with_backup(
+        df_new, fpath_symlink, backup_policy=BackupPolicy(max_versions=3)
+    )
+
+    backup_store = BackupStore.from_symlink(fpath_symlink)
+    assert fpath_symlink.resolve() == fpath_backup
+    assert backup_store.get_versions() == ["test-20240101_0000.csv", fpath_backup.name]
+    assert not backup_store.is_snapshot("test-20240101_0000.csv")
+    pd.testing.assert_frame_equal(
+        pd.read_csv(io.BytesIO(backup_store.read("test-20240101_0000.csv"))), df_old
+    )
+
+
 def test_save_df_with_backup_broken_symlink(tmp_path: Path):
     fpath_symlink = tmp_path / "test.csv"
     fpath_symlink.symlink_to("non_existent_file.csv")
@@ -304,6 +384,59 @@ def test_process_template_str_error_replace():
         assert process_template_str("[[NIPOPPY_INVALID]]") == "[[NIPOPPY_INVALID]]"
 
 
+def test_compiled_template():
+    class Obj:
+        n_calls = 0
+
+        @property
+        def static(self):
+            self.n_calls += 1
+            return "static_value"
+
+    obj = Obj()
+    template = CompiledTemplate(
+        "[[NIPOPPY_STATIC]]/[[NIPOPPY_PARTICIPANT_ID]]/[[NIPOPPY_KWARG]]"
+        "-[[NIPOPPY_PARTICIPANT_ID]]-[[NIPOPPY_STATIC]]",
+        objs=[obj],
+        dynamic_keys=["participant_id"],
+        kwarg="kwarg_value",
+    )
+    assert template.literals == ["static_value/", "/kwarg_value-", "-static_value"]
+    assert template.keys == ["participant_id", "participant_id"]
+    assert template.render(participant_id="01") == (
+        "static_value/01/kwarg_value-01-static_value"
+    )
+    assert template.render(participant_id="02", other="unused") == (
+        "static_value/02/kwarg_value-02-static_value"
+    )
+    # object attributes are only looked up once
+    assert obj.n_calls == 1
+
+
+def test_compiled_template_dynamic_precedence():
+    class Obj:
+        participant_id = None
+
+    template = CompiledTemplate(
+        "[[NIPOPPY_PARTICIPANT_ID]]",
+        objs=[Obj()],
+        dynamic_keys=["participant_id"],
+        participant_id="static",
+    )
+    assert template.render(participant_id="01") == "01"
+
+
+def test_compiled_template_resolve_paths():
+    template = CompiledTemplate("[[NIPOPPY_PATH]]", dynamic_keys=["path"])
+    assert template.render(path=Path("a_path")) == str(Path("a_path").resolve())
+
+
+def test_compiled_template_error_missing():
+    template = CompiledTemplate("[[NIPOPPY_SESSION_ID]]", dynamic_keys=["session_id"])
+    with pytest.raises(ValueError, match="No value for template string"):
+        template.render(participant_id="01")
+
+
 @pytest.mark.parametrize(
     "json_obj,substitutions,expected_output",
     [
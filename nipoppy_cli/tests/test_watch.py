@@ -0,0 +1,138 @@
+"""Tests for the directory watchers."""
+
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from nipoppy.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    get_filesystem_type,
+    get_watcher,
+    is_network_filesystem,
+)
+
+MOUNTS = """\
+sysfs /sys sysfs rw,nosuid 0 0
+/dev/sda1 / ext4 rw,relatime 0 0
+server:/export /data nfs4 rw,relatime 0 0
+/dev/sdb1 /data/local xfs rw,relatime 0 0
+/dev/sdc1 /my\\040disk ext4 rw,relatime 0 0
+"""
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is only available on Linux"
+)
+
+
+@pytest.fixture
+def mounts(mocker: pytest_mock.MockerFixture):
+    mocker.patch("builtins.open", mocker.mock_open(read_data=MOUNTS))
+    mocker.patch("os.path.realpath", side_effect=lambda path: str(path))
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("/home/user", "ext4"),
+        ("/data", "nfs4"),
+        ("/data/project", "nfs4"),
+        ("/data/local/project", "xfs"),
+        ("/datalocal", "ext4"),
+        ("/my disk/project", "ext4"),
+    ],
+)
+def test_get_filesystem_type(path, expected, mounts):
+    assert get_filesystem_type(path) == expected
+
+
+def test_get_filesystem_type_error(mocker: pytest_mock.MockerFixture):
+    mocker.patch("builtins.open", side_effect=OSError)
+    assert get_filesystem_type("/data") is None
+
+
+@pytest.mark.parametrize("path,expected", [("/data/project", True), ("/home", False)])
+def test_is_network_filesystem(path, expected, mounts):
+    assert is_network_filesystem(path) == expected
+
+
+def test_polling_watcher():
+    with PollingWatcher() as watcher:
+        watcher.set_dirs(["/some/dir"])
+        assert not watcher.wait(0.01)
+
+
+@requires_inotify
+def test_inotify_watcher(tmp_path: Path):
+    dpath1 = tmp_path / "dir1"
+    dpath2 = tmp_path / "dir2"
+    dpath1.mkdir()
+    dpath2.mkdir()
+
+    with InotifyWatcher() as watcher:
+        watcher.set_dirs([dpath1, dpath2, tmp_path / "missing"])
+        assert set(watcher.watches) == {str(dpath1), str(dpath2)}
+        assert not watcher.wait(0.01)
+
+        # new file in a watched directory
+        (dpath1 / "file1").touch()
+        assert watcher.wait(1)
+        assert not watcher.wait(0.01)
+
+        # burst of changes consumed during the debounce window
+        for i_file in range(5):
+            (dpath2 / f"file{i_file}").touch()
+        assert watcher.wait(1, debounce=0.05)
+        assert not watcher.wait(0.01)
+
+        # unwatched directory
+        watcher.set_dirs([dpath1])
+        assert set(watcher.watches) == {str(dpath1)}
+        (dpath2 / "file_new").touch()
+        assert not watcher.wait(0.01)
+
+        # watched directory deleted
+        (dpath1 / "file1").unlink()
+        dpath1.rmdir()
+        assert watcher.wait(1)
+        watcher.wait(0.01)
+        assert watcher.watches == {}
+
+    assert watcher.fd == -1
+
+
+@requires_inotify
+def test_inotify_watcher_error(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    with InotifyWatcher() as watcher:
+        mocker.patch.object(watcher, "_inotify_add_watch", return_value=-1)
+        mocker.patch("ctypes.get_errno", return_value=28)  # ENOSPC
+        with pytest.raises(OSError, match="Cannot watch directory"):
+            watcher.set_dirs([tmp_path])
+
+
+def test_inotify_watcher_not_linux(mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(sys, "platform", "darwin")
+    with pytest.raises(OSError, match="only available on Linux"):
+        InotifyWatcher()
+
+
+@requires_inotify
+def test_get_watcher(tmp_path: Path):
+    with get_watcher([tmp_path / "missing" / "subdir", None]) as watcher:
+        assert isinstance(watcher, InotifyWatcher)
+
+
+def test_get_watcher_network_filesystem(
+    tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    mocker.patch("nipoppy.watch.get_filesystem_type", return_value="nfs")
+    assert type(get_watcher([tmp_path])) is PollingWatcher
+
+
+def test_get_watcher_inotify_unavailable(
+    tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    mocker.patch("nipoppy.watch.InotifyWatcher", side_effect=OSError("Not available"))
+    assert type(get_watcher([tmp_path])) is PollingWatcher
@@ -0,0 +1,160 @@
+"""Tests for running participant-sessions from a shared work list."""
+
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from nipoppy import executor, worker
+from nipoppy.executor import Job
+from nipoppy.worker import Worker, WorkItem, WorkList, _exit_on_sigterm
+
+ITEMS = [("01", "BL"), ("01", "M12"), ("02", "BL")]
+
+
+@pytest.fixture
+def work_list(tmp_path: Path) -> WorkList:
+    work_list = WorkList(tmp_path / "worklist.tsv")
+    work_list.populate(lambda: ITEMS)
+    return work_list
+
+
+def _get_job(code: str):
+    def get_job(item: WorkItem) -> Job:
+        return Job(
+            name=f"{item.participant_id}-{item.session_id}",
+            args=[sys.executable, "-c", code, *item],
+        )
+
+    return get_job
+
+
+def test_work_list_populate(tmp_path: Path):
+    work_list = WorkList(tmp_path / "logs" / "worklist.tsv")
+    assert work_list.populate(lambda: ITEMS)
+    assert work_list._read() == {WorkItem(*item): "" for item in ITEMS}
+    assert work_list.fpath.read_text().splitlines()[0] == "\t".join(WorkList.columns)
+
+
+def test_work_list_populate_existing(work_list: WorkList):
+    def get_items():
+        raise RuntimeError("Should not be called")
+
+    work_list.claim("worker1", 1)
+    assert not work_list.populate(get_items)
+
+
+def test_work_list_populate_drained(work_list: WorkList):
+    def get_items():
+        raise RuntimeError("Should not be called")
+
+    # participant-sessions that were run are not added again
+    work_list.complete([WorkItem(*item) for item in ITEMS])
+    assert not work_list.populate(get_items)
+    assert work_list.claim("worker1", 3) == []
+    assert work_list.get_n_remaining() == 0
+
+
+def test_work_list_populate_reset(work_list: WorkList):
+    work_list.complete([WorkItem(*item) for item in ITEMS])
+    assert work_list.populate(lambda: [("03", "BL")], reset=True)
+    assert work_list._read() == {WorkItem("03", "BL"): ""}
+
+
+def test_work_list_claim(work_list: WorkList):
+    assert work_list.claim("worker1", 2) == [WorkItem(*item) for item in ITEMS[:2]]
+    assert work_list.claim("worker2", 2) == [WorkItem(*ITEMS[2])]
+    assert work_list.claim("worker3", 2) == []
+    assert list(work_list._read().values()) == ["worker1", "worker1", "worker2"]
+
+
+def test_work_list_complete_release(work_list: WorkList):
+    item1, item2, item3 = work_list.claim("worker1", 3)
+    work_list.complete([item1])
+    work_list.release([item2])
+    assert work_list._read() == {item1: WorkList.done, item2: "", item3: "worker1"}
+    assert work_list.get_n_remaining() == 2
+    # finished participant-sessions cannot be released
+    work_list.release([item1])
+    assert work_list.claim("worker2", 3) == [item2]
+
+
+def test_worker_n_concurrent(work_list: WorkList, mocker: pytest_mock.MockerFixture):
+    mocker.patch.object(worker, "get_available_cpus", return_value=8)
+    mocker.patch.object(executor, "get_available_cpus", return_value=8)
+    mocker.patch.object(executor, "get_available_memory_gb", return_value=12)
+    assert Worker(work_list, n_cpus=2).n_concurrent == 4
+    assert Worker(work_list, n_cpus=2, memory_gb=4).n_concurrent == 3
+    assert Worker(work_list, n_cpus=16).n_concurrent == 1
+
+
+def test_worker_run(
+    work_list: WorkList,
+    mocker: pytest_mock.MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    mocker.patch.object(worker, "get_available_cpus", return_value=2)
+    mocker.patch.object(executor, "get_available_cpus", return_value=2)
+    code = "import sys; sys.exit(sys.argv[2] == 'M12')"
+    returncodes = Worker(work_list, poll_interval=0.01).run(_get_job(code))
+    assert returncodes == {
+        WorkItem("01", "BL"): 0,
+        WorkItem("01", "M12"): 1,
+        WorkItem("02", "BL"): 0,
+    }
+    # failed participant-sessions are not run again by the next worker
+    assert work_list._read() == {WorkItem(*item): WorkList.done for item in ITEMS}
+    assert "Job for 01-M12 failed with exit code 1" in caplog.text
+
+
+def test_worker_run_walltime(
+    work_list: WorkList,
+    mocker: pytest_mock.MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    mocker.patch.object(worker, "get_available_cpus", return_value=2)
+    mocker.patch.object(executor, "get_available_cpus", return_value=2)
+    time_start = time.monotonic()
+    returncodes = Worker(
+        work_list, walltime=1, walltime_margin=0, poll_interval=0.01
+    ).run(_get_job("import time; time.sleep(60)"))
+    assert time.monotonic() - time_start < 30
+    assert returncodes == {}
+    # running jobs were stopped and returned to the list
+    assert work_list._read() == {WorkItem(*item): "" for item in ITEMS}
+    assert "Walltime almost reached" in caplog.text
+    assert "Returned 2 participant-session pairs to the work list" in caplog.text
+
+
+def test_worker_run_job_walltime(work_list: WorkList):
+    # not enough time to run any job
+    returncodes = Worker(
+        work_list, walltime=100, job_walltime=200, walltime_margin=0
+    ).run(_get_job("pass"))
+    assert returncodes == {}
+    assert work_list._read() == {WorkItem(*item): "" for item in ITEMS}
+
+
+def test_worker_run_shared(work_list: WorkList):
+    # a second worker only gets the participant-sessions not claimed by the first
+    work_list.claim("other_worker", 2)
+    returncodes = Worker(work_list, poll_interval=0.01).run(_get_job("pass"))
+    assert returncodes == {WorkItem(*ITEMS[2]): 0}
+    assert list(work_list._read().values()) == [
+        "other_worker",
+        "other_worker",
+        WorkList.done,
+    ]
+
+
+def test_exit_on_sigterm():
+    with pytest.raises(SystemExit) as exception:
+        with _exit_on_sigterm():
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(10)
+    assert exception.value.code == 128 + signal.SIGTERM
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
@@ -0,0 +1,74 @@
+"""Tests for the BackupCompactionWorkflow."""
+
+from pathlib import Path
+
+import pytest
+
+from nipoppy.backups import BackupStore
+from nipoppy.utils import FPATH_DEFAULT_LAYOUT, load_json, save_json
+from nipoppy.workflows.backups import BackupCompactionWorkflow
+
+from .conftest import ATTR_TO_FPATH_MAP, create_empty_dataset
+
+
+def _make_backups(fpath_symlink: Path, n_versions: int) -> list[bytes]:
+    backup_store = BackupStore.from_symlink(fpath_symlink)
+    backup_store.dpath_backups.mkdir(parents=True)
+    contents = []
+    for i_version in range(n_versions):
+        rows = [f"{i_row:03d},{i_row < i_version}\n" for i_row in range(50)]
+        contents.append("".join(["participant_id,status\n"] + rows).encode())
+        backup_store.get_fpath(
+            f"{fpath_symlink.stem}-20240101_{i_version:04d}{fpath_symlink.suffix}"
+        ).write_bytes(contents[-1])
+    return contents
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_run(dry_run: bool, tmp_path: Path):
+    dpath_root = tmp_path / "my_dataset"
+    create_empty_dataset(dpath_root)
+    layout_config = load_json(FPATH_DEFAULT_LAYOUT)
+    layout_config["fpath_imaging_bagel"]["backups"] = {
+        "snapshot_interval": 2,
+        "max_versions": 4,
+    }
+    fpath_layout = tmp_path / "layout.json"
+    save_json(layout_config, fpath_layout)
+
+    fpath_bagel = dpath_root / ATTR_TO_FPATH_MAP["fpath_imaging_bagel"]
+    fpath_doughnut = dpath_root / ATTR_TO_FPATH_MAP["fpath_doughnut"]
+    contents_bagel = _make_backups(fpath_bagel, 5)
+    contents_doughnut = _make_backups(fpath_doughnut, 5)
+
+    workflow = BackupCompactionWorkflow(
+        dpath_root=dpath_root, fpath_layout=fpath_layout, dry_run=dry_run
+    )
+    workflow.run()
+
+    store_bagel = BackupStore.from_symlink(fpath_bagel)
+    store_doughnut = BackupStore.from_symlink(fpath_doughnut)
+    if dry_run:
+        for store in (store_bagel, store_doughnut):
+            versions = store.get_versions()
+            assert len(versions) == 5
+            assert all(store.is_snapshot(version) for version in versions)
+    else:
+        # layout options
+        versions = store_bagel.get_versions()
+        assert len(versions) == 4
+        assert [store_bagel.is_snapshot(version) for version in versions] == [
+            False,
+            True,
+            False,
+            True,
+        ]
+        for version, content in zip(versions, contents_bagel[1:]):
+            assert store_bagel.read(version) == content
+
+        # no options: full copies are kept
+        versions = store_doughnut.get_versions()
+        assert len(versions) == 5
+        assert all(store_doughnut.is_snapshot(version) for version in versions)
+        for version, content in zip(versions, contents_doughnut):
+            assert store_doughnut.read(version) == content
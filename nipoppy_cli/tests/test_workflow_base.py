@@ -9,9 +9,17 @@ import pytest
 
 from nipoppy.config.main import Config
 from nipoppy.logger import get_logger
+from nipoppy.tabular.bagel import Bagel
 from nipoppy.tabular.dicom_dir_map import DicomDirMap
+from nipoppy.tabular.doughnut import Doughnut
 from nipoppy.tabular.manifest import Manifest
-from nipoppy.utils import FPATH_SAMPLE_CONFIG, FPATH_SAMPLE_MANIFEST
+from nipoppy.utils import (
+    FPATH_DEFAULT_LAYOUT,
+    FPATH_SAMPLE_CONFIG,
+    FPATH_SAMPLE_MANIFEST,
+    load_json,
+    save_json,
+)
 from nipoppy.workflows.base import BaseWorkflow
 
 from .conftest import datetime_fixture  # noqa F401
@@ -142,6 +150,82 @@ def test_config_not_found(workflow: BaseWorkflow):
         workflow.config
 
 
+def test_save_load_tabular_file_layout_format(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+
+    class DummyWorkflow(BaseWorkflow):
+        def run_main(self):
+            pass
+
+    layout_config = load_json(FPATH_DEFAULT_LAYOUT)
+    layout_config["fpath_imaging_bagel"] = {
+        "path": "derivatives/bagel.dat",
+        "format": "arrow",
+        "export_csv": True,
+    }
+    fpath_layout = tmp_path / "layout.json"
+    save_json(layout_config, fpath_layout)
+
+    workflow = DummyWorkflow(
+        dpath_root=tmp_path / "my_dataset",
+        name="my_workflow",
+        fpath_layout=fpath_layout,
+    )
+    bagel = Bagel(
+        data={
+            Bagel.col_participant_id: ["01"],
+            Bagel.col_session_id: ["1"],
+            Bagel.col_pipeline_name: ["my_pipeline"],
+            Bagel.col_pipeline_version: ["1.0"],
+            Bagel.col_pipeline_complete: [Bagel.status_success],
+        }
+    ).validate()
+    fpath_bagel = workflow.layout.fpath_imaging_bagel
+    fpath_bagel.parent.mkdir(parents=True)
+    workflow.save_tabular_file(bagel, fpath_bagel)
+
+    assert fpath_bagel.is_symlink()
+    assert fpath_bagel.with_suffix(".csv").exists()
+    with pytest.raises(Exception):
+        # not a CSV file
+        Bagel.load(fpath_bagel)
+    assert workflow.load_tabular_file(Bagel, fpath_bagel).equals(bagel)
+
+
+def test_doughnut_generated_layout_options(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+
+    class DummyWorkflow(BaseWorkflow):
+        def run_main(self):
+            pass
+
+    layout_config = load_json(FPATH_DEFAULT_LAYOUT)
+    layout_config["fpath_doughnut"] = {
+        **layout_config["fpath_doughnut"],
+        "path": "sourcedata/imaging/doughnut.parquet",
+        "format": "parquet",
+        "export_csv": True,
+    }
+    fpath_layout = tmp_path / "layout.json"
+    save_json(layout_config, fpath_layout)
+
+    workflow = DummyWorkflow(
+        dpath_root=tmp_path / "my_dataset",
+        name="my_workflow",
+        fpath_layout=fpath_layout,
+    )
+    workflow.config = get_config(visit_ids=["1"])
+    manifest = prepare_dataset(participants_and_sessions_manifest={"01": ["1"]})
+    manifest.save_with_backup(workflow.layout.fpath_manifest)
+
+    # doughnut file does not exist: generated and saved with the layout options
+    doughnut = workflow.doughnut
+    fpath_doughnut = workflow.layout.fpath_doughnut
+    assert fpath_doughnut.is_symlink()
+    assert workflow.load_tabular_file(Doughnut, fpath_doughnut).equals(doughnut)
+    assert Doughnut.load(fpath_doughnut.with_suffix(".csv")).equals(doughnut)
+
+
 def test_config_replacement(workflow: BaseWorkflow):
     config = get_config(dataset_name="[[NIPOPPY_DPATH_ROOT]]")
     config.save(workflow.layout.fpath_config)
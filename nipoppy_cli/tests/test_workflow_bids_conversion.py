@@ -1,14 +1,18 @@
 """Tests for BidsConversionWorkflow."""
 
+import os
 from pathlib import Path
 
 import pytest
+import pytest_mock
 
+from nipoppy.config.boutiques import BoutiquesConfig
 from nipoppy.config.main import Config
+from nipoppy.executor import LocalExecutor
 from nipoppy.tabular.doughnut import Doughnut
 from nipoppy.workflows.bids_conversion import BidsConversionRunner
 
-from .conftest import create_empty_dataset, get_config
+from .conftest import create_empty_dataset, get_config, make_fake_submit_command
 
 
 @pytest.fixture
@@ -82,6 +86,69 @@ def test_cleanup(doughnut: Doughnut, config: Config, tmp_path: Path):
     assert Doughnut.load(workflow.layout.fpath_doughnut).equals(doughnut)
 
 
+def test_cleanup_flush_doughnut_records(config: Config, tmp_path: Path):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step="convert",
+    )
+    workflow.doughnut = Doughnut(
+        data={
+            Doughnut.col_participant_id: ["01", "02"],
+            Doughnut.col_visit_id: ["1", "1"],
+            Doughnut.col_session_id: ["1", "1"],
+            Doughnut.col_datatype: ["['anat']", "['anat']"],
+            Doughnut.col_participant_dicom_dir: ["01", "02"],
+            Doughnut.col_in_raw_imaging: [True, True],
+            Doughnut.col_in_sourcedata: [True, True],
+            Doughnut.col_in_bids: [False, False],
+        }
+    ).validate()
+    workflow.doughnut_records = [("02", "1")]
+    config.save(workflow.layout.fpath_config)
+
+    workflow.run_cleanup()
+
+    assert workflow.doughnut_records == []
+    doughnut = Doughnut.load(workflow.layout.fpath_doughnut)
+    assert not doughnut.get_status("01", "1", Doughnut.col_in_bids)
+    assert doughnut.get_status("02", "1", Doughnut.col_in_bids)
+
+
+def test_cleanup_flush_doughnut_records_missing(
+    config: Config, tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step="convert",
+    )
+    workflow.doughnut = Doughnut(
+        data={
+            Doughnut.col_participant_id: ["01"],
+            Doughnut.col_visit_id: ["1"],
+            Doughnut.col_session_id: ["1"],
+            Doughnut.col_datatype: ["['anat']"],
+            Doughnut.col_participant_dicom_dir: ["01"],
+            Doughnut.col_in_raw_imaging: [True],
+            Doughnut.col_in_sourcedata: [True],
+            Doughnut.col_in_bids: [False],
+        }
+    ).validate()
+    workflow.doughnut_records = [("01", "1"), ("02", "1")]
+    config.save(workflow.layout.fpath_config)
+
+    workflow.run_cleanup()
+
+    # no partial record was added, and the saved doughnut is still valid
+    doughnut = Doughnut.load(workflow.layout.fpath_doughnut)
+    assert len(doughnut) == 1
+    assert doughnut.get_status("01", "1", Doughnut.col_in_bids)
+    assert "not in the doughnut: [('02', '1')]" in caplog.text
+
+
 def test_cleanup_simulate(tmp_path: Path, config: Config):
     workflow = BidsConversionRunner(
         dpath_root=tmp_path / "my_dataset",
@@ -115,6 +182,138 @@ def test_cleanup_no_doughnut_update(config: Config, tmp_path: Path):
     assert not workflow.layout.fpath_doughnut.exists()
 
 
+def test_cleanup_no_doughnut_update_from_args(config: Config, tmp_path: Path):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step="convert",
+        update_doughnut=False,
+    )
+    workflow.doughnut = Doughnut()
+    config.save(workflow.layout.fpath_config)
+
+    workflow.run_cleanup()
+
+    assert not workflow.layout.fpath_doughnut.exists()
+
+
+def test_run_single_container_env(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step="convert",
+    )
+    config.CONTAINER_CONFIG.COMMAND = "echo"  # dummy command
+    config.CONTAINER_CONFIG.ENV_VARS = {"MY_VAR": "value"}
+    config.save(workflow.layout.fpath_config)
+    workflow.boutiques_config = BoutiquesConfig()
+    workflow.doughnut = Doughnut()
+    mocked_launch_boutiques_run = mocker.patch.object(workflow, "launch_boutiques_run")
+    environ = dict(os.environ)
+
+    workflow.run_single("01", "1")
+
+    container_env = mocked_launch_boutiques_run.call_args.kwargs["container_env"]
+    assert container_env["APPTAINERENV_MY_VAR"] == "value"
+    # the container variables do not leak into the environment of the process
+    assert dict(os.environ) == environ
+
+
+def test_get_job_args(tmp_path: Path):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+    )
+    args = workflow.get_job_args("01", "1")
+    assert args[3] == "bidsify"
+    # jobs do not write the doughnut at the same time
+    assert "--no-update-doughnut" in args
+
+
+def test_run_main_n_jobs(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step="convert",
+        n_jobs=2,
+    )
+    workflow.doughnut = Doughnut()
+    config.save(workflow.layout.fpath_config)
+    mocker.patch.object(
+        workflow,
+        "get_participants_sessions_to_run",
+        return_value=iter([("01", "1"), ("02", "1")]),
+    )
+    mocker.patch.object(LocalExecutor, "run", return_value=[1, 0])
+
+    workflow.run_main()
+
+    assert workflow.n_success == 1
+    assert workflow.doughnut_records == [("02", "1")]
+
+
+@pytest.mark.parametrize(
+    "pipeline_step,simulate,expect_doughnut_job",
+    [("convert", False, True), ("prepare", False, False), ("convert", True, False)],
+)
+def test_run_main_hpc(
+    pipeline_step: str,
+    simulate: bool,
+    expect_doughnut_job: bool,
+    config: Config,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: pytest_mock.MockerFixture,
+):
+    dpath_bin = tmp_path / "bin"
+    fpath_calls = make_fake_submit_command(dpath_bin, "sbatch", ["1234", "1235"])
+    monkeypatch.setenv("PATH", f"{dpath_bin}{os.pathsep}{os.environ['PATH']}")
+
+    workflow = BidsConversionRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="heudiconv",
+        pipeline_version="0.12.2",
+        pipeline_step=pipeline_step,
+        simulate=simulate,
+        hpc="slurm",
+    )
+    workflow.doughnut = Doughnut()
+    config.save(workflow.layout.fpath_config)
+    mocker.patch.object(
+        workflow,
+        "get_participants_sessions_to_run",
+        return_value=iter([("01", "1"), ("02", "1")]),
+    )
+
+    workflow.run_main()
+    workflow.run_cleanup()
+
+    assert workflow.hpc_job_id == "1234"
+    n_calls = len(fpath_calls.read_text().splitlines())
+    fpaths_doughnut_script = list(workflow.dpath_hpc.glob("doughnut-*.sh"))
+    if expect_doughnut_job:
+        assert n_calls == 2
+        [fpath_script] = fpaths_doughnut_script
+        script = fpath_script.read_text()
+        # the doughnut is refreshed after all the tasks, even failed ones
+        assert "#SBATCH --dependency=afterany:1234" in script
+        assert "doughnut" in script.splitlines()[-1]
+        assert "--refresh" in script.splitlines()[-1]
+    else:
+        assert n_calls == 1
+        assert len(fpaths_doughnut_script) == 0
+    # the doughnut is not written by the submitting process
+    assert not workflow.layout.fpath_doughnut.exists()
+
+
 @pytest.mark.parametrize(
     "doughnut_data,participant_id,session_id,expected",
     [
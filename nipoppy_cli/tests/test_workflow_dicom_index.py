@@ -0,0 +1,84 @@
+"""Tests for the DicomHeaderIndexWorkflow."""
+
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from nipoppy.dicom_index import DicomHeaderIndex, get_file_stats, probe_dicom_header
+from nipoppy.workflows.dicom_index import DicomHeaderIndexWorkflow
+
+from .conftest import DPATH_TEST_DATA, create_empty_dataset
+
+
+@pytest.fixture
+def workflow(tmp_path: Path) -> DicomHeaderIndexWorkflow:
+    dpath_root = tmp_path / "my_dataset"
+    create_empty_dataset(dpath_root)
+    return DicomHeaderIndexWorkflow(dpath_root=dpath_root)
+
+
+def _make_index(workflow: DicomHeaderIndexWorkflow) -> list[Path]:
+    fpaths = []
+    mtime = time.time() - 3600
+    for fname in ("dicom-derived.dcm", "dicom-not_derived.dcm"):
+        fpath = workflow.layout.dpath_raw_imaging / fname
+        shutil.copyfile(DPATH_TEST_DATA / fname, fpath)
+        os.utime(fpath, (mtime, mtime))
+        fpaths.append(fpath)
+    with DicomHeaderIndex(workflow.fpath_dicom_header_index) as index:
+        index.set_many(
+            get_file_stats(fpaths),
+            {fpath: probe_dicom_header(fpath) for fpath in fpaths},
+        )
+    return fpaths
+
+
+def test_init_attributes(workflow: DicomHeaderIndexWorkflow):
+    assert workflow.prune is False
+    assert workflow.n_jobs == 1
+    assert workflow.fpath_dicom_header_index.parent == workflow.layout.dpath_scratch
+
+
+def test_run_main_no_index(
+    workflow: DicomHeaderIndexWorkflow, caplog: pytest.LogCaptureFixture
+):
+    workflow.run_main()
+    assert "No DICOM header index found" in caplog.text
+    assert not workflow.fpath_dicom_header_index.exists()
+
+
+def test_run_main_stats(
+    workflow: DicomHeaderIndexWorkflow, caplog: pytest.LogCaptureFixture
+):
+    _make_index(workflow)
+    with caplog.at_level(logging.INFO):
+        workflow.run_main()
+    assert "2 files, including 1 derived and 0 unreadable" in caplog.text
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_run_main_prune(
+    dry_run: bool,
+    workflow: DicomHeaderIndexWorkflow,
+    caplog: pytest.LogCaptureFixture,
+):
+    workflow.prune = True
+    workflow.dry_run = dry_run
+    fpaths = _make_index(workflow)
+    fpaths[0].unlink()
+
+    with caplog.at_level(logging.INFO):
+        workflow.run_main()
+
+    with DicomHeaderIndex(workflow.fpath_dicom_header_index) as index:
+        n_entries = index.get_stats()["n_entries"]
+    if dry_run:
+        assert "Would remove 1 entries" in caplog.text
+        assert n_entries == 2
+    else:
+        assert "Removed 1 entries" in caplog.text
+        assert n_entries == 1
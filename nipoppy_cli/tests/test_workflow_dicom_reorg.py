@@ -1,29 +1,78 @@
 """Tests for DicomReorgWorkflow."""
 
 import logging
+import os
 import shutil
+import tarfile
+import time
 from pathlib import Path
 
 import pytest
+import pytest_mock
 
 from nipoppy.env import LogColor, ReturnCode
 from nipoppy.tabular.dicom_dir_map import DicomDirMap
 from nipoppy.tabular.doughnut import Doughnut
 from nipoppy.tabular.manifest import Manifest
 from nipoppy.utils import participant_id_to_bids_participant, session_id_to_bids_session
-from nipoppy.workflows.dicom_reorg import DicomReorgWorkflow, is_derived_dicom
+from nipoppy.workflows import dicom_reorg
+from nipoppy.workflows.dicom_reorg import (
+    DicomReorgWorkflow,
+    check_dicom_headers,
+    is_derived_dicom,
+)
 
-from .conftest import DPATH_TEST_DATA, create_empty_dataset, get_config, prepare_dataset
+from .conftest import (
+    DPATH_TEST_DATA,
+    create_empty_dataset,
+    get_config,
+    make_archive,
+    prepare_dataset,
+)
 
 
 def test_init_attributes(tmp_path: Path):
     workflow = DicomReorgWorkflow(dpath_root=tmp_path)
     assert workflow.copy_files is False
     assert workflow.check_dicoms is False
+    assert workflow.n_jobs == 1
+    assert workflow.transfer_mode == "symlink"
     assert workflow.n_success == 0
     assert workflow.n_total == 0
 
 
+@pytest.mark.parametrize(
+    "copy_files,transfer_mode,expected",
+    [
+        (True, None, "copy"),
+        (True, "copy", "copy"),
+        (False, "hardlink", "hardlink"),
+        (False, "move", "move"),
+    ],
+)
+def test_init_transfer_mode(copy_files, transfer_mode, expected, tmp_path: Path):
+    workflow = DicomReorgWorkflow(
+        dpath_root=tmp_path, copy_files=copy_files, transfer_mode=transfer_mode
+    )
+    assert workflow.transfer_mode == expected
+    assert workflow.file_transferer.mode == expected
+
+
+def test_init_transfer_mode_invalid(tmp_path: Path):
+    with pytest.raises(ValueError, match="Invalid transfer mode"):
+        DicomReorgWorkflow(dpath_root=tmp_path, transfer_mode="teleport")
+
+
+def test_init_transfer_mode_copy_files(tmp_path: Path):
+    with pytest.raises(ValueError, match="Cannot copy files with transfer mode"):
+        DicomReorgWorkflow(dpath_root=tmp_path, copy_files=True, transfer_mode="move")
+
+
+def test_init_n_jobs_invalid(tmp_path: Path):
+    with pytest.raises(ValueError, match="Number of jobs must be a positive integer"):
+        DicomReorgWorkflow(dpath_root=tmp_path, n_jobs=0)
+
+
 @pytest.mark.parametrize(
     "fpath,expected_result",
     [
@@ -35,6 +84,39 @@ def test_is_derived_dicom(fpath, expected_result):
     assert is_derived_dicom(fpath) == expected_result
 
 
+def test_is_derived_dicom_header_only(tmp_path: Path):
+    # pixel data is not read so a truncated file can still be checked
+    fpath = tmp_path / "truncated.dcm"
+    fpath.write_bytes((DPATH_TEST_DATA / "dicom-derived.dcm").read_bytes()[:1024])
+    assert is_derived_dicom(fpath)
+
+
+def test_is_derived_dicom_unreadable(tmp_path: Path):
+    fpath = tmp_path / "not_dicom.dcm"
+    fpath.write_text("not a DICOM file")
+    with pytest.raises(Exception):
+        is_derived_dicom(fpath)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_check_dicom_headers(n_jobs, tmp_path: Path):
+    fpaths = []
+    for i_file in range(3):
+        for fname in ("dicom-derived.dcm", "dicom-not_derived.dcm"):
+            fpath = tmp_path / f"{i_file}-{fname}"
+            shutil.copyfile(DPATH_TEST_DATA / fname, fpath)
+            fpaths.append(fpath)
+    fpath_invalid = tmp_path / "invalid.dcm"
+    fpath_invalid.touch()
+    fpaths.append(fpath_invalid)
+
+    fpaths_derived, errors = check_dicom_headers(fpaths, n_jobs=n_jobs)
+    assert fpaths_derived == [
+        tmp_path / f"{i_file}-dicom-derived.dcm" for i_file in range(3)
+    ]
+    assert list(errors) == [fpath_invalid]
+
+
 @pytest.mark.parametrize(
     "participant_id,session_id,fpaths,participant_first",
     [
@@ -164,6 +246,248 @@ def test_run_single_error_file_exists(tmp_path: Path):
         workflow.run_single(participant_id, session_id)
 
 
+def test_run_single_error_duplicate_fname(tmp_path: Path):
+    participant_id = "01"
+    session_id = "1"
+    workflow = DicomReorgWorkflow(dpath_root=tmp_path / "my_dataset")
+
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest={participant_id: [session_id]}
+    )
+    workflow.dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+
+    # same file name in two different subdirectories
+    for dname in ("series1", "series2"):
+        fpath = (
+            workflow.layout.dpath_raw_imaging
+            / participant_id
+            / session_id
+            / dname
+            / "test.dcm"
+        )
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.touch()
+
+    with pytest.raises(FileExistsError, match="Cannot move file"):
+        workflow.run_single(participant_id, session_id)
+
+
+@pytest.mark.parametrize("copy_files", [True, False])
+def test_run_single_batches(
+    copy_files: bool, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    participant_id = "01"
+    session_id = "1"
+    workflow = DicomReorgWorkflow(
+        dpath_root=tmp_path / "my_dataset", copy_files=copy_files
+    )
+
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest={participant_id: [session_id]}
+    )
+    workflow.dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    dpath_downloaded = workflow.layout.dpath_raw_imaging / participant_id / session_id
+    fnames = []
+    for i_dir in range(3):
+        for i_file in range(i_dir + 2):
+            fpath = dpath_downloaded / f"series{i_dir}" / f"{i_dir}-{i_file}.dcm"
+            fpath.parent.mkdir(parents=True, exist_ok=True)
+            fpath.write_text(fpath.name)
+            fnames.append(fpath.name)
+
+    mocker.patch.object(dicom_reorg, "REORG_BATCH_SIZE", 2)
+    spy = mocker.spy(workflow, "_reorg_files")
+    workflow.run_single(participant_id, session_id)
+
+    assert spy.call_count == 5
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+    assert sorted(fpath.name for fpath in dpath_reorganized.iterdir()) == sorted(fnames)
+    for fpath in dpath_reorganized.iterdir():
+        assert fpath.is_symlink() != copy_files
+        # relative symlinks point to the right files
+        assert fpath.read_text() == fpath.name
+
+
+@pytest.mark.parametrize("transfer_mode", ["symlink", "hardlink", "copy", "move"])
+def test_run_single_transfer_mode(transfer_mode: str, tmp_path: Path):
+    participant_id = "01"
+    session_id = "1"
+    workflow = DicomReorgWorkflow(
+        dpath_root=tmp_path / "my_dataset", transfer_mode=transfer_mode
+    )
+
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest={participant_id: [session_id]}
+    )
+    workflow.dicom_dir_map = DicomDirMap.load_or_generate(
+        manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
+    )
+    dpath_downloaded = workflow.layout.dpath_raw_imaging / participant_id / session_id
+    fpaths_source = []
+    for i_file in range(3):
+        fpath = dpath_downloaded / "series" / f"{i_file}.dcm"
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(fpath.name)
+        fpaths_source.append(fpath)
+
+    workflow.run_single(participant_id, session_id)
+
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+    for fpath_source in fpaths_source:
+        fpath_dest = dpath_reorganized / fpath_source.name
+        assert fpath_dest.read_text() == fpath_source.name
+        assert fpath_dest.is_symlink() == (transfer_mode == "symlink")
+        assert fpath_source.exists() == (transfer_mode != "move")
+        if transfer_mode == "hardlink":
+            assert fpath_dest.stat().st_nlink == 2
+
+
+def _make_archive_workflow(
+    tmp_path: Path, fname_archive: str, contents: dict[str, bytes], **kwargs
+) -> DicomReorgWorkflow:
+    workflow = DicomReorgWorkflow(dpath_root=tmp_path / "my_dataset", **kwargs)
+    workflow.dicom_dir_map = DicomDirMap(
+        data={
+            DicomDirMap.col_participant_id: ["01"],
+            DicomDirMap.col_session_id: ["1"],
+            DicomDirMap.col_participant_dicom_dir: [f"01/{fname_archive}"],
+        }
+    )
+    make_archive(workflow.layout.dpath_raw_imaging / "01" / fname_archive, contents)
+    return workflow
+
+
+@pytest.mark.parametrize("fname_archive", ["1.zip", "1.tar.gz"])
+@pytest.mark.parametrize("transfer_mode", ["symlink", "move"])
+def test_run_single_archive(fname_archive: str, transfer_mode: str, tmp_path: Path):
+    contents = {"series1/a.dcm": b"a", "series2/b.dcm": b"b", "c.dcm": b"c"}
+    workflow = _make_archive_workflow(
+        tmp_path, fname_archive, contents, transfer_mode=transfer_mode
+    )
+    workflow.run_single("01", "1")
+
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+    assert {
+        fpath.name: fpath.read_bytes() for fpath in dpath_reorganized.iterdir()
+    } == {"a.dcm": b"a", "b.dcm": b"b", "c.dcm": b"c"}
+    assert not any(fpath.is_symlink() for fpath in dpath_reorganized.iterdir())
+    # the archive is not extracted in the raw imaging directory
+    assert [
+        fpath.name for fpath in (workflow.layout.dpath_raw_imaging / "01").iterdir()
+    ] == [fname_archive]
+
+
+def test_run_single_archive_dry_run(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    workflow = _make_archive_workflow(
+        tmp_path, "1.tar", {"a.dcm": b"a", "b.dcm": b"b"}, dry_run=True
+    )
+    with caplog.at_level(logging.INFO):
+        workflow.run_single("01", "1")
+    assert not workflow.layout.dpath_sourcedata.exists()
+    assert "Extracted 2 files from" in caplog.text
+
+
+def test_run_single_archive_duplicate_fname(tmp_path: Path):
+    workflow = _make_archive_workflow(
+        tmp_path, "1.zip", {"series1/a.dcm": b"1", "series2/a.dcm": b"2"}
+    )
+    with pytest.raises(FileExistsError, match="Cannot move file .*1.zip:series2"):
+        workflow.run_single("01", "1")
+    # no partially extracted files
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+    assert list(dpath_reorganized.iterdir()) == []
+
+
+def test_run_single_archive_truncated(tmp_path: Path):
+    contents = {"a.dcm": b"a", "b.dcm": os.urandom(100_000)}
+    workflow = _make_archive_workflow(tmp_path, "1.tar", contents)
+    fpath_archive = workflow.layout.dpath_raw_imaging / "01" / "1.tar"
+    archive_bytes = fpath_archive.read_bytes()
+    # cut in the middle of the second member
+    fpath_archive.write_bytes(archive_bytes[:50_000])
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+
+    with pytest.raises(tarfile.ReadError):
+        workflow.run_single("01", "1")
+    # no partially written files
+    assert list(dpath_reorganized.iterdir()) == []
+
+    # the next run is not blocked by leftover files
+    fpath_archive.write_bytes(archive_bytes)
+    workflow.run_single("01", "1")
+    assert {
+        fpath.name: fpath.read_bytes() for fpath in dpath_reorganized.iterdir()
+    } == contents
+
+
+@pytest.mark.parametrize("with_invalid", [False, True])
+def test_run_single_archive_check_dicoms(
+    with_invalid: bool, tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    contents = {"derived.dcm": (DPATH_TEST_DATA / "dicom-derived.dcm").read_bytes()}
+    if with_invalid:
+        contents["invalid.dcm"] = b"not a DICOM file"
+    workflow = _make_archive_workflow(tmp_path, "1.tar.gz", contents, check_dicoms=True)
+    dpath_reorganized = workflow.layout.dpath_sourcedata / "sub-01" / "ses-1"
+
+    if with_invalid:
+        with pytest.raises(RuntimeError, match="Error checking DICOM files"):
+            workflow.run_single("01", "1")
+        assert list(dpath_reorganized.iterdir()) == []
+    else:
+        workflow.run_single("01", "1")
+        assert [fpath.name for fpath in dpath_reorganized.iterdir()] == ["derived.dcm"]
+    assert "Derived DICOM files detected" in caplog.text
+
+
+def test_run_main_archives(tmp_path: Path):
+    dataset_name = "my_dataset"
+    workflow = DicomReorgWorkflow(dpath_root=tmp_path / dataset_name)
+    manifest: Manifest = prepare_dataset(
+        participants_and_sessions_manifest={"01": ["1", "2"], "02": ["1"]},
+        participants_and_sessions_downloaded={"01": ["1"]},
+        dpath_downloaded=workflow.layout.dpath_raw_imaging,
+    )
+    config = get_config(
+        dataset_name=dataset_name,
+        visit_ids=list(manifest[Manifest.col_visit_id].unique()),
+    )
+    manifest.save_with_backup(workflow.layout.fpath_manifest)
+    config.save(workflow.layout.fpath_config)
+    workflow.dicom_dir_map = DicomDirMap(
+        data={
+            DicomDirMap.col_participant_id: ["01", "01", "02"],
+            DicomDirMap.col_session_id: ["1", "2", "1"],
+            DicomDirMap.col_participant_dicom_dir: ["01/1", "01/2.zip", "02.tar"],
+        }
+    )
+    make_archive(workflow.layout.dpath_raw_imaging / "01" / "2.zip", {"a.dcm": b"a"})
+    make_archive(workflow.layout.dpath_raw_imaging / "02.tar", {"1/b.dcm": b"b"})
+
+    workflow.run_main()
+
+    assert workflow.n_success == workflow.n_total == 3
+    for participant_id, session_id, fname in [
+        ("01", "2", "a.dcm"),
+        ("02", "1", "b.dcm"),
+    ]:
+        assert (
+            workflow.layout.dpath_sourcedata
+            / participant_id_to_bids_participant(participant_id)
+            / session_id_to_bids_session(session_id)
+            / fname
+        ).exists()
+        for col in [
+            workflow.doughnut.col_in_raw_imaging,
+            workflow.doughnut.col_in_sourcedata,
+        ]:
+            assert workflow.doughnut.get_status(participant_id, session_id, col)
+
+
 def test_run_single_invalid_dicom(tmp_path: Path, caplog: pytest.LogCaptureFixture):
     participant_id = "01"
     session_id = "1"
@@ -191,14 +515,14 @@ def test_run_single_invalid_dicom(tmp_path: Path, caplog: pytest.LogCaptureFixtu
 
     assert any(
         [
-            "Derived DICOM file detected" in record.message
+            "Derived DICOM files detected" in record.message
             and record.levelno == logging.WARNING
             for record in caplog.records
         ]
     )
 
 
-def test_run_single_error_dicom_read(tmp_path: Path):
+def test_run_single_error_dicom_read(tmp_path: Path, mocker: pytest_mock.MockerFixture):
     participant_id = "01"
     session_id = "1"
     dataset_name = "my_dataset"
@@ -211,15 +535,69 @@ def test_run_single_error_dicom_read(tmp_path: Path):
         manifest=manifest, fpath_dicom_dir_map=None, participant_first=True
     )
 
-    # create an invalid DICOM file
-    fname = "test.dcm"
-    fpath = workflow.layout.dpath_raw_imaging / participant_id / session_id / fname
-    fpath.parent.mkdir(parents=True, exist_ok=True)
-    fpath.touch()
-
-    with pytest.raises(RuntimeError, match="Error checking DICOM file"):
+    # create invalid DICOM files
+    dpath = workflow.layout.dpath_raw_imaging / participant_id / session_id
+    dpath.mkdir(parents=True, exist_ok=True)
+    for fname in ("test1.dcm", "test2.dcm"):
+        (dpath / fname).touch()
+    shutil.copyfile(DPATH_TEST_DATA / "dicom-not_derived.dcm", dpath / "test3.dcm")
+
+    mocker.patch.object(dicom_reorg, "N_ERRORS_IN_MESSAGE", 1)
+    with pytest.raises(
+        RuntimeError, match="Error checking DICOM files.*2 out of 3 files.* and 1 more$"
+    ):
         workflow.run_single(participant_id, session_id)
 
+    # files are checked before being reorganized
+    assert not any(workflow.layout.dpath_sourcedata.rglob("*.dcm"))
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_run_main_dicom_header_index(
+    dry_run: bool, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    dataset_name = "my_dataset"
+    workflow = DicomReorgWorkflow(
+        dpath_root=tmp_path / dataset_name, check_dicoms=True, dry_run=dry_run
+    )
+    manifest: Manifest = prepare_dataset(
+        participants_and_sessions_manifest={"01": ["1"], "02": ["1"]},
+        participants_and_sessions_downloaded={"01": ["1"], "02": ["1"]},
+        dpath_downloaded=workflow.layout.dpath_raw_imaging,
+    )
+    config = get_config(
+        dataset_name=dataset_name,
+        visit_ids=list(manifest[Manifest.col_visit_id].unique()),
+    )
+    manifest.save_with_backup(workflow.layout.fpath_manifest)
+    config.save(workflow.layout.fpath_config)
+
+    # use real DICOM files older than the racy window (so they can be indexed)
+    mtime = time.time() - 3600
+    fpaths = [
+        fpath
+        for fpath in workflow.layout.dpath_raw_imaging.rglob("*")
+        if fpath.is_file()
+    ]
+    for fpath in fpaths:
+        shutil.copyfile(DPATH_TEST_DATA / "dicom-derived.dcm", fpath)
+        os.utime(fpath, (mtime, mtime))
+    n_files = len(fpaths)
+
+    spy = mocker.spy(dicom_reorg, "probe_dicom_header")
+    workflow.run_main()
+    assert spy.call_count == n_files
+    assert workflow.dicom_header_index is None
+    assert workflow.fpath_dicom_header_index.exists() == (not dry_run)
+
+    # headers are not read again
+    spy.reset_mock()
+    workflow.doughnut[workflow.doughnut.col_in_sourcedata] = False
+    shutil.rmtree(workflow.layout.dpath_sourcedata, ignore_errors=True)
+    workflow.run_main()
+    assert spy.call_count == (n_files if dry_run else 0)
+    assert workflow.n_success == workflow.n_total == 4
+
 
 @pytest.mark.parametrize(
     (
@@ -366,15 +744,17 @@ def test_run_setup(tmp_path: Path):
     ],
 )
 @pytest.mark.parametrize("copy_files", [True, False])
+@pytest.mark.parametrize("n_jobs", [1, 4])
 def test_run_main(
     participants_and_sessions_manifest: dict,
     participants_and_sessions_downloaded: dict,
     copy_files: bool,
+    n_jobs: int,
     tmp_path: Path,
 ):
     dataset_name = "my_dataset"
     workflow = DicomReorgWorkflow(
-        dpath_root=tmp_path / dataset_name, copy_files=copy_files
+        dpath_root=tmp_path / dataset_name, copy_files=copy_files, n_jobs=n_jobs
     )
 
     manifest: Manifest = prepare_dataset(
@@ -433,6 +813,33 @@ def test_run_main(
     assert workflow.n_success == workflow.n_total
 
 
+def test_run_main_transfer_stats(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    dataset_name = "my_dataset"
+    workflow = DicomReorgWorkflow(
+        dpath_root=tmp_path / dataset_name, transfer_mode="copy"
+    )
+    manifest: Manifest = prepare_dataset(
+        participants_and_sessions_manifest={"01": ["1"], "02": ["1"]},
+        participants_and_sessions_downloaded={"01": ["1"], "02": ["1"]},
+        dpath_downloaded=workflow.layout.dpath_raw_imaging,
+    )
+    config = get_config(
+        dataset_name=dataset_name,
+        visit_ids=list(manifest[Manifest.col_visit_id].unique()),
+    )
+    manifest.save_with_backup(workflow.layout.fpath_manifest)
+    config.save(workflow.layout.fpath_config)
+
+    with caplog.at_level(logging.INFO):
+        workflow.run_main()
+
+    n_files = sum(
+        len(files) for _, _, files in os.walk(workflow.layout.dpath_sourcedata)
+    )
+    assert f"Transferred {n_files} files" in caplog.text
+    assert "with mode 'copy'" in caplog.text
+
+
 def test_run_main_error(tmp_path: Path):
     dataset_name = "my_dataset"
     workflow = DicomReorgWorkflow(dpath_root=tmp_path / dataset_name)
@@ -465,6 +872,45 @@ def test_run_main_error(tmp_path: Path):
     assert workflow.return_code == ReturnCode.PARTIAL_SUCCESS
 
 
+@pytest.mark.parametrize("n_jobs", [1, 3])
+def test_run_main_partial_success(n_jobs: int, tmp_path: Path):
+    dataset_name = "my_dataset"
+    workflow = DicomReorgWorkflow(dpath_root=tmp_path / dataset_name, n_jobs=n_jobs)
+    create_empty_dataset(workflow.layout.dpath_root)
+
+    manifest: Manifest = prepare_dataset(
+        participants_and_sessions_manifest={
+            "S01": ["1", "2"],
+            "S02": ["1", "2"],
+            "S03": ["1", "2"],
+        },
+        participants_and_sessions_downloaded={"S01": ["1", "2"], "S03": ["2"]},
+        dpath_downloaded=workflow.layout.dpath_raw_imaging,
+    )
+    config = get_config(
+        dataset_name=dataset_name,
+        visit_ids=list(manifest[Manifest.col_visit_id].unique()),
+    )
+    manifest.save_with_backup(workflow.layout.fpath_manifest)
+    config.save(workflow.layout.fpath_config)
+
+    # S02 directories cannot be found
+    workflow.doughnut.set_statuses(
+        [("S02", "1"), ("S02", "2")], Doughnut.col_in_raw_imaging, True
+    )
+
+    workflow.run_main()
+
+    assert workflow.return_code == ReturnCode.PARTIAL_SUCCESS
+    assert workflow.n_total == 5
+    assert workflow.n_success == 3
+    assert list(workflow.doughnut.get_organized_participants_sessions()) == [
+        ("S01", "1"),
+        ("S01", "2"),
+        ("S03", "2"),
+    ]
+
+
 @pytest.mark.parametrize(
     "doughnut",
     [
@@ -3,10 +3,12 @@
 from pathlib import Path
 
 import pytest
+import pytest_mock
 
-from nipoppy.tabular.doughnut import Doughnut
+from nipoppy.tabular.doughnut import DirectoryIndex, Doughnut
 from nipoppy.tabular.manifest import Manifest
 from nipoppy.utils import save_json
+from nipoppy.watch import PollingWatcher
 from nipoppy.workflows.doughnut import DoughnutWorkflow
 
 from .conftest import (
@@ -49,6 +51,7 @@ from .conftest import (
     ],
 )
 @pytest.mark.parametrize("empty", [True, False])
+@pytest.mark.parametrize("n_jobs", [1, 3])
 def test_run_main(
     participants_and_sessions_manifest1: dict[str, list[str]],
     participants_and_sessions_manifest2: dict[str, list[str]],
@@ -56,6 +59,7 @@ def test_run_main(
     participants_and_sessions_organized: dict[str, list[str]],
     participants_and_sessions_bidsified: dict[str, list[str]],
     empty: bool,
+    n_jobs: int,
     tmp_path: Path,
 ):
     dpath_root = tmp_path / "my_dataset"
@@ -86,7 +90,7 @@ def test_run_main(
     save_json(config.model_dump(mode="json"), fpath_config)
 
     # generate the doughnut
-    DoughnutWorkflow(dpath_root=dpath_root, empty=empty).run_main()
+    DoughnutWorkflow(dpath_root=dpath_root, empty=empty, n_jobs=n_jobs).run_main()
     doughnut1 = Doughnut.load(fpath_doughnut)
 
     assert len(doughnut1) == len(manifest1)
@@ -104,7 +108,7 @@ def test_run_main(
     manifest2.save_with_backup(fpath_manifest)
 
     # update the doughnut
-    DoughnutWorkflow(dpath_root=dpath_root, empty=empty).run()
+    DoughnutWorkflow(dpath_root=dpath_root, empty=empty, n_jobs=n_jobs).run()
     doughnut2 = Doughnut.load(fpath_doughnut)
 
     assert len(doughnut2) == len(manifest2)
@@ -210,6 +214,205 @@ def test_run_main_regenerate(
     )
 
 
+@pytest.mark.parametrize("refresh", [True, False])
+def test_run_main_refresh(refresh: bool, tmp_path: Path):
+    dpath_root = tmp_path / "my_dataset"
+    create_empty_dataset(dpath_root)
+    participants_and_sessions = {"01": ["BL", "M12"], "02": ["BL"]}
+
+    dpath_bidsified = dpath_root / ATTR_TO_DPATH_MAP["dpath_bids"]
+    fpath_doughnut = dpath_root / ATTR_TO_FPATH_MAP["fpath_doughnut"]
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_bidsified={"01": ["BL"]},
+        dpath_bidsified=dpath_bidsified,
+    )
+    manifest.save_with_backup(dpath_root / ATTR_TO_FPATH_MAP["fpath_manifest"])
+    save_json(
+        get_config(visit_ids=["BL", "M12"]).model_dump(mode="json"),
+        dpath_root / ATTR_TO_FPATH_MAP["fpath_config"],
+    )
+
+    DoughnutWorkflow(dpath_root=dpath_root, refresh=refresh).run_main()
+    assert not Doughnut.load(fpath_doughnut).get_status(
+        "02", "BL", Doughnut.col_in_bids
+    )
+
+    # new BIDS data for an existing record
+    (dpath_bidsified / "sub-02" / "ses-BL").mkdir(parents=True)
+    (dpath_bidsified / "sub-02" / "ses-BL" / "file.nii.gz").touch()
+
+    DoughnutWorkflow(dpath_root=dpath_root, refresh=refresh).run_main()
+    assert (
+        Doughnut.load(fpath_doughnut).get_status("02", "BL", Doughnut.col_in_bids)
+        == refresh
+    )
+    assert DirectoryIndex.get_fpath(fpath_doughnut).exists() == refresh
+
+
+def _prepare_watch_dataset(dpath_root: Path) -> Path:
+    create_empty_dataset(dpath_root)
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest={"01": ["BL", "M12"], "02": ["BL"]},
+        participants_and_sessions_bidsified={"01": ["BL"]},
+        dpath_bidsified=dpath_root / ATTR_TO_DPATH_MAP["dpath_bids"],
+    )
+    manifest.save_with_backup(dpath_root / ATTR_TO_FPATH_MAP["fpath_manifest"])
+    save_json(
+        get_config(visit_ids=["BL", "M12"]).model_dump(mode="json"),
+        dpath_root / ATTR_TO_FPATH_MAP["fpath_config"],
+    )
+    return dpath_root / ATTR_TO_DPATH_MAP["dpath_bids"]
+
+
+def test_run_main_watch(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    dpath_root = tmp_path / "my_dataset"
+    _prepare_watch_dataset(dpath_root)
+    mocked_run_watch = mocker.patch.object(DoughnutWorkflow, "run_watch")
+
+    workflow = DoughnutWorkflow(dpath_root=dpath_root, watch=True)
+    assert workflow.refresh
+    workflow.run_main()
+
+    mocked_run_watch.assert_called_once()
+    doughnut, dir_index, dpaths_visited = mocked_run_watch.call_args.args
+    assert isinstance(doughnut, Doughnut)
+    assert isinstance(dir_index, DirectoryIndex)
+    assert str(workflow.layout.dpath_bids) in dpaths_visited
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def _run_main_without_watch(workflow: DoughnutWorkflow, mocker):
+    """Run the workflow and return the arguments that run_watch was called with."""
+    mocked_run_watch = mocker.patch.object(workflow, "run_watch")
+    workflow.run_main()
+    return mocked_run_watch.call_args.args
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_run_watch(
+    use_inotify: bool, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    dpath_root = tmp_path / "my_dataset"
+    dpath_bidsified = _prepare_watch_dataset(dpath_root)
+    if not use_inotify:
+        mocker.patch(
+            "nipoppy.workflows.doughnut.get_watcher", return_value=PollingWatcher()
+        )
+    workflow = DoughnutWorkflow(
+        dpath_root=dpath_root, watch=True, debounce=0.01, poll_interval=0.05
+    )
+    args = _run_main_without_watch(workflow, mocker)
+    spy_save = mocker.spy(workflow, "save_tabular_file")
+
+    # new BIDS data for an existing record
+    (dpath_bidsified / "sub-02" / "ses-BL").mkdir(parents=True)
+    (dpath_bidsified / "sub-02" / "ses-BL" / "file.nii.gz").touch()
+
+    DoughnutWorkflow.run_watch(workflow, *args, n_cycles=2)
+
+    assert spy_save.call_count == 2
+    assert Doughnut.load(workflow.layout.fpath_doughnut).get_status(
+        "02", "BL", Doughnut.col_in_bids
+    )
+
+
+def test_run_watch_reload(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    dpath_root = tmp_path / "my_dataset"
+    _prepare_watch_dataset(dpath_root)
+    workflow = DoughnutWorkflow(dpath_root=dpath_root, watch=True)
+    args = _run_main_without_watch(workflow, mocker)
+
+    def save_other_doughnut(*args, **kwargs):
+        # doughnut updated by another command while watching
+        doughnut_other = Doughnut.load(workflow.layout.fpath_doughnut)
+        doughnut_other.set_value(("02", "BL"), Doughnut.col_participant_dicom_dir, "x")
+        doughnut_other.save_with_backup(workflow.layout.fpath_doughnut)
+        return False
+
+    watcher = PollingWatcher()
+    mocker.patch.object(watcher, "wait", side_effect=save_other_doughnut)
+    mocker.patch("nipoppy.workflows.doughnut.get_watcher", return_value=watcher)
+    spy_load = mocker.spy(workflow, "load_tabular_file")
+
+    DoughnutWorkflow.run_watch(workflow, *args, n_cycles=1)
+    spy_load.assert_called_once()
+
+
+def test_run_watch_manifest_updated(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    dpath_root = tmp_path / "my_dataset"
+    dpath_bidsified = _prepare_watch_dataset(dpath_root)
+    workflow = DoughnutWorkflow(dpath_root=dpath_root, watch=True)
+    args = _run_main_without_watch(workflow, mocker)
+    fpath_manifest = workflow.layout.fpath_manifest
+
+    def append_manifest_row(*args, **kwargs):
+        # new participant added to the manifest while watching
+        manifest = Manifest.load(fpath_manifest)
+        if "03" not in manifest[Manifest.col_participant_id].tolist():
+            manifest.add_or_update_records(
+                {
+                    Manifest.col_participant_id: "03",
+                    Manifest.col_visit_id: "BL",
+                    Manifest.col_session_id: "BL",
+                    Manifest.col_datatype: ["anat"],
+                }
+            )
+            manifest.save_with_backup(fpath_manifest)
+            (dpath_bidsified / "sub-03" / "ses-BL").mkdir(parents=True)
+            (dpath_bidsified / "sub-03" / "ses-BL" / "file.nii.gz").touch()
+        return False
+
+    watcher = PollingWatcher()
+    mocker.patch.object(watcher, "wait", side_effect=append_manifest_row)
+    mocker.patch("nipoppy.workflows.doughnut.get_watcher", return_value=watcher)
+    spy_load = mocker.spy(workflow, "load_tabular_file")
+
+    DoughnutWorkflow.run_watch(workflow, *args, n_cycles=2)
+
+    # manifest only reloaded once
+    assert spy_load.call_count == 1
+    doughnut = Doughnut.load(workflow.layout.fpath_doughnut)
+    assert len(doughnut) == 4
+    assert doughnut.get_status("03", "BL", Doughnut.col_in_bids)
+    assert doughnut.get_status("01", "BL", Doughnut.col_in_bids)
+
+
+def test_run_watch_fallback(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    dpath_root = tmp_path / "my_dataset"
+    _prepare_watch_dataset(dpath_root)
+    workflow = DoughnutWorkflow(dpath_root=dpath_root, watch=True, poll_interval=0.01)
+    args = _run_main_without_watch(workflow, mocker)
+
+    watcher = PollingWatcher()
+    mocker.patch.object(watcher, "set_dirs", side_effect=OSError("Too many watches"))
+    mocker.patch("nipoppy.workflows.doughnut.get_watcher", return_value=watcher)
+    spy_warning = mocker.spy(workflow.logger, "warning")
+
+    DoughnutWorkflow.run_watch(workflow, *args, n_cycles=2)
+    spy_warning.assert_called_once()
+
+
+def test_run_watch_interrupt(tmp_path: Path, mocker: pytest_mock.MockerFixture):
+    dpath_root = tmp_path / "my_dataset"
+    _prepare_watch_dataset(dpath_root)
+    watcher = PollingWatcher()
+    mocker.patch.object(watcher, "wait", side_effect=KeyboardInterrupt)
+    spy_close = mocker.spy(watcher, "close")
+    mocker.patch("nipoppy.workflows.doughnut.get_watcher", return_value=watcher)
+    workflow = DoughnutWorkflow(dpath_root=dpath_root, watch=True)
+
+    # no error
+    workflow.run_main()
+    spy_close.assert_called_once()
+
+
 def test_run_cleanup(tmp_path: Path, caplog: pytest.LogCaptureFixture):
     DoughnutWorkflow(dpath_root=tmp_path).run_cleanup()
     assert "Successfully generated/updated the dataset's doughnut file!" in caplog.text
+
+
+@pytest.mark.parametrize("n_jobs", [0, -1])
+def test_n_jobs_invalid(n_jobs: int, tmp_path: Path):
+    with pytest.raises(ValueError, match="Number of jobs must be a positive integer"):
+        DoughnutWorkflow(dpath_root=tmp_path / "my_dataset", n_jobs=n_jobs)
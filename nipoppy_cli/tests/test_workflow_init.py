@@ -4,11 +4,16 @@ from pathlib import Path
 
 import pytest
 
+from nipoppy.tabular.manifest import Manifest
 from nipoppy.utils import (
     DPATH_DESCRIPTORS,
     DPATH_INVOCATIONS,
     DPATH_LAYOUTS,
     DPATH_TRACKER_CONFIGS,
+    FPATH_DEFAULT_LAYOUT,
+    FPATH_SAMPLE_MANIFEST,
+    load_json,
+    save_json,
 )
 from nipoppy.workflows.dataset_init import InitWorkflow
 
@@ -83,3 +88,18 @@ def test_config_attrs_error(attr):
         match="The config property .* is not available*",
     ):
         getattr(InitWorkflow(dpath_root="my_dataset"), attr)
+
+
+def test_run_manifest_parquet(dpath_root: Path, tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    layout_config = load_json(FPATH_DEFAULT_LAYOUT)
+    layout_config["fpath_manifest"]["path"] = "manifest.parquet"
+    fpath_layout = tmp_path / "layout.json"
+    save_json(layout_config, fpath_layout)
+
+    workflow = InitWorkflow(dpath_root=dpath_root, fpath_layout=fpath_layout)
+    workflow.run()
+
+    assert Manifest.load(Path(dpath_root, "manifest.parquet")).equals(
+        Manifest.load(FPATH_SAMPLE_MANIFEST)
+    )
@@ -391,6 +391,48 @@ def test_process_template_json(return_str, tmp_path: Path):
         assert pattern not in processed
 
 
+def test_process_template_json_compiled(tmp_path: Path):
+    workflow = PipelineWorkflow(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="my_pipeline",
+        pipeline_version="1.0",
+    )
+    workflow.descriptor = {
+        "[[NIPOPPY_BIDS_PARTICIPANT]]": "[[NIPOPPY_PIPELINE_NAME]]",
+        "[[NIPOPPY_SESSION_ID]]": "[[NIPOPPY_EXTRA]]",
+    }
+
+    template = workflow.get_compiled_template("descriptor", dynamic_keys=["extra"])
+    # compiled once per workflow (and set of dynamic keys)
+    assert workflow.get_compiled_template("descriptor", ["extra"]) is template
+    with pytest.warns(UserWarning, match="Unable to replace \\[\\[NIPOPPY_EXTRA\\]\\]"):
+        assert workflow.get_compiled_template("descriptor") is not template
+
+    for participant_id, session_id, extra in [("01", "1", "a"), ("02", "2", "b")]:
+        assert workflow.process_template_json(
+            template, participant_id=participant_id, session_id=session_id, extra=extra
+        ) == {f"sub-{participant_id}": "my_pipeline", session_id: extra}
+
+
+def test_get_compiled_template_model(tmp_path: Path):
+    workflow = PipelineWorkflow(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="my_pipeline",
+        pipeline_version="1.0",
+    )
+    workflow.boutiques_config = BoutiquesConfig(
+        CONTAINER_SUBCOMMAND="[[NIPOPPY_PARTICIPANT_ID]]"
+    )
+    assert (
+        workflow.process_template_json(
+            workflow.get_compiled_template("boutiques_config"),
+            participant_id="01",
+            session_id="1",
+        )
+        == BoutiquesConfig(CONTAINER_SUBCOMMAND="01").model_dump()
+    )
+
+
 @pytest.mark.parametrize("participant_id,session_id", [("123", None), (None, "1")])
 def test_process_template_json_error(participant_id, session_id, tmp_path: Path):
     workflow = PipelineWorkflow(
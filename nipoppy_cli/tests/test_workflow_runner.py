@@ -1,18 +1,33 @@
 """Tests for PipelineRunner."""
 
 import json
+import os
+import shlex
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
+import pytest_mock
 from bids import BIDSLayout
 from fids import fids
 
+from nipoppy.cli.parser import get_global_parser
+from nipoppy.config.hpc import HpcConfig
 from nipoppy.config.main import Config
+from nipoppy.env import ReturnCode
+from nipoppy.executor import LocalExecutor
 from nipoppy.tabular.bagel import Bagel
 from nipoppy.tabular.doughnut import Doughnut
+from nipoppy.worker import Worker, WorkItem, WorkList
 from nipoppy.workflows.runner import PipelineRunner
 
-from .conftest import create_empty_dataset, get_config, prepare_dataset
+from .conftest import (
+    create_empty_dataset,
+    get_config,
+    make_fake_submit_command,
+    prepare_dataset,
+)
 
 
 @pytest.fixture(scope="function")
@@ -154,6 +169,40 @@ def test_process_container_config_boutiques_subcommand(config: Config, tmp_path:
     )
 
 
+def test_process_container_config_env(config: Config, tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+    )
+    config.CONTAINER_CONFIG.ENV_VARS = {"MY_VAR": "value"}
+    config.save(runner.layout.fpath_config)
+
+    env = {}
+    runner.process_container_config(participant_id="01", session_id="BL", env=env)
+    assert env["APPTAINERENV_MY_VAR"] == "value"
+    assert "APPTAINERENV_MY_VAR" not in os.environ
+
+
+def test_launch_boutiques_run_container_env(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+    )
+    config.save(runner.layout.fpath_config)
+    mocked_run_command = mocker.patch.object(runner, "run_command")
+
+    runner.launch_boutiques_run(
+        "01", "BL", container_env={"APPTAINERENV_MY_VAR": "01"}, container_command=""
+    )
+    env = mocked_run_command.call_args.kwargs["env"]
+    assert env["APPTAINERENV_MY_VAR"] == "01"
+    assert "APPTAINERENV_MY_VAR" not in os.environ
+
+
 @pytest.mark.parametrize(
     "doughnut_data,bagel_data,pipeline_name,pipeline_version,expected",
     [
@@ -282,6 +331,41 @@ def test_get_participants_sessions_to_run(
     ] == expected
 
 
+def test_get_participants_sessions_to_run_bagel_filters(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+    )
+    config.save(runner.layout.fpath_config)
+    runner.doughnut = Doughnut()
+    Bagel(
+        [
+            ["01", "1", "dummy_pipeline", "1.0.0", Bagel.status_success],
+            ["02", "1", "dummy_pipeline", "1.0.0", Bagel.status_success],
+        ],
+        columns=[
+            Bagel.col_participant_id,
+            Bagel.col_session_id,
+            Bagel.col_pipeline_name,
+            Bagel.col_pipeline_version,
+            Bagel.col_pipeline_complete,
+        ],
+    ).validate().save_with_backup(runner.layout.fpath_imaging_bagel)
+    mocked_load = mocker.spy(Bagel, "load")
+
+    list(runner.get_participants_sessions_to_run(participant_id="01", session_id=None))
+
+    assert mocked_load.call_args.kwargs["filters"] == {
+        Bagel.col_pipeline_name: "dummy_pipeline",
+        Bagel.col_pipeline_version: "1.0.0",
+        Bagel.col_participant_id: "01",
+    }
+    assert len(mocked_load.spy_return) == 1
+
+
 def test_run_multiple(config: Config, tmp_path: Path):
     participant_id = None
     session_id = None
@@ -307,3 +391,408 @@ def test_run_multiple(config: Config, tmp_path: Path):
 
     bids_layout = BIDSLayout(database_path=runner.dpath_pipeline_bids_db)
     assert not len(bids_layout.get(extension=".nii.gz")) == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected_args",
+    [
+        ({}, []),
+        (
+            {"pipeline_step": "step1", "simulate": True, "dry_run": True},
+            ["--pipeline-step", "step1", "--simulate", "--dry-run"],
+        ),
+    ],
+)
+def test_get_job_args(kwargs, expected_args, tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        **kwargs,
+    )
+    args = runner.get_job_args("01", "BL")
+    assert args[:4] == [sys.executable, "-m", "nipoppy", "run"]
+    for arg in expected_args:
+        assert arg in args
+
+    # the job command must be valid for the CLI
+    parsed = get_global_parser().parse_args(args[3:])
+    assert parsed.dataset_root == tmp_path
+    assert parsed.pipeline == "dummy_pipeline"
+    assert parsed.participant_id == "01"
+    assert parsed.session_id == "BL"
+    assert parsed.verbosity == runner.logger.level
+    assert parsed.n_jobs == 1
+
+
+def test_get_job_args_layout(tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path, pipeline_name="dummy_pipeline", pipeline_version="1.0.0"
+    )
+    runner.fpath_layout = tmp_path / "layout.json"
+    args = runner.get_job_args("01", "BL")
+    assert args[args.index("--layout") + 1] == str(tmp_path / "layout.json")
+
+
+def test_run_main_n_jobs(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        n_jobs=2,
+    )
+    config.save(runner.layout.fpath_config)
+    participants_sessions = [("01", "1"), ("02", "1"), ("03", "1")]
+    mocker.patch.object(
+        runner,
+        "get_participants_sessions_to_run",
+        return_value=iter(participants_sessions),
+    )
+    mocked_run = mocker.patch.object(LocalExecutor, "run", return_value=[0, 1, 0])
+    mocked_run_single = mocker.patch.object(runner, "run_single")
+
+    runner.run_main()
+
+    jobs = list(mocked_run.call_args.args[0])
+    assert [job.args[job.args.index("--participant-id") + 1] for job in jobs] == [
+        participant_id for participant_id, _ in participants_sessions
+    ]
+    assert runner.n_total == 3
+    assert runner.n_success == 2
+    assert runner.return_code == ReturnCode.PARTIAL_SUCCESS
+    mocked_run_single.assert_not_called()
+
+
+def test_run_main_n_jobs_subprocesses(config: Config, tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        simulate=True,
+        n_jobs=2,
+    )
+    config.save(runner.layout.fpath_config)
+
+    participants_and_sessions = {"01": ["1"], "02": ["2"]}
+    create_empty_dataset(runner.layout.dpath_root)
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_bidsified=participants_and_sessions,
+        dpath_bidsified=runner.layout.dpath_bids,
+    )
+    manifest.save_with_backup(runner.layout.fpath_manifest)
+    runner.run()
+
+    assert runner.n_total == 2
+    assert runner.n_success == 2
+    assert runner.return_code == ReturnCode.SUCCESS
+    # one log file per participant-session
+    fnames_log = [fpath.name for fpath in runner.layout.dpath_logs.rglob("*.log")]
+    for participant_id, [session_id] in participants_and_sessions.items():
+        assert any(
+            fname.startswith(f"dummy_pipeline-1.0.0-{participant_id}-{session_id}")
+            for fname in fnames_log
+        )
+
+
+def test_hpc_n_jobs_invalid(tmp_path: Path):
+    with pytest.raises(ValueError, match="Cannot use both n_jobs and hpc"):
+        PipelineRunner(
+            dpath_root=tmp_path,
+            pipeline_name="dummy_pipeline",
+            pipeline_version="1.0.0",
+            n_jobs=2,
+            hpc="slurm",
+        )
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_run_main_hpc(
+    dry_run: bool,
+    config: Config,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: pytest_mock.MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    dpath_bin = tmp_path / "bin"
+    fpath_calls = make_fake_submit_command(dpath_bin, "sbatch", ["1234"])
+    monkeypatch.setenv("PATH", f"{dpath_bin}{os.pathsep}{os.environ['PATH']}")
+
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        hpc="slurm",
+        dry_run=dry_run,
+    )
+    config.HPC_CONFIG = HpcConfig(QUEUE="my_partition")
+    config.save(runner.layout.fpath_config)
+    participants_sessions = [("01", "1"), ("02", "1"), ("03", "1")]
+    mocker.patch.object(
+        runner,
+        "get_participants_sessions_to_run",
+        return_value=iter(participants_sessions),
+    )
+    mocked_run_single = mocker.patch.object(runner, "run_single")
+
+    runner.run_main()
+    runner.log_summary()
+
+    mocked_run_single.assert_not_called()
+    assert runner.n_total == 3
+    assert "Submitted 3 participant-session pairs to slurm" in caplog.text
+    fpaths_script = list(runner.dpath_hpc.glob("*.sh"))
+    if dry_run:
+        assert runner.hpc_job_id is None
+        assert not fpath_calls.exists()
+        assert len(fpaths_script) == 0
+    else:
+        assert runner.hpc_job_id == "1234"
+        assert "(job ID 1234)" in caplog.text
+        assert len(fpaths_script) == 1
+        assert fpath_calls.read_text().split() == [
+            "--parsable",
+            str(fpaths_script[0]),
+        ]
+        script = fpaths_script[0].read_text()
+        assert "#SBATCH --array=1-3" in script
+        assert "#SBATCH --partition=my_partition" in script
+        assert f"{shlex.join(runner.get_job_args())} --participant-id" in script
+
+
+def test_run_main_hpc_task(config: Config, tmp_path: Path):
+    # run one task of the generated array job, as the scheduler would
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        simulate=True,
+        hpc="slurm",
+    )
+    config.save(runner.layout.fpath_config)
+
+    participants_and_sessions = {"01": ["1"], "02": ["2"]}
+    create_empty_dataset(runner.layout.dpath_root)
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_bidsified=participants_and_sessions,
+        dpath_bidsified=runner.layout.dpath_bids,
+    )
+    manifest.save_with_backup(runner.layout.fpath_manifest)
+    runner.run_setup()
+
+    script = runner.hpc_scheduler.generate_script(
+        job_name="test",
+        dpath_output=tmp_path,
+        resources=runner.pipeline_config.get_resources(),
+        args=runner.get_job_args(),
+        task_args={"--participant-id": ["01", "02"], "--session-id": ["1", "2"]},
+    )
+    fpath_script = tmp_path / "job.sh"
+    fpath_script.write_text(script)
+    subprocess.run(
+        ["bash", str(fpath_script)],
+        env={**os.environ, "SLURM_ARRAY_TASK_ID": "2"},
+        check=True,
+    )
+
+    fnames_log = [fpath.name for fpath in runner.layout.dpath_logs.rglob("*.log")]
+    assert any(fname.startswith("dummy_pipeline-1.0.0-02-2") for fname in fnames_log)
+    assert not any(
+        fname.startswith("dummy_pipeline-1.0.0-01-1") for fname in fnames_log
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"worker": True, "n_jobs": 2},
+        {"worker": True, "hpc": "slurm"},
+        {"walltime": "01:00:00"},
+        {"worker": True, "walltime": "1h"},
+        {"reset_work_list": True},
+    ],
+)
+def test_worker_invalid(kwargs, tmp_path: Path):
+    with pytest.raises(ValueError):
+        PipelineRunner(
+            dpath_root=tmp_path,
+            pipeline_name="dummy_pipeline",
+            pipeline_version="1.0.0",
+            **kwargs,
+        )
+
+
+def test_run_main_worker(config: Config, tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        simulate=True,
+        worker=True,
+        walltime="01:00:00",
+    )
+    config.save(runner.layout.fpath_config)
+
+    participants_and_sessions = {"01": ["1"], "02": ["2"]}
+    create_empty_dataset(runner.layout.dpath_root)
+    manifest = prepare_dataset(
+        participants_and_sessions_manifest=participants_and_sessions,
+        participants_and_sessions_bidsified=participants_and_sessions,
+        dpath_bidsified=runner.layout.dpath_bids,
+    )
+    manifest.save_with_backup(runner.layout.fpath_manifest)
+    runner.run()
+
+    assert runner.n_total == 2
+    assert runner.n_success == 2
+    assert runner.return_code == ReturnCode.SUCCESS
+    # the work list is drained
+    assert runner.fpath_work_list.read_text().splitlines() == [
+        "participant_id\tsession_id\tworker",
+        "01\t1\tdone",
+        "02\t2\tdone",
+    ]
+
+    # the next worker does not run the same participant-sessions again
+    runner.n_total = runner.n_success = 0
+    runner.run()
+    assert runner.n_total == 0
+    fnames_log = [fpath.name for fpath in runner.layout.dpath_logs.rglob("*.log")]
+    for participant_id, [session_id] in participants_and_sessions.items():
+        assert any(
+            fname.startswith(f"dummy_pipeline-1.0.0-{participant_id}-{session_id}")
+            for fname in fnames_log
+        )
+
+
+def test_run_main_worker_existing_list(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        worker=True,
+    )
+    config.save(runner.layout.fpath_config)
+    WorkList(runner.fpath_work_list).populate(lambda: [("01", "1"), ("02", "1")])
+    mocked_get_participants_sessions = mocker.patch.object(
+        runner, "get_participants_sessions_to_run"
+    )
+    mocked_run = mocker.patch.object(
+        Worker,
+        "run",
+        return_value={WorkItem("01", "1"): 0, WorkItem("02", "1"): 1},
+    )
+
+    runner.run_main()
+
+    mocked_run.assert_called_once()
+    # participant-sessions are taken from the list
+    mocked_get_participants_sessions.assert_not_called()
+    assert runner.n_total == 2
+    assert runner.n_success == 1
+    assert runner.return_code == ReturnCode.PARTIAL_SUCCESS
+
+
+def test_run_main_worker_reset_work_list(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        worker=True,
+        reset_work_list=True,
+    )
+    config.save(runner.layout.fpath_config)
+    work_list = WorkList(runner.fpath_work_list)
+    work_list.populate(lambda: [("01", "1")])
+    work_list.complete([WorkItem("01", "1")])
+    mocker.patch.object(
+        runner, "get_participants_sessions_to_run", return_value=[("02", "1")]
+    )
+    mocked_run = mocker.patch.object(Worker, "run", return_value={})
+
+    runner.run_main()
+
+    mocked_run.assert_called_once()
+    assert work_list._read() == {WorkItem("02", "1"): ""}
+
+
+def test_run_main_worker_dry_run(config: Config, tmp_path: Path):
+    runner = PipelineRunner(
+        dpath_root=tmp_path,
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        worker=True,
+        dry_run=True,
+    )
+    config.save(runner.layout.fpath_config)
+    runner.run_main()
+    assert not runner.fpath_work_list.exists()
+
+
+def test_launch_boutiques_run_in_process(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+    )
+    config.save(runner.layout.fpath_config)
+    mocked_run_command = mocker.patch.object(runner, "run_command")
+
+    runner.launch_boutiques_run("01", "BL", container_command="")
+
+    # the command line is run directly, not through bosh
+    command = mocked_run_command.call_args.args[0]
+    assert command == (
+        f"echo --arg1 '01 ses-BL' --arg2 10 {runner.layout.dpath_bids.resolve()}"
+    )
+    assert mocked_run_command.call_args.kwargs["shell"]
+
+
+def test_launch_boutiques_run_simulate(
+    config: Config,
+    tmp_path: Path,
+    mocker: pytest_mock.MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+        simulate=True,
+    )
+    config.save(runner.layout.fpath_config)
+    mocked_run_command = mocker.patch.object(runner, "run_command")
+
+    runner.launch_boutiques_run("01", "BL", container_command="")
+
+    mocked_run_command.assert_not_called()
+    assert "Generated Command:" in caplog.text
+    assert "echo --arg1 '01 ses-BL' --arg2 10" in caplog.text
+
+
+def test_launch_boutiques_run_container_image(
+    config: Config, tmp_path: Path, mocker: pytest_mock.MockerFixture
+):
+    runner = PipelineRunner(
+        dpath_root=tmp_path / "my_dataset",
+        pipeline_name="dummy_pipeline",
+        pipeline_version="1.0.0",
+    )
+    config.save(runner.layout.fpath_config)
+    runner.descriptor["container-image"] = {"type": "docker", "image": "a/b"}
+    mocked_run_command = mocker.patch.object(runner, "run_command")
+
+    runner.launch_boutiques_run("01", "BL", container_command="")
+
+    # Boutiques is needed to run the container
+    assert mocked_run_command.call_args.args[0][:3] == ["bosh", "exec", "launch"]
@@ -178,7 +178,10 @@ def test_run_single(
         fpath.touch()
 
     assert tracker.run_single(participant_id, session_id) == expected_status
+    assert len(tracker.bagel_records) == 1
 
+    tracker.flush_bagel_records()
+    assert tracker.bagel_records == []
     assert (
         tracker.bagel.set_index([Bagel.col_participant_id, Bagel.col_session_id])
         .loc[:, Bagel.col_pipeline_complete]